@@ -0,0 +1,338 @@
+"""
+Sanic-Redis benchmarks
+
+Each scenario starts a Sanic app with SanicRedis in a child process, drives
+it over HTTP with concurrent keep-alive clients and reports throughput and
+p50/p99 latency. Scenarios cover plain commands and pipelines, the hiredis
+and pure-Python parsers, and pooled and single-connection clients.
+
+Run against the Redis of docker-compose.test.yml, or let the script start
+a throwaway redis-server or the fake server of sanic_redis.testing:
+
+    python benchmarks/bench.py --output results.json
+    python benchmarks/bench.py --redis-server redis-server --duration 10
+    python benchmarks/bench.py --fake
+    python benchmarks/bench.py --compare baseline.json --output results.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any
+
+COMMANDS = ("get", "pipeline")
+PARSERS = ("hiredis", "python")
+CLIENTS = ("pooled", "single")
+KEY_PREFIX = "sanic-redis:bench"
+REDIS_URL = os.getenv("REDIS_URL", "redis://127.0.0.1:6379")
+TEST_REDIS_DB = int(os.getenv("TEST_REDIS_DB", "15"))
+
+
+def create_app(parser: str, client: str, value_size: int, pipeline_size: int):
+    """Build the benchmarked app; imported lazily to keep the driver lean."""
+    from redis._parsers import _AsyncHiredisParser, _AsyncRESP2Parser
+    from redis.utils import HIREDIS_AVAILABLE
+    from sanic import Sanic
+    from sanic.response import raw
+
+    from sanic_redis import SanicRedis
+
+    if parser == "hiredis" and not HIREDIS_AVAILABLE:
+        raise SystemExit("hiredis is not installed")
+    parser_class = _AsyncHiredisParser if parser == "hiredis" else _AsyncRESP2Parser
+
+    app = Sanic("sanic_redis_bench")
+    app.config.REDIS = os.environ["SANIC_REDIS_BENCH_URL"]
+    SanicRedis(
+        app,
+        single_connection_client=client == "single",
+        from_url_kwargs={"parser_class": parser_class},
+    )
+    keys = [f"{KEY_PREFIX}:{i}" for i in range(pipeline_size)]
+    value = b"x" * value_size
+
+    @app.before_server_start
+    async def seed(app):
+        await app.ctx.redis.mset(dict.fromkeys(keys, value))
+
+    @app.get("/ping")
+    async def ping(request):
+        return raw(b"")
+
+    @app.get("/get")
+    async def get(request):
+        return raw(await request.app.ctx.redis.get(keys[0]))
+
+    @app.get("/pipeline")
+    async def pipeline(request):
+        async with request.app.ctx.redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.get(key)
+            values = await pipe.execute()
+        return raw(values[-1])
+
+    return app
+
+
+def serve(args: argparse.Namespace) -> None:
+    app = create_app(args.parser, args.client, args.value_size, args.pipeline_size)
+    app.run(
+        host="127.0.0.1",
+        port=args.port,
+        single_process=True,
+        access_log=False,
+        motd=False,
+    )
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted samples."""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+async def wait_ready(url: str, process: subprocess.Popen, timeout: float) -> None:
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"server exited with code {process.returncode}")
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"server did not answer {url} within {timeout}s")
+
+
+async def drive(
+    url: str, concurrency: int, duration: float, warmup: float
+) -> dict[str, Any]:
+    """Hammer url from concurrency workers and summarize the measured run."""
+    import httpx
+
+    latencies: list[float] = []
+    errors = 0
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+
+    async with httpx.AsyncClient(limits=limits, timeout=10) as client:
+
+        async def worker(until: float, record: bool) -> None:
+            nonlocal errors
+            while (started := time.perf_counter()) < until:
+                try:
+                    response = await client.get(url)
+                    response.raise_for_status()
+                except httpx.HTTPError:
+                    if record:
+                        errors += 1
+                    continue
+                if record:
+                    latencies.append(time.perf_counter() - started)
+
+        for record, seconds in ((False, warmup), (True, duration)):
+            started = time.perf_counter()
+            until = started + seconds
+            await asyncio.gather(*(worker(until, record) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+def run_scenario(
+    args: argparse.Namespace, redis_url: str, command: str, parser: str, client: str
+) -> dict[str, Any]:
+    port = free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            __file__,
+            "serve",
+            f"--port={port}",
+            f"--parser={parser}",
+            f"--client={client}",
+            f"--value-size={args.value_size}",
+            f"--pipeline-size={args.pipeline_size}",
+        ],
+        env={**os.environ, "SANIC_REDIS_BENCH_URL": redis_url},
+        stdout=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        asyncio.run(wait_ready(f"{base}/ping", process, timeout=15))
+        result = asyncio.run(
+            drive(f"{base}/{command}", args.concurrency, args.duration, args.warmup)
+        )
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return {"command": command, "parser": parser, "client": client, **result}
+
+
+def start_redis_server(binary: str | None) -> tuple[subprocess.Popen, str]:
+    """Start redis-server, or the fake server when binary is None."""
+    port = free_port()
+    if binary is None:
+        command = [sys.executable, "-m", "sanic_redis.testing", "--port", str(port)]
+    else:
+        path = shutil.which(binary)
+        if path is None:
+            raise SystemExit(f"{binary} not found")
+        command = [path, "--port", str(port), "--save", "", "--appendonly", "no"]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return process, f"redis://127.0.0.1:{port}/0"
+        except OSError:
+            time.sleep(0.05)
+    process.terminate()
+    raise SystemExit(f"{command[0]} did not start")
+
+
+def environment() -> dict[str, Any]:
+    packages = {}
+    for package in ("sanic-redis", "sanic", "redis", "hiredis"):
+        try:
+            packages[package] = version(package)
+        except PackageNotFoundError:
+            packages[package] = None
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "packages": packages,
+    }
+
+
+def compare(results: list[dict[str, Any]], baseline_path: str) -> None:
+    """Print throughput and p99 changes against a previous results file."""
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)
+    previous = {
+        (row["command"], row["parser"], row["client"]): row
+        for row in baseline["results"]
+    }
+    print(f"\nCompared with {baseline_path}:")
+    for row in results:
+        old = previous.get((row["command"], row["parser"], row["client"]))
+        if old is None or not old["throughput"] or not old["p99_ms"]:
+            continue
+        throughput = row["throughput"] / old["throughput"] - 1
+        p99 = row["p99_ms"] / old["p99_ms"] - 1
+        print(
+            f"{row['command']:<9} {row['parser']:<8} {row['client']:<7} "
+            f"throughput {throughput:+.1%}  p99 {p99:+.1%}"
+        )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Sanic-Redis hot paths.")
+    parser.add_argument("--redis-url", default=f"{REDIS_URL}/{TEST_REDIS_DB}")
+    parser.add_argument(
+        "--redis-server",
+        metavar="BINARY",
+        help="start this redis-server on a free port instead of using --redis-url",
+    )
+    parser.add_argument(
+        "--fake",
+        action="store_true",
+        help="start the in-process fake server of sanic_redis.testing instead",
+    )
+    parser.add_argument("--command", choices=COMMANDS, action="append")
+    parser.add_argument("--parser", choices=PARSERS, action="append")
+    parser.add_argument("--client", choices=CLIENTS, action="append")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--value-size", type=int, default=100)
+    parser.add_argument("--pipeline-size", type=int, default=10)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results file")
+    subparsers = parser.add_subparsers(dest="mode")
+    server = subparsers.add_parser("serve", help=argparse.SUPPRESS)
+    server.add_argument("--port", type=int, required=True)
+    server.add_argument("--parser", choices=PARSERS, required=True)
+    server.add_argument("--client", choices=CLIENTS, required=True)
+    server.add_argument("--value-size", type=int, required=True)
+    server.add_argument("--pipeline-size", type=int, required=True)
+    args = parser.parse_args(argv)
+
+    if args.mode == "serve":
+        serve(args)
+        return
+
+    redis_process = None
+    redis_url = args.redis_url
+    if args.redis_server or args.fake:
+        redis_process, redis_url = start_redis_server(args.redis_server)
+    results = []
+    try:
+        for command, parser_name, client in itertools.product(
+            args.command or COMMANDS, args.parser or PARSERS, args.client or CLIENTS
+        ):
+            row = run_scenario(args, redis_url, command, parser_name, client)
+            results.append(row)
+            print(
+                f"{command:<9} {parser_name:<8} {client:<7} "
+                f"{row['throughput']:>9.1f} req/s  p50 {row['p50_ms']:.3f} ms  "
+                f"p99 {row['p99_ms']:.3f} ms  errors {row['errors']}",
+                flush=True,
+            )
+    finally:
+        if redis_process is not None:
+            redis_process.terminate()
+            redis_process.wait(timeout=10)
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "settings": {
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "value_size": args.value_size,
+            "pipeline_size": args.pipeline_size,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+            output.write("\n")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
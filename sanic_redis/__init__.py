@@ -2,7 +2,57 @@
 Sanic-Redis init file
 """
 
+from .blocking_pool import BlockingPoolOptions, FairBlockingPool
+from .breaker import BreakerOptions, CircuitBreaker, CircuitOpenError, redis_deadline
+from .budget import PoolBudget, PoolBudgetOptions
+from .bulk import (
+    BulkError,
+    BulkHSet,
+    BulkOperation,
+    BulkOptions,
+    BulkResult,
+    BulkSet,
+    BulkXAdd,
+    BulkZAdd,
+    bulk_write,
+)
 from .core import SanicRedis
+from .diagnostics import (
+    DiagnosticsOptions,
+    RedisDiagnostics,
+    SlowCommand,
+    add_diagnostics_route,
+)
+from .loader import LoaderOptions, LoaderScope, RedisLoader
+from .locks import LockOptions, LockTimeoutError, RedisLock, RedisLocks
+from .metrics import (
+    MetricsExporter,
+    MetricsOptions,
+    PrometheusExporter,
+    RedisMetrics,
+    add_metrics_route,
+)
+from .near_cache import NearCache, NearCacheOptions
+from .pipelining import AutoPipeline, AutoPipelineOptions
+from .pubsub import PubSubHub, PubSubMessage, PubSubOptions, PubSubSubscription
+from .ratelimit import RateLimiter, RateLimitResult
+from .replicas import ReplicaOptions, ReplicaRouter
+from .response_cache import cache_response
+from .scan import (
+    ScanOptions,
+    hscan_batches,
+    inspect_keys,
+    scan_batches,
+    sscan_batches,
+    zscan_batches,
+)
+from .scripts import BoundScripts, ScriptRegistry
+from .sentinel import SentinelFailover, SentinelOptions
+from .serialization import Codec, Compressor, Serializer, SerializerOptions
+from .sessions import RedisSessions, Session
+from .shared_pool import DatabasePool
+from .streams import StreamConsumer, StreamConsumerOptions, StreamMessage
+from .warmup import WarmupOptions
 
 try:
     from importlib.metadata import version
@@ -11,4 +61,74 @@ try:
 except ImportError:
     __version__ = "unknown"
 
-__all__ = ["SanicRedis", "__version__"]
+__all__ = [
+    "AutoPipeline",
+    "AutoPipelineOptions",
+    "BlockingPoolOptions",
+    "BoundScripts",
+    "BreakerOptions",
+    "BulkError",
+    "BulkHSet",
+    "BulkOperation",
+    "BulkOptions",
+    "BulkResult",
+    "BulkSet",
+    "BulkXAdd",
+    "BulkZAdd",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "Codec",
+    "Compressor",
+    "DatabasePool",
+    "DiagnosticsOptions",
+    "FairBlockingPool",
+    "LoaderOptions",
+    "LoaderScope",
+    "LockOptions",
+    "LockTimeoutError",
+    "MetricsExporter",
+    "MetricsOptions",
+    "NearCache",
+    "NearCacheOptions",
+    "PoolBudget",
+    "PoolBudgetOptions",
+    "PrometheusExporter",
+    "PubSubHub",
+    "PubSubMessage",
+    "PubSubOptions",
+    "PubSubSubscription",
+    "RateLimitResult",
+    "RateLimiter",
+    "RedisDiagnostics",
+    "RedisLoader",
+    "RedisLock",
+    "RedisLocks",
+    "RedisMetrics",
+    "RedisSessions",
+    "ReplicaOptions",
+    "ReplicaRouter",
+    "SanicRedis",
+    "ScanOptions",
+    "ScriptRegistry",
+    "SentinelFailover",
+    "SentinelOptions",
+    "Serializer",
+    "SerializerOptions",
+    "Session",
+    "SlowCommand",
+    "StreamConsumer",
+    "StreamConsumerOptions",
+    "StreamMessage",
+    "WarmupOptions",
+    "__version__",
+    "add_diagnostics_route",
+    "add_metrics_route",
+    "bulk_write",
+    "cache_response",
+    "hscan_batches",
+    "inspect_keys",
+    "redis_deadline",
+    "scan_batches",
+    "sscan_batches",
+    "zscan_batches",
+]
@@ -0,0 +1,196 @@
+"""
+Sanic-Redis blocking connection pool
+"""
+
+import asyncio
+import time
+from bisect import bisect_left
+from collections import deque
+from dataclasses import dataclass
+from typing import Any
+
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import MaxConnectionsError
+
+from .metrics import _Histogram
+
+WAIT_BUCKETS = (
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+    5.0,
+    10.0,
+)
+
+
+@dataclass(frozen=True)
+class BlockingPoolOptions:
+    """
+    Options for a pool that makes callers wait for a free connection.
+
+    At most max_connections connections are opened. Callers that find them
+    all in use queue in arrival order and fail with MaxConnectionsError after
+    timeout seconds; None waits forever. Time spent waiting is recorded in a
+    histogram with the given bucket bounds.
+    """
+
+    max_connections: int = 50
+    timeout: float | None = 5.0
+    buckets: tuple[float, ...] = WAIT_BUCKETS
+
+    def __post_init__(self) -> None:
+        if self.max_connections < 1:
+            raise ValueError("max_connections must be at least 1")
+        if self.timeout is not None and self.timeout <= 0:
+            raise ValueError("timeout must be positive")
+        if not self.buckets or list(self.buckets) != sorted(set(self.buckets)):
+            raise ValueError("buckets must be unique and sorted in ascending order")
+
+
+class FairBlockingPool(ConnectionPool):
+    """
+    Connection pool with a FIFO wait queue and wait-time measurements.
+
+    Released connections are handed directly to the longest waiting caller,
+    so new callers cannot overtake queued ones. Unlike redis-py's
+    BlockingConnectionPool, a waiter that is woken up always gets the
+    connection it was woken for.
+    """
+
+    timeout: float | None
+    wait_buckets: tuple[float, ...]
+    wait_times: _Histogram
+    acquired: int
+    waited: int
+    timeouts: int
+
+    def __init__(
+        self,
+        max_connections: int = 50,
+        timeout: float | None = 5.0,
+        wait_buckets: tuple[float, ...] = WAIT_BUCKETS,
+        **connection_kwargs: Any,
+    ) -> None:
+        super().__init__(max_connections=max_connections, **connection_kwargs)
+        self.timeout = timeout
+        self.wait_buckets = wait_buckets
+        self.wait_times = _Histogram(len(wait_buckets))
+        self.acquired = 0
+        self.waited = 0
+        self.timeouts = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        """Number of callers waiting for a connection."""
+        return len(self._waiters)
+
+    async def get_connection(
+        self, command_name: Any = None, *keys: Any, **options: Any
+    ) -> Any:
+        """Get a connection, waiting in line while all of them are in use."""
+        started = time.perf_counter()
+        if self._waiters or not self.can_get_connection():
+            connection = await self._wait()
+        else:
+            connection = self.get_available_connection()
+        elapsed = time.perf_counter() - started
+        self.acquired += 1
+        self.wait_times.buckets[bisect_left(self.wait_buckets, elapsed)] += 1
+        self.wait_times.count += 1
+        self.wait_times.sum += elapsed
+        try:
+            await self.ensure_connection(connection)
+        except BaseException:
+            await self.release(connection)
+            raise
+        return connection
+
+    async def release(self, connection: Any) -> None:
+        """Return a connection and hand it to the first waiting caller."""
+        await super().release(connection)
+        self._wake()
+
+    def stats(self) -> dict[str, Any]:
+        """Return pool usage and wait counters."""
+        return {
+            "max_connections": self.max_connections,
+            "in_use": len(self._in_use_connections),
+            "idle": len(self._available_connections),
+            "waiting": len(self._waiters),
+            "acquired": self.acquired,
+            "waited": self.waited,
+            "timeouts": self.timeouts,
+            "wait_seconds": self.wait_times.sum,
+        }
+
+    async def _wait(self) -> Any:
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.waited += 1
+        try:
+            # Unlike wait_for, wait() never swallows a cancellation that
+            # arrives together with the connection.
+            await asyncio.wait((waiter,), timeout=self.timeout)
+        except BaseException:
+            self._give_up(waiter)
+            raise
+        if waiter.done():
+            return waiter.result()
+        self._give_up(waiter)
+        self.timeouts += 1
+        raise MaxConnectionsError(f"no connection available after {self.timeout}s")
+
+    def _give_up(self, waiter: asyncio.Future) -> None:
+        if waiter.done():
+            # A connection was handed over while this caller gave up.
+            self._hand_back(waiter.result())
+        else:
+            waiter.cancel()
+            self._waiters.remove(waiter)
+
+    def _hand_back(self, connection: Any) -> None:
+        self._in_use_connections.remove(connection)
+        self._available_connections.append(connection)
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.can_get_connection():
+            waiter = self._waiters.popleft()
+            try:
+                connection = self.get_available_connection()
+            except MaxConnectionsError:
+                # A pool budget refused a new connection; keep the place.
+                self._waiters.appendleft(waiter)
+                return
+            waiter.set_result(connection)
+
+
+def blocking_client(
+    url: str,
+    options: BlockingPoolOptions,
+    single_connection_client: bool = False,
+    auto_close_connection_pool: bool | None = None,
+    **kwargs: Any,
+) -> Redis:
+    """Create a client on a FairBlockingPool, like redis.asyncio.from_url."""
+    pool = FairBlockingPool.from_url(
+        url,
+        max_connections=options.max_connections,
+        timeout=options.timeout,
+        wait_buckets=options.buckets,
+        **kwargs,
+    )
+    client = Redis(
+        connection_pool=pool, single_connection_client=single_connection_client
+    )
+    client.auto_close_connection_pool = (
+        True if auto_close_connection_pool is None else auto_close_connection_pool
+    )
+    return client
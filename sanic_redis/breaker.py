@@ -0,0 +1,268 @@
+"""
+Sanic-Redis circuit breaker
+"""
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Literal
+
+from redis.asyncio import Redis
+from redis.asyncio.cluster import RedisCluster
+from redis.exceptions import ConnectionError, TimeoutError
+from sanic import Request, Sanic
+
+from .pipelining import command_name
+
+# Commands that wait server-side on purpose; their latency is not judged.
+BLOCKING_COMMANDS = frozenset(
+    {
+        "BLMOVE",
+        "BLMPOP",
+        "BLPOP",
+        "BRPOP",
+        "BRPOPLPUSH",
+        "BZMPOP",
+        "BZPOPMAX",
+        "BZPOPMIN",
+        "WAIT",
+        "WAITAOF",
+        "XREAD",
+        "XREADGROUP",
+    }
+)
+
+BreakerState = Literal["closed", "open", "half_open"]
+
+# time.monotonic() deadline of the current request, if any.
+_deadline: ContextVar[float | None] = ContextVar("sanic_redis_deadline", default=None)
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of sending a command while the circuit is open."""
+
+
+@contextmanager
+def redis_deadline(seconds: float | None) -> Iterator[None]:
+    """
+    Bound Redis commands issued in the block to seconds from now.
+
+    None removes the deadline, for example in tasks started from a handler
+    that should outlive its request.
+    """
+    token = _deadline.set(None if seconds is None else time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@dataclass(frozen=True)
+class BreakerOptions:
+    """
+    Options for failing fast while Redis is unhealthy.
+
+    The circuit opens when at least minimum_calls of the last window_size
+    commands finished and failure_rate of them failed. Connection errors and
+    timeouts are failures, and so are commands slower than
+    slow_call_duration seconds when it is set. After open_duration seconds
+    up to half_open_calls probe commands are let through; the circuit closes
+    when all of them succeed and opens again on the first failure. While it
+    is open, commands named in fallbacks return the given value and others
+    raise CircuitOpenError. With deadline enabled, commands issued while
+    handling a request time out when the app's RESPONSE_TIMEOUT runs out.
+    """
+
+    failure_rate: float = 0.5
+    slow_call_duration: float | None = None
+    window_size: int = 50
+    minimum_calls: int = 10
+    open_duration: float = 5.0
+    half_open_calls: int = 3
+    fallbacks: Mapping[str, Any] = field(default_factory=dict)
+    deadline: bool = True
+
+    def __post_init__(self) -> None:
+        if not 0 < self.failure_rate <= 1:
+            raise ValueError("failure_rate must be between 0 and 1")
+        if self.slow_call_duration is not None and self.slow_call_duration <= 0:
+            raise ValueError("slow_call_duration must be positive")
+        if self.window_size < 1:
+            raise ValueError("window_size must be at least 1")
+        if not 1 <= self.minimum_calls <= self.window_size:
+            raise ValueError("minimum_calls must be between 1 and window_size")
+        if self.open_duration <= 0:
+            raise ValueError("open_duration must be positive")
+        if self.half_open_calls < 1:
+            raise ValueError("half_open_calls must be at least 1")
+
+
+class CircuitBreaker:
+    """
+    Stop sending commands to Redis while most of them fail or are slow.
+
+    install() wraps execute_command on the client instance. The outcome of
+    each command is kept in a sliding window of the last window_size calls.
+    Errors Redis answers with, such as WRONGTYPE, count as successes.
+    """
+
+    client: Redis | RedisCluster
+    options: BreakerOptions
+    state: BreakerState
+    rejected: int
+
+    def __init__(self, client: Redis | RedisCluster, options: BreakerOptions) -> None:
+        self.client = client
+        self.options = options
+        self.state = "closed"
+        self.rejected = 0
+        self._execute_command = client.execute_command
+        self._fallbacks = {
+            name.upper(): value for name, value in options.fallbacks.items()
+        }
+        self._outcomes: deque[bool] = deque(maxlen=options.window_size)
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+
+    def install(self) -> None:
+        """Route the client's commands through the breaker."""
+        self.client.execute_command = self.execute_command
+
+    def stats(self) -> dict[str, Any]:
+        """Return the breaker state and window counters for monitoring."""
+        return {
+            "state": self.state,
+            "calls": len(self._outcomes),
+            "failures": self._failures,
+            "rejected": self.rejected,
+        }
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        """Run a command unless the circuit is open."""
+        name = command_name(args)
+        if not self._acquire():
+            self.rejected += 1
+            if name in self._fallbacks:
+                return self._fallbacks[name]
+            raise CircuitOpenError("Redis circuit breaker is open")
+        probe = self.state == "half_open"
+        deadline = _deadline.get()
+        started = time.monotonic()
+        if deadline is not None and deadline <= started:
+            # The request ran out of time before Redis was asked anything.
+            self._release(probe)
+            raise TimeoutError("request deadline exceeded")
+        try:
+            if deadline is None:
+                result = await self._execute_command(*args, **options)
+            else:
+                result = await asyncio.wait_for(
+                    self._execute_command(*args, **options), deadline - started
+                )
+        except asyncio.TimeoutError:
+            self._record(False, probe)
+            raise TimeoutError("request deadline exceeded") from None
+        except (ConnectionError, TimeoutError):
+            self._record(False, probe)
+            raise
+        except Exception:
+            self._record(True, probe)
+            raise
+        except BaseException:
+            self._release(probe)
+            raise
+        slow = self.options.slow_call_duration
+        self._record(
+            slow is None
+            or name in BLOCKING_COMMANDS
+            or time.monotonic() - started < slow,
+            probe,
+        )
+        return result
+
+    async def aclose(self) -> None:
+        """Release nothing; the breaker only holds in-memory state."""
+
+    def _acquire(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.options.open_duration:
+                return False
+            self.state = "half_open"
+            self._probes = 0
+            self._probe_successes = 0
+        if self._probes >= self.options.half_open_calls:
+            return False
+        self._probes += 1
+        return True
+
+    def _release(self, probe: bool) -> None:
+        if probe and self.state == "half_open":
+            self._probes -= 1
+
+    def _record(self, success: bool, probe: bool) -> None:
+        if probe:
+            if self.state != "half_open":
+                # Another probe already decided the outcome.
+                return
+            if not success:
+                self._open()
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.options.half_open_calls:
+                self.state = "closed"
+                self._outcomes.clear()
+                self._failures = 0
+            return
+        if self.state != "closed":
+            return
+        if len(self._outcomes) == self._outcomes.maxlen and not self._outcomes[0]:
+            self._failures -= 1
+        self._outcomes.append(success)
+        if not success:
+            self._failures += 1
+            calls = len(self._outcomes)
+            if (
+                calls >= self.options.minimum_calls
+                and self._failures >= calls * self.options.failure_rate
+            ):
+                self._open()
+
+    def _open(self) -> None:
+        self.state = "open"
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self._failures = 0
+
+
+def add_deadline_middleware(app: Sanic) -> None:
+    """
+    Bound the Redis commands of each request by app RESPONSE_TIMEOUT.
+
+    Websocket handlers live as long as their connection and get no deadline.
+    Other routes opt out with ctx_redis_deadline=False.
+    """
+
+    async def redis_deadline_start(request: Request) -> None:
+        timeout = request.app.config.RESPONSE_TIMEOUT
+        route = request.route
+        if (
+            not timeout
+            or request.scheme in ("ws", "wss")
+            or (
+                route is not None
+                and getattr(route.ctx, "redis_deadline", True) is False
+            )
+        ):
+            _deadline.set(None)
+        else:
+            _deadline.set(time.monotonic() + timeout)
+
+    app.on_request(redis_deadline_start)
@@ -0,0 +1,145 @@
+"""
+Sanic-Redis connection budgets shared by Sanic workers
+"""
+
+import multiprocessing
+from dataclasses import dataclass
+from typing import Any
+
+from redis.asyncio import Redis
+from redis.exceptions import MaxConnectionsError
+from sanic import Sanic
+
+# Shared counters of a budget: the worker count and the open connections.
+_Counters = tuple[Any, Any]
+
+
+@dataclass(frozen=True)
+class PoolBudgetOptions:
+    """
+    Options for splitting a connection budget between Sanic workers.
+
+    max_connections is the number of connections all workers together may
+    open to the server; keep it below the server's maxclients minus other
+    clients. Each worker's pool gets an equal share of at least
+    min_per_worker connections. A counter in the main process's shared
+    context also rejects connections beyond max_connections, for example
+    when shares are rounded up or a restarting worker overlaps its
+    replacement. workers defaults to the worker count the server was
+    started with.
+    """
+
+    max_connections: int
+    min_per_worker: int = 1
+    workers: int | None = None
+
+    def __post_init__(self) -> None:
+        if self.max_connections < 1:
+            raise ValueError("max_connections must be at least 1")
+        if self.min_per_worker < 1:
+            raise ValueError("min_per_worker must be at least 1")
+        if self.workers is not None and self.workers < 1:
+            raise ValueError("workers must be at least 1")
+
+
+def share_budget(app: Sanic, name: str, options: PoolBudgetOptions) -> None:
+    """Create the counters of a budget on app.shared_ctx in the main process."""
+    workers = options.workers or app.state.workers or 1
+    counters = (multiprocessing.Value("i", workers), multiprocessing.Value("i", 0))
+    setattr(app.shared_ctx, name, counters)
+
+
+def budget_counters(app: Sanic, name: str, options: PoolBudgetOptions) -> _Counters:
+    """
+    Return the counters shared by the main process, or local ones.
+
+    Local counters are used when the app runs without a main process, for
+    example with single_process=True; the budget then covers this process.
+    """
+    counters = getattr(app.shared_ctx, name, None)
+    if counters is None:
+        workers = options.workers or 1
+        counters = (multiprocessing.Value("i", workers), multiprocessing.Value("i", 0))
+    return counters
+
+
+class PoolBudget:
+    """
+    Cap the connections of a client's pool across all workers.
+
+    install() sets the pool's max_connections to this worker's share and
+    wraps make_connection on the pool instance, so each new connection is
+    counted in the shared counter and refused with MaxConnectionsError once
+    max_connections is reached. Connections count against the budget until
+    aclose(); crashed workers cannot return theirs.
+    """
+
+    client: Redis
+    options: PoolBudgetOptions
+    workers: int
+    worker_max_connections: int
+    created: int
+    rejected: int
+
+    def __init__(
+        self, client: Redis, options: PoolBudgetOptions, counters: _Counters
+    ) -> None:
+        self.client = client
+        self.options = options
+        self._workers, self._connections = counters
+        self.workers = self._workers.value
+        self.worker_max_connections = max(
+            options.min_per_worker, options.max_connections // self.workers
+        )
+        self.created = 0
+        self.rejected = 0
+        self._make_connection: Any = None
+
+    def install(self) -> None:
+        """Size the pool to this worker's share and count its connections."""
+        pool = self.client.connection_pool
+        pool.max_connections = self.worker_max_connections
+        self._make_connection = pool.make_connection
+        pool.make_connection = self.make_connection
+
+    def make_connection(self) -> Any:
+        """Create a pool connection if the budget allows another one."""
+        connections = self._connections
+        with connections.get_lock():
+            if connections.value >= self.options.max_connections:
+                self.rejected += 1
+                raise MaxConnectionsError(
+                    f"connection budget of {self.options.max_connections} "
+                    "connections is used up"
+                )
+            connections.value += 1
+        try:
+            connection = self._make_connection()
+        except BaseException:
+            self._return(1)
+            raise
+        self.created += 1
+        return connection
+
+    def stats(self) -> dict[str, Any]:
+        """Return the budget and the connections open across workers."""
+        kwargs = self.client.connection_pool.connection_kwargs
+        server = kwargs.get("path") or f"{kwargs.get('host')}:{kwargs.get('port')}"
+        return {
+            "server": server,
+            "workers": self.workers,
+            "max_connections": self.options.max_connections,
+            "worker_max_connections": self.worker_max_connections,
+            "connections": self._connections.value,
+            "worker_connections": self.created,
+            "rejected": self.rejected,
+        }
+
+    def _return(self, count: int) -> None:
+        with self._connections.get_lock():
+            self._connections.value -= count
+
+    async def aclose(self) -> None:
+        """Return this worker's connections to the budget."""
+        self._return(self.created)
+        self.created = 0
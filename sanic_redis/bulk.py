@@ -0,0 +1,227 @@
+"""
+Sanic-Redis bulk writes
+"""
+
+import asyncio
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Mapping
+from dataclasses import dataclass, field
+from typing import Any, Protocol
+
+from redis.asyncio import Redis
+from redis.asyncio.cluster import RedisCluster
+
+
+class BulkOperation(Protocol):
+    """A write that queues its commands on a pipeline and returns their count."""
+
+    def queue(self, pipe: Any) -> int: ...
+
+
+def _expire(pipe: Any, key: Any, ttl: float | None) -> int:
+    if ttl is None:
+        return 0
+    pipe.pexpire(key, max(1, int(ttl * 1000)))
+    return 1
+
+
+@dataclass(frozen=True)
+class BulkSet:
+    """SET key to value, expiring after ttl seconds when given."""
+
+    key: Any
+    value: Any
+    ttl: float | None = None
+
+    def queue(self, pipe: Any) -> int:
+        px = None if self.ttl is None else max(1, int(self.ttl * 1000))
+        pipe.set(self.key, self.value, px=px)
+        return 1
+
+
+@dataclass(frozen=True)
+class BulkHSet:
+    """HSET the fields of mapping on a hash, then set its TTL when given."""
+
+    key: Any
+    mapping: Mapping[Any, Any]
+    ttl: float | None = None
+
+    def queue(self, pipe: Any) -> int:
+        pipe.hset(self.key, mapping=self.mapping)
+        return 1 + _expire(pipe, self.key, self.ttl)
+
+
+@dataclass(frozen=True)
+class BulkZAdd:
+    """ZADD members with their scores, then set the TTL when given."""
+
+    key: Any
+    mapping: Mapping[Any, float]
+    ttl: float | None = None
+
+    def queue(self, pipe: Any) -> int:
+        pipe.zadd(self.key, self.mapping)
+        return 1 + _expire(pipe, self.key, self.ttl)
+
+
+@dataclass(frozen=True)
+class BulkXAdd:
+    """
+    XADD one entry to a stream, then set the stream's TTL when given.
+
+    maxlen trims the stream approximately, which Redis does cheaply.
+    """
+
+    key: Any
+    fields: Mapping[Any, Any]
+    id: Any = "*"
+    maxlen: int | None = None
+    ttl: float | None = None
+
+    def queue(self, pipe: Any) -> int:
+        pipe.xadd(self.key, dict(self.fields), id=self.id, maxlen=self.maxlen)
+        return 1 + _expire(pipe, self.key, self.ttl)
+
+
+@dataclass(frozen=True)
+class BulkOptions:
+    """
+    Options for bulk writes.
+
+    Operations are sent in non-transactional pipelines of batch_size
+    operations, with up to concurrency pipelines in flight. Reading from the
+    source pauses while all of them are busy, so at most concurrency + 1
+    batches are held in memory. concurrency should not exceed the pool's
+    max_connections.
+    """
+
+    batch_size: int = 1000
+    concurrency: int = 4
+
+    def __post_init__(self) -> None:
+        if self.batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if self.concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+
+@dataclass(frozen=True)
+class BulkError:
+    """A failed operation, with the index of the batch it was sent in."""
+
+    batch: int
+    operation: BulkOperation
+    error: Exception
+
+
+@dataclass
+class BulkResult:
+    """Counters and failures of a bulk write."""
+
+    written: int = 0
+    batches: int = 0
+    errors: list[BulkError] = field(default_factory=list)
+
+    @property
+    def failed(self) -> int:
+        """Number of operations that were not written."""
+        return len(self.errors)
+
+
+async def _iterate(
+    operations: Iterable[BulkOperation] | AsyncIterable[BulkOperation],
+) -> AsyncIterator[BulkOperation]:
+    if isinstance(operations, AsyncIterable):
+        async for operation in operations:
+            yield operation
+    else:
+        for operation in operations:
+            yield operation
+
+
+async def _write_batch(
+    client: Redis | RedisCluster,
+    index: int,
+    batch: list[BulkOperation],
+    result: BulkResult,
+) -> None:
+    queued: list[tuple[BulkOperation, int]] = []
+    try:
+        async with client.pipeline(transaction=False) as pipe:
+            for operation in batch:
+                try:
+                    queued.append((operation, operation.queue(pipe)))
+                except Exception as error:
+                    # Bad arguments are rejected before anything is sent.
+                    result.errors.append(BulkError(index, operation, error))
+            replies = await pipe.execute(raise_on_error=False) if queued else []
+    except Exception as error:
+        result.errors.extend(
+            BulkError(index, operation, error) for operation, _count in queued
+        )
+        return
+    offset = 0
+    for operation, count in queued:
+        failure = next(
+            (
+                reply
+                for reply in replies[offset : offset + count]
+                if isinstance(reply, Exception)
+            ),
+            None,
+        )
+        offset += count
+        if failure is None:
+            result.written += 1
+        else:
+            result.errors.append(BulkError(index, operation, failure))
+
+
+async def bulk_write(
+    client: Redis | RedisCluster,
+    operations: Iterable[BulkOperation] | AsyncIterable[BulkOperation],
+    options: BulkOptions | None = None,
+) -> BulkResult:
+    """
+    Write operations in pipelined batches with bounded concurrency.
+
+    operations may be a plain or async iterable of BulkSet, BulkHSet,
+    BulkZAdd, BulkXAdd or any object with a queue(pipe) method. Failed
+    operations, including whole batches lost to connection errors, are
+    reported in the result instead of raised; writes are not retried.
+    """
+    options = options or BulkOptions()
+    result = BulkResult()
+    slots = asyncio.Semaphore(options.concurrency)
+    tasks: set[asyncio.Task] = set()
+
+    async def flush(index: int, batch: list[BulkOperation]) -> None:
+        try:
+            await _write_batch(client, index, batch, result)
+        finally:
+            slots.release()
+
+    async def send(batch: list[BulkOperation]) -> None:
+        # Waiting for a free slot here is what pauses the producer.
+        await slots.acquire()
+        task = asyncio.ensure_future(flush(result.batches, batch))
+        result.batches += 1
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    try:
+        batch: list[BulkOperation] = []
+        async for operation in _iterate(operations):
+            batch.append(operation)
+            if len(batch) >= options.batch_size:
+                await send(batch)
+                batch = []
+        if batch:
+            await send(batch)
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return result
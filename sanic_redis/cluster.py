@@ -0,0 +1,46 @@
+"""
+Sanic-Redis cluster helpers
+"""
+
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+from redis.asyncio import Redis
+from redis.asyncio.cluster import RedisCluster
+
+
+async def mget(client: Redis | RedisCluster, keys: Iterable[Any]) -> list[Any]:
+    """
+    Read many keys at once on a single node or across cluster shards.
+
+    On a cluster the keys are split by hash slot and the per-slot MGETs are
+    sent as one pipeline, which redis-py runs on all nodes concurrently.
+    """
+    keys = list(keys)
+    if not keys:
+        return []
+    if isinstance(client, RedisCluster):
+        return await client.mget_nonatomic(keys)
+    return await client.mget(keys)
+
+
+async def hmget_many(
+    client: Redis | RedisCluster, fields: Mapping[Any, Iterable[Any]]
+) -> dict[Any, list[Any]]:
+    """
+    Read fields of many hashes in one round trip per node.
+
+    fields maps hash names to the fields to read; the result maps the same
+    names to the field values in order.
+    """
+    requests = {name: list(names) for name, names in fields.items()}
+    if not requests:
+        return {}
+    if len(requests) == 1:
+        ((name, names),) = requests.items()
+        return {name: await client.hmget(name, names)}
+    async with client.pipeline(transaction=False) as pipe:
+        for name, names in requests.items():
+            pipe.hmget(name, names)
+        replies = await pipe.execute()
+    return dict(zip(requests, replies, strict=True))
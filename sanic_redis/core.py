@@ -2,14 +2,41 @@
 Sanic-Redis core file
 """
 
-from collections.abc import Iterable, Mapping
-from typing import Any
+import asyncio
+import time
+from collections.abc import Callable, Iterable, Mapping
+from typing import Any, TypeVar, cast
 from urllib.parse import parse_qsl, urlsplit
 
 from redis.asyncio import Redis, from_url
-from sanic import Sanic
+from redis.asyncio.cluster import RedisCluster
+from sanic import Request, Sanic
 from sanic.log import logger
 
+from .blocking_pool import BlockingPoolOptions, blocking_client
+from .breaker import BreakerOptions, CircuitBreaker, add_deadline_middleware
+from .budget import PoolBudget, PoolBudgetOptions, budget_counters, share_budget
+from .diagnostics import (
+    DiagnosticsOptions,
+    RedisDiagnostics,
+    add_diagnostics_route,
+)
+from .loader import LoaderOptions, RedisLoader
+from .locks import LockOptions, RedisLocks
+from .metrics import MetricsOptions, RedisMetrics, add_metrics_route
+from .near_cache import NearCache, NearCacheOptions
+from .pipelining import AutoPipeline, AutoPipelineOptions
+from .pubsub import PubSubHub, PubSubOptions
+from .replicas import ReplicaOptions, ReplicaRouter
+from .scripts import BoundScripts, ScriptRegistry
+from .sentinel import SentinelFailover, SentinelOptions
+from .serialization import Serializer, SerializerOptions
+from .shared_pool import shared_client
+from .streams import StreamConsumer, StreamConsumerOptions, StreamHandler
+from .warmup import WarmupOptions, warm_pool
+
+_OptionsT = TypeVar("_OptionsT")
+
 PLUGIN_FROM_URL_KWARGS = {"auto_close_connection_pool", "single_connection_client"}
 
 
@@ -43,6 +70,43 @@ def _validate_redis_url(redis_url: str) -> None:
     _reject_plugin_options(query_options, "Redis URL query")
 
 
+def _feature_options(
+    value: "bool | _OptionsT | None",
+    options_class: type[_OptionsT],
+    option_name: str,
+) -> _OptionsT | None:
+    if value is None or value is False:
+        return None
+    if value is True:
+        return options_class()
+    if isinstance(value, options_class):
+        return value
+    raise TypeError(
+        f"{option_name} must be a bool or {options_class.__name__} instance"
+    )
+
+
+async def _warm_clients(
+    client: Redis | RedisCluster,
+    helpers: list[tuple[str | None, Any]],
+    options: WarmupOptions,
+) -> None:
+    # Cluster mode is rejected with warmup in init_app.
+    clients = [cast(Redis, client)]
+    for _helper_name, helper in helpers:
+        if isinstance(helper, ReplicaRouter):
+            clients.extend(helper.replicas)
+        elif isinstance(helper, SentinelFailover) and helper.replica is not None:
+            clients.append(helper.replica)
+    started = time.monotonic()
+    warmed = await asyncio.gather(*(warm_pool(c, options) for c in clients))
+    logger.info(
+        "[sanic-redis] warmed %d connections in %.3fs",
+        sum(warmed),
+        time.monotonic() - started,
+    )
+
+
 class SanicRedis:
     """
     Register redis.asyncio clients on a Sanic app lifecycle.
@@ -55,6 +119,24 @@ class SanicRedis:
     auto_close_connection_pool: bool | None
     from_url_kwargs: dict[str, Any]
     ping_on_startup: bool
+    auto_pipeline: AutoPipelineOptions | None
+    near_cache: NearCacheOptions | None
+    loader: LoaderOptions | None
+    cluster: bool
+    sentinel: SentinelOptions | None
+    replicas: ReplicaOptions | None
+    warmup: WarmupOptions | None
+    metrics: MetricsOptions | None
+    diagnostics: DiagnosticsOptions | None
+    serializer: SerializerOptions | None
+    scripts: ScriptRegistry | None
+    pubsub: PubSubOptions | None
+    breaker: BreakerOptions | None
+    share_pool: bool
+    locks: LockOptions | None
+    pool_budget: PoolBudgetOptions | None
+    blocking_pool: BlockingPoolOptions | None
+    consumers: list[tuple[str, str, StreamHandler, StreamConsumerOptions]]
 
     def __init__(
         self,
@@ -66,12 +148,59 @@ class SanicRedis:
         auto_close_connection_pool: bool | None = None,
         from_url_kwargs: Mapping[str, Any] | None = None,
         ping_on_startup: bool = False,
+        auto_pipeline: bool | AutoPipelineOptions = False,
+        near_cache: bool | NearCacheOptions = False,
+        loader: bool | LoaderOptions = False,
+        cluster: bool = False,
+        sentinel: SentinelOptions | None = None,
+        replicas: ReplicaOptions | None = None,
+        warmup: bool | WarmupOptions = False,
+        metrics: bool | MetricsOptions = False,
+        diagnostics: bool | DiagnosticsOptions = False,
+        serializer: bool | SerializerOptions = False,
+        scripts: ScriptRegistry | None = None,
+        pubsub: bool | PubSubOptions = False,
+        breaker: bool | BreakerOptions = False,
+        share_pool: bool = False,
+        locks: bool | LockOptions = False,
+        pool_budget: PoolBudgetOptions | None = None,
+        blocking_pool: bool | BlockingPoolOptions = False,
     ) -> None:
         """
         Store default Redis options and optionally bind them to an app.
 
         When ping_on_startup is true, Redis is pinged before startup stores
-        the client on app.ctx.
+        the client on app.ctx. The other options enable optional features;
+        pass True for their defaults or an options object to tune them.
+        Helpers named below are set on app.ctx with the ctx_name prefix, e.g.
+        app.ctx.redis_loader:
+
+        - auto_pipeline: send commands of one event-loop tick as one pipeline.
+        - near_cache: serve hot reads from worker memory (_near_cache).
+        - loader: batch reads into MGET and HMGET calls (_loader), with a
+          memoizing scope per request on request.ctx.
+        - cluster: create a RedisCluster client from the URL.
+        - sentinel: discover the master through Sentinel and follow
+          failovers (_sentinel).
+        - replicas: send read-only commands to replicas (_router).
+        - warmup: open and PING pool connections during startup.
+        - metrics: record command latency, errors and pool usage (_metrics).
+        - diagnostics: log slow commands and sample hot keys (_diagnostics).
+        - serializer: store Python values with a codec and optional
+          compression (_serializer).
+        - scripts: load the Lua scripts of a ScriptRegistry (_scripts).
+        - pubsub: share one subscribed connection per worker (_pubsub).
+        - breaker: fail fast while Redis is failing or slow and bound
+          commands by RESPONSE_TIMEOUT (_breaker).
+        - share_pool: share one pool with instances whose URLs and options
+          only differ in the database.
+        - locks: distributed locks and single-flight calls (_locks).
+        - pool_budget: split a connection budget between Sanic workers
+          (_pool_budget).
+        - blocking_pool: queue callers in arrival order while all
+          connections are in use, recording their wait times.
+
+        See the README for examples of each feature.
         """
         self.config_name = config_name
         self.ctx_name = ctx_name
@@ -80,9 +209,56 @@ class SanicRedis:
         self.auto_close_connection_pool = auto_close_connection_pool
         self.from_url_kwargs = _copy_from_url_kwargs(from_url_kwargs)
         self.ping_on_startup = ping_on_startup
+        self.auto_pipeline = _feature_options(
+            auto_pipeline, AutoPipelineOptions, "auto_pipeline"
+        )
+        self.near_cache = _feature_options(near_cache, NearCacheOptions, "near_cache")
+        self.loader = _feature_options(loader, LoaderOptions, "loader")
+        self.cluster = cluster
+        self.sentinel = sentinel
+        self.replicas = replicas
+        self.warmup = _feature_options(warmup, WarmupOptions, "warmup")
+        self.metrics = _feature_options(metrics, MetricsOptions, "metrics")
+        self.diagnostics = _feature_options(
+            diagnostics, DiagnosticsOptions, "diagnostics"
+        )
+        self.serializer = _feature_options(serializer, SerializerOptions, "serializer")
+        self.scripts = scripts
+        self.pubsub = _feature_options(pubsub, PubSubOptions, "pubsub")
+        self.breaker = _feature_options(breaker, BreakerOptions, "breaker")
+        self.share_pool = share_pool
+        self.locks = _feature_options(locks, LockOptions, "locks")
+        self.pool_budget = pool_budget
+        self.blocking_pool = _feature_options(
+            blocking_pool, BlockingPoolOptions, "blocking_pool"
+        )
+        self.consumers = []
         if app is not None:
             self.init_app(app)
 
+    def consumer(
+        self,
+        stream: str,
+        group: str,
+        options: StreamConsumerOptions | None = None,
+    ) -> Callable[[StreamHandler], StreamHandler]:
+        """
+        Register the decorated coroutine as a consumer of stream in group.
+
+        Every app this instance is bound to runs the consumer in each worker
+        from after_server_start and drains it when the server stops. The
+        handler receives one StreamMessage per entry, which is acknowledged
+        when the handler returns without raising.
+        """
+
+        def decorator(handler: StreamHandler) -> StreamHandler:
+            self.consumers.append(
+                (stream, group, handler, options or StreamConsumerOptions())
+            )
+            return handler
+
+        return decorator
+
     def init_app(
         self,
         app: Sanic,
@@ -93,11 +269,31 @@ class SanicRedis:
         auto_close_connection_pool: bool | None = None,
         from_url_kwargs: Mapping[str, Any] | None = None,
         ping_on_startup: bool | None = None,
+        auto_pipeline: bool | AutoPipelineOptions | None = None,
+        near_cache: bool | NearCacheOptions | None = None,
+        loader: bool | LoaderOptions | None = None,
+        cluster: bool | None = None,
+        sentinel: SentinelOptions | None = None,
+        replicas: ReplicaOptions | None = None,
+        warmup: bool | WarmupOptions | None = None,
+        metrics: bool | MetricsOptions | None = None,
+        diagnostics: bool | DiagnosticsOptions | None = None,
+        serializer: bool | SerializerOptions | None = None,
+        scripts: ScriptRegistry | None = None,
+        pubsub: bool | PubSubOptions | None = None,
+        breaker: bool | BreakerOptions | None = None,
+        share_pool: bool | None = None,
+        locks: bool | LockOptions | None = None,
+        pool_budget: PoolBudgetOptions | None = None,
+        blocking_pool: bool | BlockingPoolOptions | None = None,
     ) -> None:
         """
         Register Redis startup and shutdown listeners on a Sanic app.
 
-        ping_on_startup overrides the instance default when it is not None.
+        ping_on_startup, auto_pipeline, near_cache, loader, cluster, sentinel,
+        replicas, warmup, metrics, diagnostics, serializer, scripts, pubsub,
+        breaker, share_pool, locks, pool_budget and blocking_pool override the
+        instance defaults when they are not None.
         """
 
         redis_url = self.redis_url if redis_url is None else redis_url
@@ -122,14 +318,139 @@ class SanicRedis:
             if from_url_kwargs is None
             else _copy_from_url_kwargs(from_url_kwargs)
         )
+        auto_pipeline_options = (
+            self.auto_pipeline
+            if auto_pipeline is None
+            else _feature_options(auto_pipeline, AutoPipelineOptions, "auto_pipeline")
+        )
+        near_cache_options = (
+            self.near_cache
+            if near_cache is None
+            else _feature_options(near_cache, NearCacheOptions, "near_cache")
+        )
+        loader_options = (
+            self.loader
+            if loader is None
+            else _feature_options(loader, LoaderOptions, "loader")
+        )
+        warmup_options = (
+            self.warmup
+            if warmup is None
+            else _feature_options(warmup, WarmupOptions, "warmup")
+        )
+        metrics_options = (
+            self.metrics
+            if metrics is None
+            else _feature_options(metrics, MetricsOptions, "metrics")
+        )
+        diagnostics_options = (
+            self.diagnostics
+            if diagnostics is None
+            else _feature_options(diagnostics, DiagnosticsOptions, "diagnostics")
+        )
+        serializer_options = (
+            self.serializer
+            if serializer is None
+            else _feature_options(serializer, SerializerOptions, "serializer")
+        )
+        breaker_options = (
+            self.breaker
+            if breaker is None
+            else _feature_options(breaker, BreakerOptions, "breaker")
+        )
+        lock_options = (
+            self.locks
+            if locks is None
+            else _feature_options(locks, LockOptions, "locks")
+        )
+        if serializer_options is not None and base_from_url_kwargs.get(
+            "decode_responses"
+        ):
+            raise ValueError("serializer cannot be used with decode_responses")
+        script_registry = self.scripts if scripts is None else scripts
+        pubsub_options = (
+            self.pubsub
+            if pubsub is None
+            else _feature_options(pubsub, PubSubOptions, "pubsub")
+        )
+        cluster = self.cluster if cluster is None else cluster
+        if cluster and single_connection_client:
+            raise ValueError(
+                "single_connection_client is not supported in cluster mode"
+            )
+        if cluster and near_cache_options is not None:
+            raise ValueError("near_cache is not supported in cluster mode")
+        if cluster and warmup_options is not None:
+            raise ValueError("warmup is not supported in cluster mode")
+        if cluster and pubsub_options is not None:
+            raise ValueError("pubsub is not supported in cluster mode")
+        sentinel_options = self.sentinel if sentinel is None else sentinel
+        if cluster and sentinel_options is not None:
+            raise ValueError("cluster and sentinel modes are mutually exclusive")
+        replica_options = self.replicas if replicas is None else replicas
+        share_pool = self.share_pool if share_pool is None else share_pool
+        if share_pool:
+            if cluster or sentinel_options is not None:
+                raise ValueError(
+                    "share_pool is not supported in cluster or sentinel mode"
+                )
+            if auto_close_connection_pool is False:
+                raise ValueError(
+                    "share_pool closes the shared pool itself; do not set "
+                    "auto_close_connection_pool to False"
+                )
+        pool_budget_options = self.pool_budget if pool_budget is None else pool_budget
+        if pool_budget_options is not None:
+            if cluster or share_pool:
+                raise ValueError(
+                    "pool_budget is not supported in cluster mode or with share_pool"
+                )
+            if "max_connections" in base_from_url_kwargs:
+                raise ValueError(
+                    "pool_budget sets max_connections; do not pass it in "
+                    "from_url_kwargs"
+                )
+        blocking_pool_options = (
+            self.blocking_pool
+            if blocking_pool is None
+            else _feature_options(blocking_pool, BlockingPoolOptions, "blocking_pool")
+        )
+        if blocking_pool_options is not None:
+            if cluster or sentinel_options is not None or share_pool:
+                raise ValueError(
+                    "blocking_pool is not supported in cluster or sentinel mode "
+                    "or with share_pool"
+                )
+            if "max_connections" in base_from_url_kwargs:
+                raise ValueError(
+                    "blocking_pool sets max_connections; do not pass it in "
+                    "from_url_kwargs"
+                )
+        if replica_options is not None:
+            if cluster or sentinel_options is not None:
+                raise ValueError(
+                    "replicas are not supported in cluster or sentinel mode"
+                )
+            for replica_url in replica_options.urls:
+                _validate_redis_url(replica_url)
         if redis_url:
             _validate_redis_url(redis_url)
-        redis_conn: Redis | None = None
+        redis_conn: Redis | RedisCluster | None = None
+        budget_name = f"{ctx_name}_pool_budget"
+        # Helpers are closed in reverse order before the client; named ones
+        # are also registered on app.ctx.
+        redis_helpers: list[tuple[str | None, Any]] = []
+
+        if pool_budget_options is not None:
+
+            @app.listener("main_process_start")
+            async def redis_share_budget(_app: Sanic) -> None:
+                share_budget(_app, budget_name, pool_budget_options)
 
         @app.listener("before_server_start")
         async def redis_configure(_app: Sanic) -> None:
-            nonlocal redis_conn
-            if redis_url:
+            nonlocal redis_conn, redis_helpers
+            if sentinel_options is not None or redis_url:
                 _redis_url = redis_url
             else:
                 _redis_url = _app.config.get(config_name)
@@ -143,15 +464,114 @@ class SanicRedis:
                 _validate_redis_url(_redis_url)
             logger.info("[sanic-redis] connecting")
             redis_kwargs = dict(base_from_url_kwargs)
-            redis_kwargs["single_connection_client"] = single_connection_client
-            if auto_close_connection_pool is not None:
-                redis_kwargs["auto_close_connection_pool"] = auto_close_connection_pool
-            _redis = from_url(_redis_url, **redis_kwargs)
-            if ping_on_startup:
+            _redis: Redis | RedisCluster
+            _helpers: list[tuple[str | None, Any]] = []
+            if sentinel_options is not None:
+                _sentinel = SentinelFailover(
+                    sentinel_options, redis_kwargs, single_connection_client
+                )
+                _redis = _sentinel.master
+                _helpers.append((f"{ctx_name}_sentinel", _sentinel))
+                if _sentinel.replica is not None:
+                    _helpers.append((f"{ctx_name}_replica", _sentinel.replica))
+            elif cluster:
+                _redis = RedisCluster.from_url(_redis_url, **redis_kwargs)
+            elif share_pool:
+                _redis = shared_client(
+                    _redis_url,
+                    single_connection_client=single_connection_client,
+                    **redis_kwargs,
+                )
+            else:
+                redis_kwargs["single_connection_client"] = single_connection_client
+                if auto_close_connection_pool is not None:
+                    redis_kwargs["auto_close_connection_pool"] = (
+                        auto_close_connection_pool
+                    )
+                if blocking_pool_options is not None:
+                    _redis = blocking_client(
+                        _redis_url, blocking_pool_options, **redis_kwargs
+                    )
+                else:
+                    _redis = from_url(_redis_url, **redis_kwargs)
+            if pool_budget_options is not None:
+                # Cluster mode is rejected with pool_budget in init_app.
+                _budget = PoolBudget(
+                    cast(Redis, _redis),
+                    pool_budget_options,
+                    budget_counters(_app, budget_name, pool_budget_options),
+                )
+                _budget.install()
+                _helpers.append((budget_name, _budget))
+            if auto_pipeline_options is not None:
+                _auto_pipeline = AutoPipeline(_redis, auto_pipeline_options)
+                _auto_pipeline.install()
+                _helpers.append((None, _auto_pipeline))
+            if replica_options is not None:
+                _router = ReplicaRouter(
+                    cast(Redis, _redis),
+                    [from_url(url, **redis_kwargs) for url in replica_options.urls],
+                    replica_options,
+                )
+                _router.install()
+                _helpers.append((f"{ctx_name}_router", _router))
+            if breaker_options is not None:
+                # Installed below the near cache so cached reads are still
+                # served while the circuit is open.
+                _breaker = CircuitBreaker(_redis, breaker_options)
+                _breaker.install()
+                _helpers.append((f"{ctx_name}_breaker", _breaker))
+            if near_cache_options is not None:
+                # Cluster mode is rejected with near_cache in init_app.
+                _near_cache = NearCache(cast(Redis, _redis), near_cache_options)
+                _near_cache.install()
+                _helpers.append((f"{ctx_name}_near_cache", _near_cache))
+            if metrics_options is not None:
+                _metrics = RedisMetrics(_redis, ctx_name, metrics_options)
+                _metrics.install()
+                _helpers.append((f"{ctx_name}_metrics", _metrics))
+            if diagnostics_options is not None:
+                _diagnostics = RedisDiagnostics(_redis, diagnostics_options)
+                _diagnostics.install()
+                _helpers.append((f"{ctx_name}_diagnostics", _diagnostics))
+            if serializer_options is not None:
+                _serializer = Serializer(_redis, serializer_options)
+                _helpers.append((f"{ctx_name}_serializer", _serializer))
+            _scripts: BoundScripts | None = None
+            if script_registry is not None:
+                _scripts = script_registry.bind(_redis)
+                _helpers.append((f"{ctx_name}_scripts", _scripts))
+            if loader_options is not None:
+                _loader = RedisLoader(_redis, loader_options)
+                _helpers.append((f"{ctx_name}_loader", _loader))
+            if pubsub_options is not None:
+                # Cluster mode is rejected with pubsub in init_app.
+                _pubsub = PubSubHub(cast(Redis, _redis), pubsub_options)
+                _helpers.append((f"{ctx_name}_pubsub", _pubsub))
+            if lock_options is not None:
+                _locks = RedisLocks(_redis, lock_options)
+                _helpers.append((f"{ctx_name}_locks", _locks))
+            for stream, group, handler, consumer_options in self.consumers:
+                _helpers.append(
+                    (
+                        None,
+                        StreamConsumer(
+                            _redis, stream, group, handler, consumer_options
+                        ),
+                    )
+                )
+            if ping_on_startup or warmup_options is not None or _scripts is not None:
                 try:
-                    await _redis.ping()
+                    if ping_on_startup:
+                        await _redis.ping()
+                    if warmup_options is not None:
+                        await _warm_clients(_redis, _helpers, warmup_options)
+                    if _scripts is not None:
+                        await _scripts.load()
                 except BaseException:
                     try:
+                        for _helper_name, helper in reversed(_helpers):
+                            await helper.aclose()
                         await _redis.aclose()
                     except Exception:
                         logger.warning(
@@ -160,18 +580,71 @@ class SanicRedis:
                             exc_info=True,
                         )
                     raise
+            for helper_name, helper in _helpers:
+                if isinstance(helper, (NearCache, SentinelFailover)):
+                    helper.start()
+                if helper_name is not None:
+                    setattr(_app.ctx, helper_name, helper)
             setattr(_app.ctx, ctx_name, _redis)
             redis_conn = _redis
+            redis_helpers = _helpers
+
+        if metrics_options is not None and metrics_options.route:
+            add_metrics_route(
+                app,
+                metrics_options.route,
+                metrics_options.exporter,
+                name=f"{ctx_name}_metrics",
+            )
+
+        if diagnostics_options is not None and diagnostics_options.route:
+            add_diagnostics_route(app, diagnostics_options.route, ctx_name)
+
+        if breaker_options is not None and breaker_options.deadline:
+            add_deadline_middleware(app)
+
+        @app.listener("after_server_start")
+        async def start_redis_consumers(_app: Sanic) -> None:
+            for _helper_name, helper in redis_helpers:
+                if isinstance(helper, StreamConsumer):
+                    helper.start()
+
+        if loader_options is not None:
+            loader_name = f"{ctx_name}_loader"
+
+            @app.on_request
+            async def redis_loader_scope(request: Request) -> None:
+                _loader = getattr(request.app.ctx, loader_name, None)
+                if isinstance(_loader, RedisLoader):
+                    setattr(request.ctx, loader_name, _loader.scope())
+
+        if replica_options is not None:
+            router_name = f"{ctx_name}_router"
+
+            @app.on_request
+            async def redis_router_reset(request: Request) -> None:
+                _router = getattr(request.app.ctx, router_name, None)
+                if isinstance(_router, ReplicaRouter):
+                    _router.reset()
 
         @app.listener("after_server_stop")
         async def close_redis(_app: Sanic) -> None:
-            nonlocal redis_conn
+            nonlocal redis_conn, redis_helpers
             logger.info("[sanic-redis] closing")
             _redis = redis_conn
+            _helpers = redis_helpers
             if _redis is not None:
                 try:
+                    for _helper_name, helper in reversed(_helpers):
+                        await helper.aclose()
                     await _redis.aclose()
                 finally:
                     redis_conn = None
+                    redis_helpers = []
+                    for helper_name, helper in _helpers:
+                        if helper_name is not None and (
+                            getattr(_app.ctx, helper_name, None) is helper
+                        ):
+                            delattr(_app.ctx, helper_name)
                     if getattr(_app.ctx, ctx_name, None) is _redis:
                         delattr(_app.ctx, ctx_name)
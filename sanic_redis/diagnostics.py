@@ -0,0 +1,278 @@
+"""
+Sanic-Redis slow command log and hot-key detection
+"""
+
+import random
+import re
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from redis.asyncio import Redis
+from redis.asyncio.cluster import RedisCluster
+from sanic import Request, Sanic
+from sanic.exceptions import ServerError
+from sanic.response import HTTPResponse, json
+
+from .pipelining import command_name
+
+# Commands whose args[1] is not a key.
+KEYLESS_COMMANDS = frozenset(
+    {
+        "AUTH",
+        "CLIENT",
+        "CLUSTER",
+        "COMMAND",
+        "CONFIG",
+        "DBSIZE",
+        "DISCARD",
+        "ECHO",
+        "EXEC",
+        "FLUSHALL",
+        "FLUSHDB",
+        "FUNCTION",
+        "HELLO",
+        "INFO",
+        "KEYS",
+        "MULTI",
+        "PING",
+        "PSUBSCRIBE",
+        "PUBLISH",
+        "SCAN",
+        "SCRIPT",
+        "SELECT",
+        "SUBSCRIBE",
+        "TIME",
+    }
+)
+# Commands whose arguments after the name are all keys.
+MULTI_KEY_COMMANDS = frozenset({"DEL", "EXISTS", "MGET", "TOUCH", "UNLINK", "WATCH"})
+# Commands that pass keys as <numkeys> key [key ...] after a script or function.
+SCRIPT_COMMANDS = frozenset(
+    {"EVAL", "EVALSHA", "EVALSHA_RO", "EVAL_RO", "FCALL", "FCALL_RO"}
+)
+
+_KEY_ID = re.compile(r"[0-9a-fA-F]{8,}(?:-[0-9a-fA-F]{4,})*|\d+")
+
+
+@dataclass(frozen=True)
+class DiagnosticsOptions:
+    """
+    Options for the slow command log and hot-key sketch.
+
+    Commands slower than slow_threshold seconds are kept in a ring buffer of
+    slow_log_size entries. sample_rate is the share of commands whose keys
+    are counted in a Space-Saving sketch tracking hot_keys keys. route
+    registers a GET endpoint returning both as JSON.
+    """
+
+    slow_threshold: float = 0.01
+    slow_log_size: int = 128
+    sample_rate: float = 0.01
+    hot_keys: int = 64
+    route: str | None = None
+
+    def __post_init__(self) -> None:
+        if self.slow_threshold < 0:
+            raise ValueError("slow_threshold must not be negative")
+        if self.slow_log_size < 1:
+            raise ValueError("slow_log_size must be at least 1")
+        if not 0 <= self.sample_rate <= 1:
+            raise ValueError("sample_rate must be between 0 and 1")
+        if self.hot_keys < 1:
+            raise ValueError("hot_keys must be at least 1")
+
+
+@dataclass(frozen=True)
+class SlowCommand:
+    """A command that took longer than the slow threshold."""
+
+    command: str
+    key_pattern: str | None
+    duration: float
+    reply_size: int
+    route: str | None
+    timestamp: float
+
+
+def command_keys(args: tuple[Any, ...]) -> list[Any]:
+    """Return the keys of a command, best effort and without a server lookup."""
+    name = command_name(args)
+    if len(args) < 2 or name in KEYLESS_COMMANDS:
+        return []
+    if name in MULTI_KEY_COMMANDS:
+        return list(args[1:])
+    if name == "MSET":
+        return list(args[1::2])
+    if name in SCRIPT_COMMANDS:
+        try:
+            numkeys = int(args[2])
+        except (IndexError, TypeError, ValueError):
+            return []
+        return list(args[3 : 3 + numkeys])
+    return [args[1]]
+
+
+def _key_text(key: Any) -> str:
+    if isinstance(key, (bytes, memoryview)):
+        return bytes(key).decode(errors="replace")
+    return str(key)
+
+
+def key_pattern(key: Any) -> str:
+    """Replace ids and numbers in a key with * to group keys by shape."""
+    return _KEY_ID.sub("*", _key_text(key))
+
+
+def reply_size(reply: Any) -> int:
+    """Approximate the payload size of a reply in bytes."""
+    if isinstance(reply, (bytes, str, memoryview)):
+        return len(reply)
+    if isinstance(reply, dict):
+        return sum(reply_size(k) + reply_size(v) for k, v in reply.items())
+    if isinstance(reply, (list, tuple, set)):
+        return sum(reply_size(item) for item in reply)
+    return 0
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitter sketch over a fixed number of counters.
+
+    When the sketch is full, a new key replaces the key with the lowest
+    count and inherits that count, so counts are over-estimates bounded by
+    the replaced count.
+    """
+
+    capacity: int
+    counts: dict[str, int]
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.counts = {}
+
+    def add(self, key: str) -> None:
+        """Count one occurrence of key."""
+        counts = self.counts
+        if key in counts:
+            counts[key] += 1
+        elif len(counts) < self.capacity:
+            counts[key] = 1
+        else:
+            victim = min(counts, key=counts.__getitem__)
+            counts[key] = counts.pop(victim) + 1
+
+    def top(self, limit: int | None = None) -> list[tuple[str, int]]:
+        """Return keys by descending count."""
+        ranked = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+        return ranked if limit is None else ranked[:limit]
+
+    def clear(self) -> None:
+        """Forget all counts."""
+        self.counts.clear()
+
+
+def _current_route() -> str | None:
+    try:
+        request = Request.get_current()
+    except ServerError:
+        return None
+    return request.uri_template or request.path
+
+
+class RedisDiagnostics:
+    """
+    Record slow commands and sample accessed keys of a client.
+
+    install() wraps execute_command on the client. Every command is timed;
+    only slow commands pay for building a log entry, and only sampled
+    commands touch the hot-key sketch.
+    """
+
+    client: Redis | RedisCluster
+    options: DiagnosticsOptions
+    slow_log: deque[SlowCommand]
+    sketch: SpaceSaving
+    commands: int
+
+    def __init__(self, client: Redis | RedisCluster, options: DiagnosticsOptions):
+        self.client = client
+        self.options = options
+        self.slow_log = deque(maxlen=options.slow_log_size)
+        self.sketch = SpaceSaving(options.hot_keys)
+        self.commands = 0
+        self._execute_command = client.execute_command
+
+    def install(self) -> None:
+        """Record the client's slow commands and hot keys."""
+        self.client.execute_command = self.execute_command
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        """Run a command and record it when it is slow or sampled."""
+        self.commands += 1
+        if random.random() < self.options.sample_rate:
+            for key in command_keys(args):
+                self.sketch.add(_key_text(key))
+        started = time.perf_counter()
+        reply = None
+        try:
+            reply = await self._execute_command(*args, **options)
+            return reply
+        finally:
+            duration = time.perf_counter() - started
+            if duration >= self.options.slow_threshold:
+                self._log_slow(args, duration, reply)
+
+    def _log_slow(self, args: tuple[Any, ...], duration: float, reply: Any) -> None:
+        keys = command_keys(args)
+        self.slow_log.append(
+            SlowCommand(
+                command=command_name(args),
+                key_pattern=key_pattern(keys[0]) if keys else None,
+                duration=duration,
+                reply_size=reply_size(reply),
+                route=_current_route(),
+                timestamp=time.time(),
+            )
+        )
+
+    def slow_commands(self) -> list[SlowCommand]:
+        """Return logged slow commands, newest first."""
+        return list(reversed(self.slow_log))
+
+    def hot_keys(self, limit: int | None = None) -> list[tuple[str, int]]:
+        """Return sampled hot keys with counts scaled to all commands."""
+        scale = 1 / self.options.sample_rate if self.options.sample_rate else 0
+        return [(key, round(count * scale)) for key, count in self.sketch.top(limit)]
+
+    def stats(self) -> dict[str, Any]:
+        """Return the slow log and hot keys in a JSON-friendly form."""
+        return {
+            "commands": self.commands,
+            "slow_threshold": self.options.slow_threshold,
+            "slow_commands": [asdict(entry) for entry in self.slow_commands()],
+            "hot_keys": [
+                {"key": key, "count": count} for key, count in self.hot_keys()
+            ],
+        }
+
+    def reset(self) -> None:
+        """Clear the slow log and the hot-key sketch."""
+        self.slow_log.clear()
+        self.sketch.clear()
+        self.commands = 0
+
+    async def aclose(self) -> None:
+        """Release nothing; diagnostics only hold in-memory state."""
+
+
+def add_diagnostics_route(app: Sanic, uri: str, ctx_name: str = "redis") -> None:
+    """Register a GET route returning app.ctx.<ctx_name>_diagnostics.stats()."""
+    diagnostics_name = f"{ctx_name}_diagnostics"
+
+    async def redis_diagnostics(request: Request) -> HTTPResponse:
+        diagnostics = getattr(request.app.ctx, diagnostics_name)
+        return json(diagnostics.stats())
+
+    app.add_route(redis_diagnostics, uri, methods=["GET"], name=diagnostics_name)
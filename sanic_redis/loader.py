@@ -0,0 +1,206 @@
+"""
+Sanic-Redis batching loader
+"""
+
+import asyncio
+from collections.abc import Hashable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from redis.asyncio import Redis
+from redis.asyncio.cluster import RedisCluster
+
+from .cluster import hmget_many, mget
+
+
+@dataclass(frozen=True)
+class LoaderOptions:
+    """
+    Options for merging individual reads into MGET and HMGET calls.
+
+    Reads requested in the same event-loop tick are merged; a batch is sent
+    early once max_batch_size distinct keys or fields are queued.
+    """
+
+    max_batch_size: int = 512
+
+    def __post_init__(self) -> None:
+        if self.max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+
+class RedisLoader:
+    """
+    Batch GET and HGET style reads issued by concurrent coroutines.
+
+    Identical keys requested while a batch is pending share one future, plain
+    keys are fetched with a single MGET (one per hash slot on a cluster) and
+    hash fields with one HMGET per hash. The loader does not remember values
+    between batches; use scope() for per-request memoization.
+    """
+
+    client: Redis | RedisCluster
+    options: LoaderOptions
+    batches: int
+
+    def __init__(self, client: Redis | RedisCluster, options: LoaderOptions) -> None:
+        self.client = client
+        self.options = options
+        self.batches = 0
+        self._keys: dict[Any, asyncio.Future] = {}
+        self._fields: dict[tuple[Any, Any], asyncio.Future] = {}
+        self._flush_handle: asyncio.Handle | None = None
+        self._inflight: set[asyncio.Task] = set()
+
+    async def load(self, key: Any) -> Any:
+        """Return the value of key, fetched with other keys in one MGET."""
+        future = self._keys.get(key)
+        if future is None:
+            future = self._keys[key] = asyncio.get_running_loop().create_future()
+            self._schedule()
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: Iterable[Any]) -> list[Any]:
+        """Return the values of keys in order."""
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    async def load_field(self, name: Any, field: Any) -> Any:
+        """Return one hash field, fetched with other fields in one HMGET."""
+        future = self._fields.get((name, field))
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._fields[(name, field)] = future
+            self._schedule()
+        return await asyncio.shield(future)
+
+    def scope(self) -> "LoaderScope":
+        """Return a memoizing view of this loader for one unit of work."""
+        return LoaderScope(self)
+
+    async def aclose(self) -> None:
+        """Send queued reads and wait for in-flight batches."""
+        self._flush()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    def _schedule(self) -> None:
+        if len(self._keys) + len(self._fields) >= self.options.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_soon(self._flush)
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        keys, self._keys = self._keys, {}
+        fields, self._fields = self._fields, {}
+        if not keys and not fields:
+            return
+        self.batches += 1
+        for coro in (
+            self._send_keys(keys) if keys else None,
+            self._send_fields(fields) if fields else None,
+        ):
+            if coro is None:
+                continue
+            task = asyncio.ensure_future(coro)
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _send_keys(self, batch: dict[Any, asyncio.Future]) -> None:
+        try:
+            values = await mget(self.client, batch)
+        except BaseException as exc:
+            _fail(batch.values(), exc)
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            return
+        for future, value in zip(batch.values(), values, strict=True):
+            if not future.done():
+                future.set_result(value)
+
+    async def _send_fields(self, batch: dict[tuple[Any, Any], asyncio.Future]) -> None:
+        hashes: dict[Any, list[Any]] = {}
+        for name, field in batch:
+            hashes.setdefault(name, []).append(field)
+        try:
+            replies = await hmget_many(self.client, hashes)
+        except BaseException as exc:
+            _fail(batch.values(), exc)
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            return
+        for name, names in hashes.items():
+            for field, value in zip(names, replies[name], strict=True):
+                future = batch[(name, field)]
+                if not future.done():
+                    future.set_result(value)
+
+
+class LoaderScope:
+    """
+    Memoize loader results for the lifetime of one request.
+
+    SanicRedis stores a new scope on request.ctx for every request, so a
+    handler and everything it calls read each key from Redis at most once.
+    """
+
+    loader: RedisLoader
+
+    def __init__(self, loader: RedisLoader) -> None:
+        self.loader = loader
+        self._memo: dict[Hashable, asyncio.Future] = {}
+
+    async def load(self, key: Any) -> Any:
+        """Return the value of key, reading it from Redis once per scope."""
+        future = self._memo.get(key)
+        if future is None:
+            future = self._memo[key] = asyncio.ensure_future(self.loader.load(key))
+        return await self._wait(key, future)
+
+    async def load_many(self, keys: Iterable[Any]) -> list[Any]:
+        """Return the values of keys in order."""
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    async def load_field(self, name: Any, field: Any) -> Any:
+        """Return one hash field, reading it from Redis once per scope."""
+        memo_key = ("field", name, field)
+        future = self._memo.get(memo_key)
+        if future is None:
+            future = self._memo[memo_key] = asyncio.ensure_future(
+                self.loader.load_field(name, field)
+            )
+        return await self._wait(memo_key, future)
+
+    async def _wait(self, memo_key: Hashable, future: asyncio.Future) -> Any:
+        try:
+            return await asyncio.shield(future)
+        except Exception:
+            # Failed reads are retried by the next caller instead of cached.
+            if self._memo.get(memo_key) is future:
+                del self._memo[memo_key]
+            raise
+
+    def prime(self, key: Any, value: Any) -> None:
+        """Remember value for key, e.g. after the handler wrote it."""
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(value)
+        self._memo[key] = future
+
+    def clear(self, key: Any = None) -> None:
+        """Forget key, or every remembered value when key is None."""
+        if key is None:
+            self._memo.clear()
+        else:
+            self._memo.pop(key, None)
+
+
+def _fail(futures: Iterable[asyncio.Future], exc: BaseException) -> None:
+    for future in futures:
+        if future.done():
+            continue
+        if isinstance(exc, asyncio.CancelledError):
+            future.cancel()
+        else:
+            future.set_exception(exc)
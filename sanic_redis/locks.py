@@ -0,0 +1,384 @@
+"""
+Sanic-Redis distributed locks
+"""
+
+import asyncio
+import random
+import uuid
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from redis.asyncio import Redis
+from redis.asyncio.cluster import RedisCluster
+from redis.commands.core import AsyncScript
+from redis.exceptions import ConnectionError, TimeoutError
+from sanic.log import logger
+
+from .tasks import stop_task
+
+_T = TypeVar("_T")
+
+# Seconds a renewal in flight gets to finish before it is cancelled.
+RENEWAL_STOP_GRACE = 1.0
+
+# KEYS[1] = lock key, ARGV = token and lease in milliseconds. Returns 0 when
+# the lock was taken, else the holder's remaining lease in milliseconds.
+ACQUIRE_SCRIPT = """
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return 0
+end
+return redis.call('PTTL', KEYS[1])
+"""
+
+RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class LockTimeoutError(asyncio.TimeoutError):
+    """Raised when a lock could not be acquired within its timeout."""
+
+
+@dataclass(frozen=True)
+class LockOptions:
+    """
+    Options for distributed locks.
+
+    lease is how long a lock key lives in Redis without renewal. Held locks
+    are renewed every renew_interval seconds, a third of lease by default,
+    so slow holders keep them while crashed workers lose them after lease
+    seconds. timeout bounds how long acquiring waits; None waits forever.
+    retry_interval caps the pause between attempts while another worker
+    holds the lock.
+    """
+
+    lease: float = 10.0
+    renew_interval: float | None = None
+    timeout: float | None = None
+    retry_interval: float = 0.2
+    prefix: str = "sanic-redis:lock:"
+
+    def __post_init__(self) -> None:
+        if self.lease <= 0:
+            raise ValueError("lease must be positive")
+        if self.renew_interval is not None and not (
+            0 < self.renew_interval < self.lease
+        ):
+            raise ValueError("renew_interval must be positive and below lease")
+        if self.timeout is not None and self.timeout < 0:
+            raise ValueError("timeout must not be negative")
+        if self.retry_interval <= 0:
+            raise ValueError("retry_interval must be positive")
+
+
+class _Gate:
+    __slots__ = ("waiters",)
+
+    def __init__(self) -> None:
+        # Coroutines of this worker queued behind the one owning the gate.
+        self.waiters: deque[asyncio.Future] = deque()
+
+
+class RedisLock:
+    """
+    Lock on one name, held across all workers sharing the Redis server.
+
+    Use it as an async context manager, or call acquire() and release().
+    lost is set when the lease could not be kept, for example after Redis
+    evicted the key; the lock may then have been taken by someone else.
+    """
+
+    name: str
+    key: str
+    lease: float
+    timeout: float | None
+    token: str | None
+    lost: bool
+
+    def __init__(
+        self, locks: "RedisLocks", name: str, lease: float, timeout: float | None
+    ) -> None:
+        self.name = name
+        self.key = locks.options.prefix + name
+        self.lease = lease
+        self.timeout = timeout
+        self.token = None
+        self.lost = False
+        self._locks = locks
+        self._renewal: asyncio.Task | None = None
+        self._stop_renewing = asyncio.Event()
+
+    @property
+    def locked(self) -> bool:
+        """Whether this lock object currently holds the lock."""
+        return self.token is not None
+
+    async def __aenter__(self) -> "RedisLock":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.release()
+
+    async def acquire(self) -> None:
+        """Wait until the lock is held; raise LockTimeoutError on timeout."""
+        if self.token is not None:
+            raise RuntimeError(f"lock {self.name!r} is already held")
+        await self._locks._acquire(self)
+
+    async def release(self) -> None:
+        """Release the lock if this object still owns it in Redis."""
+        if self.token is None:
+            raise RuntimeError(f"lock {self.name!r} is not held")
+        await self._locks._release(self, self.token)
+
+
+class RedisLocks:
+    """
+    Distributed locks and single-flight calls backed by one client.
+
+    A lock is taken with one atomic SET NX PX, renewed in the background
+    while held and released only by the token that took it. Coroutines of
+    one worker that want the same name queue locally behind a single one
+    that talks to Redis, so contention costs one poll per worker instead of
+    one per coroutine.
+    """
+
+    client: Redis | RedisCluster
+    options: LockOptions
+    acquired: int
+    contended: int
+    lost: int
+
+    def __init__(self, client: Redis | RedisCluster, options: LockOptions) -> None:
+        self.client = client
+        self.options = options
+        self.acquired = 0
+        self.contended = 0
+        self.lost = 0
+        self._acquire_script: AsyncScript = client.register_script(ACQUIRE_SCRIPT)
+        self._renew_script: AsyncScript = client.register_script(RENEW_SCRIPT)
+        self._release_script: AsyncScript = client.register_script(RELEASE_SCRIPT)
+        self._gates: dict[str, _Gate] = {}
+        self._held: set[RedisLock] = set()
+        self._flights: dict[str, asyncio.Future] = {}
+        self._closed = False
+
+    def __call__(
+        self, name: str, lease: float | None = None, timeout: float | None = None
+    ) -> RedisLock:
+        """Return a lock on name; lease and timeout default to the options."""
+        if lease is not None and lease <= 0:
+            raise ValueError("lease must be positive")
+        return RedisLock(
+            self,
+            name,
+            self.options.lease if lease is None else lease,
+            self.options.timeout if timeout is None else timeout,
+        )
+
+    async def single_flight(
+        self,
+        name: str,
+        func: Callable[..., Awaitable[_T]],
+        *args: Any,
+        **kwargs: Any,
+    ) -> _T:
+        """
+        Run func under the lock on name and share its result in this worker.
+
+        Concurrent calls for name in this worker await the running call
+        instead of starting another one. Other workers wait for the lock and
+        then run func themselves, so func should first check whether the
+        work is already done, for example by reading a cache.
+        """
+        flight = self._flights.get(name)
+        if flight is None:
+            flight = asyncio.ensure_future(self._fly(name, func, args, kwargs))
+            self._flights[name] = flight
+            flight.add_done_callback(lambda _flight: self._land(name, _flight))
+        # Cancelling one caller must not cancel the call others wait for.
+        return await asyncio.shield(flight)
+
+    def stats(self) -> dict[str, int]:
+        """Return lock counters for monitoring."""
+        return {
+            "held": len(self._held),
+            "waiting": sum(
+                not waiter.done()
+                for gate in self._gates.values()
+                for waiter in gate.waiters
+            ),
+            "acquired": self.acquired,
+            "contended": self.contended,
+            "lost": self.lost,
+        }
+
+    async def aclose(self) -> None:
+        """Stop renewing held locks; their leases expire in Redis."""
+        self._closed = True
+        await asyncio.gather(
+            *(self._stop_renewal(lock, lock._renewal) for lock in self._held)
+        )
+
+    async def _fly(
+        self,
+        name: str,
+        func: Callable[..., Awaitable[_T]],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> _T:
+        async with self(name):
+            return await func(*args, **kwargs)
+
+    def _land(self, name: str, flight: asyncio.Future) -> None:
+        if self._flights.get(name) is flight:
+            del self._flights[name]
+        if not flight.cancelled():
+            # Every caller may have been cancelled; do not log the error.
+            flight.exception()
+
+    async def _acquire(self, lock: RedisLock) -> None:
+        if self._closed:
+            raise RuntimeError("the lock manager is closed")
+        loop = asyncio.get_running_loop()
+        deadline = None if lock.timeout is None else loop.time() + lock.timeout
+        await self._enter(lock, deadline)
+        try:
+            token = await self._take(lock, deadline)
+        except BaseException:
+            self._leave(lock.name)
+            raise
+        self.acquired += 1
+        self._held.add(lock)
+        lock._stop_renewing.clear()
+        lock._renewal = asyncio.ensure_future(self._renew(lock, token))
+
+    async def _enter(self, lock: RedisLock, deadline: float | None) -> None:
+        gate = self._gates.get(lock.name)
+        if gate is None:
+            self._gates[lock.name] = _Gate()
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        gate.waiters.append(waiter)
+        timeout = None
+        if deadline is not None:
+            timeout = max(0.0, deadline - asyncio.get_running_loop().time())
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except BaseException as error:
+            if waiter.done() and not waiter.cancelled():
+                # The gate was handed over while this waiter gave up.
+                self._leave(lock.name)
+            else:
+                waiter.cancel()
+            if isinstance(error, asyncio.TimeoutError):
+                raise LockTimeoutError(
+                    f"timed out waiting for lock {lock.name!r}"
+                ) from None
+            raise
+
+    def _leave(self, name: str) -> None:
+        gate = self._gates[name]
+        while gate.waiters:
+            waiter = gate.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        del self._gates[name]
+
+    async def _take(self, lock: RedisLock, deadline: float | None) -> str:
+        loop = asyncio.get_running_loop()
+        token = uuid.uuid4().hex
+        lease_ms = max(1, int(lock.lease * 1000))
+        while True:
+            remaining_ms = await self._acquire_script(
+                keys=[lock.key], args=[token, lease_ms], client=self.client
+            )
+            if int(remaining_ms) == 0:
+                lock.token = token
+                lock.lost = False
+                return token
+            self.contended += 1
+            delay = self.options.retry_interval
+            if int(remaining_ms) > 0:
+                delay = min(delay, int(remaining_ms) / 1000)
+            # Jitter keeps workers from polling in lockstep.
+            delay *= random.uniform(0.5, 1.0)
+            if deadline is not None:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise LockTimeoutError(f"timed out waiting for lock {lock.name!r}")
+                delay = min(delay, remaining)
+            await asyncio.sleep(delay)
+
+    async def _renew(self, lock: RedisLock, token: str) -> None:
+        interval = self.options.renew_interval or lock.lease / 3
+        lease_ms = max(1, int(lock.lease * 1000))
+        while True:
+            try:
+                await asyncio.wait_for(lock._stop_renewing.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+            # Checked on every pass, as a cancellation can get lost inside
+            # the renewal command.
+            if lock._stop_renewing.is_set():
+                return
+            try:
+                renewed = await self._renew_script(
+                    keys=[lock.key], args=[token, lease_ms], client=self.client
+                )
+            except (ConnectionError, TimeoutError):
+                logger.warning(
+                    "[sanic-redis] could not renew lock %s", lock.name, exc_info=True
+                )
+                continue
+            if not renewed:
+                self._mark_lost(lock)
+                return
+
+    async def _release(self, lock: RedisLock, token: str) -> None:
+        renewal, lock._renewal = lock._renewal, None
+        await self._stop_renewal(lock, renewal)
+        lock.token = None
+        self._held.discard(lock)
+        try:
+            released = await self._release_script(
+                keys=[lock.key], args=[token], client=self.client
+            )
+        finally:
+            self._leave(lock.name)
+        if not released and not lock.lost:
+            self._mark_lost(lock)
+
+    async def _stop_renewal(
+        self, lock: RedisLock, renewal: asyncio.Task | None
+    ) -> None:
+        lock._stop_renewing.set()
+        if renewal is None:
+            return
+        # The renewer returns on its own unless a renewal is in flight.
+        await asyncio.wait((renewal,), timeout=RENEWAL_STOP_GRACE)
+        try:
+            await stop_task(renewal)
+        except Exception:
+            logger.warning(
+                "[sanic-redis] renewal of lock %s failed", lock.name, exc_info=True
+            )
+
+    def _mark_lost(self, lock: RedisLock) -> None:
+        lock.lost = True
+        self.lost += 1
+        logger.warning("[sanic-redis] lost lock %s before releasing it", lock.name)
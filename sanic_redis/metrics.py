@@ -0,0 +1,343 @@
+"""
+Sanic-Redis metrics
+"""
+
+import asyncio
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any, Protocol
+
+from redis.asyncio import Redis
+from redis.asyncio.cluster import RedisCluster
+from redis.exceptions import TimeoutError
+from sanic import Request, Sanic
+from sanic.response import HTTPResponse, text
+
+from .pipelining import command_name
+
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsExporter(Protocol):
+    """
+    Receive command observations and pool state from RedisMetrics hooks.
+
+    observe_command runs on every command and must not block. register and
+    unregister attach the hooks whose gauges are read at export time.
+    render returns the text served by the metrics route.
+    """
+
+    def observe_command(
+        self,
+        ctx_name: str,
+        command: str,
+        duration: float,
+        error: BaseException | None,
+    ) -> None: ...
+
+    def register(self, source: "RedisMetrics") -> None: ...
+
+    def unregister(self, source: "RedisMetrics") -> None: ...
+
+    def render(self) -> str: ...
+
+
+class _Histogram:
+    __slots__ = ("buckets", "count", "sum")
+
+    def __init__(self, size: int) -> None:
+        # One slot per bucket plus +Inf; counts are made cumulative on render.
+        self.buckets = [0] * (size + 1)
+        self.count = 0
+        self.sum = 0.0
+
+
+def _labels(**labels: str) -> str:
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name,
+            value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in labels.items()
+    )
+    return "{" + pairs + "}"
+
+
+def _number(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(value)
+
+
+class PrometheusExporter:
+    """
+    Keep metrics in process memory and render the Prometheus text format.
+
+    Latency is recorded in fixed histogram buckets, so each observation is a
+    bisect and a few integer increments. Gauges are read from the registered
+    hooks only when render() is called.
+    """
+
+    buckets: tuple[float, ...]
+    sources: list["RedisMetrics"]
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        if not buckets or list(buckets) != sorted(set(buckets)):
+            raise ValueError("buckets must be unique and sorted in ascending order")
+        self.buckets = buckets
+        self.sources = []
+        self._histograms: dict[tuple[str, str], _Histogram] = {}
+        self._errors: dict[tuple[str, str, str], int] = {}
+        self._timeouts: dict[tuple[str, str], int] = {}
+
+    def observe_command(
+        self,
+        ctx_name: str,
+        command: str,
+        duration: float,
+        error: BaseException | None,
+    ) -> None:
+        """Record one command latency and its error, if any."""
+        key = (ctx_name, command)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = _Histogram(len(self.buckets))
+        histogram.buckets[bisect_left(self.buckets, duration)] += 1
+        histogram.count += 1
+        histogram.sum += duration
+        if error is None:
+            return
+        if isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+            self._timeouts[key] = self._timeouts.get(key, 0) + 1
+        else:
+            error_key = (ctx_name, command, type(error).__name__)
+            self._errors[error_key] = self._errors.get(error_key, 0) + 1
+
+    def register(self, source: "RedisMetrics") -> None:
+        """Export the gauges of a client hook."""
+        if source not in self.sources:
+            self.sources.append(source)
+
+    def unregister(self, source: "RedisMetrics") -> None:
+        """Stop exporting the gauges of a client hook."""
+        if source in self.sources:
+            self.sources.remove(source)
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP sanic_redis_command_duration_seconds Redis command latency.",
+            "# TYPE sanic_redis_command_duration_seconds histogram",
+        ]
+        for (ctx_name, command), histogram in sorted(self._histograms.items()):
+            cumulative = 0
+            bounds = (*self.buckets, float("inf"))
+            for bound, count in zip(bounds, histogram.buckets, strict=True):
+                cumulative += count
+                labels = _labels(ctx_name=ctx_name, command=command, le=_number(bound))
+                lines.append(
+                    f"sanic_redis_command_duration_seconds_bucket{labels} {cumulative}"
+                )
+            labels = _labels(ctx_name=ctx_name, command=command)
+            lines.append(
+                f"sanic_redis_command_duration_seconds_sum{labels} "
+                f"{_number(histogram.sum)}"
+            )
+            lines.append(
+                f"sanic_redis_command_duration_seconds_count{labels} {histogram.count}"
+            )
+
+        lines += [
+            "# HELP sanic_redis_command_errors_total Redis commands that failed.",
+            "# TYPE sanic_redis_command_errors_total counter",
+        ]
+        for (ctx_name, command, error), count in sorted(self._errors.items()):
+            labels = _labels(ctx_name=ctx_name, command=command, error=error)
+            lines.append(f"sanic_redis_command_errors_total{labels} {count}")
+
+        lines += [
+            "# HELP sanic_redis_command_timeouts_total Redis commands that timed out.",
+            "# TYPE sanic_redis_command_timeouts_total counter",
+        ]
+        for (ctx_name, command), count in sorted(self._timeouts.items()):
+            labels = _labels(ctx_name=ctx_name, command=command)
+            lines.append(f"sanic_redis_command_timeouts_total{labels} {count}")
+
+        lines += [
+            "# HELP sanic_redis_commands_in_flight Redis commands awaiting a reply.",
+            "# TYPE sanic_redis_commands_in_flight gauge",
+        ]
+        for source in self.sources:
+            labels = _labels(ctx_name=source.ctx_name)
+            lines.append(f"sanic_redis_commands_in_flight{labels} {source.in_flight}")
+
+        lines += [
+            "# HELP sanic_redis_pool_connections Redis pool connections by state.",
+            "# TYPE sanic_redis_pool_connections gauge",
+        ]
+        for source in self.sources:
+            for state, count in source.pool_stats().items():
+                labels = _labels(ctx_name=source.ctx_name, state=state)
+                lines.append(f"sanic_redis_pool_connections{labels} {count}")
+
+        lines += [
+            "# HELP sanic_redis_pool_wait_seconds Time spent waiting for a pool "
+            "connection.",
+            "# TYPE sanic_redis_pool_wait_seconds histogram",
+        ]
+        for source in self.sources:
+            wait = source.pool_wait()
+            if wait is None:
+                continue
+            buckets, histogram = wait
+            cumulative = 0
+            bounds = (*buckets, float("inf"))
+            for bound, count in zip(bounds, histogram.buckets, strict=True):
+                cumulative += count
+                labels = _labels(ctx_name=source.ctx_name, le=_number(bound))
+                lines.append(
+                    f"sanic_redis_pool_wait_seconds_bucket{labels} {cumulative}"
+                )
+            labels = _labels(ctx_name=source.ctx_name)
+            lines.append(
+                f"sanic_redis_pool_wait_seconds_sum{labels} {_number(histogram.sum)}"
+            )
+            lines.append(
+                f"sanic_redis_pool_wait_seconds_count{labels} {histogram.count}"
+            )
+        return "\n".join(lines) + "\n"
+
+
+default_exporter = PrometheusExporter()
+
+
+@dataclass(frozen=True)
+class MetricsOptions:
+    """
+    Options for client metrics.
+
+    exporter receives the measurements; the process-wide PrometheusExporter
+    is shared by default, so several SanicRedis instances appear in one
+    exposition labeled by ctx_name. route registers a GET endpoint serving
+    exporter.render(); set it on one instance per app.
+    """
+
+    exporter: MetricsExporter = field(default_factory=lambda: default_exporter)
+    route: str | None = None
+
+
+def pool_stats(client: Redis | RedisCluster) -> dict[str, int]:
+    """Return in-use, idle and waiting connection counts of a client."""
+    if isinstance(client, RedisCluster):
+        in_use = idle = 0
+        for node in client.get_nodes():
+            idle += len(node._free)
+            in_use += len(node._connections) - len(node._free)
+        return {"in_use": in_use, "idle": idle, "waiting": 0}
+    pool = client.connection_pool
+    # Only blocking pools make callers wait for a connection.
+    waiting = getattr(pool, "waiting", None)
+    if waiting is None:
+        waiters = getattr(getattr(pool, "_condition", None), "_waiters", None)
+        waiting = len(waiters or ())
+    return {
+        "in_use": len(pool._in_use_connections),
+        "idle": len(pool._available_connections),
+        "waiting": waiting,
+    }
+
+
+class RedisMetrics:
+    """
+    Measure latency, errors and in-flight commands of a client.
+
+    install() wraps execute_command on the client, so every command issued
+    through the client API is timed as the caller sees it, including time
+    spent in other client hooks. Commands sent through pipelines and
+    transactions are not observed individually.
+    """
+
+    client: Redis | RedisCluster
+    ctx_name: str
+    exporter: MetricsExporter
+    in_flight: int
+
+    def __init__(
+        self,
+        client: Redis | RedisCluster,
+        ctx_name: str,
+        options: MetricsOptions,
+    ) -> None:
+        self.client = client
+        self.ctx_name = ctx_name
+        self.exporter = options.exporter
+        self.in_flight = 0
+        self._execute_command = client.execute_command
+
+    def install(self) -> None:
+        """Time the client's commands and export its gauges."""
+        self.client.execute_command = self.execute_command
+        self.exporter.register(self)
+
+    def pool_stats(self) -> dict[str, int]:
+        """Return in-use, idle and waiting connection counts."""
+        return pool_stats(self.client)
+
+    def pool_wait(self) -> tuple[tuple[float, ...], _Histogram] | None:
+        """Return the bucket bounds and histogram of connection waits, if any."""
+        pool: Any = getattr(self.client, "connection_pool", None)
+        histogram = getattr(pool, "wait_times", None)
+        if histogram is None:
+            return None
+        return pool.wait_buckets, histogram
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        """Run a command and record its latency."""
+        name = command_name(args)
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            result = await self._execute_command(*args, **options)
+        except Exception as error:
+            self.exporter.observe_command(
+                self.ctx_name, name, time.perf_counter() - started, error
+            )
+            raise
+        finally:
+            self.in_flight -= 1
+        self.exporter.observe_command(
+            self.ctx_name, name, time.perf_counter() - started, None
+        )
+        return result
+
+    async def aclose(self) -> None:
+        """Stop exporting the client's gauges."""
+        self.exporter.unregister(self)
+
+
+def add_metrics_route(
+    app: Sanic,
+    uri: str = "/metrics",
+    exporter: MetricsExporter | None = None,
+    name: str = "sanic_redis_metrics",
+) -> None:
+    """Register a GET route serving the exporter's text exposition."""
+    _exporter = default_exporter if exporter is None else exporter
+
+    async def redis_metrics(_request: Request) -> HTTPResponse:
+        return text(_exporter.render(), content_type=CONTENT_TYPE)
+
+    app.add_route(redis_metrics, uri, methods=["GET"], name=name)
@@ -0,0 +1,369 @@
+"""
+Sanic-Redis in-process near cache
+"""
+
+import asyncio
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError, ResponseError, TimeoutError
+from sanic.log import logger
+
+from .pipelining import command_name
+from .tasks import stop_task
+
+INVALIDATE_CHANNEL = b"__redis__:invalidate"
+
+# Read commands whose reply only depends on the key in args[1].
+CACHEABLE_COMMANDS = frozenset(
+    {
+        "GET",
+        "GETRANGE",
+        "HEXISTS",
+        "HGET",
+        "HGETALL",
+        "HKEYS",
+        "HLEN",
+        "HMGET",
+        "HSTRLEN",
+        "HVALS",
+        "LINDEX",
+        "LLEN",
+        "LRANGE",
+        "SCARD",
+        "SISMEMBER",
+        "SMEMBERS",
+        "STRLEN",
+        "ZCARD",
+        "ZRANGE",
+        "ZSCORE",
+    }
+)
+
+
+def key_bytes(key: Any) -> bytes:
+    """Normalize a Redis key to the bytes form used in invalidation messages."""
+    if isinstance(key, bytes):
+        return key
+    if isinstance(key, memoryview):
+        return key.tobytes()
+    return str(key).encode()
+
+
+def _size_of(value: Any) -> int:
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(sys.getsizeof(item) for item in value)
+    return size
+
+
+def _entry_key(
+    name: str, args: tuple[Any, ...], options: dict[str, Any]
+) -> tuple[Any, ...] | None:
+    # Options such as score_cast_func change how the reply is parsed, so
+    # they are part of the key; keys= only repeats args[1].
+    parse_options = tuple(
+        sorted(
+            ((option, value) for option, value in options.items() if option != "keys"),
+            key=lambda item: item[0],
+        )
+    )
+    entry_key = (name, *args[1:], parse_options)
+    try:
+        hash(entry_key)
+    except TypeError:
+        return None
+    return entry_key
+
+
+def _copy_reply(value: Any) -> Any:
+    # Mutable replies are copied so callers cannot change cached entries.
+    if isinstance(value, (dict, list, set)):
+        return value.copy()
+    return value
+
+
+@dataclass(frozen=True)
+class NearCacheOptions:
+    """
+    Options for the in-worker read cache placed in front of a Redis client.
+
+    max_entries and max_memory (in bytes) bound the cache; least recently used
+    entries are evicted first. Entries expire after ttl seconds. With tracking
+    enabled the cache is kept coherent with Redis server-assisted client
+    tracking in broadcast mode, limited to prefixes when they are given. When
+    the server does not support tracking, or tracking is false, entries are
+    only bounded by ttl.
+    """
+
+    max_entries: int = 10_000
+    max_memory: int = 64 * 1024 * 1024
+    ttl: float = 60.0
+    tracking: bool = True
+    prefixes: tuple[str, ...] = ()
+
+    def __post_init__(self) -> None:
+        if self.max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if self.max_memory < 1:
+            raise ValueError("max_memory must be at least 1")
+        if self.ttl <= 0:
+            raise ValueError("ttl must be positive")
+
+
+class NearCache:
+    """
+    Serve repeated reads of hot keys from worker memory.
+
+    install() wraps execute_command on the client instance. Cacheable reads
+    are answered locally when possible, and every other command invalidates
+    local entries for the keys it mentions. In tracking mode a dedicated
+    connection subscribes to Redis invalidation messages; while it is not
+    connected the cache is bypassed.
+    """
+
+    client: Redis
+    options: NearCacheOptions
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    memory: int
+    tracking: bool
+
+    def __init__(self, client: Redis, options: NearCacheOptions) -> None:
+        self.client = client
+        self.options = options
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.memory = 0
+        self.tracking = False
+        self._execute_command = client.execute_command
+        self._entries: OrderedDict[tuple[Any, ...], tuple[Any, float, int]] = (
+            OrderedDict()
+        )
+        self._keys: dict[bytes, set[tuple[Any, ...]]] = {}
+        self._prefixes = tuple(key_bytes(prefix) for prefix in options.prefixes)
+        self._generation = 0
+        self._enabled = not options.tracking
+        self._listener: asyncio.Task | None = None
+        self._closing = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def install(self) -> None:
+        """Route the client's commands through the cache."""
+        self.client.execute_command = self.execute_command
+
+    def start(self) -> None:
+        """Start the invalidation listener when tracking is enabled."""
+        if self.options.tracking and self._listener is None:
+            self._closing = False
+            self._listener = asyncio.ensure_future(self._listen())
+
+    def stats(self) -> dict[str, int]:
+        """Return cache counters for monitoring."""
+        return {
+            "entries": len(self._entries),
+            "memory": self.memory,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        """Answer cacheable reads locally and invalidate on other commands."""
+        name = command_name(args)
+        if name not in CACHEABLE_COMMANDS:
+            try:
+                return await self._execute_command(*args, **options)
+            finally:
+                # Writes must also stop concurrent reads from storing replies
+                # that predate them.
+                self._generation += 1
+                self._invalidate_args(args[1:])
+
+        key = key_bytes(args[1])
+        if not self._enabled or not key.startswith(self._prefixes or (b"",)):
+            return await self._execute_command(*args, **options)
+
+        entry_key = _entry_key(name, args, options)
+        if entry_key is None:
+            return await self._execute_command(*args, **options)
+        entry = self._entries.get(entry_key)
+        if entry is not None:
+            value, expires_at, _size = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(entry_key)
+                self.hits += 1
+                return _copy_reply(value)
+            self._remove(entry_key)
+
+        self.misses += 1
+        generation = self._generation
+        value = await self._execute_command(*args, **options)
+        # Skip the store when an invalidation arrived while the read was in
+        # flight; the reply may already be stale.
+        if self._enabled and generation == self._generation:
+            self._store(entry_key, key, value)
+        return _copy_reply(value)
+
+    def invalidate(self, key: Any) -> None:
+        """Drop every cached reply for key."""
+        self._generation += 1
+        entry_keys = self._keys.pop(key_bytes(key), None)
+        if not entry_keys:
+            return
+        self.invalidations += len(entry_keys)
+        for entry_key in entry_keys:
+            self._remove(entry_key, unindex=False)
+
+    def clear(self) -> None:
+        """Drop all cached replies."""
+        self._generation += 1
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+        self._keys.clear()
+        self.memory = 0
+
+    async def aclose(self) -> None:
+        """Stop the invalidation listener and drop cached replies."""
+        self._enabled = False
+        self._closing = True
+        await stop_task(self._listener)
+        self._listener = None
+        # The listener may have enabled the cache again while stopping.
+        self._enabled = False
+        self.clear()
+
+    def _invalidate_args(self, args: tuple[Any, ...]) -> None:
+        if not self._keys:
+            return
+        for arg in args:
+            if (
+                isinstance(arg, (bytes, str, memoryview))
+                and key_bytes(arg) in self._keys
+            ):
+                self.invalidate(arg)
+
+    def _store(self, entry_key: tuple[Any, ...], key: bytes, value: Any) -> None:
+        size = _size_of(entry_key) + _size_of(value)
+        if size > self.options.max_memory:
+            return
+        if entry_key in self._entries:
+            self._remove(entry_key)
+        self._entries[entry_key] = (
+            value,
+            time.monotonic() + self.options.ttl,
+            size,
+        )
+        self._keys.setdefault(key, set()).add(entry_key)
+        self.memory += size
+        while (
+            len(self._entries) > self.options.max_entries
+            or self.memory > self.options.max_memory
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, entry_key: tuple[Any, ...], unindex: bool = True) -> None:
+        _value, _expires_at, size = self._entries.pop(entry_key)
+        self.memory -= size
+        if not unindex:
+            return
+        key = key_bytes(entry_key[1])
+        entry_keys = self._keys.get(key)
+        if entry_keys is not None:
+            entry_keys.discard(entry_key)
+            if not entry_keys:
+                del self._keys[key]
+
+    def _handle_message(self, message: Any) -> None:
+        if not isinstance(message, list) or len(message) < 3:
+            return
+        kind, channel, keys = message[0], message[1], message[2]
+        if key_bytes(kind) != b"message" or key_bytes(channel) != INVALIDATE_CHANNEL:
+            return
+        if keys is None:
+            # FLUSHDB/FLUSHALL invalidate everything.
+            self.clear()
+            return
+        for key in keys:
+            self.invalidate(key)
+
+    async def _listen(self) -> None:
+        pool = self.client.connection_pool
+        # RESP2 keeps invalidations as regular pub/sub messages on the
+        # redirect connection, regardless of the data connections' protocol.
+        connection_kwargs = dict(pool.connection_kwargs, protocol=2)
+        prefix_args: list[Any] = []
+        for prefix in self.options.prefixes:
+            prefix_args.extend(("PREFIX", prefix))
+        retry_delay = 0.1
+        # Checked on every pass, as a cancellation can get lost inside reads.
+        while not self._closing:
+            connection = pool.connection_class(**connection_kwargs)
+            try:
+                await connection.connect()
+                await connection.send_command("CLIENT", "ID")
+                client_id = await connection.read_response()
+                await connection.send_command(
+                    "CLIENT",
+                    "TRACKING",
+                    "ON",
+                    "REDIRECT",
+                    client_id,
+                    "BCAST",
+                    *prefix_args,
+                )
+                await connection.read_response()
+                await connection.send_command("SUBSCRIBE", INVALIDATE_CHANNEL)
+                await connection.read_response()
+                # Anything cached before tracking (re)started may be stale.
+                self.clear()
+                self._enabled = True
+                self.tracking = True
+                retry_delay = 0.1
+                while not self._closing:
+                    try:
+                        message = await connection.read_response(
+                            disconnect_on_error=False
+                        )
+                    except TimeoutError:
+                        continue
+                    self._handle_message(message)
+            except ResponseError:
+                logger.warning(
+                    "[sanic-redis] client tracking is not available; "
+                    "near cache falls back to TTL-only mode",
+                    exc_info=True,
+                )
+                self._enabled = True
+                self.tracking = False
+                return
+            except (RedisError, OSError):
+                # Includes timeouts while setting up tracking.
+                self._enabled = False
+                self.tracking = False
+                self.clear()
+                logger.warning(
+                    "[sanic-redis] near cache invalidation connection lost; "
+                    "reconnecting in %.1fs",
+                    retry_delay,
+                    exc_info=True,
+                )
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 5.0)
+            finally:
+                await connection.disconnect()
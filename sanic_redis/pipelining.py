@@ -0,0 +1,190 @@
+"""
+Sanic-Redis automatic pipelining
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any
+
+from redis.asyncio import Redis
+from redis.asyncio.cluster import RedisCluster
+
+# Commands that block, change connection state or expect a dedicated
+# connection are never merged into a shared pipeline.
+UNBATCHED_COMMANDS = frozenset(
+    {
+        "AUTH",
+        "BLMOVE",
+        "BLMPOP",
+        "BLPOP",
+        "BRPOP",
+        "BRPOPLPUSH",
+        "BZMPOP",
+        "BZPOPMAX",
+        "BZPOPMIN",
+        "CLIENT",
+        "DISCARD",
+        "EXEC",
+        "HELLO",
+        "MONITOR",
+        "MULTI",
+        "PSUBSCRIBE",
+        "PUNSUBSCRIBE",
+        "QUIT",
+        "RESET",
+        "SELECT",
+        "SSUBSCRIBE",
+        "SUBSCRIBE",
+        "SUNSUBSCRIBE",
+        "UNSUBSCRIBE",
+        "UNWATCH",
+        "WAIT",
+        "WAITAOF",
+        "WATCH",
+        "XREAD",
+        "XREADGROUP",
+    }
+)
+
+
+def command_name(args: tuple[Any, ...]) -> str:
+    """Return the upper-cased first word of a redis-py command."""
+    name = args[0]
+    if isinstance(name, bytes):
+        name = name.decode()
+    return str(name).split(" ", 1)[0].upper()
+
+
+@dataclass(frozen=True)
+class AutoPipelineOptions:
+    """
+    Options for batching concurrent commands into one pipeline write.
+
+    Commands issued in the same event-loop tick are sent together. A batch is
+    flushed early once max_batch_size commands are queued, and flush_delay
+    seconds can be added to collect commands across ticks.
+    """
+
+    max_batch_size: int = 128
+    flush_delay: float = 0.0
+
+    def __post_init__(self) -> None:
+        if self.max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if self.flush_delay < 0:
+            raise ValueError("flush_delay must not be negative")
+
+
+class AutoPipeline:
+    """
+    Merge commands from concurrent callers into non-transactional pipelines.
+
+    install() replaces execute_command on the client instance, so every
+    command method of the client goes through the batching queue. Replies are
+    fanned back out to the awaiting callers in command order.
+    """
+
+    client: Redis | RedisCluster
+    options: AutoPipelineOptions
+    batches: int
+    batched_commands: int
+
+    def __init__(
+        self, client: Redis | RedisCluster, options: AutoPipelineOptions
+    ) -> None:
+        self.client = client
+        self.options = options
+        self.batches = 0
+        self.batched_commands = 0
+        self._execute_command = client.execute_command
+        self._pending: list[tuple[tuple[Any, ...], dict[str, Any], asyncio.Future]] = []
+        self._flush_handle: asyncio.Handle | None = None
+        self._inflight: set[asyncio.Task] = set()
+        self._closed = False
+
+    def install(self) -> None:
+        """Route the client's commands through this pipeline."""
+        self.client.execute_command = self.execute_command
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        """Queue a command for the next batch and wait for its reply."""
+        if self._closed or command_name(args) in UNBATCHED_COMMANDS:
+            return await self._execute_command(*args, **options)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((args, options, future))
+        if len(self._pending) >= self.options.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            if self.options.flush_delay:
+                self._flush_handle = loop.call_later(
+                    self.options.flush_delay, self._flush
+                )
+            else:
+                self._flush_handle = loop.call_soon(self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._send(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _send(
+        self, batch: list[tuple[tuple[Any, ...], dict[str, Any], asyncio.Future]]
+    ) -> None:
+        # Callers cancelled while queued no longer need a reply.
+        batch = [item for item in batch if not item[2].done()]
+        if not batch:
+            return
+        if len(batch) == 1:
+            args, options, future = batch[0]
+            try:
+                result = await self._execute_command(*args, **options)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as exc:
+                if not future.done():
+                    future.set_exception(exc)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            return
+
+        self.batches += 1
+        self.batched_commands += len(batch)
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for args, options, _future in batch:
+                    pipe.execute_command(*args, **options)
+                results = await pipe.execute(raise_on_error=False)
+        except asyncio.CancelledError:
+            for _args, _options, future in batch:
+                future.cancel()
+            raise
+        except Exception as exc:
+            for _args, _options, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for (_args, _options, future), result in zip(batch, results, strict=True):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def aclose(self) -> None:
+        """Send queued commands, wait for in-flight batches and stop batching."""
+        self._closed = True
+        self._flush()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
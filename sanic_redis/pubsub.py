@@ -0,0 +1,333 @@
+"""
+Sanic-Redis shared pub/sub hub
+"""
+
+import asyncio
+from collections import deque
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any, Literal
+
+from redis.asyncio import Redis
+from redis.exceptions import ConnectionError, TimeoutError
+from sanic.log import logger
+
+from .near_cache import key_bytes
+from .tasks import stop_task
+
+PubSubOverflow = Literal["drop_oldest", "close"]
+
+
+@dataclass(frozen=True)
+class PubSubOptions:
+    """
+    Options for the worker-wide pub/sub hub.
+
+    queue_size bounds the messages buffered for each subscription. When a
+    subscriber falls behind, overflow "drop_oldest" discards its oldest
+    buffered message and "close" closes the subscription.
+    """
+
+    queue_size: int = 100
+    overflow: PubSubOverflow = "drop_oldest"
+
+    def __post_init__(self) -> None:
+        if self.queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        if self.overflow not in ("drop_oldest", "close"):
+            raise ValueError("overflow must be drop_oldest or close")
+
+
+@dataclass(frozen=True)
+class PubSubMessage:
+    """A published message; pattern is set for pattern subscriptions."""
+
+    channel: Any
+    data: Any
+    pattern: Any = None
+
+
+class PubSubSubscription:
+    """
+    Local subscription to channels or patterns of a PubSubHub.
+
+    Iterate it with ``async for`` or call get(); both stop once the
+    subscription is closed. Use it as an async context manager, or call
+    aclose(), to release its channels.
+    """
+
+    channels: tuple[bytes, ...]
+    patterns: tuple[bytes, ...]
+    queue_size: int
+    dropped: int
+    closed: bool
+
+    def __init__(
+        self,
+        hub: "PubSubHub",
+        channels: tuple[bytes, ...],
+        patterns: tuple[bytes, ...],
+        queue_size: int,
+    ) -> None:
+        self.channels = channels
+        self.patterns = patterns
+        self.queue_size = queue_size
+        self.dropped = 0
+        self.closed = False
+        self._hub = hub
+        self._messages: deque[PubSubMessage] = deque()
+        self._ready = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    async def __aenter__(self) -> "PubSubSubscription":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    def __aiter__(self) -> "PubSubSubscription":
+        return self
+
+    async def __anext__(self) -> PubSubMessage:
+        message = await self.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+    async def get(self) -> PubSubMessage | None:
+        """Wait for the next message; None once the subscription is closed."""
+        while not self._messages:
+            if self.closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        return self._messages.popleft()
+
+    async def aclose(self) -> None:
+        """Stop receiving messages and release the subscribed channels."""
+        closed = self.closed
+        self._close()
+        self._messages.clear()
+        if not closed:
+            await self._hub._remove(self)
+
+    def _close(self) -> None:
+        self.closed = True
+        self._ready.set()
+
+    def _deliver(self, message: PubSubMessage) -> bool:
+        # Returns False when the subscription overflowed and was closed.
+        if len(self._messages) >= self.queue_size:
+            self.dropped += 1
+            self._hub.dropped += 1
+            if self._hub.options.overflow == "close":
+                self._close()
+                return False
+            self._messages.popleft()
+        self._messages.append(message)
+        self._ready.set()
+        return True
+
+
+def _attach(
+    index: dict[bytes, set[PubSubSubscription]],
+    names: Iterable[bytes],
+    subscription: PubSubSubscription,
+) -> list[bytes]:
+    added = []
+    for name in names:
+        subscribers = index.get(name)
+        if subscribers is None:
+            subscribers = index[name] = set()
+            added.append(name)
+        subscribers.add(subscription)
+    return added
+
+
+def _detach(
+    index: dict[bytes, set[PubSubSubscription]],
+    names: Iterable[bytes],
+    subscription: PubSubSubscription,
+) -> list[bytes]:
+    removed = []
+    for name in names:
+        subscribers = index.get(name)
+        if subscribers is None:
+            continue
+        subscribers.discard(subscription)
+        if not subscribers:
+            del index[name]
+            removed.append(name)
+    return removed
+
+
+class PubSubHub:
+    """
+    Share one subscribed Redis connection between all subscribers of a worker.
+
+    Channels and patterns are reference counted: Redis is only sent SUBSCRIBE
+    for the first local subscriber and UNSUBSCRIBE after the last one leaves.
+    A single listener task reads messages and fans them out to the bounded
+    queues of the matching subscriptions. After a lost connection the hub
+    reconnects and resubscribes; messages published meanwhile are missed.
+    """
+
+    client: Redis
+    options: PubSubOptions
+    delivered: int
+    dropped: int
+
+    def __init__(self, client: Redis, options: PubSubOptions) -> None:
+        self.client = client
+        self.options = options
+        self.delivered = 0
+        self.dropped = 0
+        self._pubsub = client.pubsub()
+        self._channels: dict[bytes, set[PubSubSubscription]] = {}
+        self._patterns: dict[bytes, set[PubSubSubscription]] = {}
+        self._subscriptions: set[PubSubSubscription] = set()
+        # Serializes reference count changes with the commands they send.
+        self._lock = asyncio.Lock()
+        self._listener: asyncio.Task | None = None
+        self._closed = False
+
+    async def subscribe(
+        self, *channels: Any, queue_size: int | None = None
+    ) -> PubSubSubscription:
+        """Subscribe to channels and return the local subscription."""
+        return await self._add(channels, (), queue_size)
+
+    async def psubscribe(
+        self, *patterns: Any, queue_size: int | None = None
+    ) -> PubSubSubscription:
+        """Subscribe to glob-style channel patterns."""
+        return await self._add((), patterns, queue_size)
+
+    def stats(self) -> dict[str, int]:
+        """Return hub counters for monitoring."""
+        return {
+            "subscriptions": len(self._subscriptions),
+            "channels": len(self._channels),
+            "patterns": len(self._patterns),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+    async def aclose(self) -> None:
+        """Stop the listener, close every subscription and the connection."""
+        self._closed = True
+        await stop_task(self._listener)
+        self._listener = None
+        for subscription in self._subscriptions:
+            subscription._close()
+        self._subscriptions.clear()
+        self._channels.clear()
+        self._patterns.clear()
+        await self._pubsub.aclose()
+
+    async def _add(
+        self,
+        channels: tuple[Any, ...],
+        patterns: tuple[Any, ...],
+        queue_size: int | None,
+    ) -> PubSubSubscription:
+        if self._closed:
+            raise RuntimeError("the pub/sub hub is closed")
+        if not channels and not patterns:
+            raise ValueError("subscribe needs at least one channel or pattern")
+        if queue_size is not None and queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        subscription = PubSubSubscription(
+            self,
+            tuple(key_bytes(channel) for channel in channels),
+            tuple(key_bytes(pattern) for pattern in patterns),
+            queue_size or self.options.queue_size,
+        )
+        async with self._lock:
+            new_channels = _attach(self._channels, subscription.channels, subscription)
+            new_patterns = _attach(self._patterns, subscription.patterns, subscription)
+            self._subscriptions.add(subscription)
+            try:
+                if new_channels:
+                    await self._pubsub.subscribe(*new_channels)
+                if new_patterns:
+                    await self._pubsub.psubscribe(*new_patterns)
+            except BaseException:
+                self._forget(subscription)
+                raise
+        if self._listener is None:
+            self._listener = asyncio.ensure_future(self._listen())
+        return subscription
+
+    def _forget(
+        self, subscription: PubSubSubscription
+    ) -> tuple[list[bytes], list[bytes]]:
+        self._subscriptions.discard(subscription)
+        return (
+            _detach(self._channels, subscription.channels, subscription),
+            _detach(self._patterns, subscription.patterns, subscription),
+        )
+
+    async def _remove(self, subscription: PubSubSubscription) -> None:
+        async with self._lock:
+            channels, patterns = self._forget(subscription)
+            if self._closed:
+                return
+            try:
+                if channels:
+                    await self._pubsub.unsubscribe(*channels)
+                if patterns:
+                    await self._pubsub.punsubscribe(*patterns)
+            except (ConnectionError, TimeoutError):
+                # Messages of channels without local subscribers are ignored.
+                logger.warning(
+                    "[sanic-redis] pub/sub unsubscribe failed", exc_info=True
+                )
+
+    def _dispatch(self, message: dict[str, Any]) -> list[PubSubSubscription]:
+        if message["type"] == "message":
+            subscribers = self._channels.get(key_bytes(message["channel"]))
+        elif message["type"] == "pmessage":
+            subscribers = self._patterns.get(key_bytes(message["pattern"]))
+        else:
+            return []
+        if not subscribers:
+            return []
+        # One immutable message object is shared by every subscriber.
+        item = PubSubMessage(message["channel"], message["data"], message["pattern"])
+        self.delivered += len(subscribers)
+        return [
+            subscription
+            for subscription in subscribers
+            if not subscription._deliver(item)
+        ]
+
+    async def _listen(self) -> None:
+        retry_delay = 0.1
+        # Checked on every pass, as a cancellation can get lost inside reads.
+        while not self._closed:
+            try:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=None
+                )
+            except (ConnectionError, TimeoutError, OSError):
+                # The next read reconnects and resubscribes.
+                logger.warning(
+                    "[sanic-redis] pub/sub connection lost; reconnecting in %.1fs",
+                    retry_delay,
+                )
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 5.0)
+                continue
+            retry_delay = 0.1
+            if message is None:
+                continue
+            for subscription in self._dispatch(message):
+                logger.warning(
+                    "[sanic-redis] closed a pub/sub subscription that fell "
+                    "%d messages behind",
+                    subscription.queue_size,
+                )
+                await self._remove(subscription)
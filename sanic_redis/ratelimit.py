@@ -0,0 +1,293 @@
+"""
+Sanic-Redis rate limiting
+"""
+
+import asyncio
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, Literal
+
+from redis.commands.core import AsyncScript
+from redis.exceptions import ConnectionError, TimeoutError
+from sanic import Request, Sanic
+from sanic.log import logger
+from sanic.response import HTTPResponse, json
+
+# Both scripts take KEYS[1] = state hash and ARGV = limit, period in
+# milliseconds, cost and a partial flag. They read the clock with TIME so all
+# workers share the server's clock, and return {granted, remaining,
+# retry_after_ms}. With the partial flag set, fewer tokens than cost may be
+# granted and retry_after is the wait for a single token; leases use it to
+# reserve up to a batch of tokens.
+SLIDING_WINDOW_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local needed = cost
+if ARGV[4] == '1' then needed = 1 end
+local window = math.floor(now / period)
+local state = redis.call('HMGET', KEYS[1], 'window', 'current', 'previous')
+local stored = tonumber(state[1])
+local current = tonumber(state[2]) or 0
+local previous = tonumber(state[3]) or 0
+if stored ~= window then
+    if stored == window - 1 then previous = current else previous = 0 end
+    current = 0
+end
+local offset = now % period
+local used = previous * (1 - offset / period) + current
+local granted = 0
+if used + cost <= limit then
+    granted = cost
+elseif ARGV[4] == '1' then
+    granted = math.max(0, math.floor(limit - used))
+end
+current = current + granted
+used = used + granted
+redis.call('HSET', KEYS[1], 'window', window, 'current', current,
+    'previous', previous)
+redis.call('PEXPIRE', KEYS[1], period * 2)
+local retry_after = 0
+if granted == 0 then
+    if current + needed > limit then
+        retry_after = period - offset
+    else
+        retry_after = math.ceil(
+            (1 - (limit - current - needed) / previous) * period - offset)
+    end
+    retry_after = math.max(retry_after, 1)
+end
+return {granted, math.max(0, math.floor(limit - used)), retry_after}
+"""
+
+TOKEN_BUCKET_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local needed = cost
+if ARGV[4] == '1' then needed = 1 end
+local rate = limit / period
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or limit
+local ts = tonumber(state[2]) or now
+tokens = math.min(limit, tokens + math.max(0, now - ts) * rate)
+local granted = 0
+if tokens >= cost then
+    granted = cost
+elseif ARGV[4] == '1' then
+    granted = math.floor(tokens)
+end
+tokens = tokens - granted
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], period)
+local retry_after = 0
+if granted == 0 then
+    retry_after = math.max(math.ceil((needed - tokens) / rate), 1)
+end
+return {granted, math.floor(tokens), retry_after}
+"""
+
+SCRIPTS = {
+    "sliding_window": SLIDING_WINDOW_SCRIPT,
+    "token_bucket": TOKEN_BUCKET_SCRIPT,
+}
+
+RateLimitAlgorithm = Literal["sliding_window", "token_bucket"]
+RateLimitKey = Callable[[Request], str | None]
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """Outcome of one rate limit check."""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float
+
+
+def _default_key(request: Request) -> str:
+    return request.remote_addr or request.ip
+
+
+class RateLimiter:
+    """
+    Limit requests per key with one atomic Lua call to Redis.
+
+    sliding_window allows limit requests in any period seconds, weighting the
+    previous fixed window by how much of it still overlaps. token_bucket
+    holds up to limit tokens and refills them evenly over period seconds.
+
+    With lease set, each worker reserves up to lease tokens per key in one
+    call and spends them locally, and remembers rejections until their
+    retry time, so hot keys do not reach Redis on every request. Unused
+    leased tokens expire after lease_ttl seconds; the limit may then be
+    under-used by at most lease tokens per worker.
+    """
+
+    limit: int
+    period: float
+    algorithm: RateLimitAlgorithm
+
+    def __init__(
+        self,
+        limit: int,
+        period: float,
+        algorithm: RateLimitAlgorithm = "sliding_window",
+        key: RateLimitKey | None = None,
+        ctx_name: str = "redis",
+        prefix: str = "sanic-redis:ratelimit:",
+        lease: int = 0,
+        lease_ttl: float = 1.0,
+        max_local_keys: int = 10_000,
+        fail_open: bool = True,
+    ) -> None:
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        if period <= 0:
+            raise ValueError("period must be positive")
+        if algorithm not in SCRIPTS:
+            raise ValueError("algorithm must be sliding_window or token_bucket")
+        if lease < 0 or lease > limit:
+            raise ValueError("lease must be between 0 and limit")
+        self.limit = limit
+        self.period = period
+        self.algorithm = algorithm
+        self.key = key or _default_key
+        self.ctx_name = ctx_name
+        self.prefix = f"{prefix}{algorithm}:"
+        self.lease = lease
+        self.lease_ttl = lease_ttl
+        self.max_local_keys = max_local_keys
+        self.fail_open = fail_open
+        self._period_ms = max(1, int(period * 1000))
+        self._script: AsyncScript | None = None
+        # key -> [tokens, expires_at, remaining] of tokens leased by this
+        # worker; remaining is what Redis had left when the lease was taken.
+        self._leases: dict[str, list[float]] = {}
+        # key -> monotonic time until which the key is known to be limited.
+        self._blocked: dict[str, float] = {}
+        self._refills: dict[str, asyncio.Future] = {}
+
+    async def hit(self, client: Any, key: str, cost: int = 1) -> RateLimitResult:
+        """Spend cost tokens of key and report whether that was allowed."""
+        if self.lease and cost == 1:
+            return await self._hit_leased(client, key)
+        granted, remaining, retry_after = await self._call(client, key, cost, False)
+        return RateLimitResult(granted > 0, self.limit, remaining, retry_after)
+
+    async def check(self, request: Request) -> RateLimitResult | None:
+        """Rate limit a request; None when its key function returns None."""
+        key = self.key(request)
+        if key is None:
+            return None
+        client = getattr(request.app.ctx, self.ctx_name)
+        try:
+            return await self.hit(client, key)
+        except (ConnectionError, TimeoutError):
+            if not self.fail_open:
+                raise
+            logger.warning(
+                "[sanic-redis] rate limiter could not reach Redis; allowing request",
+                exc_info=True,
+            )
+            return None
+
+    def install(self, app: Sanic) -> None:
+        """Register request and response middleware on app."""
+
+        async def redis_rate_limit(request: Request) -> HTTPResponse | None:
+            result = await self.check(request)
+            request.ctx.rate_limit = result
+            if result is None or result.allowed:
+                return None
+            return json(
+                {"error": "rate limit exceeded"},
+                status=429,
+                headers=self.headers(result),
+            )
+
+        async def redis_rate_limit_headers(
+            request: Request, response: HTTPResponse
+        ) -> None:
+            result = getattr(request.ctx, "rate_limit", None)
+            if result is not None and result.allowed:
+                response.headers.update(self.headers(result))
+
+        app.on_request(redis_rate_limit)
+        app.on_response(redis_rate_limit_headers)
+
+    def headers(self, result: RateLimitResult) -> dict[str, str]:
+        """Return rate limit response headers for a result."""
+        headers = {
+            "X-RateLimit-Limit": str(result.limit),
+            "X-RateLimit-Remaining": str(result.remaining),
+        }
+        if not result.allowed:
+            headers["Retry-After"] = str(max(1, int(result.retry_after + 0.999)))
+        return headers
+
+    async def _call(
+        self, client: Any, key: str, cost: int, partial: bool
+    ) -> tuple[int, int, float]:
+        script = self._script
+        if script is None:
+            script = self._script = client.register_script(SCRIPTS[self.algorithm])
+        granted, remaining, retry_after_ms = await script(
+            keys=[self.prefix + key],
+            args=[self.limit, self._period_ms, cost, "1" if partial else "0"],
+            client=client,
+        )
+        return int(granted), int(remaining), int(retry_after_ms) / 1000
+
+    async def _hit_leased(self, client: Any, key: str) -> RateLimitResult:
+        while True:
+            now = time.monotonic()
+            blocked_until = self._blocked.get(key)
+            if blocked_until is not None:
+                if now < blocked_until:
+                    return RateLimitResult(False, self.limit, 0, blocked_until - now)
+                del self._blocked[key]
+            lease = self._leases.get(key)
+            if lease is not None and lease[0] >= 1 and now < lease[1]:
+                lease[0] -= 1
+                remaining = int(lease[0] + lease[2])
+                return RateLimitResult(True, self.limit, remaining, 0.0)
+            refill = self._refills.get(key)
+            if refill is None:
+                break
+            # Another request is already reserving tokens for this key.
+            await asyncio.shield(refill)
+
+        refill = self._refills[key] = asyncio.get_running_loop().create_future()
+        try:
+            granted, remaining, retry_after = await self._call(
+                client, key, self.lease, True
+            )
+            now = time.monotonic()
+            self._prune(now)
+            if granted == 0:
+                self._leases.pop(key, None)
+                self._blocked[key] = now + retry_after
+                return RateLimitResult(False, self.limit, 0, retry_after)
+            self._leases[key] = [granted - 1, now + self.lease_ttl, remaining]
+            return RateLimitResult(True, self.limit, remaining + granted - 1, 0.0)
+        finally:
+            del self._refills[key]
+            refill.set_result(None)
+
+    def _prune(self, now: float) -> None:
+        if len(self._leases) + len(self._blocked) < self.max_local_keys:
+            return
+        for key in [k for k, lease in self._leases.items() if lease[1] <= now]:
+            del self._leases[key]
+        for key in [k for k, until in self._blocked.items() if until <= now]:
+            del self._blocked[key]
+        if len(self._leases) + len(self._blocked) >= self.max_local_keys:
+            self._leases.clear()
+            self._blocked.clear()
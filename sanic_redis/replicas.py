@@ -0,0 +1,133 @@
+"""
+Sanic-Redis read/write splitting
+"""
+
+import itertools
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Literal
+
+from redis.asyncio import Redis
+from redis.commands.cluster import READ_COMMANDS
+from redis.exceptions import ConnectionError, TimeoutError
+
+from .pipelining import command_name
+
+# Commands in READ_COMMANDS that do not read the dataset.
+PRIMARY_ONLY_COMMANDS = frozenset({"XREAD"})
+
+ReplicaStrategy = Literal["round_robin", "least_outstanding"]
+
+
+@dataclass(frozen=True)
+class ReplicaOptions:
+    """
+    Options for sending read-only commands to replicas.
+
+    urls lists the replica Redis URLs. strategy picks a replica per command:
+    round_robin cycles through them and least_outstanding picks the replica
+    with the fewest commands in flight. read_your_writes sends every read of
+    a request to the primary once that request has written; it can also be
+    enabled per request with ReplicaRouter.read_your_writes().
+    """
+
+    urls: tuple[str, ...]
+    strategy: ReplicaStrategy = "round_robin"
+    read_your_writes: bool = False
+    fallback_to_primary: bool = True
+
+    def __post_init__(self) -> None:
+        if not self.urls:
+            raise ValueError("urls must list at least one replica")
+        if self.strategy not in ("round_robin", "least_outstanding"):
+            raise ValueError("strategy must be round_robin or least_outstanding")
+
+
+class ReplicaRouter:
+    """
+    Route read-only commands of a primary client to replica clients.
+
+    install() wraps execute_command on the primary client, so app.ctx keeps
+    the primary client with its full API. Writes, pipelines and transactions
+    always use the primary. Reads that fail with a connection error on a
+    replica are retried on the primary when fallback_to_primary is set.
+    """
+
+    client: Redis
+    replicas: list[Redis]
+    options: ReplicaOptions
+    outstanding: list[int]
+    replica_reads: int
+    primary_reads: int
+
+    def __init__(
+        self, client: Redis, replicas: list[Redis], options: ReplicaOptions
+    ) -> None:
+        self.client = client
+        self.replicas = replicas
+        self.options = options
+        self.outstanding = [0] * len(replicas)
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self._execute_command = client.execute_command
+        self._cycle = itertools.cycle(range(len(replicas)))
+        self._read_your_writes: ContextVar[bool] = ContextVar(
+            f"sanic_redis_read_your_writes_{id(self)}",
+            default=options.read_your_writes,
+        )
+        self._wrote: ContextVar[bool] = ContextVar(
+            f"sanic_redis_wrote_{id(self)}", default=False
+        )
+
+    def install(self) -> None:
+        """Route the primary client's read commands to replicas."""
+        self.client.execute_command = self.execute_command
+
+    def read_your_writes(self, enabled: bool = True) -> None:
+        """Enable read-your-writes for the current request or task."""
+        self._read_your_writes.set(enabled)
+
+    def reset(self) -> None:
+        """
+        Forget read-your-writes state of the current task.
+
+        SanicRedis calls this at the start of every request, as requests on
+        one keep-alive connection share a task.
+        """
+        self._read_your_writes.set(self.options.read_your_writes)
+        self._wrote.set(False)
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        """Send reads to a replica and everything else to the primary."""
+        name = command_name(args)
+        if name not in READ_COMMANDS or name in PRIMARY_ONLY_COMMANDS:
+            if self._read_your_writes.get():
+                self._wrote.set(True)
+            return await self._execute_command(*args, **options)
+        if self._wrote.get() and self._read_your_writes.get():
+            self.primary_reads += 1
+            return await self._execute_command(*args, **options)
+
+        index = self._pick()
+        self.outstanding[index] += 1
+        try:
+            result = await self.replicas[index].execute_command(*args, **options)
+        except (ConnectionError, TimeoutError):
+            if not self.options.fallback_to_primary:
+                raise
+            self.primary_reads += 1
+            return await self._execute_command(*args, **options)
+        finally:
+            self.outstanding[index] -= 1
+        self.replica_reads += 1
+        return result
+
+    def _pick(self) -> int:
+        if self.options.strategy == "least_outstanding":
+            return min(range(len(self.replicas)), key=self.outstanding.__getitem__)
+        return next(self._cycle)
+
+    async def aclose(self) -> None:
+        """Close the replica clients."""
+        for replica in self.replicas:
+            await replica.aclose()
@@ -0,0 +1,227 @@
+"""
+Sanic-Redis response caching
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from functools import wraps
+from typing import Any
+
+from sanic import Request
+from sanic.log import logger
+from sanic.response import HTTPResponse
+
+RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+# Request headers that make a response likely to differ per user.
+CREDENTIAL_HEADERS = ("authorization", "cookie")
+
+# Headers describing the transfer of one response, not its content.
+UNCACHED_HEADERS = frozenset(
+    {"connection", "content-length", "date", "etag", "transfer-encoding", "x-cache"}
+)
+
+ResponseKey = Callable[[Request], str]
+CachedResponse = tuple[dict[str, Any], bytes]
+
+
+def _default_key(request: Request) -> str:
+    if request.query_string:
+        return f"{request.path}?{request.query_string}"
+    return request.path
+
+
+def _encode(meta: dict[str, Any], body: bytes) -> bytes:
+    return json.dumps(meta, separators=(",", ":")).encode() + b"\n" + body
+
+
+def _decode(raw: bytes | str) -> CachedResponse:
+    if isinstance(raw, str):
+        raw = raw.encode()
+    header, _sep, body = raw.partition(b"\n")
+    return json.loads(header), body
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = {value.strip() for value in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def _respond(request: Request, cached: CachedResponse, state: str) -> HTTPResponse:
+    meta, body = cached
+    headers = {"ETag": meta["etag"], "X-Cache": state}
+    if _etag_matches(request, meta["etag"]):
+        return HTTPResponse(status=304, headers=headers)
+    response = HTTPResponse(
+        body=body,
+        status=meta["status"],
+        content_type=meta["content_type"],
+    )
+    for name, value in meta["headers"]:
+        response.headers.add(name, value)
+    response.headers.update(headers)
+    return response
+
+
+def _snapshot(
+    response: HTTPResponse, statuses: frozenset[int]
+) -> CachedResponse | None:
+    if not isinstance(response, HTTPResponse) or response.status not in statuses:
+        return None
+    if "set-cookie" in response.headers:
+        return None
+    body = response.body or b""
+    meta = {
+        "status": response.status,
+        "content_type": response.content_type,
+        "headers": [
+            (name, value)
+            for name, value in response.headers.items()
+            if name.lower() not in UNCACHED_HEADERS
+        ],
+        "etag": f'"{hashlib.sha1(body, usedforsecurity=False).hexdigest()}"',
+        "created": time.time(),
+    }
+    return meta, body
+
+
+def cache_response(
+    ttl: float,
+    key: ResponseKey | str | None = None,
+    ctx_name: str = "redis",
+    stale_ttl: float = 0,
+    lock_timeout: float = 10.0,
+    poll_interval: float = 0.05,
+    statuses: tuple[int, ...] = (200,),
+    prefix: str = "sanic-redis:response:",
+    cache_credentialed: bool = False,
+) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """
+    Cache GET and HEAD responses of a Sanic route in Redis.
+
+    key is a fixed cache key or a callable building one from the request; the
+    request path and query string are used by default. Cached responses are
+    fresh for ttl seconds and may be served for stale_ttl more seconds while
+    one request regenerates them in the background.
+
+    A cached response is served to every request with the same key. Requests
+    carrying an Authorization or Cookie header therefore bypass the cache
+    unless cache_credentialed is true; only set it together with a key that
+    varies on the user, or for responses that are the same for everyone.
+
+    Regeneration is single-flight: one coroutine per worker recomputes a key
+    and one worker across the deployment holds a Redis lock for it, while
+    other workers wait for the new entry for up to lock_timeout seconds.
+    Responses carry an ETag, and matching If-None-Match requests get a 304.
+    """
+    if ttl <= 0:
+        raise ValueError("ttl must be positive")
+    if stale_ttl < 0:
+        raise ValueError("stale_ttl must not be negative")
+    cacheable_statuses = frozenset(statuses)
+    expire_ms = max(1, int((ttl + stale_ttl) * 1000))
+    lock_ms = max(1, int(lock_timeout * 1000))
+    inflight: dict[str, asyncio.Task] = {}
+
+    def build_key(request: Request) -> str:
+        if key is None:
+            return prefix + _default_key(request)
+        if isinstance(key, str):
+            return prefix + key
+        return prefix + key(request)
+
+    def decorator(
+        handler: Callable[..., Awaitable[Any]],
+    ) -> Callable[..., Awaitable[Any]]:
+        async def refresh(
+            client: Any, cache_key: str, request: Request, args: Any, kwargs: Any
+        ) -> tuple[CachedResponse | None, Any]:
+            lock_key = f"{cache_key}:lock"
+            token = uuid.uuid4().hex
+            if not await client.set(lock_key, token, nx=True, px=lock_ms):
+                # Another worker is regenerating; wait for its result.
+                deadline = time.monotonic() + lock_timeout
+                while time.monotonic() < deadline:
+                    await asyncio.sleep(poll_interval)
+                    raw = await client.get(cache_key)
+                    if raw is not None:
+                        cached = _decode(raw)
+                        if time.time() - cached[0]["created"] < ttl:
+                            return cached, None
+                    if not await client.exists(lock_key):
+                        break
+                token = None
+            try:
+                response = await handler(request, *args, **kwargs)
+                cached = _snapshot(response, cacheable_statuses)
+                if cached is not None:
+                    await client.set(cache_key, _encode(*cached), px=expire_ms)
+                return cached, response
+            finally:
+                if token is not None:
+                    await client.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+
+        def start_refresh(
+            client: Any, cache_key: str, request: Request, args: Any, kwargs: Any
+        ) -> tuple[asyncio.Task, bool]:
+            task = inflight.get(cache_key)
+            if task is not None:
+                return task, False
+            task = asyncio.ensure_future(
+                refresh(client, cache_key, request, args, kwargs)
+            )
+            inflight[cache_key] = task
+            task.add_done_callback(lambda _task: inflight.pop(cache_key, None))
+            return task, True
+
+        @wraps(handler)
+        async def wrapper(request: Request, *args: Any, **kwargs: Any) -> Any:
+            if request.method not in ("GET", "HEAD") or (
+                not cache_credentialed
+                and any(name in request.headers for name in CREDENTIAL_HEADERS)
+            ):
+                return await handler(request, *args, **kwargs)
+            client = getattr(request.app.ctx, ctx_name)
+            cache_key = build_key(request)
+            raw = await client.get(cache_key)
+            if raw is not None:
+                cached = _decode(raw)
+                if time.time() - cached[0]["created"] < ttl:
+                    return _respond(request, cached, "HIT")
+                task, started = start_refresh(client, cache_key, request, args, kwargs)
+                if started:
+                    task.add_done_callback(_log_refresh_error)
+                return _respond(request, cached, "STALE")
+
+            task, started = start_refresh(client, cache_key, request, args, kwargs)
+            cached, response = await asyncio.shield(task)
+            if cached is not None:
+                return _respond(request, cached, "MISS" if started else "HIT")
+            if started and response is not None:
+                return response
+            # The shared response could not be cached; build our own.
+            return await handler(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _log_refresh_error(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(
+            "[sanic-redis] background response refresh failed",
+            exc_info=task.exception(),
+        )
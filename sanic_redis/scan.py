@@ -0,0 +1,225 @@
+"""
+Sanic-Redis keyspace scanning
+"""
+
+import asyncio
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, cast
+
+from redis.asyncio import Redis
+from redis.asyncio.cluster import RedisCluster
+
+
+@dataclass(frozen=True)
+class ScanOptions:
+    """
+    Options for scan iterators.
+
+    Each call starts at count and doubles it while calls take less than
+    half of target_latency seconds; slower calls shrink it in proportion.
+    COUNT stays between min_count and max_count. On a cluster every
+    primary is scanned concurrently and up to queue_size batches are
+    buffered ahead of the consumer.
+    """
+
+    count: int = 100
+    min_count: int = 10
+    max_count: int = 10_000
+    target_latency: float = 0.005
+    queue_size: int = 8
+
+    def __post_init__(self) -> None:
+        if self.min_count < 1:
+            raise ValueError("min_count must be at least 1")
+        if not self.min_count <= self.count <= self.max_count:
+            raise ValueError("count must be between min_count and max_count")
+        if self.target_latency <= 0:
+            raise ValueError("target_latency must be positive")
+        if self.queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+
+
+class _AdaptiveCount:
+    __slots__ = ("options", "value")
+
+    def __init__(self, options: ScanOptions) -> None:
+        self.options = options
+        self.value = options.count
+
+    def update(self, elapsed: float) -> None:
+        options = self.options
+        if elapsed > options.target_latency:
+            scaled = int(self.value * options.target_latency / elapsed)
+            self.value = max(options.min_count, scaled)
+        elif elapsed < options.target_latency / 2:
+            self.value = min(options.max_count, self.value * 2)
+
+
+# Sends one scan call for (cursor, count) and returns (next cursor, items).
+_ScanCall = Callable[[int, int], Awaitable[tuple[int, list[Any]]]]
+
+
+async def _scan(call: _ScanCall, options: ScanOptions) -> AsyncIterator[list[Any]]:
+    count = _AdaptiveCount(options)
+    cursor = 0
+    while True:
+        started = time.perf_counter()
+        cursor, items = await call(cursor, count.value)
+        count.update(time.perf_counter() - started)
+        if items:
+            yield items
+        if cursor == 0:
+            return
+
+
+async def _merge(
+    scans: list[AsyncIterator[list[Any]]], queue_size: int
+) -> AsyncIterator[list[Any]]:
+    # Producers block on the bounded queue, so a slow consumer pauses them.
+    queue: asyncio.Queue = asyncio.Queue(queue_size)
+    done = object()
+
+    async def produce(scan: AsyncIterator[list[Any]]) -> None:
+        try:
+            async for items in scan:
+                await queue.put(items)
+        except Exception as error:
+            await queue.put(error)
+        else:
+            await queue.put(done)
+
+    tasks = [asyncio.ensure_future(produce(scan)) for scan in scans]
+    try:
+        running = len(tasks)
+        while running:
+            items = await queue.get()
+            if items is done:
+                running -= 1
+            elif isinstance(items, Exception):
+                raise items
+            else:
+                yield items
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def scan_batches(
+    client: Redis | RedisCluster,
+    match: Any = None,
+    key_type: str | None = None,
+    options: ScanOptions | None = None,
+) -> AsyncIterator[list[Any]]:
+    """
+    Iterate over matching keys in batches, one batch per SCAN reply.
+
+    key_type restricts the scan to keys of one type, such as "hash".
+    Only one batch per node is held at a time, so the keyspace is never
+    loaded into memory. Like SCAN, a key may be returned more than once.
+    On a cluster all primaries are scanned concurrently.
+    """
+    options = options or ScanOptions()
+
+    if not isinstance(client, RedisCluster):
+
+        async def call(cursor: int, count: int) -> tuple[int, list[Any]]:
+            return await client.scan(cursor, match=match, count=count, _type=key_type)
+
+        return _scan(call, options)
+
+    def node_call(node: Any) -> _ScanCall:
+        async def call(cursor: int, count: int) -> tuple[int, list[Any]]:
+            cursors, keys = await cast(Any, client).scan(
+                cursor, match=match, count=count, _type=key_type, target_nodes=node
+            )
+            return cursors[node.name], keys
+
+        return call
+
+    nodes = client.get_primaries()
+    return _merge(
+        [_scan(node_call(node), options) for node in nodes], options.queue_size
+    )
+
+
+def hscan_batches(
+    client: Redis | RedisCluster,
+    name: Any,
+    match: Any = None,
+    options: ScanOptions | None = None,
+) -> AsyncIterator[list[tuple[Any, Any]]]:
+    """Iterate over (field, value) pairs of a hash in batches."""
+
+    async def call(cursor: int, count: int) -> tuple[int, list[Any]]:
+        cursor, fields = await client.hscan(name, cursor, match=match, count=count)
+        return cursor, list(cast(dict, fields).items())
+
+    return _scan(call, options or ScanOptions())
+
+
+def sscan_batches(
+    client: Redis | RedisCluster,
+    name: Any,
+    match: Any = None,
+    options: ScanOptions | None = None,
+) -> AsyncIterator[list[Any]]:
+    """Iterate over members of a set in batches."""
+
+    async def call(cursor: int, count: int) -> tuple[int, list[Any]]:
+        return await client.sscan(name, cursor, match=match, count=count)
+
+    return _scan(call, options or ScanOptions())
+
+
+def zscan_batches(
+    client: Redis | RedisCluster,
+    name: Any,
+    match: Any = None,
+    options: ScanOptions | None = None,
+) -> AsyncIterator[list[tuple[Any, float]]]:
+    """Iterate over (member, score) pairs of a sorted set in batches."""
+
+    async def call(cursor: int, count: int) -> tuple[int, list[Any]]:
+        cursor, members = await client.zscan(name, cursor, match=match, count=count)
+        return cursor, [tuple(member) for member in members]
+
+    return _scan(call, options or ScanOptions())
+
+
+def inspect_keys(
+    client: Redis | RedisCluster,
+    batches: AsyncIterable[list[Any]],
+    *commands: str,
+) -> AsyncIterator[list[tuple[Any, ...]]]:
+    """
+    Run commands on every key of each batch in one pipeline per batch.
+
+    commands are command names taking the key as their only argument, such
+    as "TYPE", "PTTL" or "MEMORY USAGE". Each batch is yielded as a list of
+    (key, reply, ...) tuples. Errors are returned in place of their reply,
+    for example for keys deleted since they were scanned.
+    """
+    if not commands:
+        raise ValueError("inspect_keys needs at least one command")
+    return _inspect(client, batches, [tuple(command.split()) for command in commands])
+
+
+async def _inspect(
+    client: Redis | RedisCluster,
+    batches: AsyncIterable[list[Any]],
+    commands: list[tuple[str, ...]],
+) -> AsyncIterator[list[tuple[Any, ...]]]:
+    width = len(commands)
+    async for keys in batches:
+        async with client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                for command in commands:
+                    pipe.execute_command(*command, key)
+            replies = await pipe.execute(raise_on_error=False)
+        yield [
+            (key, *replies[index * width : (index + 1) * width])
+            for index, key in enumerate(keys)
+        ]
@@ -0,0 +1,89 @@
+"""
+Sanic-Redis Lua script registry
+"""
+
+import asyncio
+from collections.abc import Iterable, Mapping, Sequence
+from typing import Any
+
+from redis.asyncio import Redis
+from redis.asyncio.cluster import RedisCluster
+from redis.commands.core import AsyncScript
+
+
+class ScriptRegistry:
+    """
+    Declare Lua scripts once and call them by name.
+
+    Pass the registry to SanicRedis(scripts=...). Startup loads every
+    script with SCRIPT LOAD, and app.ctx.<ctx_name>_scripts then runs them
+    with EVALSHA, reloading a script when the server answers NOSCRIPT, for
+    example after a failover or SCRIPT FLUSH.
+    """
+
+    sources: dict[str, str]
+
+    def __init__(self, scripts: Mapping[str, str] | None = None) -> None:
+        self.sources = {}
+        for name, source in (scripts or {}).items():
+            self.register(name, source)
+
+    def register(self, name: str, source: str) -> str:
+        """Add a script under name and return the name."""
+        if self.sources.get(name, source) != source:
+            raise ValueError(f"script {name!r} is already registered")
+        self.sources[name] = source
+        return name
+
+    def bind(self, client: Redis | RedisCluster) -> "BoundScripts":
+        """Return the registered scripts callable through client."""
+        return BoundScripts(self, client)
+
+
+class BoundScripts:
+    """
+    Scripts of a ScriptRegistry bound to a client.
+
+    Scripts registered after startup are loaded on their first call.
+    """
+
+    registry: ScriptRegistry
+    client: Redis | RedisCluster
+
+    def __init__(self, registry: ScriptRegistry, client: Redis | RedisCluster):
+        self.registry = registry
+        self.client = client
+        self._scripts: dict[str, AsyncScript] = {}
+
+    def __getitem__(self, name: str) -> AsyncScript:
+        script = self._scripts.get(name)
+        if script is None:
+            script = self._scripts[name] = self.client.register_script(
+                self.registry.sources[name]
+            )
+        return script
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.registry.sources
+
+    async def load(self) -> None:
+        """Load every registered script into the script cache."""
+        await asyncio.gather(
+            *(
+                self.client.script_load(self.registry.sources[name])
+                for name in self.registry.sources
+            )
+        )
+
+    async def call(
+        self,
+        name: str,
+        keys: Sequence[Any] = (),
+        args: Iterable[Any] = (),
+        client: Any = None,
+    ) -> Any:
+        """Run a script with EVALSHA; pass a pipeline as client to queue it."""
+        return await self[name](keys=keys, args=args, client=client)
+
+    async def aclose(self) -> None:
+        """Release nothing; scripts stay in the server's script cache."""
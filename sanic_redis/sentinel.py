@@ -0,0 +1,191 @@
+"""
+Sanic-Redis Sentinel support
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from redis.asyncio import Redis
+from redis.asyncio.sentinel import Sentinel
+from redis.exceptions import ConnectionError, TimeoutError
+from sanic.log import logger
+
+from .tasks import stop_task
+
+SWITCH_MASTER_CHANNEL = "+switch-master"
+
+
+@dataclass(frozen=True)
+class SentinelOptions:
+    """
+    Options for discovering Redis through Sentinel.
+
+    sentinels lists (host, port) pairs of Sentinel processes and service_name
+    the monitored master. replicas adds a read-only client for the replicas
+    of the same master, registered as app.ctx.<ctx_name>_replica.
+    sentinel_kwargs are passed to the Sentinel connections, while
+    from_url_kwargs of SanicRedis configure the Redis connections themselves.
+    """
+
+    service_name: str
+    sentinels: tuple[tuple[str, int], ...]
+    replicas: bool = False
+    min_other_sentinels: int = 0
+    sentinel_kwargs: dict[str, Any] = field(default_factory=dict)
+    recovery_timeout: float = 30.0
+    recovery_interval: float = 0.1
+
+    def __post_init__(self) -> None:
+        if not self.sentinels:
+            raise ValueError("sentinels must list at least one (host, port) pair")
+        if self.recovery_timeout <= 0:
+            raise ValueError("recovery_timeout must be positive")
+
+
+class SentinelFailover:
+    """
+    Follow Sentinel failovers and re-point clients without a restart.
+
+    A background task subscribes to +switch-master on the Sentinels. When the
+    monitored master changes, pooled connections are dropped so the next
+    command connects to the new master, and the time until the new master
+    answers PING is recorded as time-to-recover.
+    """
+
+    sentinel: Sentinel
+    options: SentinelOptions
+    master: Redis
+    replica: Redis | None
+    failovers: int
+    last_failover_at: float | None
+    last_recovery_time: float | None
+    master_address: tuple[str, int] | None
+
+    def __init__(
+        self,
+        options: SentinelOptions,
+        connection_kwargs: dict[str, Any],
+        single_connection_client: bool = False,
+    ) -> None:
+        self.options = options
+        self.sentinel = Sentinel(
+            list(options.sentinels),
+            min_other_sentinels=options.min_other_sentinels,
+            sentinel_kwargs=dict(options.sentinel_kwargs),
+        )
+        self.master = self.sentinel.master_for(
+            options.service_name, **connection_kwargs
+        )
+        self.replica = (
+            self.sentinel.slave_for(options.service_name, **connection_kwargs)
+            if options.replicas
+            else None
+        )
+        # master_for passes its kwargs to the connections, so client options
+        # are set on the clients it returns.
+        for client in (self.master, self.replica):
+            if client is not None:
+                client.single_connection_client = single_connection_client
+        self.failovers = 0
+        self.last_failover_at = None
+        self.last_recovery_time = None
+        self.master_address = None
+        self._watcher: asyncio.Task | None = None
+        self._closing = False
+
+    def start(self) -> None:
+        """Start watching Sentinels for master switches."""
+        if self._watcher is None:
+            self._closing = False
+            self._watcher = asyncio.ensure_future(self._watch())
+
+    def stats(self) -> dict[str, Any]:
+        """Return failover counters for monitoring."""
+        return {
+            "failovers": self.failovers,
+            "last_failover_at": self.last_failover_at,
+            "last_recovery_time": self.last_recovery_time,
+            "master_address": self.master_address,
+        }
+
+    async def handle_switch(self, new_address: tuple[str, int]) -> None:
+        """Drop connections to the old master and wait for the new one."""
+        started = time.monotonic()
+        self.failovers += 1
+        self.last_failover_at = time.time()
+        self.master_address = new_address
+        logger.warning(
+            "[sanic-redis] Sentinel switched %s to %s:%s",
+            self.options.service_name,
+            *new_address,
+        )
+        clients = [self.master] + ([self.replica] if self.replica else [])
+        for client in clients:
+            await client.connection_pool.disconnect()
+        deadline = started + self.options.recovery_timeout
+        while time.monotonic() < deadline:
+            try:
+                await self.master.ping()
+            except (ConnectionError, TimeoutError, OSError):
+                await asyncio.sleep(self.options.recovery_interval)
+                continue
+            self.last_recovery_time = time.monotonic() - started
+            logger.info(
+                "[sanic-redis] recovered from failover in %.3fs",
+                self.last_recovery_time,
+            )
+            return
+        logger.error(
+            "[sanic-redis] new master did not answer within %.1fs",
+            self.options.recovery_timeout,
+        )
+
+    def _parse_switch(self, message: Any) -> tuple[str, int] | None:
+        if not message or message.get("type") != "message":
+            return None
+        data = message["data"]
+        if isinstance(data, bytes):
+            data = data.decode()
+        parts = str(data).split()
+        # <master name> <old ip> <old port> <new ip> <new port>
+        if len(parts) != 5 or parts[0] != self.options.service_name:
+            return None
+        return parts[3], int(parts[4])
+
+    async def _watch(self) -> None:
+        index = 0
+        retry_delay = 0.1
+        # Checked on every pass, as a cancellation can get lost inside reads;
+        # pubsub.listen() would keep reading without returning here.
+        while not self._closing:
+            sentinel = self.sentinel.sentinels[index % len(self.sentinel.sentinels)]
+            pubsub = sentinel.pubsub()
+            try:
+                await pubsub.subscribe(SWITCH_MASTER_CHANNEL)
+                retry_delay = 0.1
+                while not self._closing:
+                    message = await pubsub.get_message(timeout=None)
+                    new_address = self._parse_switch(message)
+                    if new_address is not None:
+                        await self.handle_switch(new_address)
+            except (ConnectionError, TimeoutError, OSError):
+                logger.warning(
+                    "[sanic-redis] lost Sentinel subscription; trying the next "
+                    "Sentinel in %.1fs",
+                    retry_delay,
+                )
+                index += 1
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 5.0)
+            finally:
+                await pubsub.aclose()
+
+    async def aclose(self) -> None:
+        """Stop watching and close the Sentinel connections."""
+        self._closing = True
+        await stop_task(self._watcher)
+        self._watcher = None
+        for sentinel in self.sentinel.sentinels:
+            await sentinel.aclose()
@@ -0,0 +1,329 @@
+"""
+Sanic-Redis value serialization
+"""
+
+import json
+import pickle
+import zlib
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from typing import Any, Protocol, cast
+
+from redis.asyncio import Redis
+from redis.asyncio.cluster import RedisCluster
+
+from .cluster import mget
+
+# Header byte of values stored without compression.
+UNCOMPRESSED = 0
+
+
+class Codec(Protocol):
+    """Turn Python values into bytes and back."""
+
+    def encode(self, value: Any) -> bytes: ...
+
+    def decode(self, data: memoryview) -> Any: ...
+
+
+class Compressor(Protocol):
+    """
+    Compress encoded values.
+
+    marker is the header byte written before compressed values; built-in
+    compressors use 1 to 3, custom ones should use 16 or higher.
+    """
+
+    marker: int
+
+    def compress(self, data: bytes) -> bytes: ...
+
+    def decompress(self, data: memoryview) -> bytes: ...
+
+
+class RawCodec:
+    """Store bytes as they are."""
+
+    def encode(self, value: Any) -> bytes:
+        if isinstance(value, str):
+            return value.encode()
+        return bytes(value)
+
+    def decode(self, data: memoryview) -> Any:
+        return data.tobytes()
+
+
+class JsonCodec:
+    """Store JSON values with the standard library."""
+
+    def encode(self, value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":")).encode()
+
+    def decode(self, data: memoryview) -> Any:
+        return json.loads(data.tobytes())
+
+
+class PickleCodec:
+    """
+    Store any picklable value.
+
+    Decoding runs code chosen by whoever wrote the value, so only use it
+    when nothing but trusted code can write to the keys.
+    """
+
+    def __init__(self, protocol: int = pickle.HIGHEST_PROTOCOL) -> None:
+        self.protocol = protocol
+
+    def encode(self, value: Any) -> bytes:
+        return pickle.dumps(value, protocol=self.protocol)
+
+    def decode(self, data: memoryview) -> Any:
+        return pickle.loads(data)
+
+
+class OrjsonCodec:
+    """Store JSON values with orjson."""
+
+    def __init__(self) -> None:
+        import orjson
+
+        self._orjson = orjson
+
+    def encode(self, value: Any) -> bytes:
+        return self._orjson.dumps(value)
+
+    def decode(self, data: memoryview) -> Any:
+        return self._orjson.loads(data)
+
+
+class MsgpackCodec:
+    """Store values with msgpack."""
+
+    def __init__(self) -> None:
+        import msgpack  # pyright: ignore[reportMissingImports]
+
+        self._msgpack = msgpack
+
+    def encode(self, value: Any) -> bytes:
+        return self._msgpack.packb(value, use_bin_type=True)
+
+    def decode(self, data: memoryview) -> Any:
+        return self._msgpack.unpackb(data, raw=False)
+
+
+class ZlibCompressor:
+    """Compress with zlib from the standard library."""
+
+    marker = 1
+
+    def __init__(self, level: int | None = None) -> None:
+        self.level = -1 if level is None else level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: memoryview) -> bytes:
+        return zlib.decompress(data)
+
+
+class ZstdCompressor:
+    """Compress with zstandard."""
+
+    marker = 2
+
+    def __init__(self, level: int | None = None) -> None:
+        import zstandard  # pyright: ignore[reportMissingImports]
+
+        self._compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def decompress(self, data: memoryview) -> bytes:
+        # Frames written by compress() carry their content size.
+        return self._decompressor.decompress(data)
+
+
+class Lz4Compressor:
+    """Compress with LZ4 frames."""
+
+    marker = 3
+
+    def __init__(self, level: int | None = None) -> None:
+        import lz4.frame  # pyright: ignore[reportMissingImports]
+
+        self._frame = lz4.frame
+        self.level = 0 if level is None else level
+
+    def compress(self, data: bytes) -> bytes:
+        return self._frame.compress(data, compression_level=self.level)
+
+    def decompress(self, data: memoryview) -> bytes:
+        return self._frame.decompress(data)
+
+
+CODECS: dict[str, type] = {
+    "json": JsonCodec,
+    "msgpack": MsgpackCodec,
+    "orjson": OrjsonCodec,
+    "pickle": PickleCodec,
+    "raw": RawCodec,
+}
+COMPRESSORS: dict[str, type] = {
+    "lz4": Lz4Compressor,
+    "zlib": ZlibCompressor,
+    "zstd": ZstdCompressor,
+}
+# Package providing each optional codec or compressor.
+EXTRAS = {"msgpack": "msgpack", "orjson": "orjson", "zstd": "zstd", "lz4": "lz4"}
+
+
+@dataclass(frozen=True)
+class SerializerOptions:
+    """
+    Options for storing typed values.
+
+    codec is json, msgpack, orjson, pickle or raw, or an object implementing
+    Codec. pickle must be chosen explicitly, as reading a value written by
+    someone else can run arbitrary code. compression is None, zlib, zstd or
+    lz4, or an object implementing Compressor; encoded values of at least
+    compress_threshold bytes are compressed when that makes them smaller.
+    """
+
+    codec: "str | Codec" = "json"
+    compression: "str | Compressor | None" = None
+    compress_threshold: int = 1024
+    compression_level: int | None = None
+
+    def __post_init__(self) -> None:
+        if isinstance(self.codec, str) and self.codec not in CODECS:
+            raise ValueError(f"codec must be one of {', '.join(sorted(CODECS))}")
+        if isinstance(self.compression, str) and self.compression not in COMPRESSORS:
+            raise ValueError(
+                f"compression must be one of {', '.join(sorted(COMPRESSORS))}"
+            )
+        if self.compress_threshold < 0:
+            raise ValueError("compress_threshold must not be negative")
+
+
+def _build(name: str, factory: type, *args: Any) -> Any:
+    try:
+        return factory(*args)
+    except ImportError as error:
+        raise ImportError(
+            f"{name} requires an optional dependency; install "
+            f"sanic-redis[{EXTRAS.get(name, name)}]"
+        ) from error
+
+
+class Serializer:
+    """
+    Read and write Python values through a client.
+
+    Values are stored as one header byte followed by the encoded value; the
+    header names the compressor used, or 0 for none, so the compression
+    setting can change without breaking values already stored. Decoding
+    works on memoryviews of the reply to avoid copying payloads. The client
+    must return bytes, so decode_responses cannot be used.
+    """
+
+    client: Redis | RedisCluster
+    options: SerializerOptions
+    codec: Codec
+    compressor: Compressor | None
+
+    def __init__(
+        self, client: Redis | RedisCluster, options: SerializerOptions
+    ) -> None:
+        self.client = client
+        self.options = options
+        if isinstance(options.codec, str):
+            self.codec = _build(options.codec, CODECS[options.codec])
+        else:
+            self.codec = options.codec
+        if isinstance(options.compression, str):
+            self.compressor = _build(
+                options.compression,
+                COMPRESSORS[options.compression],
+                options.compression_level,
+            )
+        else:
+            self.compressor = options.compression
+        self._decompressors: dict[int, Compressor] = {}
+        if self.compressor is not None:
+            self._decompressors[self.compressor.marker] = self.compressor
+
+    def encode(self, value: Any) -> bytes:
+        """Return the stored form of value."""
+        payload = self.codec.encode(value)
+        compressor = self.compressor
+        if compressor is not None and len(payload) >= self.options.compress_threshold:
+            compressed = compressor.compress(payload)
+            if len(compressed) < len(payload):
+                return bytes((compressor.marker,)) + compressed
+        return bytes((UNCOMPRESSED,)) + payload
+
+    def decode(self, data: bytes | bytearray | memoryview | None) -> Any:
+        """Return the value of a stored form, or None for a missing key."""
+        if data is None:
+            return None
+        view = memoryview(data)
+        if not view:
+            raise ValueError("stored value has no header byte")
+        marker = view[0]
+        payload = view[1:]
+        if marker != UNCOMPRESSED:
+            payload = memoryview(self._decompressor(marker).decompress(payload))
+        return self.codec.decode(payload)
+
+    def _decompressor(self, marker: int) -> Compressor:
+        compressor = self._decompressors.get(marker)
+        if compressor is None:
+            # Values written with a compressor that is no longer configured.
+            for name, factory in COMPRESSORS.items():
+                if factory.marker == marker:
+                    compressor = _build(name, factory, None)
+                    break
+            else:
+                raise ValueError(f"unknown compression header byte {marker}")
+            self._decompressors[marker] = compressor
+        return compressor
+
+    async def get(self, key: Any, default: Any = None) -> Any:
+        """Return the value stored at key, or default when it is missing."""
+        data = await self.client.get(key)
+        return default if data is None else self.decode(cast(bytes, data))
+
+    async def set(self, key: Any, value: Any, **options: Any) -> Any:
+        """Store value at key; options are passed to SET, e.g. ex or nx."""
+        return await self.client.set(key, self.encode(value), **options)
+
+    async def mget(self, keys: Iterable[Any]) -> list[Any]:
+        """Return the values of keys in order, None for missing keys."""
+        return [self.decode(data) for data in await mget(self.client, keys)]
+
+    async def mset(self, mapping: Mapping[Any, Any]) -> Any:
+        """Store several values at once."""
+        encoded = {key: self.encode(value) for key, value in mapping.items()}
+        if isinstance(self.client, RedisCluster):
+            return await self.client.mset_nonatomic(encoded)
+        return await self.client.mset(encoded)
+
+    async def hget(self, name: Any, key: Any, default: Any = None) -> Any:
+        """Return one hash field value, or default when it is missing."""
+        data = await self.client.hget(name, key)
+        return default if data is None else self.decode(cast(bytes, data))
+
+    async def hset(self, name: Any, mapping: Mapping[Any, Any]) -> Any:
+        """Store hash field values."""
+        encoded = {key: self.encode(value) for key, value in mapping.items()}
+        return await self.client.hset(name, mapping=encoded)
+
+    async def hgetall(self, name: Any) -> dict[Any, Any]:
+        """Return all fields of a hash with decoded values."""
+        data = await self.client.hgetall(name)
+        return {key: self.decode(cast(bytes, value)) for key, value in data.items()}
+
+    async def aclose(self) -> None:
+        """Release nothing; the serializer does not own the client."""
@@ -0,0 +1,291 @@
+"""
+Sanic-Redis session store
+"""
+
+import json
+import secrets
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterator, MutableMapping
+from typing import Any, Literal
+
+from sanic import Request, Sanic
+from sanic.response import HTTPResponse
+
+SessionStorage = Literal["hash", "string"]
+SameSite = Literal["Strict", "Lax", "None"]
+
+
+class Session(MutableMapping[str, Any]):
+    """
+    Session data of one request, loaded from Redis on first await.
+
+    Use ``session = await request.ctx.session`` before reading. With hash
+    storage, fields can be set or deleted without loading, and only changed
+    fields are written back.
+    """
+
+    sid: str | None
+    loaded: bool
+    modified: bool
+    invalidated: bool
+
+    def __init__(self, store: "RedisSessions", client: Any, sid: str | None):
+        self.store = store
+        self.client = client
+        self.sid = sid
+        self.loaded = sid is None
+        self.modified = False
+        self.invalidated = False
+        self._data: dict[str, Any] = {}
+        self._changed: dict[str, Any] = {}
+        self._removed: set[str] = set()
+        self._replaced: str | None = None
+
+    @property
+    def is_new(self) -> bool:
+        """Whether the session has no id stored in the client's cookie yet."""
+        return self.sid is None
+
+    def __await__(self):
+        return self.load().__await__()
+
+    async def load(self) -> "Session":
+        """Fetch the session data once and return the session."""
+        if not self.loaded:
+            data = await self.store._read(self.client, self.sid)
+            if data is None:
+                # Never adopt an id that Redis does not know, as it may have
+                # been planted by someone else; save() issues a fresh one.
+                self.sid = None
+                data = {}
+            # Apply changes made before loading on top of the stored data.
+            data.update(self._changed)
+            for key in self._removed:
+                data.pop(key, None)
+            self._data = data
+            self.loaded = True
+        return self
+
+    def _require_loaded(self) -> None:
+        if not self.loaded:
+            raise RuntimeError("await the session before reading it")
+
+    def __getitem__(self, key: str) -> Any:
+        self._require_loaded()
+        return self._data[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if not self.loaded and self.store.storage == "string":
+            raise RuntimeError("await the session before changing it")
+        self._data[key] = value
+        self._changed[key] = value
+        self._removed.discard(key)
+        self.modified = True
+
+    def __delitem__(self, key: str) -> None:
+        if self.loaded:
+            del self._data[key]
+        elif self.store.storage == "string":
+            raise RuntimeError("await the session before changing it")
+        self._changed.pop(key, None)
+        self._removed.add(key)
+        self.modified = True
+
+    def __iter__(self) -> Iterator[str]:
+        self._require_loaded()
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        self._require_loaded()
+        return len(self._data)
+
+    def invalidate(self) -> None:
+        """Delete the session from Redis and the client when the response is sent."""
+        self.invalidated = True
+
+    async def regenerate(self) -> None:
+        """
+        Move the session data to a new id when the response is sent.
+
+        Call this when privileges change, e.g. on login, so an id known to
+        anyone else before stops working.
+        """
+        await self.load()
+        if self.sid is not None:
+            self._replaced = self.sid
+        self.sid = None
+        self._changed = dict(self._data)
+        self._removed.clear()
+        self.modified = True
+
+
+class RedisSessions:
+    """
+    Store sessions in Redis behind a session id cookie.
+
+    install() puts a Session on request.ctx.session. Redis is only read when
+    a handler awaits the session and only written when it changed. The TTL
+    of unchanged sessions is refreshed at most once per refresh_interval
+    seconds (capped at half the ttl) per worker with a single PEXPIRE,
+    without reading the session.
+    """
+
+    ttl: float
+    storage: SessionStorage
+    samesite: SameSite
+
+    def __init__(
+        self,
+        ttl: float = 86_400,
+        refresh_interval: float = 300,
+        storage: SessionStorage = "hash",
+        ctx_name: str = "redis",
+        prefix: str = "sanic-redis:session:",
+        cookie_name: str = "session",
+        cookie_path: str = "/",
+        cookie_domain: str | None = None,
+        secure: bool = True,
+        samesite: SameSite = "Lax",
+        dumps: Callable[[Any], str | bytes] = json.dumps,
+        loads: Callable[[str | bytes], Any] = json.loads,
+        max_tracked_sessions: int = 100_000,
+    ) -> None:
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+        if refresh_interval < 0:
+            raise ValueError("refresh_interval must not be negative")
+        if storage not in ("hash", "string"):
+            raise ValueError("storage must be hash or string")
+        self.ttl = ttl
+        # Refresh well before a session could expire between two refreshes.
+        self.refresh_interval = min(refresh_interval, ttl / 2)
+        self.storage = storage
+        self.ctx_name = ctx_name
+        self.prefix = prefix
+        self.cookie_name = cookie_name
+        self.cookie_path = cookie_path
+        self.cookie_domain = cookie_domain
+        self.secure = secure
+        self.samesite = samesite
+        self.dumps = dumps
+        self.loads = loads
+        self.max_tracked_sessions = max_tracked_sessions
+        self._ttl_ms = max(1, int(ttl * 1000))
+        # sid -> monotonic time of this worker's last TTL refresh.
+        self._refreshed: OrderedDict[str, float] = OrderedDict()
+
+    def install(self, app: Sanic) -> None:
+        """Register request and response middleware on app."""
+
+        async def redis_session(request: Request) -> None:
+            client = getattr(request.app.ctx, self.ctx_name)
+            sid = request.cookies.get(self.cookie_name) or None
+            request.ctx.session = Session(self, client, sid)
+
+        async def redis_session_save(request: Request, response: HTTPResponse) -> None:
+            session = getattr(request.ctx, "session", None)
+            if isinstance(session, Session):
+                await self.save(session, response)
+
+        app.on_request(redis_session)
+        app.on_response(redis_session_save)
+
+    async def save(self, session: Session, response: HTTPResponse) -> None:
+        """Write back a changed session and maintain its cookie and TTL."""
+        replaced = session._replaced
+        if replaced is not None:
+            session._replaced = None
+            await session.client.delete(self.prefix + replaced)
+            self._refreshed.pop(replaced, None)
+        if session.invalidated:
+            if session.sid is not None:
+                await session.client.delete(self.prefix + session.sid)
+                self._refreshed.pop(session.sid, None)
+            if session.sid is not None or replaced is not None:
+                response.delete_cookie(
+                    self.cookie_name, path=self.cookie_path, domain=self.cookie_domain
+                )
+            return
+        if session.modified:
+            if (
+                session.sid is not None
+                and not session.loaded
+                and not await session.client.exists(self.prefix + session.sid)
+            ):
+                # Fields were set without loading a session Redis does not
+                # know; do not adopt the id from the cookie.
+                session.sid = None
+            if session.sid is None:
+                session.sid = secrets.token_urlsafe(32)
+            await self._write(session)
+        elif session.sid is None or not self._refresh_due(session.sid):
+            return
+        elif not await session.client.pexpire(self.prefix + session.sid, self._ttl_ms):
+            # The session expired in Redis; stop sending its id.
+            self._refreshed.pop(session.sid, None)
+            response.delete_cookie(
+                self.cookie_name, path=self.cookie_path, domain=self.cookie_domain
+            )
+            return
+        self._mark_refreshed(session.sid)
+        response.add_cookie(
+            self.cookie_name,
+            session.sid,
+            path=self.cookie_path,
+            domain=self.cookie_domain,
+            secure=self.secure,
+            httponly=True,
+            samesite=self.samesite,
+            max_age=int(self.ttl),
+        )
+
+    async def _read(self, client: Any, sid: str | None) -> dict[str, Any] | None:
+        """Return the stored session data, or None if Redis has no such session."""
+        if sid is None:
+            return {}
+        key = self.prefix + sid
+        if self.storage == "hash":
+            fields = await client.hgetall(key)
+            if not fields:
+                return None
+            return {
+                (name.decode() if isinstance(name, bytes) else name): self.loads(value)
+                for name, value in fields.items()
+            }
+        raw = await client.get(key)
+        return None if raw is None else self.loads(raw)
+
+    async def _write(self, session: Session) -> None:
+        key = self.prefix + str(session.sid)
+        async with session.client.pipeline(transaction=True) as pipe:
+            if self.storage == "string":
+                pipe.set(key, self.dumps(session._data), px=self._ttl_ms)
+            else:
+                if session._removed:
+                    pipe.hdel(key, *session._removed)
+                if session._changed:
+                    pipe.hset(
+                        key,
+                        mapping={
+                            name: self.dumps(value)
+                            for name, value in session._changed.items()
+                        },
+                    )
+                pipe.pexpire(key, self._ttl_ms)
+            await pipe.execute()
+        session._changed.clear()
+        session._removed.clear()
+        session.modified = False
+
+    def _refresh_due(self, sid: str) -> bool:
+        refreshed = self._refreshed.get(sid)
+        return refreshed is None or (
+            time.monotonic() - refreshed >= self.refresh_interval
+        )
+
+    def _mark_refreshed(self, sid: str) -> None:
+        self._refreshed[sid] = time.monotonic()
+        self._refreshed.move_to_end(sid)
+        while len(self._refreshed) > self.max_tracked_sessions:
+            self._refreshed.popitem(last=False)
@@ -0,0 +1,123 @@
+"""
+Sanic-Redis connection pools shared between databases of one server
+"""
+
+from typing import Any, cast
+
+from redis.asyncio import ConnectionPool, Redis
+from redis.asyncio.connection import parse_url
+from redis.exceptions import ResponseError
+
+
+class _SharedPool:
+    __slots__ = ("key", "pool", "views")
+
+    def __init__(self, key: tuple[Any, ...], pool: ConnectionPool) -> None:
+        self.key = key
+        self.pool = pool
+        self.views = 0
+
+
+# Pools shared in this process, keyed by everything but the database.
+_shared_pools: dict[tuple[Any, ...], _SharedPool] = {}
+
+
+def _pool_key(options: dict[str, Any]) -> tuple[Any, ...]:
+    return tuple(
+        sorted((name, repr(value)) for name, value in options.items() if name != "db")
+    )
+
+
+class DatabasePool:
+    """
+    View of a shared connection pool bound to one database.
+
+    Connections come from the shared pool and are switched to this view's
+    database with SELECT only when they last served another database.
+    Other pool attributes are read from the shared pool. aclose() releases
+    the view; the shared pool is closed when its last view is released.
+    """
+
+    db: int
+
+    def __init__(self, shared: _SharedPool, db: int) -> None:
+        self.db = db
+        self._shared = shared
+        self._released = False
+
+    @property
+    def pool(self) -> ConnectionPool:
+        """The shared connection pool."""
+        return self._shared.pool
+
+    @property
+    def connection_kwargs(self) -> dict[str, Any]:
+        """Connection options of the shared pool with this view's database."""
+        return {**self._shared.pool.connection_kwargs, "db": self.db}
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._shared.pool, name)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}(db={self.db}, pool={self.pool!r})>"
+
+    async def get_connection(self, *args: Any, **options: Any) -> Any:
+        """Get a connection from the shared pool with this database selected."""
+        connection = await self.pool.get_connection(*args, **options)
+        if connection.db == self.db:
+            return connection
+        try:
+            await connection.send_command("SELECT", self.db)
+            reply = await connection.read_response()
+            if reply not in (b"OK", "OK"):
+                raise ResponseError(f"SELECT {self.db} failed: {reply!r}")
+        except BaseException:
+            # The reply may still be unread; do not reuse the socket.
+            await connection.disconnect()
+            await self.pool.release(connection)
+            raise
+        # Reconnects select the database the connection was last used with.
+        connection.db = self.db
+        return connection
+
+    async def aclose(self) -> None:
+        """Release this view and close the shared pool after the last one."""
+        if self._released:
+            return
+        self._released = True
+        shared = self._shared
+        shared.views -= 1
+        if shared.views == 0:
+            if _shared_pools.get(shared.key) is shared:
+                del _shared_pools[shared.key]
+            await shared.pool.aclose()
+
+
+def shared_pool(url: str, **kwargs: Any) -> DatabasePool:
+    """
+    Return a view on the process-wide pool for the server and options of url.
+
+    URLs and options that only differ in the database share one pool.
+    """
+    options = {**parse_url(url), **kwargs}
+    db = int(options.get("db") or 0)
+    key = _pool_key(options)
+    shared = _shared_pools.get(key)
+    if shared is None:
+        pool = ConnectionPool.from_url(url, **kwargs)
+        shared = _shared_pools[key] = _SharedPool(key, pool)
+    shared.views += 1
+    return DatabasePool(shared, db)
+
+
+def shared_client(
+    url: str, single_connection_client: bool = False, **kwargs: Any
+) -> Redis:
+    """Create a client using a shared pool view, like redis.asyncio.from_url."""
+    client = Redis(
+        connection_pool=cast(ConnectionPool, shared_pool(url, **kwargs)),
+        single_connection_client=single_connection_client,
+    )
+    # The client owns its view, so closing it releases the shared pool.
+    client.auto_close_connection_pool = True
+    return client
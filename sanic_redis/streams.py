@@ -0,0 +1,321 @@
+"""
+Sanic-Redis stream consumer groups
+"""
+
+import asyncio
+import os
+import socket
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from redis.asyncio import Redis
+from redis.asyncio.cluster import RedisCluster
+from redis.exceptions import ConnectionError, ResponseError, TimeoutError
+from sanic.log import logger
+
+from .tasks import stop_task
+
+
+@dataclass(frozen=True)
+class StreamMessage:
+    """One stream entry delivered to a consumer handler."""
+
+    stream: str
+    id: Any
+    fields: dict[Any, Any]
+
+
+StreamHandler = Callable[[StreamMessage], Awaitable[Any]]
+
+
+@dataclass(frozen=True)
+class StreamConsumerOptions:
+    """
+    Options for a stream consumer group worker.
+
+    Each XREADGROUP call asks for at most batch_size entries and blocks up to
+    block seconds; the client's socket_timeout must be longer. concurrency
+    bounds the handlers running at once, and no more entries are read than
+    there are free handler slots. Successful entries are acknowledged in one
+    XACK per ack_batch_size entries or every ack_interval seconds. Entries
+    left pending for claim_idle seconds, by any consumer of the group, are
+    taken over with XAUTOCLAIM every claim_interval seconds; None disables
+    reclaiming. On shutdown running handlers get drain_timeout seconds to
+    finish. consumer defaults to the host name and process id.
+    """
+
+    batch_size: int = 100
+    block: float = 5.0
+    concurrency: int = 16
+    ack_batch_size: int = 100
+    ack_interval: float = 0.1
+    claim_idle: float | None = 60.0
+    claim_interval: float = 30.0
+    drain_timeout: float = 30.0
+    consumer: str | None = None
+    create_group: bool = True
+
+    def __post_init__(self) -> None:
+        if self.batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if self.block <= 0:
+            raise ValueError("block must be positive")
+        if self.concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if self.ack_batch_size < 1:
+            raise ValueError("ack_batch_size must be at least 1")
+        if self.ack_interval <= 0:
+            raise ValueError("ack_interval must be positive")
+        if self.claim_idle is not None and self.claim_idle <= 0:
+            raise ValueError("claim_idle must be positive")
+        if self.drain_timeout < 0:
+            raise ValueError("drain_timeout must not be negative")
+
+
+def _consumer_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class StreamConsumer:
+    """
+    Process the entries of a stream as a member of a consumer group.
+
+    start() runs a reader task that creates the group when needed, reads new
+    entries with XREADGROUP and hands each one to handler in its own task.
+    Entries whose handler raised stay pending and are retried once they are
+    reclaimed. Delivery is at least once, so handlers should be idempotent.
+    """
+
+    client: Redis | RedisCluster
+    stream: str
+    group: str
+    handler: StreamHandler
+    options: StreamConsumerOptions
+    consumer: str
+    processed: int
+    failed: int
+    acked: int
+    claimed: int
+
+    def __init__(
+        self,
+        client: Redis | RedisCluster,
+        stream: str,
+        group: str,
+        handler: StreamHandler,
+        options: StreamConsumerOptions,
+    ) -> None:
+        self.client = client
+        self.stream = stream
+        self.group = group
+        self.handler = handler
+        self.options = options
+        self.consumer = options.consumer or _consumer_name()
+        self.processed = 0
+        self.failed = 0
+        self.acked = 0
+        self.claimed = 0
+        self._tasks: set[asyncio.Task] = set()
+        self._acks: list[Any] = []
+        self._ack_ready = asyncio.Event()
+        self._claim_cursor: Any = "0-0"
+        self._reader: asyncio.Task | None = None
+        self._acker: asyncio.Task | None = None
+        self._stop_reading = False
+        self._stop_acking = False
+
+    def start(self) -> None:
+        """Start reading and acknowledging entries."""
+        if self._reader is None:
+            self._stop_reading = False
+            self._stop_acking = False
+            self._reader = asyncio.ensure_future(self._read())
+            self._acker = asyncio.ensure_future(self._ack_loop())
+
+    def stats(self) -> dict[str, int]:
+        """Return consumer counters for monitoring."""
+        return {
+            "in_flight": len(self._tasks),
+            "processed": self.processed,
+            "failed": self.failed,
+            "acked": self.acked,
+            "claimed": self.claimed,
+        }
+
+    async def aclose(self) -> None:
+        """Stop reading, drain running handlers and flush acknowledgements."""
+        # Entries read but not yet handled stay pending and are reclaimed.
+        self._stop_reading = True
+        await stop_task(self._reader)
+        self._reader = None
+        if self._tasks:
+            _done, pending = await asyncio.wait(
+                self._tasks, timeout=self.options.drain_timeout
+            )
+            if pending:
+                logger.warning(
+                    "[sanic-redis] cancelling %d stream handlers of %s that did "
+                    "not finish in time",
+                    len(pending),
+                    self.stream,
+                )
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+        self._stop_acking = True
+        await stop_task(self._acker)
+        self._acker = None
+        await self._flush_acks()
+
+    async def _read(self) -> None:
+        block_ms = max(1, int(self.options.block * 1000))
+        loop = asyncio.get_running_loop()
+        next_claim = loop.time()
+        retry_delay = 0.1
+        group_ready = False
+        while not self._stop_reading:
+            try:
+                if not group_ready:
+                    await self._create_group()
+                    group_ready = True
+                await self._wait_for_slot()
+                count = min(
+                    self.options.batch_size,
+                    self.options.concurrency - len(self._tasks),
+                )
+                if self.options.claim_idle is not None and loop.time() >= next_claim:
+                    if await self._claim(count):
+                        continue
+                    next_claim = loop.time() + self.options.claim_interval
+                reply: Any = await self.client.xreadgroup(
+                    self.group,
+                    self.consumer,
+                    {self.stream: ">"},
+                    count=count,
+                    block=block_ms,
+                )
+                # RESP3 replies map stream names to entries.
+                if isinstance(reply, dict):
+                    reply = reply.items()
+                for _stream, entries in reply or ():
+                    for entry_id, fields in entries:
+                        self._spawn(entry_id, fields)
+                retry_delay = 0.1
+            except ResponseError as error:
+                if "NOGROUP" in str(error) and group_ready:
+                    # The stream or group was deleted; create it again.
+                    group_ready = False
+                    continue
+                logger.exception(
+                    "[sanic-redis] stream consumer of %s failed; retrying in %.1fs",
+                    self.stream,
+                    retry_delay,
+                )
+            except (ConnectionError, TimeoutError):
+                logger.warning(
+                    "[sanic-redis] stream consumer of %s lost its connection; "
+                    "retrying in %.1fs",
+                    self.stream,
+                    retry_delay,
+                )
+            else:
+                continue
+            await asyncio.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, 5.0)
+
+    async def _create_group(self) -> None:
+        if not self.options.create_group:
+            return
+        try:
+            await self.client.xgroup_create(
+                self.stream, self.group, id="$", mkstream=True
+            )
+        except ResponseError as error:
+            if "BUSYGROUP" not in str(error):
+                raise
+
+    async def _claim(self, count: int) -> bool:
+        # Returns True while the pending entries list has more to scan.
+        assert self.options.claim_idle is not None
+        reply = await self.client.xautoclaim(
+            self.stream,
+            self.group,
+            self.consumer,
+            min_idle_time=int(self.options.claim_idle * 1000),
+            start_id=self._claim_cursor,
+            count=count,
+        )
+        cursor, entries = reply[0], reply[1]
+        for entry_id, fields in entries:
+            if fields is None:
+                # Redis 6.2 returns entries deleted from the stream as nil.
+                self._acks.append(entry_id)
+                continue
+            self.claimed += 1
+            self._spawn(entry_id, fields)
+        self._claim_cursor = cursor
+        return cursor not in (b"0-0", "0-0")
+
+    async def _wait_for_slot(self) -> None:
+        if len(self._tasks) >= self.options.concurrency:
+            await asyncio.wait(self._tasks, return_when=asyncio.FIRST_COMPLETED)
+
+    def _spawn(self, entry_id: Any, fields: dict[Any, Any]) -> None:
+        message = StreamMessage(self.stream, entry_id, fields)
+        task = asyncio.ensure_future(self._handle(message))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _handle(self, message: StreamMessage) -> None:
+        try:
+            await self.handler(message)
+        except Exception:
+            self.failed += 1
+            logger.exception(
+                "[sanic-redis] stream handler failed for %s entry %s",
+                self.stream,
+                message.id,
+            )
+            return
+        self.processed += 1
+        self._acks.append(message.id)
+        if len(self._acks) >= self.options.ack_batch_size:
+            self._ack_ready.set()
+
+    async def _ack_loop(self) -> None:
+        while not self._stop_acking:
+            try:
+                await asyncio.wait_for(
+                    self._ack_ready.wait(), self.options.ack_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._ack_ready.clear()
+            await self._flush_acks()
+
+    async def _flush_acks(self) -> None:
+        if not self._acks:
+            return
+        ids, self._acks = self._acks, []
+        try:
+            await self.client.xack(self.stream, self.group, *ids)
+        except (ConnectionError, TimeoutError):
+            # Keep them for the next flush; unacknowledged entries would
+            # otherwise be processed again after claim_idle.
+            self._acks[:0] = ids
+            logger.warning(
+                "[sanic-redis] could not acknowledge %d entries of %s",
+                len(ids),
+                self.stream,
+            )
+            return
+        except ResponseError:
+            # Retrying cannot help, e.g. when the group was deleted.
+            logger.exception(
+                "[sanic-redis] dropped acknowledgements of %d entries of %s",
+                len(ids),
+                self.stream,
+            )
+            return
+        self.acked += len(ids)
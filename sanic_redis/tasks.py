@@ -0,0 +1,24 @@
+"""
+Sanic-Redis background task helpers
+"""
+
+import asyncio
+
+
+async def stop_task(task: asyncio.Task | None, retry_interval: float = 0.1) -> None:
+    """
+    Cancel task and wait until it has finished.
+
+    On Python 3.10 and 3.11, asyncio.wait_for inside redis-py can swallow a
+    cancellation that arrives together with a reply, so the task is
+    cancelled again until it is done. Loops stopped this way should also
+    check a stop flag on every pass.
+    """
+    if task is None:
+        return
+    while not task.done():
+        task.cancel()
+        await asyncio.wait((task,), timeout=retry_interval)
+    if not task.cancelled():
+        # Raise what the task raised instead of leaving it unretrieved.
+        task.result()
@@ -0,0 +1,2772 @@
+"""
+Sanic-Redis in-process Redis server for tests and benchmarks
+"""
+
+import argparse
+import asyncio
+import bisect
+import functools
+import itertools
+import math
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from typing import Any
+
+REDIS_VERSION = "7.4.0"
+DATABASES = 16
+MAX_ID = (2**64 - 1, 2**64 - 1)
+WRONGTYPE = "WRONGTYPE Operation against a key holding the wrong kind of value"
+SYNTAX_ERROR = "ERR syntax error"
+NOT_INTEGER = "ERR value is not an integer or out of range"
+NOT_FLOAT = "ERR value is not a valid float"
+INVALID_ID = "ERR Invalid stream ID specified as stream command argument"
+
+
+class _Status(str):
+    """Simple string reply, such as OK."""
+
+
+class _Push(list):
+    """Pub/sub message; a push reply under RESP3."""
+
+
+class _Replies(list):
+    """Several replies to one command, such as SUBSCRIBE a b."""
+
+
+class _ReplyError(Exception):
+    """Error reply, raised by commands or returned inside EXEC results."""
+
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+        self.message = message
+
+
+class _ProtocolError(Exception):
+    pass
+
+
+class _Block:
+    """Returned by blocking commands that found nothing to serve yet."""
+
+    __slots__ = ("keys", "timeout", "attempt")
+
+    def __init__(
+        self, keys: list[bytes], timeout: float, attempt: Callable[[], Any]
+    ) -> None:
+        self.keys = keys
+        self.timeout = timeout
+        self.attempt = attempt
+
+
+OK = _Status("OK")
+QUEUED = _Status("QUEUED")
+
+
+def _now() -> int:
+    return int(time.time() * 1000)
+
+
+def _text(value: bytes) -> str:
+    return value.decode("utf-8", "replace")
+
+
+def _int(value: bytes, message: str = NOT_INTEGER) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        raise _ReplyError(message) from None
+    if not -(2**63) <= number < 2**63:
+        raise _ReplyError(message)
+    return number
+
+
+def _float(value: bytes, message: str = NOT_FLOAT) -> float:
+    try:
+        number = float(value)
+    except ValueError:
+        raise _ReplyError(message) from None
+    if math.isnan(number):
+        raise _ReplyError(message)
+    return number
+
+
+def _format_float(value: float) -> str:
+    if math.isinf(value):
+        return "inf" if value > 0 else "-inf"
+    if value.is_integer() and abs(value) < 1e17:
+        return str(int(value))
+    return repr(value)
+
+
+def _timeout(value: bytes, unit: float = 1.0) -> float:
+    timeout = _float(value, "ERR timeout is not a float or out of range") * unit
+    if timeout < 0:
+        raise _ReplyError("ERR timeout is negative")
+    return timeout
+
+
+def _index_range(length: int, start: int, stop: int) -> slice:
+    if start < 0:
+        start += length
+    if stop < 0:
+        stop += length
+    start = max(start, 0)
+    if start > stop or start >= length:
+        return slice(0, 0)
+    return slice(start, min(stop, length - 1) + 1)
+
+
+def _arity_error(name: bytes) -> _ReplyError:
+    return _ReplyError(
+        f"ERR wrong number of arguments for '{_text(name).lower()}' command"
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def _matcher(pattern: bytes) -> Callable[[bytes], Any]:
+    """Compile a Redis glob-style pattern into a full-match predicate."""
+    if pattern == b"*":
+        return lambda value: True
+    text = pattern.decode("latin-1")
+    parts = []
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char == "*":
+            parts.append(".*")
+        elif char == "?":
+            parts.append(".")
+        elif char == "\\" and i + 1 < len(text):
+            i += 1
+            parts.append(re.escape(text[i]))
+        elif char == "[" and "]" in text[i + 2 :]:
+            end = text.index("]", i + 2)
+            body = text[i + 1 : end]
+            if body.startswith("^"):
+                body = "^" + body[1:].replace("\\", "\\\\")
+            else:
+                body = body.replace("\\", "\\\\").replace("^", "\\^")
+            parts.append(f"[{body}]")
+            i = end
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return re.compile("".join(parts).encode("latin-1"), re.DOTALL).fullmatch
+
+
+def _encode(out: bytearray, value: Any, resp3: bool) -> None:
+    kind = type(value)
+    if kind is bytes:
+        out += b"$%d\r\n%b\r\n" % (len(value), value)
+    elif value is None:
+        out += b"_\r\n" if resp3 else b"$-1\r\n"
+    elif kind is _Status:
+        out += b"+%b\r\n" % value.encode()
+    elif kind is int or kind is bool:
+        out += b":%d\r\n" % value
+    elif kind is list or kind is tuple or kind is _Push:
+        if kind is _Push and resp3:
+            out += b">%d\r\n" % len(value)
+        else:
+            out += b"*%d\r\n" % len(value)
+        for item in value:
+            _encode(out, item, resp3)
+    elif kind is float:
+        text = _format_float(value).encode()
+        if resp3:
+            out += b",%b\r\n" % text
+        else:
+            out += b"$%d\r\n%b\r\n" % (len(text), text)
+    elif kind is dict:
+        out += (b"%%%d\r\n" if resp3 else b"*%d\r\n") % (
+            len(value) if resp3 else 2 * len(value)
+        )
+        for key, item in value.items():
+            _encode(out, key, resp3)
+            _encode(out, item, resp3)
+    elif kind is set or kind is frozenset:
+        out += (b"~%d\r\n" if resp3 else b"*%d\r\n") % len(value)
+        for item in value:
+            _encode(out, item, resp3)
+    elif kind is str:
+        _encode(out, value.encode(), resp3)
+    elif isinstance(value, _ReplyError):
+        out += b"-%b\r\n" % value.message.encode()
+    else:
+        raise TypeError(f"cannot encode {kind.__name__} reply")
+
+
+def _parse(buffer: bytearray, start: int) -> tuple[list[bytes] | None, int]:
+    """Parse one command at start; return (None, start) when incomplete."""
+    if buffer[start] != 42:  # inline command
+        end = buffer.find(b"\n", start)
+        if end < 0:
+            if len(buffer) - start > 65536:
+                raise _ProtocolError("too big inline request")
+            return None, start
+        return bytes(buffer[start:end]).split(), end + 1
+    end = buffer.find(b"\r\n", start)
+    if end < 0:
+        return None, start
+    try:
+        count = int(buffer[start + 1 : end])
+    except ValueError:
+        raise _ProtocolError("invalid multibulk length") from None
+    pos = end + 2
+    args = []
+    for _ in range(count):
+        end = buffer.find(b"\r\n", pos)
+        if end < 0:
+            return None, start
+        if buffer[pos] != 36:
+            raise _ProtocolError(f"expected '$', got '{chr(buffer[pos])}'")
+        try:
+            size = int(buffer[pos + 1 : end])
+        except ValueError:
+            raise _ProtocolError("invalid bulk length") from None
+        pos = end + 2
+        if len(buffer) < pos + size + 2:
+            return None, start
+        args.append(bytes(buffer[pos : pos + size]))
+        pos += size + 2
+    return args, pos
+
+
+class _ZSet:
+    __slots__ = ("scores", "_ordered")
+
+    def __init__(self) -> None:
+        self.scores: dict[bytes, float] = {}
+        self._ordered: list[tuple[float, bytes]] | None = None
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def ordered(self) -> list[tuple[float, bytes]]:
+        if self._ordered is None:
+            self._ordered = sorted((score, m) for m, score in self.scores.items())
+        return self._ordered
+
+    def add(self, member: bytes, score: float) -> None:
+        self.scores[member] = score
+        self._ordered = None
+
+    def remove(self, member: bytes) -> bool:
+        if self.scores.pop(member, None) is None:
+            return False
+        self._ordered = None
+        return True
+
+
+class _Pending:
+    __slots__ = ("consumer", "delivered", "count")
+
+    def __init__(self, consumer: bytes, delivered: int, count: int) -> None:
+        self.consumer = consumer
+        self.delivered = delivered
+        self.count = count
+
+
+class _Group:
+    __slots__ = ("last_id", "pending", "consumers")
+
+    def __init__(self, last_id: tuple[int, int]) -> None:
+        self.last_id = last_id
+        self.pending: dict[tuple[int, int], _Pending] = {}
+        self.consumers: dict[bytes, int] = {}
+
+
+class _Stream:
+    __slots__ = ("ids", "entries", "last_id", "groups")
+
+    def __init__(self) -> None:
+        self.ids: list[tuple[int, int]] = []
+        self.entries: dict[tuple[int, int], list[bytes]] = {}
+        self.last_id = (0, 0)
+        self.groups: dict[bytes, _Group] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, entry_id: tuple[int, int], fields: list[bytes]) -> None:
+        self.ids.append(entry_id)
+        self.entries[entry_id] = fields
+        self.last_id = entry_id
+
+    def range(
+        self,
+        start: tuple[int, int],
+        end: tuple[int, int],
+        count: int | None = None,
+        reverse: bool = False,
+    ) -> list[list[Any]]:
+        ids = self.ids[
+            bisect.bisect_left(self.ids, start) : bisect.bisect_right(self.ids, end)
+        ]
+        if reverse:
+            ids.reverse()
+        if count is not None:
+            ids = ids[:count]
+        return [[_format_id(entry_id), self.entries[entry_id]] for entry_id in ids]
+
+    def after(self, entry_id: tuple[int, int], count: int | None) -> list:
+        start = bisect.bisect_right(self.ids, entry_id)
+        return self.ids[start : None if count is None else start + count]
+
+    def remove(self, entry_id: tuple[int, int]) -> bool:
+        if self.entries.pop(entry_id, None) is None:
+            return False
+        self.ids.pop(bisect.bisect_left(self.ids, entry_id))
+        return True
+
+    def trim(self, maxlen: int | None, minid: tuple[int, int] | None) -> int:
+        drop = 0
+        if maxlen is not None:
+            drop = max(0, len(self.ids) - maxlen)
+        elif minid is not None:
+            drop = bisect.bisect_left(self.ids, minid)
+        for entry_id in self.ids[:drop]:
+            del self.entries[entry_id]
+        del self.ids[:drop]
+        return drop
+
+
+_TYPE_NAMES: dict[type, str] = {
+    bytes: "string",
+    dict: "hash",
+    deque: "list",
+    set: "set",
+    _ZSet: "zset",
+    _Stream: "stream",
+}
+
+
+def _format_id(entry_id: tuple[int, int]) -> bytes:
+    return b"%d-%d" % entry_id
+
+
+def _parse_id(value: bytes, missing_seq: int = 0) -> tuple[int, int]:
+    if value == b"-":
+        return (0, 0)
+    if value == b"+":
+        return MAX_ID
+    ms, separator, seq = value.partition(b"-")
+    try:
+        entry_id = (int(ms), int(seq) if separator else missing_seq)
+    except ValueError:
+        raise _ReplyError(INVALID_ID) from None
+    if min(entry_id) < 0:
+        raise _ReplyError(INVALID_ID)
+    return entry_id
+
+
+def _parse_range_id(value: bytes, end: bool) -> tuple[int, int]:
+    """Parse an XRANGE bound, honouring the exclusive "(" prefix."""
+    if not value.startswith(b"("):
+        return _parse_id(value, MAX_ID[1] if end else 0)
+    ms, seq = _parse_id(value[1:], MAX_ID[1] if end else 0)
+    if end:
+        return (ms, seq - 1) if seq else (ms - 1, MAX_ID[1])
+    return (ms, seq + 1) if seq < MAX_ID[1] else (ms + 1, 0)
+
+
+class _Database:
+    __slots__ = ("index", "data", "expires")
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.data: dict[bytes, Any] = {}
+        self.expires: dict[bytes, int] = {}
+
+    def get(self, key: bytes, kind: type | None = None) -> Any:
+        if key in self.expires and self.expires[key] <= _now():
+            del self.data[key]
+            del self.expires[key]
+            return None
+        value = self.data.get(key)
+        if value is not None and kind is not None and type(value) is not kind:
+            raise _ReplyError(WRONGTYPE)
+        return value
+
+    def setdefault(self, key: bytes, kind: type) -> Any:
+        value = self.get(key, kind)
+        if value is None:
+            value = self.data[key] = kind()
+        return value
+
+    def set(self, key: bytes, value: Any, expires_at: int | None = None) -> None:
+        self.data[key] = value
+        if expires_at is None:
+            self.expires.pop(key, None)
+        else:
+            self.expires[key] = expires_at
+
+    def delete(self, key: bytes) -> bool:
+        if self.get(key) is None:
+            return False
+        del self.data[key]
+        self.expires.pop(key, None)
+        return True
+
+    def prune(self, key: bytes, value: Any) -> None:
+        """Delete key once the container it holds is empty."""
+        if not value:
+            self.delete(key)
+
+    def keys(self) -> list[bytes]:
+        now = _now()
+        for key, expires_at in list(self.expires.items()):
+            if expires_at <= now:
+                del self.data[key]
+                del self.expires[key]
+        return list(self.data)
+
+
+class _Connection:
+    __slots__ = (
+        "id",
+        "reader",
+        "writer",
+        "database",
+        "resp3",
+        "name",
+        "multi",
+        "multi_failed",
+        "watched",
+        "dirty",
+        "channels",
+        "patterns",
+        "task",
+        "closing",
+    )
+
+    def __init__(
+        self,
+        connection_id: int,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        database: _Database,
+    ) -> None:
+        self.id = connection_id
+        self.reader = reader
+        self.writer = writer
+        self.database = database
+        self.resp3 = False
+        self.name: bytes | None = None
+        self.multi: list[tuple[Callable[..., Any], list[bytes], bool]] | None = None
+        self.multi_failed = False
+        self.watched: set[tuple[int, bytes]] = set()
+        self.dirty = False
+        self.channels: set[bytes] = set()
+        self.patterns: set[bytes] = set()
+        self.task: asyncio.Task | None = None
+        self.closing = False
+
+    def send(self, reply: Any) -> None:
+        if self.writer.is_closing():
+            return
+        out = bytearray()
+        _encode(out, reply, self.resp3)
+        self.writer.write(out)
+
+
+_Handler = Callable[["FakeRedisServer", _Connection, list[bytes]], Any]
+_COMMANDS: dict[bytes, tuple[_Handler, int, bool]] = {}
+_TRANSACTION_COMMANDS = frozenset({b"EXEC", b"DISCARD", b"MULTI", b"WATCH", b"QUIT"})
+_SUBSCRIBED_COMMANDS = frozenset(
+    {
+        b"SUBSCRIBE",
+        b"UNSUBSCRIBE",
+        b"PSUBSCRIBE",
+        b"PUNSUBSCRIBE",
+        b"PING",
+        b"QUIT",
+        b"RESET",
+    }
+)
+
+
+def _command(name: str, arity: int, write: bool = False):
+    """
+    Register a command handler.
+
+    arity counts the command name like Redis does; a negative arity is the
+    minimum number of arguments.
+    """
+
+    def register(handler: _Handler) -> _Handler:
+        _COMMANDS[name.encode()] = (handler, arity, write)
+        return handler
+
+    return register
+
+
+class FakeRedisServer:
+    """
+    In-memory Redis server speaking RESP2 and RESP3 over local TCP.
+
+    It implements the common connection, key, string, hash, list, set,
+    sorted set, pub/sub, stream and transaction commands, enough for the
+    redis-py client and this extension. Lua scripts, cluster, replication
+    and persistence are not supported. Run it on the current loop with
+    async with, or on a background thread with a plain with block, and
+    point clients at url.
+    """
+
+    host: str
+    port: int
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.host = host
+        self.port = port
+        self._server: asyncio.Server | None = None
+        self._databases = [_Database(index) for index in range(DATABASES)]
+        self._connections: set[_Connection] = set()
+        self._channels: dict[bytes, set[_Connection]] = {}
+        self._patterns: dict[bytes, set[_Connection]] = {}
+        self._waiters: dict[tuple[int, bytes], set[asyncio.Future]] = {}
+        self._watching: set[_Connection] = set()
+        self._cursors: dict[int, bytes] = {}
+        self._cursor_ids = itertools.count(1)
+        self._connection_ids = itertools.count(1)
+        self._started = time.time()
+        self._thread: threading.Thread | None = None
+        self._thread_loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def url(self) -> str:
+        """Redis URL of the server, without a database."""
+        return f"redis://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        """Start listening; port 0 picks a free port."""
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        """Serve until cancelled."""
+        if self._server is None:
+            await self.start()
+        assert self._server is not None
+        await self._server.serve_forever()
+
+    async def aclose(self) -> None:
+        """Stop listening and drop all client connections."""
+        if self._server is None:
+            return
+        server, self._server = self._server, None
+        server.close()
+        tasks = []
+        for conn in list(self._connections):
+            conn.writer.close()
+            if conn.task is not None:
+                conn.task.cancel()
+                tasks.append(conn.task)
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await server.wait_closed()
+
+    async def __aenter__(self) -> "FakeRedisServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    def __enter__(self) -> "FakeRedisServer":
+        started = threading.Event()
+        errors: list[BaseException] = []
+
+        def run() -> None:
+            loop = self._thread_loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(self.start())
+            except BaseException as error:
+                errors.append(error)
+                started.set()
+                loop.close()
+                return
+            started.set()
+            try:
+                loop.run_forever()
+                loop.run_until_complete(self.aclose())
+            finally:
+                loop.close()
+
+        self._thread = threading.Thread(target=run, name="fake-redis", daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self._thread is None or self._thread_loop is None:
+            return
+        self._thread_loop.call_soon_threadsafe(self._thread_loop.stop)
+        self._thread.join()
+        self._thread = None
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        conn = _Connection(
+            next(self._connection_ids), reader, writer, self._databases[0]
+        )
+        conn.task = asyncio.current_task()
+        self._connections.add(conn)
+        buffer = bytearray()
+        try:
+            while not conn.closing:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                buffer += data
+                out = bytearray()
+                pos = 0
+                while pos < len(buffer) and not conn.closing:
+                    args, pos = _parse(buffer, pos)
+                    if args is None:
+                        break
+                    if not args:
+                        continue
+                    reply = self._dispatch(conn, args)
+                    if type(reply) is _Block:
+                        # Answer pipelined commands before waiting.
+                        if out:
+                            writer.write(out)
+                            out = bytearray()
+                        reply = await self._block(conn, reply)
+                    if type(reply) is _Replies:
+                        for item in reply:
+                            _encode(out, item, conn.resp3)
+                    else:
+                        _encode(out, reply, conn.resp3)
+                del buffer[:pos]
+                if out:
+                    writer.write(out)
+                await writer.drain()
+        except _ProtocolError as error:
+            writer.write(b"-ERR Protocol error: %b\r\n" % str(error).encode())
+        except ConnectionError:
+            pass
+        finally:
+            self._disconnect(conn)
+            writer.close()
+
+    def _dispatch(self, conn: _Connection, args: list[bytes]) -> Any:
+        name = args[0].upper()
+        spec = _COMMANDS.get(name)
+        if spec is None:
+            if conn.multi is not None:
+                conn.multi_failed = True
+            arguments = " ".join(f"'{_text(arg)}'" for arg in args[1:])
+            return _ReplyError(
+                f"ERR unknown command '{_text(args[0])}', "
+                f"with args beginning with: {arguments}"
+            )
+        handler, arity, write = spec
+        if len(args) < -arity if arity < 0 else len(args) != arity:
+            if conn.multi is not None:
+                conn.multi_failed = True
+            return _arity_error(name)
+        if conn.multi is not None and name not in _TRANSACTION_COMMANDS:
+            conn.multi.append((handler, args, write))
+            return QUEUED
+        if (
+            (conn.channels or conn.patterns)
+            and not conn.resp3
+            and name not in _SUBSCRIBED_COMMANDS
+        ):
+            return _ReplyError(
+                f"ERR Can't execute '{_text(name).lower()}': only (P|S)SUBSCRIBE "
+                "/ (P|S)UNSUBSCRIBE / PING / QUIT / RESET are allowed in this context"
+            )
+        return self._call(conn, handler, args, write)
+
+    def _call(
+        self, conn: _Connection, handler: _Handler, args: list[bytes], write: bool
+    ) -> Any:
+        if write and self._watching:
+            index = conn.database.index
+            for watcher in self._watching:
+                if any((index, key) in watcher.watched for key in args[1:]):
+                    watcher.dirty = True
+        try:
+            return handler(self, conn, args)
+        except _ReplyError as error:
+            return error
+
+    async def _block(self, conn: _Connection, block: _Block) -> Any:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + block.timeout if block.timeout else None
+        index = conn.database.index
+        while True:
+            waiter = loop.create_future()
+            keys = [(index, key) for key in block.keys]
+            for key in keys:
+                self._waiters.setdefault(key, set()).add(waiter)
+            try:
+                while not waiter.done():
+                    if conn.reader.at_eof():
+                        # The client went away; serve nothing to it.
+                        return None
+                    remaining = 0.5 if deadline is None else deadline - loop.time()
+                    if remaining <= 0:
+                        return None
+                    try:
+                        await asyncio.wait_for(
+                            asyncio.shield(waiter), min(remaining, 0.5)
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                for key in keys:
+                    waiters = self._waiters.get(key)
+                    if waiters is not None:
+                        waiters.discard(waiter)
+                        if not waiters:
+                            del self._waiters[key]
+            try:
+                reply = block.attempt()
+            except _ReplyError as error:
+                return error
+            if reply is not None:
+                return reply
+
+    def _signal(self, database: _Database, key: bytes) -> None:
+        """Wake clients blocked on key."""
+        for waiter in self._waiters.get((database.index, key), ()):
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _disconnect(self, conn: _Connection) -> None:
+        self._connections.discard(conn)
+        self._watching.discard(conn)
+        for channel in conn.channels:
+            self._unsubscribe(self._channels, channel, conn)
+        for pattern in conn.patterns:
+            self._unsubscribe(self._patterns, pattern, conn)
+        conn.channels.clear()
+        conn.patterns.clear()
+
+    @staticmethod
+    def _unsubscribe(
+        registry: dict[bytes, set[_Connection]], name: bytes, conn: _Connection
+    ) -> None:
+        subscribers = registry.get(name)
+        if subscribers is not None:
+            subscribers.discard(conn)
+            if not subscribers:
+                del registry[name]
+
+    def _publish(self, channel: bytes, message: bytes) -> int:
+        receivers = 0
+        for conn in self._channels.get(channel, ()):
+            conn.send(_Push([b"message", channel, message]))
+            receivers += 1
+        for pattern, subscribers in self._patterns.items():
+            if _matcher(pattern)(channel):
+                for conn in subscribers:
+                    conn.send(_Push([b"pmessage", pattern, channel, message]))
+                    receivers += 1
+        return receivers
+
+    def _scan_page(
+        self, cursor: int, items: list[bytes], count: int
+    ) -> tuple[int, list[bytes]]:
+        """
+        Return the page of sorted items after cursor and the next cursor.
+
+        Cursors remember the last item they returned, so keys added or
+        removed between calls never make a scan skip other keys.
+        """
+        if cursor == 0:
+            start = 0
+        else:
+            last = self._cursors.pop(cursor, None)
+            start = len(items) if last is None else bisect.bisect_right(items, last)
+        page = items[start : start + count]
+        if start + count >= len(items):
+            return 0, page
+        next_cursor = next(self._cursor_ids)
+        self._cursors[next_cursor] = page[-1]
+        if len(self._cursors) > 10000:
+            del self._cursors[next(iter(self._cursors))]
+        return next_cursor, page
+
+
+def _scan_options(args: list[bytes], start: int) -> tuple[Callable, int, dict]:
+    match: Callable[[bytes], Any] = _matcher(b"*")
+    count = 10
+    extra: dict[bytes, Any] = {}
+    i = start
+    while i < len(args):
+        option = args[i].upper()
+        if option == b"NOVALUES":
+            extra[option] = True
+            i += 1
+            continue
+        if i + 1 >= len(args):
+            raise _ReplyError(SYNTAX_ERROR)
+        if option == b"MATCH":
+            match = _matcher(args[i + 1])
+        elif option == b"COUNT":
+            count = _int(args[i + 1])
+            if count < 1:
+                raise _ReplyError(SYNTAX_ERROR)
+        elif option == b"TYPE":
+            extra[option] = _text(args[i + 1]).lower()
+        else:
+            raise _ReplyError(SYNTAX_ERROR)
+        i += 2
+    return match, count, extra
+
+
+def _cursor(value: bytes) -> int:
+    return _int(value, "ERR invalid cursor")
+
+
+# Connection and server
+
+
+@_command("PING", -1)
+def _ping(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    if len(args) > 2:
+        raise _arity_error(args[0])
+    if (conn.channels or conn.patterns) and not conn.resp3:
+        return [b"pong", args[1] if len(args) > 1 else b""]
+    return args[1] if len(args) > 1 else _Status("PONG")
+
+
+@_command("ECHO", 2)
+def _echo(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return args[1]
+
+
+@_command("SELECT", 2)
+def _select(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    index = _int(args[1])
+    if not 0 <= index < DATABASES:
+        raise _ReplyError("ERR DB index is out of range")
+    conn.database = server._databases[index]
+    return OK
+
+
+@_command("HELLO", -1)
+def _hello(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    if len(args) > 1:
+        version = _int(
+            args[1], "ERR Protocol version is not an integer or out of range"
+        )
+        if version not in (2, 3):
+            raise _ReplyError("NOPROTO unsupported protocol version")
+        conn.resp3 = version == 3
+        options = args[2:]
+        while options:
+            option = options[0].upper()
+            if option == b"AUTH" and len(options) >= 3:
+                options = options[3:]
+            elif option == b"SETNAME" and len(options) >= 2:
+                conn.name = options[1]
+                options = options[2:]
+            else:
+                raise _ReplyError(SYNTAX_ERROR)
+    return {
+        b"server": b"redis",
+        b"version": REDIS_VERSION.encode(),
+        b"proto": 3 if conn.resp3 else 2,
+        b"id": conn.id,
+        b"mode": b"standalone",
+        b"role": b"master",
+        b"modules": [],
+    }
+
+
+@_command("AUTH", -2)
+def _auth(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return OK
+
+
+@_command("CLIENT", -2)
+def _client(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    subcommand = args[1].upper()
+    if subcommand in (b"SETINFO", b"NO-EVICT", b"NO-TOUCH", b"REPLY"):
+        return OK
+    if subcommand == b"SETNAME" and len(args) == 3:
+        conn.name = args[2] or None
+        return OK
+    if subcommand == b"GETNAME":
+        return conn.name
+    if subcommand == b"ID":
+        return conn.id
+    if subcommand == b"LIST":
+        return "".join(
+            f"id={other.id} name={_text(other.name or b'')} db={other.database.index}\n"
+            for other in server._connections
+        ).encode()
+    raise _ReplyError(f"ERR unknown subcommand '{_text(args[1])}'. Try CLIENT HELP.")
+
+
+@_command("QUIT", -1)
+def _quit(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    conn.closing = True
+    return OK
+
+
+@_command("RESET", 1)
+def _reset(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    server._disconnect(conn)
+    server._connections.add(conn)
+    conn.multi = None
+    conn.multi_failed = False
+    conn.watched.clear()
+    conn.dirty = False
+    conn.database = server._databases[0]
+    conn.resp3 = False
+    conn.name = None
+    return _Status("RESET")
+
+
+@_command("INFO", -1)
+def _info(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    keyspace = "".join(
+        f"db{database.index}:keys={len(database.keys())},"
+        f"expires={len(database.expires)},avg_ttl=0\r\n"
+        for database in server._databases
+        if database.data
+    )
+    return (
+        "# Server\r\n"
+        f"redis_version:{REDIS_VERSION}\r\n"
+        "redis_mode:standalone\r\n"
+        f"process_id:{os.getpid()}\r\n"
+        f"tcp_port:{server.port}\r\n"
+        f"uptime_in_seconds:{int(time.time() - server._started)}\r\n"
+        "\r\n# Clients\r\n"
+        f"connected_clients:{len(server._connections)}\r\n"
+        "\r\n# Replication\r\n"
+        "role:master\r\n"
+        f"\r\n# Keyspace\r\n{keyspace}"
+    ).encode()
+
+
+@_command("TIME", 1)
+def _time(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    seconds, micros = divmod(int(time.time() * 1_000_000), 1_000_000)
+    return [str(seconds).encode(), str(micros).encode()]
+
+
+@_command("CONFIG", -2)
+def _config(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    subcommand = args[1].upper()
+    if subcommand == b"GET":
+        return {}
+    if subcommand in (b"SET", b"RESETSTAT", b"REWRITE"):
+        return OK
+    raise _ReplyError(f"ERR unknown subcommand '{_text(args[1])}'. Try CONFIG HELP.")
+
+
+@_command("COMMAND", -1)
+def _command_info(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    if len(args) > 1 and args[1].upper() == b"COUNT":
+        return len(_COMMANDS)
+    return []
+
+
+@_command("DBSIZE", 1)
+def _dbsize(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return len(conn.database.keys())
+
+
+@_command("FLUSHDB", -1, write=True)
+def _flushdb(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    conn.database.data.clear()
+    conn.database.expires.clear()
+    for watcher in server._watching:
+        watcher.dirty = True
+    return OK
+
+
+@_command("FLUSHALL", -1, write=True)
+def _flushall(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    for database in server._databases:
+        database.data.clear()
+        database.expires.clear()
+    for watcher in server._watching:
+        watcher.dirty = True
+    return OK
+
+
+# Transactions
+
+
+@_command("MULTI", 1)
+def _multi(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    if conn.multi is not None:
+        raise _ReplyError("ERR MULTI calls can not be nested")
+    conn.multi = []
+    conn.multi_failed = False
+    return OK
+
+
+def _unwatch_connection(server: FakeRedisServer, conn: _Connection) -> None:
+    conn.watched.clear()
+    conn.dirty = False
+    server._watching.discard(conn)
+
+
+@_command("EXEC", 1)
+def _exec(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    if conn.multi is None:
+        raise _ReplyError("ERR EXEC without MULTI")
+    queued, conn.multi = conn.multi, None
+    dirty = conn.dirty
+    _unwatch_connection(server, conn)
+    if conn.multi_failed:
+        conn.multi_failed = False
+        raise _ReplyError("EXECABORT Transaction discarded because of previous errors.")
+    if dirty:
+        return None
+    replies = []
+    for handler, command_args, write in queued:
+        reply = server._call(conn, handler, command_args, write)
+        replies.append(None if type(reply) is _Block else reply)
+    return replies
+
+
+@_command("DISCARD", 1)
+def _discard(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    if conn.multi is None:
+        raise _ReplyError("ERR DISCARD without MULTI")
+    conn.multi = None
+    conn.multi_failed = False
+    _unwatch_connection(server, conn)
+    return OK
+
+
+@_command("WATCH", -2)
+def _watch(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    if conn.multi is not None:
+        raise _ReplyError("ERR WATCH inside MULTI is not allowed")
+    conn.watched.update((conn.database.index, key) for key in args[1:])
+    server._watching.add(conn)
+    return OK
+
+
+@_command("UNWATCH", 1)
+def _unwatch(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    _unwatch_connection(server, conn)
+    return OK
+
+
+# Keys
+
+
+@_command("DEL", -2, write=True)
+@_command("UNLINK", -2, write=True)
+def _del(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return sum(conn.database.delete(key) for key in args[1:])
+
+
+@_command("EXISTS", -2)
+@_command("TOUCH", -2)
+def _exists(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return sum(conn.database.get(key) is not None for key in args[1:])
+
+
+@_command("TYPE", 2)
+def _type(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    value = conn.database.get(args[1])
+    return _Status("none" if value is None else _TYPE_NAMES[type(value)])
+
+
+@_command("KEYS", 2)
+def _keys(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    match = _matcher(args[1])
+    return [key for key in conn.database.keys() if match(key)]
+
+
+@_command("SCAN", -2)
+def _scan(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    cursor = _cursor(args[1])
+    match, count, extra = _scan_options(args, 2)
+    database = conn.database
+    cursor, page = server._scan_page(cursor, sorted(database.keys()), count)
+    kind = extra.get(b"TYPE")
+    keys = [
+        key
+        for key in page
+        if match(key)
+        and (kind is None or _TYPE_NAMES[type(database.data[key])] == kind)
+    ]
+    return [str(cursor).encode(), keys]
+
+
+@_command("RANDOMKEY", 1)
+def _randomkey(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    keys = conn.database.keys()
+    return random.choice(keys) if keys else None
+
+
+def _rename(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    database = conn.database
+    value = database.get(args[1])
+    if value is None:
+        raise _ReplyError("ERR no such key")
+    if args[0].upper() == b"RENAMENX" and database.get(args[2]) is not None:
+        return 0
+    expires_at = database.expires.get(args[1])
+    database.delete(args[1])
+    database.set(args[2], value, expires_at)
+    server._signal(database, args[2])
+    return 1 if args[0].upper() == b"RENAMENX" else OK
+
+
+_command("RENAME", 3, write=True)(_rename)
+_command("RENAMENX", 3, write=True)(_rename)
+
+
+def _expire_handler(unit: int, absolute: bool) -> _Handler:
+    def expire(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+        database = conn.database
+        amount = _int(args[2])
+        flags = {arg.upper() for arg in args[3:]}
+        if not flags <= {b"NX", b"XX", b"GT", b"LT"} or len(flags) > 1:
+            raise _ReplyError(SYNTAX_ERROR)
+        if database.get(args[1]) is None:
+            return 0
+        expires_at = amount * unit if absolute else _now() + amount * unit
+        current = database.expires.get(args[1])
+        if (
+            (b"NX" in flags and current is not None)
+            or (b"XX" in flags and current is None)
+            or (b"GT" in flags and (current is None or expires_at <= current))
+            or (b"LT" in flags and current is not None and expires_at >= current)
+        ):
+            return 0
+        if expires_at <= _now():
+            database.delete(args[1])
+        else:
+            database.expires[args[1]] = expires_at
+        return 1
+
+    return expire
+
+
+_command("EXPIRE", -3, write=True)(_expire_handler(1000, False))
+_command("PEXPIRE", -3, write=True)(_expire_handler(1, False))
+_command("EXPIREAT", -3, write=True)(_expire_handler(1000, True))
+_command("PEXPIREAT", -3, write=True)(_expire_handler(1, True))
+
+
+def _ttl_handler(unit: int, absolute: bool) -> _Handler:
+    def ttl(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+        database = conn.database
+        if database.get(args[1]) is None:
+            return -2
+        expires_at = database.expires.get(args[1])
+        if expires_at is None:
+            return -1
+        if absolute:
+            return expires_at // unit
+        return (max(expires_at - _now(), 0) + unit // 2) // unit
+
+    return ttl
+
+
+_command("TTL", 2)(_ttl_handler(1000, False))
+_command("PTTL", 2)(_ttl_handler(1, False))
+_command("EXPIRETIME", 2)(_ttl_handler(1000, True))
+_command("PEXPIRETIME", 2)(_ttl_handler(1, True))
+
+
+@_command("PERSIST", 2, write=True)
+def _persist(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    database = conn.database
+    if database.get(args[1]) is None:
+        return 0
+    return int(database.expires.pop(args[1], None) is not None)
+
+
+# Strings
+
+
+@_command("GET", 2)
+def _get(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return conn.database.get(args[1], bytes)
+
+
+@_command("SET", -3, write=True)
+def _set(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    database = conn.database
+    key = args[1]
+    nx = xx = get = keep = False
+    expires_at = None
+    i = 3
+    while i < len(args):
+        option = args[i].upper()
+        if option == b"NX":
+            nx = True
+        elif option == b"XX":
+            xx = True
+        elif option == b"GET":
+            get = True
+        elif option == b"KEEPTTL":
+            keep = True
+        elif option in (b"EX", b"PX", b"EXAT", b"PXAT") and i + 1 < len(args):
+            amount = _int(args[i + 1])
+            if amount <= 0:
+                raise _ReplyError("ERR invalid expire time in 'set' command")
+            expires_at = {
+                b"EX": _now() + amount * 1000,
+                b"PX": _now() + amount,
+                b"EXAT": amount * 1000,
+                b"PXAT": amount,
+            }[option]
+            i += 1
+        else:
+            raise _ReplyError(SYNTAX_ERROR)
+        i += 1
+    if (nx and xx) or (keep and expires_at is not None):
+        raise _ReplyError(SYNTAX_ERROR)
+    old = database.get(key, bytes if get else None)
+    if (nx and old is not None) or (xx and old is None):
+        return old if get else None
+    if keep:
+        expires_at = database.expires.get(key)
+    database.set(key, args[2], expires_at)
+    return old if get else OK
+
+
+@_command("SETNX", 3, write=True)
+def _setnx(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    if conn.database.get(args[1]) is not None:
+        return 0
+    conn.database.set(args[1], args[2])
+    return 1
+
+
+def _setex_handler(unit: int) -> _Handler:
+    def setex(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+        amount = _int(args[2])
+        if amount <= 0:
+            raise _ReplyError(
+                f"ERR invalid expire time in '{_text(args[0]).lower()}' command"
+            )
+        conn.database.set(args[1], args[3], _now() + amount * unit)
+        return OK
+
+    return setex
+
+
+_command("SETEX", 4, write=True)(_setex_handler(1000))
+_command("PSETEX", 4, write=True)(_setex_handler(1))
+
+
+@_command("GETSET", 3, write=True)
+def _getset(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    old = conn.database.get(args[1], bytes)
+    conn.database.set(args[1], args[2])
+    return old
+
+
+@_command("GETDEL", 2, write=True)
+def _getdel(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    value = conn.database.get(args[1], bytes)
+    if value is not None:
+        conn.database.delete(args[1])
+    return value
+
+
+@_command("GETEX", -2, write=True)
+def _getex(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    database = conn.database
+    value = database.get(args[1], bytes)
+    if len(args) == 2:
+        return value
+    option = args[2].upper()
+    if option == b"PERSIST" and len(args) == 3:
+        expires_at = None
+    elif option in (b"EX", b"PX", b"EXAT", b"PXAT") and len(args) == 4:
+        amount = _int(args[3])
+        if amount <= 0:
+            raise _ReplyError("ERR invalid expire time in 'getex' command")
+        expires_at = {
+            b"EX": _now() + amount * 1000,
+            b"PX": _now() + amount,
+            b"EXAT": amount * 1000,
+            b"PXAT": amount,
+        }[option]
+    else:
+        raise _ReplyError(SYNTAX_ERROR)
+    if value is not None:
+        database.set(args[1], value, expires_at)
+    return value
+
+
+@_command("MGET", -2)
+def _mget(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    values = (conn.database.get(key) for key in args[1:])
+    return [value if type(value) is bytes else None for value in values]
+
+
+@_command("MSET", -3, write=True)
+def _mset(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    if len(args) % 2 == 0:
+        raise _arity_error(args[0])
+    for i in range(1, len(args), 2):
+        conn.database.set(args[i], args[i + 1])
+    return OK
+
+
+@_command("MSETNX", -3, write=True)
+def _msetnx(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    if len(args) % 2 == 0:
+        raise _arity_error(args[0])
+    if any(conn.database.get(key) is not None for key in args[1::2]):
+        return 0
+    _mset(server, conn, args)
+    return 1
+
+
+def _incr(database: _Database, key: bytes, amount: int) -> int:
+    value = database.get(key, bytes)
+    result = (0 if value is None else _int(value)) + amount
+    if not -(2**63) <= result < 2**63:
+        raise _ReplyError("ERR increment or decrement would overflow")
+    database.set(key, str(result).encode(), database.expires.get(key))
+    return result
+
+
+@_command("INCR", 2, write=True)
+def _incr_command(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return _incr(conn.database, args[1], 1)
+
+
+@_command("DECR", 2, write=True)
+def _decr(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return _incr(conn.database, args[1], -1)
+
+
+@_command("INCRBY", 3, write=True)
+def _incrby(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return _incr(conn.database, args[1], _int(args[2]))
+
+
+@_command("DECRBY", 3, write=True)
+def _decrby(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return _incr(conn.database, args[1], -_int(args[2]))
+
+
+@_command("INCRBYFLOAT", 3, write=True)
+def _incrbyfloat(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    database = conn.database
+    value = database.get(args[1], bytes)
+    result = (0.0 if value is None else _float(value)) + _float(args[2])
+    if math.isinf(result):
+        raise _ReplyError("ERR increment would produce NaN or Infinity")
+    encoded = _format_float(result).encode()
+    database.set(args[1], encoded, database.expires.get(args[1]))
+    return encoded
+
+
+@_command("APPEND", 3, write=True)
+def _append(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    database = conn.database
+    value = (database.get(args[1], bytes) or b"") + args[2]
+    database.set(args[1], value, database.expires.get(args[1]))
+    return len(value)
+
+
+@_command("STRLEN", 2)
+def _strlen(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return len(conn.database.get(args[1], bytes) or b"")
+
+
+@_command("GETRANGE", 4)
+def _getrange(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    value = conn.database.get(args[1], bytes) or b""
+    return value[_index_range(len(value), _int(args[2]), _int(args[3]))]
+
+
+@_command("SETRANGE", 4, write=True)
+def _setrange(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    database = conn.database
+    offset = _int(args[2])
+    if offset < 0:
+        raise _ReplyError("ERR offset is out of range")
+    value = database.get(args[1], bytes) or b""
+    if not args[3]:
+        return len(value)
+    value = value.ljust(offset, b"\0")
+    value = value[:offset] + args[3] + value[offset + len(args[3]) :]
+    database.set(args[1], value, database.expires.get(args[1]))
+    return len(value)
+
+
+# Hashes
+
+
+@_command("HSET", -4, write=True)
+@_command("HMSET", -4, write=True)
+def _hset(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    if len(args) % 2:
+        raise _arity_error(args[0])
+    fields = conn.database.setdefault(args[1], dict)
+    added = 0
+    for i in range(2, len(args), 2):
+        added += args[i] not in fields
+        fields[args[i]] = args[i + 1]
+    return OK if args[0].upper() == b"HMSET" else added
+
+
+@_command("HSETNX", 4, write=True)
+def _hsetnx(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    fields = conn.database.setdefault(args[1], dict)
+    if args[2] in fields:
+        return 0
+    fields[args[2]] = args[3]
+    return 1
+
+
+@_command("HGET", 3)
+def _hget(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return (conn.database.get(args[1], dict) or {}).get(args[2])
+
+
+@_command("HMGET", -3)
+def _hmget(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    fields = conn.database.get(args[1], dict) or {}
+    return [fields.get(field) for field in args[2:]]
+
+
+@_command("HGETALL", 2)
+def _hgetall(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return dict(conn.database.get(args[1], dict) or {})
+
+
+@_command("HDEL", -3, write=True)
+def _hdel(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    fields = conn.database.get(args[1], dict)
+    if fields is None:
+        return 0
+    removed = sum(fields.pop(field, None) is not None for field in args[2:])
+    conn.database.prune(args[1], fields)
+    return removed
+
+
+@_command("HEXISTS", 3)
+def _hexists(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return int(args[2] in (conn.database.get(args[1], dict) or {}))
+
+
+@_command("HLEN", 2)
+def _hlen(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return len(conn.database.get(args[1], dict) or {})
+
+
+@_command("HKEYS", 2)
+def _hkeys(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return list(conn.database.get(args[1], dict) or {})
+
+
+@_command("HVALS", 2)
+def _hvals(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return list((conn.database.get(args[1], dict) or {}).values())
+
+
+@_command("HSTRLEN", 3)
+def _hstrlen(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return len((conn.database.get(args[1], dict) or {}).get(args[2], b""))
+
+
+@_command("HINCRBY", 4, write=True)
+def _hincrby(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    fields = conn.database.setdefault(args[1], dict)
+    current = fields.get(args[2])
+    result = (
+        0 if current is None else _int(current, "ERR hash value is not an integer")
+    ) + _int(args[3])
+    if not -(2**63) <= result < 2**63:
+        raise _ReplyError("ERR increment or decrement would overflow")
+    fields[args[2]] = str(result).encode()
+    return result
+
+
+@_command("HINCRBYFLOAT", 4, write=True)
+def _hincrbyfloat(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    fields = conn.database.setdefault(args[1], dict)
+    current = fields.get(args[2])
+    result = (0.0 if current is None else _float(current)) + _float(args[3])
+    if math.isinf(result):
+        raise _ReplyError("ERR increment would produce NaN or Infinity")
+    fields[args[2]] = _format_float(result).encode()
+    return fields[args[2]]
+
+
+@_command("HSCAN", -3)
+def _hscan(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    fields = conn.database.get(args[1], dict) or {}
+    match, count, extra = _scan_options(args, 3)
+    cursor, page = server._scan_page(_cursor(args[2]), sorted(fields), count)
+    reply: list[bytes] = []
+    for field in page:
+        if match(field):
+            reply.append(field)
+            if b"NOVALUES" not in extra:
+                reply.append(fields[field])
+    return [str(cursor).encode(), reply]
+
+
+# Lists
+
+
+def _push_handler(left: bool, existing: bool) -> _Handler:
+    def push(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+        database = conn.database
+        if existing and database.get(args[1], deque) is None:
+            return 0
+        items = database.setdefault(args[1], deque)
+        if left:
+            items.extendleft(args[2:])
+        else:
+            items.extend(args[2:])
+        server._signal(database, args[1])
+        return len(items)
+
+    return push
+
+
+_command("LPUSH", -3, write=True)(_push_handler(True, False))
+_command("RPUSH", -3, write=True)(_push_handler(False, False))
+_command("LPUSHX", -3, write=True)(_push_handler(True, True))
+_command("RPUSHX", -3, write=True)(_push_handler(False, True))
+
+
+def _pop_handler(left: bool) -> _Handler:
+    def pop(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+        if len(args) > 3:
+            raise _arity_error(args[0])
+        database = conn.database
+        items = database.get(args[1], deque)
+        count = None
+        if len(args) == 3:
+            count = _int(args[2])
+            if count < 0:
+                raise _ReplyError("ERR value is out of range, must be positive")
+        if not items:
+            return None
+        take = items.popleft if left else items.pop
+        if count is None:
+            popped = take()
+        else:
+            popped = [take() for _ in range(min(count, len(items)))]
+        database.prune(args[1], items)
+        return popped
+
+    return pop
+
+
+_command("LPOP", -2, write=True)(_pop_handler(True))
+_command("RPOP", -2, write=True)(_pop_handler(False))
+
+
+@_command("LLEN", 2)
+def _llen(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return len(conn.database.get(args[1], deque) or ())
+
+
+@_command("LRANGE", 4)
+def _lrange(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    items = conn.database.get(args[1], deque) or deque()
+    span = _index_range(len(items), _int(args[2]), _int(args[3]))
+    return list(itertools.islice(items, span.start, span.stop))
+
+
+@_command("LINDEX", 3)
+def _lindex(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    items = conn.database.get(args[1], deque) or deque()
+    index = _int(args[2])
+    if not -len(items) <= index < len(items):
+        return None
+    return items[index]
+
+
+@_command("LSET", 4, write=True)
+def _lset(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    items = conn.database.get(args[1], deque)
+    if items is None:
+        raise _ReplyError("ERR no such key")
+    index = _int(args[2])
+    if not -len(items) <= index < len(items):
+        raise _ReplyError("ERR index out of range")
+    items[index] = args[3]
+    return OK
+
+
+@_command("LREM", 4, write=True)
+def _lrem(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    database = conn.database
+    items = database.get(args[1], deque)
+    if items is None:
+        return 0
+    count = _int(args[2])
+    values = list(items) if count >= 0 else list(reversed(items))
+    limit = abs(count) or len(values)
+    kept = []
+    removed = 0
+    for value in values:
+        if value == args[3] and removed < limit:
+            removed += 1
+        else:
+            kept.append(value)
+    if count < 0:
+        kept.reverse()
+    items.clear()
+    items.extend(kept)
+    database.prune(args[1], items)
+    return removed
+
+
+@_command("LTRIM", 4, write=True)
+def _ltrim(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    database = conn.database
+    items = database.get(args[1], deque)
+    if items is None:
+        return OK
+    span = _index_range(len(items), _int(args[2]), _int(args[3]))
+    kept = list(itertools.islice(items, span.start, span.stop))
+    items.clear()
+    items.extend(kept)
+    database.prune(args[1], items)
+    return OK
+
+
+@_command("LINSERT", 5, write=True)
+def _linsert(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    where = args[2].upper()
+    if where not in (b"BEFORE", b"AFTER"):
+        raise _ReplyError(SYNTAX_ERROR)
+    items = conn.database.get(args[1], deque)
+    if items is None:
+        return 0
+    try:
+        index = items.index(args[3])
+    except ValueError:
+        return -1
+    items.insert(index + (where == b"AFTER"), args[4])
+    return len(items)
+
+
+def _move(
+    server: FakeRedisServer,
+    database: _Database,
+    source: bytes,
+    destination: bytes,
+    wherefrom: bytes,
+    whereto: bytes,
+) -> Any:
+    if wherefrom not in (b"LEFT", b"RIGHT") or whereto not in (b"LEFT", b"RIGHT"):
+        raise _ReplyError(SYNTAX_ERROR)
+    items = database.get(source, deque)
+    database.get(destination, deque)
+    if not items:
+        return None
+    value = items.popleft() if wherefrom == b"LEFT" else items.pop()
+    database.prune(source, items)
+    target = database.setdefault(destination, deque)
+    if whereto == b"LEFT":
+        target.appendleft(value)
+    else:
+        target.append(value)
+    server._signal(database, destination)
+    return value
+
+
+@_command("LMOVE", 5, write=True)
+def _lmove(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return _move(
+        server, conn.database, args[1], args[2], args[3].upper(), args[4].upper()
+    )
+
+
+@_command("RPOPLPUSH", 3, write=True)
+def _rpoplpush(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return _move(server, conn.database, args[1], args[2], b"RIGHT", b"LEFT")
+
+
+def _blocking_pop_handler(left: bool) -> _Handler:
+    def blocking_pop(
+        server: FakeRedisServer, conn: _Connection, args: list[bytes]
+    ) -> Any:
+        keys = args[1:-1]
+        timeout = _timeout(args[-1])
+        database = conn.database
+
+        def attempt() -> Any:
+            for key in keys:
+                items = database.get(key, deque)
+                if items:
+                    value = items.popleft() if left else items.pop()
+                    database.prune(key, items)
+                    return [key, value]
+            return None
+
+        reply = attempt()
+        return _Block(keys, timeout, attempt) if reply is None else reply
+
+    return blocking_pop
+
+
+_command("BLPOP", -3, write=True)(_blocking_pop_handler(True))
+_command("BRPOP", -3, write=True)(_blocking_pop_handler(False))
+
+
+def _blocking_move(
+    server: FakeRedisServer,
+    conn: _Connection,
+    args: list[bytes],
+    wherefrom: bytes,
+    whereto: bytes,
+    timeout: float,
+) -> Any:
+    database = conn.database
+
+    def attempt() -> Any:
+        return _move(server, database, args[1], args[2], wherefrom, whereto)
+
+    reply = attempt()
+    return _Block([args[1]], timeout, attempt) if reply is None else reply
+
+
+@_command("BLMOVE", 6, write=True)
+def _blmove(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return _blocking_move(
+        server, conn, args, args[3].upper(), args[4].upper(), _timeout(args[5])
+    )
+
+
+@_command("BRPOPLPUSH", 4, write=True)
+def _brpoplpush(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return _blocking_move(server, conn, args, b"RIGHT", b"LEFT", _timeout(args[3]))
+
+
+# Sets
+
+
+@_command("SADD", -3, write=True)
+def _sadd(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    members = conn.database.setdefault(args[1], set)
+    before = len(members)
+    members.update(args[2:])
+    return len(members) - before
+
+
+@_command("SREM", -3, write=True)
+def _srem(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    members = conn.database.get(args[1], set)
+    if members is None:
+        return 0
+    before = len(members)
+    members.difference_update(args[2:])
+    conn.database.prune(args[1], members)
+    return before - len(members)
+
+
+@_command("SMEMBERS", 2)
+def _smembers(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return set(conn.database.get(args[1], set) or ())
+
+
+@_command("SISMEMBER", 3)
+def _sismember(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return int(args[2] in (conn.database.get(args[1], set) or ()))
+
+
+@_command("SMISMEMBER", -3)
+def _smismember(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    members = conn.database.get(args[1], set) or set()
+    return [int(member in members) for member in args[2:]]
+
+
+@_command("SCARD", 2)
+def _scard(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return len(conn.database.get(args[1], set) or ())
+
+
+@_command("SPOP", -2, write=True)
+def _spop(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    if len(args) > 3:
+        raise _arity_error(args[0])
+    members = conn.database.get(args[1], set)
+    if len(args) == 3:
+        count = _int(args[2])
+        if count < 0:
+            raise _ReplyError("ERR value is out of range, must be positive")
+        if not members:
+            return []
+        popped = random.sample(sorted(members), min(count, len(members)))
+        members.difference_update(popped)
+    else:
+        if not members:
+            return None
+        popped = random.choice(sorted(members))
+        members.discard(popped)
+    conn.database.prune(args[1], members)
+    return popped
+
+
+@_command("SRANDMEMBER", -2)
+def _srandmember(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    if len(args) > 3:
+        raise _arity_error(args[0])
+    members = sorted(conn.database.get(args[1], set) or ())
+    if len(args) == 2:
+        return random.choice(members) if members else None
+    count = _int(args[2])
+    if not members:
+        return []
+    if count < 0:
+        return [random.choice(members) for _ in range(-count)]
+    return random.sample(members, min(count, len(members)))
+
+
+def _set_operation(database: _Database, keys: list[bytes], operation: bytes) -> set:
+    sets = [database.get(key, set) or set() for key in keys]
+    result = set(sets[0])
+    for other in sets[1:]:
+        if operation == b"INTER":
+            result &= other
+        elif operation == b"UNION":
+            result |= other
+        else:
+            result -= other
+    return result
+
+
+def _set_operation_handler(operation: bytes, store: bool) -> _Handler:
+    def handler(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+        database = conn.database
+        if not store:
+            return _set_operation(database, args[1:], operation)
+        result = _set_operation(database, args[2:], operation)
+        database.delete(args[1])
+        if result:
+            database.set(args[1], result)
+        return len(result)
+
+    return handler
+
+
+for _operation in (b"INTER", b"UNION", b"DIFF"):
+    _name = "S" + _operation.decode()
+    _command(_name, -2)(_set_operation_handler(_operation, False))
+    _command(_name + "STORE", -3, write=True)(_set_operation_handler(_operation, True))
+
+
+@_command("SMOVE", 4, write=True)
+def _smove(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    database = conn.database
+    source = database.get(args[1], set)
+    database.get(args[2], set)
+    if not source or args[3] not in source:
+        return 0
+    source.discard(args[3])
+    database.prune(args[1], source)
+    database.setdefault(args[2], set).add(args[3])
+    return 1
+
+
+@_command("SSCAN", -3)
+def _sscan(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    members = conn.database.get(args[1], set) or set()
+    match, count, _ = _scan_options(args, 3)
+    cursor, page = server._scan_page(_cursor(args[2]), sorted(members), count)
+    return [str(cursor).encode(), [member for member in page if match(member)]]
+
+
+# Sorted sets
+
+
+def _score_bound(value: bytes) -> tuple[float, bool]:
+    exclusive = value.startswith(b"(")
+    score = _float(value[1:] if exclusive else value, "ERR min or max is not a float")
+    return score, exclusive
+
+
+def _in_bounds(score: float, low: tuple[float, bool], high: tuple[float, bool]) -> bool:
+    above = score > low[0] if low[1] else score >= low[0]
+    below = score < high[0] if high[1] else score <= high[0]
+    return above and below
+
+
+def _scored(conn: _Connection, items: list[tuple[float, bytes]], scores: bool) -> list:
+    if not scores:
+        return [member for _, member in items]
+    if conn.resp3:
+        return [[member, score] for score, member in items]
+    return [value for score, member in items for value in (member, score)]
+
+
+@_command("ZADD", -4, write=True)
+def _zadd(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    flags = set()
+    i = 2
+    while args[i].upper() in (b"NX", b"XX", b"GT", b"LT", b"CH", b"INCR"):
+        flags.add(args[i].upper())
+        i += 1
+        if i >= len(args):
+            raise _ReplyError(SYNTAX_ERROR)
+    pairs = args[i:]
+    if len(pairs) % 2:
+        raise _ReplyError(SYNTAX_ERROR)
+    if b"NX" in flags and flags & {b"XX", b"GT", b"LT"}:
+        raise _ReplyError(
+            "ERR GT, LT, and/or NX options at the same time are not compatible"
+        )
+    if b"INCR" in flags and len(pairs) != 2:
+        raise _ReplyError("ERR INCR option supports a single increment-element pair")
+    scores = [(_float(pairs[j]), pairs[j + 1]) for j in range(0, len(pairs), 2)]
+    zset = conn.database.setdefault(args[1], _ZSet)
+    added = changed = 0
+    result = None
+    for score, member in scores:
+        current = zset.scores.get(member)
+        if (b"NX" in flags and current is not None) or (
+            b"XX" in flags and current is None
+        ):
+            continue
+        if b"INCR" in flags and current is not None:
+            score += current
+        if current is not None and (
+            (b"GT" in flags and score <= current)
+            or (b"LT" in flags and score >= current)
+        ):
+            continue
+        if current is None:
+            added += 1
+        elif current != score:
+            changed += 1
+        zset.add(member, score)
+        result = score
+    conn.database.prune(args[1], zset)
+    if b"INCR" in flags:
+        return result
+    return added + changed if b"CH" in flags else added
+
+
+@_command("ZINCRBY", 4, write=True)
+def _zincrby(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    zset = conn.database.setdefault(args[1], _ZSet)
+    score = zset.scores.get(args[3], 0.0) + _float(args[2])
+    zset.add(args[3], score)
+    return score
+
+
+@_command("ZREM", -3, write=True)
+def _zrem(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    zset = conn.database.get(args[1], _ZSet)
+    if zset is None:
+        return 0
+    removed = sum(zset.remove(member) for member in args[2:])
+    conn.database.prune(args[1], zset)
+    return removed
+
+
+@_command("ZSCORE", 3)
+def _zscore(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    zset = conn.database.get(args[1], _ZSet)
+    return None if zset is None else zset.scores.get(args[2])
+
+
+@_command("ZMSCORE", -3)
+def _zmscore(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    zset = conn.database.get(args[1], _ZSet) or _ZSet()
+    return [zset.scores.get(member) for member in args[2:]]
+
+
+@_command("ZCARD", 2)
+def _zcard(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return len(conn.database.get(args[1], _ZSet) or ())
+
+
+@_command("ZCOUNT", 4)
+def _zcount(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    zset = conn.database.get(args[1], _ZSet) or _ZSet()
+    low, high = _score_bound(args[2]), _score_bound(args[3])
+    return sum(_in_bounds(score, low, high) for score in zset.scores.values())
+
+
+def _zrange_items(
+    zset: _ZSet,
+    start: bytes,
+    stop: bytes,
+    by_score: bool,
+    reverse: bool,
+    limit: tuple[int, int] | None,
+) -> list[tuple[float, bytes]]:
+    ordered = zset.ordered()
+    if by_score:
+        low, high = (stop, start) if reverse else (start, stop)
+        low_bound, high_bound = _score_bound(low), _score_bound(high)
+        items = [item for item in ordered if _in_bounds(item[0], low_bound, high_bound)]
+        if reverse:
+            items.reverse()
+        if limit is not None:
+            offset, count = limit
+            items = items[offset:] if count < 0 else items[offset : offset + count]
+        return items
+    if reverse:
+        ordered = ordered[::-1]
+    return ordered[_index_range(len(ordered), _int(start), _int(stop))]
+
+
+def _zrange_options(
+    args: list[bytes], start: int
+) -> tuple[bool, bool, bool, tuple[int, int] | None]:
+    by_score = reverse = scores = False
+    limit = None
+    i = start
+    while i < len(args):
+        option = args[i].upper()
+        if option == b"BYSCORE":
+            by_score = True
+        elif option == b"REV":
+            reverse = True
+        elif option == b"WITHSCORES":
+            scores = True
+        elif option == b"LIMIT" and i + 2 < len(args):
+            limit = (_int(args[i + 1]), _int(args[i + 2]))
+            i += 2
+        else:
+            raise _ReplyError(SYNTAX_ERROR)
+        i += 1
+    return by_score, reverse, scores, limit
+
+
+@_command("ZRANGE", -4)
+def _zrange(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    by_score, reverse, scores, limit = _zrange_options(args, 4)
+    if limit is not None and not by_score:
+        raise _ReplyError(
+            "ERR syntax error, LIMIT is only supported in combination with "
+            "either BYSCORE or BYLEX"
+        )
+    zset = conn.database.get(args[1], _ZSet) or _ZSet()
+    items = _zrange_items(zset, args[2], args[3], by_score, reverse, limit)
+    return _scored(conn, items, scores)
+
+
+@_command("ZREVRANGE", -4)
+def _zrevrange(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    _, _, scores, _ = _zrange_options(args, 4)
+    zset = conn.database.get(args[1], _ZSet) or _ZSet()
+    items = _zrange_items(zset, args[2], args[3], False, True, None)
+    return _scored(conn, items, scores)
+
+
+def _zrangebyscore_handler(reverse: bool) -> _Handler:
+    def handler(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+        _, _, scores, limit = _zrange_options(args, 4)
+        zset = conn.database.get(args[1], _ZSet) or _ZSet()
+        items = _zrange_items(zset, args[2], args[3], True, reverse, limit)
+        return _scored(conn, items, scores)
+
+    return handler
+
+
+_command("ZRANGEBYSCORE", -4)(_zrangebyscore_handler(False))
+_command("ZREVRANGEBYSCORE", -4)(_zrangebyscore_handler(True))
+
+
+def _zrank_handler(reverse: bool) -> _Handler:
+    def handler(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+        if len(args) > 4 or (len(args) == 4 and args[3].upper() != b"WITHSCORE"):
+            raise _ReplyError(SYNTAX_ERROR)
+        zset = conn.database.get(args[1], _ZSet)
+        score = None if zset is None else zset.scores.get(args[2])
+        if zset is None or score is None:
+            return None
+        rank = zset.ordered().index((score, args[2]))
+        if reverse:
+            rank = len(zset) - 1 - rank
+        return [rank, score] if len(args) == 4 else rank
+
+    return handler
+
+
+_command("ZRANK", -3)(_zrank_handler(False))
+_command("ZREVRANK", -3)(_zrank_handler(True))
+
+
+@_command("ZREMRANGEBYSCORE", 4, write=True)
+def _zremrangebyscore(
+    server: FakeRedisServer, conn: _Connection, args: list[bytes]
+) -> Any:
+    zset = conn.database.get(args[1], _ZSet)
+    if zset is None:
+        return 0
+    items = _zrange_items(zset, args[2], args[3], True, False, None)
+    for _, member in items:
+        zset.remove(member)
+    conn.database.prune(args[1], zset)
+    return len(items)
+
+
+@_command("ZREMRANGEBYRANK", 4, write=True)
+def _zremrangebyrank(
+    server: FakeRedisServer, conn: _Connection, args: list[bytes]
+) -> Any:
+    zset = conn.database.get(args[1], _ZSet)
+    if zset is None:
+        return 0
+    items = _zrange_items(zset, args[2], args[3], False, False, None)
+    for _, member in items:
+        zset.remove(member)
+    conn.database.prune(args[1], zset)
+    return len(items)
+
+
+def _zpop_handler(maximum: bool) -> _Handler:
+    def handler(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+        if len(args) > 3:
+            raise _arity_error(args[0])
+        count = _int(args[2]) if len(args) == 3 else 1
+        if count < 0:
+            raise _ReplyError("ERR value is out of range, must be positive")
+        zset = conn.database.get(args[1], _ZSet)
+        if zset is None:
+            return []
+        ordered = zset.ordered()
+        items = ordered[::-1][:count] if maximum else ordered[:count]
+        for _, member in items:
+            zset.remove(member)
+        conn.database.prune(args[1], zset)
+        if len(args) == 2 or not conn.resp3:
+            return [value for score, member in items for value in (member, score)]
+        return [[member, score] for score, member in items]
+
+    return handler
+
+
+_command("ZPOPMIN", -2, write=True)(_zpop_handler(False))
+_command("ZPOPMAX", -2, write=True)(_zpop_handler(True))
+
+
+@_command("ZSCAN", -3)
+def _zscan(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    zset = conn.database.get(args[1], _ZSet) or _ZSet()
+    match, count, _ = _scan_options(args, 3)
+    cursor, page = server._scan_page(_cursor(args[2]), sorted(zset.scores), count)
+    reply: list[bytes] = []
+    for member in page:
+        if match(member):
+            reply += [member, _format_float(zset.scores[member]).encode()]
+    return [str(cursor).encode(), reply]
+
+
+# Pub/sub
+
+
+def _subscribe_handler(patterns: bool) -> _Handler:
+    kind = b"psubscribe" if patterns else b"subscribe"
+
+    def handler(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+        registry = server._patterns if patterns else server._channels
+        names = conn.patterns if patterns else conn.channels
+        replies = _Replies()
+        for name in args[1:]:
+            names.add(name)
+            registry.setdefault(name, set()).add(conn)
+            count = len(conn.channels) + len(conn.patterns)
+            replies.append(_Push([kind, name, count]))
+        return replies
+
+    return handler
+
+
+def _unsubscribe_handler(patterns: bool) -> _Handler:
+    kind = b"punsubscribe" if patterns else b"unsubscribe"
+
+    def handler(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+        registry = server._patterns if patterns else server._channels
+        names = conn.patterns if patterns else conn.channels
+        replies = _Replies()
+        for name in args[1:] or sorted(names):
+            names.discard(name)
+            server._unsubscribe(registry, name, conn)
+            count = len(conn.channels) + len(conn.patterns)
+            replies.append(_Push([kind, name, count]))
+        if not replies:
+            count = len(conn.channels) + len(conn.patterns)
+            replies.append(_Push([kind, None, count]))
+        return replies
+
+    return handler
+
+
+_command("SUBSCRIBE", -2)(_subscribe_handler(False))
+_command("PSUBSCRIBE", -2)(_subscribe_handler(True))
+_command("UNSUBSCRIBE", -1)(_unsubscribe_handler(False))
+_command("PUNSUBSCRIBE", -1)(_unsubscribe_handler(True))
+
+
+@_command("PUBLISH", 3)
+def _publish(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return server._publish(args[1], args[2])
+
+
+@_command("PUBSUB", -2)
+def _pubsub(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    subcommand = args[1].upper()
+    if subcommand == b"CHANNELS" and len(args) <= 3:
+        match = _matcher(args[2] if len(args) == 3 else b"*")
+        return [channel for channel in server._channels if match(channel)]
+    if subcommand == b"NUMSUB":
+        numsub: list[Any] = []
+        for channel in args[2:]:
+            numsub += [channel, len(server._channels.get(channel, ()))]
+        return numsub
+    if subcommand == b"NUMPAT" and len(args) == 2:
+        return len(server._patterns)
+    raise _ReplyError(f"ERR unknown subcommand '{_text(args[1])}'. Try PUBSUB HELP.")
+
+
+# Streams
+
+
+def _stream(database: _Database, key: bytes) -> _Stream | None:
+    return database.get(key, _Stream)
+
+
+def _group(database: _Database, key: bytes, name: bytes, command: str) -> _Group:
+    stream = _stream(database, key)
+    group = None if stream is None else stream.groups.get(name)
+    if group is None:
+        raise _ReplyError(
+            f"NOGROUP No such key '{_text(key)}' or consumer group "
+            f"'{_text(name)}' in {command} command"
+        )
+    return group
+
+
+@_command("XADD", -5, write=True)
+def _xadd(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    database = conn.database
+    nomkstream = False
+    maxlen = minid = None
+    i = 2
+    try:
+        while True:
+            option = args[i].upper()
+            if option == b"NOMKSTREAM":
+                nomkstream = True
+                i += 1
+            elif option in (b"MAXLEN", b"MINID"):
+                i += 1
+                if args[i] in (b"=", b"~"):
+                    i += 1
+                if option == b"MAXLEN":
+                    maxlen = _int(args[i])
+                else:
+                    minid = _parse_id(args[i])
+                i += 1
+                if args[i].upper() == b"LIMIT":
+                    i += 2
+            else:
+                break
+    except IndexError:
+        raise _ReplyError(SYNTAX_ERROR) from None
+    fields = args[i + 1 :]
+    if not fields or len(fields) % 2:
+        raise _arity_error(args[0])
+    stream = _stream(database, args[1])
+    if stream is None:
+        if nomkstream:
+            return None
+        stream = _Stream()
+    last = stream.last_id
+    requested = args[i]
+    if requested == b"*" or requested.endswith(b"-*"):
+        ms = max(_now(), last[0]) if requested == b"*" else _int(requested[:-2])
+        entry_id = (ms, last[1] + 1 if ms == last[0] else 0)
+    else:
+        entry_id = _parse_id(requested)
+        if entry_id == (0, 0):
+            raise _ReplyError("ERR The ID specified in XADD must be greater than 0-0")
+    if entry_id <= last:
+        raise _ReplyError(
+            "ERR The ID specified in XADD is equal or smaller than the target "
+            "stream top item"
+        )
+    if args[1] not in database.data:
+        database.set(args[1], stream)
+    stream.add(entry_id, list(fields))
+    stream.trim(maxlen, minid)
+    server._signal(database, args[1])
+    return _format_id(entry_id)
+
+
+@_command("XLEN", 2)
+def _xlen(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    return len(_stream(conn.database, args[1]) or ())
+
+
+def _xrange_handler(reverse: bool) -> _Handler:
+    def handler(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+        count = None
+        if len(args) == 6 and args[4].upper() == b"COUNT":
+            count = max(_int(args[5]), 0)
+        elif len(args) != 4:
+            raise _ReplyError(SYNTAX_ERROR)
+        low, high = (args[3], args[2]) if reverse else (args[2], args[3])
+        stream = _stream(conn.database, args[1])
+        if stream is None:
+            return []
+        start = _parse_range_id(low, False)
+        end = _parse_range_id(high, True)
+        return stream.range(start, end, count, reverse)
+
+    return handler
+
+
+_command("XRANGE", -4)(_xrange_handler(False))
+_command("XREVRANGE", -4)(_xrange_handler(True))
+
+
+@_command("XDEL", -3, write=True)
+def _xdel(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    stream = _stream(conn.database, args[1])
+    if stream is None:
+        return 0
+    return sum(stream.remove(_parse_id(value)) for value in args[2:])
+
+
+@_command("XTRIM", -4, write=True)
+def _xtrim(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    strategy = args[2].upper()
+    i = 4 if args[3] in (b"=", b"~") else 3
+    if i >= len(args) or strategy not in (b"MAXLEN", b"MINID"):
+        raise _ReplyError(SYNTAX_ERROR)
+    stream = _stream(conn.database, args[1])
+    if stream is None:
+        return 0
+    if strategy == b"MAXLEN":
+        return stream.trim(_int(args[i]), None)
+    return stream.trim(None, _parse_id(args[i]))
+
+
+def _read_streams(
+    args: list[bytes], start: int
+) -> tuple[int | None, float | None, bool, list[bytes], list[bytes]]:
+    count = block = None
+    noack = False
+    i = start
+    while i < len(args):
+        option = args[i].upper()
+        if option == b"COUNT" and i + 1 < len(args):
+            count = _int(args[i + 1])
+            count = None if count <= 0 else count
+            i += 2
+        elif option == b"BLOCK" and i + 1 < len(args):
+            block = _timeout(args[i + 1], 0.001)
+            i += 2
+        elif option == b"NOACK":
+            noack = True
+            i += 1
+        elif option == b"STREAMS":
+            rest = args[i + 1 :]
+            if not rest or len(rest) % 2:
+                raise _ReplyError(
+                    "ERR Unbalanced 'xread' list of streams: for each stream key "
+                    "an ID or '$' must be specified."
+                )
+            half = len(rest) // 2
+            return count, block, noack, rest[:half], rest[half:]
+        else:
+            raise _ReplyError(SYNTAX_ERROR)
+    raise _ReplyError(SYNTAX_ERROR)
+
+
+def _streams_reply(conn: _Connection, replies: list[tuple[bytes, list]]) -> Any:
+    if not replies:
+        return None
+    if conn.resp3:
+        return dict(replies)
+    return [[key, entries] for key, entries in replies]
+
+
+@_command("XREAD", -4)
+def _xread(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    count, block, _, keys, ids = _read_streams(args, 1)
+    database = conn.database
+    starts = []
+    for key, value in zip(keys, ids, strict=True):
+        if value == b"$":
+            stream = _stream(database, key)
+            starts.append(stream.last_id if stream is not None else (0, 0))
+        elif value == b"+":
+            stream = _stream(database, key)
+            last = stream.ids[-1] if stream is not None and stream.ids else None
+            starts.append(None if last is None else (last[0], last[1] - 1))
+        else:
+            starts.append(_parse_id(value))
+
+    def attempt() -> Any:
+        replies = []
+        for key, entry_id in zip(keys, starts, strict=True):
+            stream = _stream(database, key)
+            if stream is None or entry_id is None:
+                continue
+            found = stream.after(entry_id, count)
+            if found:
+                replies.append(
+                    (key, [[_format_id(i), stream.entries[i]] for i in found])
+                )
+        return _streams_reply(conn, replies)
+
+    reply = attempt()
+    if reply is None and block is not None:
+        return _Block(keys, block, attempt)
+    return reply
+
+
+@_command("XGROUP", -2, write=True)
+def _xgroup(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    database = conn.database
+    subcommand = args[1].upper()
+    if subcommand == b"CREATE" and len(args) >= 5:
+        stream = _stream(database, args[2])
+        options = {arg.upper() for arg in args[5:]}
+        if stream is None:
+            if b"MKSTREAM" not in options:
+                raise _ReplyError(
+                    "ERR The XGROUP subcommand requires the key to exist. Note "
+                    "that for CREATE you may want to use the MKSTREAM option to "
+                    "create an empty stream automatically."
+                )
+            stream = _Stream()
+            database.set(args[2], stream)
+        if args[3] in stream.groups:
+            raise _ReplyError("BUSYGROUP Consumer Group name already exists")
+        last_id = stream.last_id if args[4] == b"$" else _parse_id(args[4])
+        stream.groups[args[3]] = _Group(last_id)
+        return OK
+    if subcommand == b"SETID" and len(args) >= 5:
+        stream = _stream(database, args[2])
+        group = _group(database, args[2], args[3], "XGROUP")
+        assert stream is not None
+        group.last_id = stream.last_id if args[4] == b"$" else _parse_id(args[4])
+        return OK
+    if subcommand == b"DESTROY" and len(args) == 4:
+        stream = _stream(database, args[2])
+        if stream is None:
+            raise _ReplyError("ERR The XGROUP subcommand requires the key to exist.")
+        return int(stream.groups.pop(args[3], None) is not None)
+    if subcommand == b"CREATECONSUMER" and len(args) == 5:
+        group = _group(database, args[2], args[3], "XGROUP")
+        if args[4] in group.consumers:
+            return 0
+        group.consumers[args[4]] = _now()
+        return 1
+    if subcommand == b"DELCONSUMER" and len(args) == 5:
+        group = _group(database, args[2], args[3], "XGROUP")
+        if group.consumers.pop(args[4], None) is None:
+            return 0
+        owned = [i for i, p in group.pending.items() if p.consumer == args[4]]
+        for entry_id in owned:
+            del group.pending[entry_id]
+        return len(owned)
+    raise _ReplyError(f"ERR unknown subcommand '{_text(args[1])}'. Try XGROUP HELP.")
+
+
+@_command("XREADGROUP", -7, write=True)
+def _xreadgroup(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    if args[1].upper() != b"GROUP":
+        raise _ReplyError(SYNTAX_ERROR)
+    name, consumer = args[2], args[3]
+    count, block, noack, keys, ids = _read_streams(args, 4)
+    database = conn.database
+    for key in keys:
+        _group(database, key, name, "XREADGROUP").consumers.setdefault(consumer, _now())
+    history = any(value != b">" for value in ids)
+
+    def attempt() -> Any:
+        replies = []
+        for key, value in zip(keys, ids, strict=True):
+            stream = _stream(database, key)
+            group = _group(database, key, name, "XREADGROUP")
+            assert stream is not None
+            now = _now()
+            group.consumers[consumer] = now
+            if value == b">":
+                found = stream.after(group.last_id, count)
+                if found:
+                    group.last_id = found[-1]
+                    if not noack:
+                        for entry_id in found:
+                            group.pending[entry_id] = _Pending(consumer, now, 1)
+                    replies.append(
+                        (key, [[_format_id(i), stream.entries[i]] for i in found])
+                    )
+                continue
+            start = _parse_id(value)
+            owned = sorted(
+                entry_id
+                for entry_id, pending in group.pending.items()
+                if pending.consumer == consumer and entry_id > start
+            )[:count]
+            entries = []
+            for entry_id in owned:
+                pending = group.pending[entry_id]
+                pending.delivered = now
+                pending.count += 1
+                entries.append([_format_id(entry_id), stream.entries.get(entry_id)])
+            replies.append((key, entries))
+        return _streams_reply(conn, replies)
+
+    reply = attempt()
+    if reply is None and block is not None and not history:
+        return _Block(keys, block, attempt)
+    return reply
+
+
+@_command("XACK", -4, write=True)
+def _xack(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    stream = _stream(conn.database, args[1])
+    group = None if stream is None else stream.groups.get(args[2])
+    if group is None:
+        return 0
+    return sum(
+        group.pending.pop(_parse_id(value), None) is not None for value in args[3:]
+    )
+
+
+@_command("XPENDING", -3)
+def _xpending(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    group = _group(conn.database, args[1], args[2], "XPENDING")
+    pending = sorted(group.pending.items())
+    if len(args) == 3:
+        if not pending:
+            return [0, None, None, None]
+        consumers: dict[bytes, int] = {}
+        for _, entry in pending:
+            consumers[entry.consumer] = consumers.get(entry.consumer, 0) + 1
+        return [
+            len(pending),
+            _format_id(pending[0][0]),
+            _format_id(pending[-1][0]),
+            [[name, str(total).encode()] for name, total in consumers.items()],
+        ]
+    i = 3
+    min_idle = 0
+    if args[i].upper() == b"IDLE" and len(args) > i + 1:
+        min_idle = _int(args[i + 1])
+        i += 2
+    if len(args) not in (i + 3, i + 4):
+        raise _ReplyError(SYNTAX_ERROR)
+    start = _parse_range_id(args[i], False)
+    end = _parse_range_id(args[i + 1], True)
+    count = _int(args[i + 2])
+    consumer = args[i + 3] if len(args) == i + 4 else None
+    now = _now()
+    reply = []
+    for entry_id, entry in pending:
+        if len(reply) >= count:
+            break
+        if not start <= entry_id <= end or now - entry.delivered < min_idle:
+            continue
+        if consumer is not None and entry.consumer != consumer:
+            continue
+        reply.append(
+            [_format_id(entry_id), entry.consumer, now - entry.delivered, entry.count]
+        )
+    return reply
+
+
+@_command("XCLAIM", -6, write=True)
+def _xclaim(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    database = conn.database
+    group = _group(database, args[1], args[2], "XCLAIM")
+    stream = _stream(database, args[1])
+    assert stream is not None
+    consumer = args[3]
+    min_idle = _int(args[4])
+    ids = []
+    now = _now()
+    delivered = now
+    retry_count = None
+    force = justid = False
+    i = 5
+    while i < len(args):
+        option = args[i].upper()
+        if option in (b"IDLE", b"TIME", b"RETRYCOUNT", b"LASTID") and i + 1 < len(args):
+            if option == b"IDLE":
+                delivered = now - _int(args[i + 1])
+            elif option == b"TIME":
+                delivered = _int(args[i + 1])
+            elif option == b"RETRYCOUNT":
+                retry_count = _int(args[i + 1])
+            i += 2
+            continue
+        if option == b"FORCE":
+            force = True
+        elif option == b"JUSTID":
+            justid = True
+        else:
+            ids.append(_parse_id(args[i]))
+        i += 1
+    group.consumers.setdefault(consumer, now)
+    claimed = []
+    for entry_id in ids:
+        pending = group.pending.get(entry_id)
+        if entry_id not in stream.entries:
+            group.pending.pop(entry_id, None)
+            continue
+        if pending is None:
+            if not force:
+                continue
+            pending = group.pending[entry_id] = _Pending(consumer, now, 0)
+        elif now - pending.delivered < min_idle:
+            continue
+        pending.consumer = consumer
+        pending.delivered = delivered
+        if retry_count is not None:
+            pending.count = retry_count
+        elif not justid:
+            pending.count += 1
+        claimed.append(entry_id)
+    if justid:
+        return [_format_id(entry_id) for entry_id in claimed]
+    return [[_format_id(i), stream.entries[i]] for i in claimed]
+
+
+@_command("XAUTOCLAIM", -6, write=True)
+def _xautoclaim(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    database = conn.database
+    group = _group(database, args[1], args[2], "XAUTOCLAIM")
+    stream = _stream(database, args[1])
+    assert stream is not None
+    consumer = args[3]
+    min_idle = _int(args[4])
+    start = _parse_range_id(args[5], False)
+    count = 100
+    justid = False
+    i = 6
+    while i < len(args):
+        option = args[i].upper()
+        if option == b"COUNT" and i + 1 < len(args):
+            count = _int(args[i + 1])
+            if count < 1:
+                raise _ReplyError("ERR COUNT must be > 0")
+            i += 2
+        elif option == b"JUSTID":
+            justid = True
+            i += 1
+        else:
+            raise _ReplyError(SYNTAX_ERROR)
+    now = _now()
+    group.consumers.setdefault(consumer, now)
+    claimed = []
+    deleted = []
+    next_id = (0, 0)
+    attempts = count * 10
+    for entry_id in sorted(e for e in group.pending if e >= start):
+        if len(claimed) >= count or attempts == 0:
+            next_id = entry_id
+            break
+        attempts -= 1
+        pending = group.pending[entry_id]
+        if entry_id not in stream.entries:
+            del group.pending[entry_id]
+            deleted.append(_format_id(entry_id))
+            continue
+        if now - pending.delivered < min_idle:
+            continue
+        pending.consumer = consumer
+        pending.delivered = now
+        if not justid:
+            pending.count += 1
+        claimed.append(entry_id)
+    if justid:
+        entries: list = [_format_id(entry_id) for entry_id in claimed]
+    else:
+        entries = [[_format_id(i), stream.entries[i]] for i in claimed]
+    return [_format_id(next_id), entries, deleted]
+
+
+@_command("XINFO", -3)
+def _xinfo(server: FakeRedisServer, conn: _Connection, args: list[bytes]) -> Any:
+    database = conn.database
+    subcommand = args[1].upper()
+    stream = _stream(database, args[2])
+    if stream is None:
+        raise _ReplyError("ERR no such key")
+    if subcommand == b"STREAM" and len(args) == 3:
+        first = stream.range((0, 0), MAX_ID, 1)
+        last = stream.range((0, 0), MAX_ID, 1, reverse=True)
+        return {
+            b"length": len(stream),
+            b"groups": len(stream.groups),
+            b"last-generated-id": _format_id(stream.last_id),
+            b"first-entry": first[0] if first else None,
+            b"last-entry": last[0] if last else None,
+        }
+    if subcommand == b"GROUPS" and len(args) == 3:
+        return [
+            {
+                b"name": name,
+                b"consumers": len(group.consumers),
+                b"pending": len(group.pending),
+                b"last-delivered-id": _format_id(group.last_id),
+            }
+            for name, group in stream.groups.items()
+        ]
+    if subcommand == b"CONSUMERS" and len(args) == 4:
+        group = _group(database, args[2], args[3], "XINFO")
+        now = _now()
+        return [
+            {
+                b"name": name,
+                b"pending": sum(p.consumer == name for p in group.pending.values()),
+                b"idle": now - seen,
+            }
+            for name, seen in group.consumers.items()
+        ]
+    raise _ReplyError(f"ERR unknown subcommand '{_text(args[1])}'. Try XINFO HELP.")
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run a fake Redis server until interrupted."""
+    parser = argparse.ArgumentParser(
+        description="Run an in-memory Redis server for tests and benchmarks."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args(argv)
+
+    async def serve() -> None:
+        server = FakeRedisServer(args.host, args.port)
+        await server.start()
+        print(f"Fake Redis listening on {server.url}", flush=True)
+        await server.serve_forever()
+
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(serve())
+    else:
+        uvloop.run(serve())
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
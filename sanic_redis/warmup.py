@@ -0,0 +1,91 @@
+"""
+Sanic-Redis connection pool pre-warming
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any
+
+from redis.asyncio import Redis
+from sanic.log import logger
+
+
+@dataclass(frozen=True)
+class WarmupOptions:
+    """
+    Options for opening pool connections before the server accepts requests.
+
+    connections is the number of pool connections to open and validate with
+    PING, capped at the pool's max_connections. At most concurrency
+    handshakes run at once. When timeout expires, startup continues with the
+    connections opened so far.
+    """
+
+    connections: int = 10
+    concurrency: int = 4
+    timeout: float = 10.0
+
+    def __post_init__(self) -> None:
+        if self.connections < 1:
+            raise ValueError("connections must be at least 1")
+        if self.concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if self.timeout <= 0:
+            raise ValueError("timeout must be positive")
+
+
+async def warm_pool(client: Redis, options: WarmupOptions) -> int:
+    """
+    Open, authenticate and PING pool connections of a client.
+
+    Connections are held until all of them are open, so the pool creates a
+    new connection for each one, and are then released back to the pool.
+    Returns the number of connections warmed. Connection errors propagate
+    like a failed startup ping; a timeout is logged and not raised.
+    """
+    if client.single_connection_client:
+        await client.ping()
+        return 1
+
+    pool = client.connection_pool
+    count = min(options.connections, pool.max_connections)
+    semaphore = asyncio.Semaphore(options.concurrency)
+    acquired: list[Any] = []
+
+    async def open_connection() -> None:
+        async with semaphore:
+            connection = await pool.get_connection()
+            acquired.append(connection)
+            try:
+                await connection.send_command("PING")
+                await connection.read_response()
+            except BaseException:
+                # Do not return a connection with a half-read reply.
+                await connection.disconnect()
+                raise
+
+    tasks = [asyncio.ensure_future(open_connection()) for _ in range(count)]
+    try:
+        done, pending = await asyncio.wait(tasks, timeout=options.timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            logger.warning(
+                "[sanic-redis] pool warm-up timed out after %.1fs with %d of %d "
+                "connections open",
+                options.timeout,
+                len(done),
+                count,
+            )
+        for task in done:
+            task.result()
+        return len(done)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    finally:
+        for connection in acquired:
+            await pool.release(connection)
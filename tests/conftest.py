@@ -8,7 +8,9 @@ import re
 import pytest
 from redis.asyncio import from_url
 
-REDIS_URL = os.getenv("REDIS_URL", "redis://127.0.0.1:6379")
+from sanic_redis.testing import FakeRedisServer
+
+REDIS_URL = os.getenv("REDIS_URL")
 TEST_REDIS_DB = int(os.getenv("TEST_REDIS_DB", "15"))
 
 slugify = re.compile(r"[^a-zA-Z0-9_\-]")
@@ -20,15 +22,31 @@ def app_name(request):
     return slugify.sub("-", request.node.nodeid)
 
 
+@pytest.fixture(scope="session")
+def fake_redis_server():
+    """Run an in-process fake Redis server for the test session."""
+    with FakeRedisServer() as server:
+        yield server
+
+
 @pytest.fixture
-def redis_url():
-    """Build the Redis URL used by integration tests."""
+def redis_url(request):
+    """
+    Build the Redis URL used by integration tests.
+
+    Without REDIS_URL the tests run against the in-process fake server.
+    """
+    if REDIS_URL is None:
+        server = request.getfixturevalue("fake_redis_server")
+        return f"{server.url}/{TEST_REDIS_DB}"
     return f"{REDIS_URL.rstrip('/')}/{TEST_REDIS_DB}"
 
 
 @pytest.fixture
-async def redis_server(redis_url):
+async def redis_server(redis_url, request):
     """Fail quickly when integration Redis is unavailable."""
+    if REDIS_URL is None and request.node.get_closest_marker("real_redis"):
+        pytest.skip("needs a real Redis server; set REDIS_URL")
     redis = from_url(redis_url)
     try:
         await redis.ping()
@@ -0,0 +1,143 @@
+"""
+Tests for the FIFO blocking connection pool.
+"""
+
+import asyncio
+
+import pytest
+from redis.exceptions import MaxConnectionsError
+from sanic import Sanic
+
+from sanic_redis import (
+    BlockingPoolOptions,
+    FairBlockingPool,
+    MetricsOptions,
+    PrometheusExporter,
+    SanicRedis,
+)
+from sanic_redis.blocking_pool import blocking_client
+from sanic_redis.metrics import pool_stats
+
+from .test_sanic_redis import get_listener
+
+
+class TestBlockingPoolOptions:
+    def test_validates_arguments(self):
+        with pytest.raises(ValueError, match="max_connections"):
+            BlockingPoolOptions(max_connections=0)
+        with pytest.raises(ValueError, match="timeout"):
+            BlockingPoolOptions(timeout=0)
+        with pytest.raises(ValueError, match="buckets"):
+            BlockingPoolOptions(buckets=(0.1, 0.01))
+
+
+@pytest.mark.integration
+class TestFairBlockingPool:
+    @pytest.mark.asyncio
+    async def test_waiters_get_connections_in_arrival_order(self, redis_url):
+        client = blocking_client(redis_url, BlockingPoolOptions(max_connections=1))
+        pool = client.connection_pool
+        order = []
+
+        async def use(index):
+            connection = await pool.get_connection()
+            order.append(index)
+            await asyncio.sleep(0.005)
+            await pool.release(connection)
+
+        try:
+            held = await pool.get_connection()
+            waiters = [asyncio.ensure_future(use(index)) for index in range(5)]
+            await asyncio.sleep(0.01)
+            assert pool_stats(client)["waiting"] == 5
+            await pool.release(held)
+            # A caller arriving after the release still queues behind them.
+            late = asyncio.ensure_future(use("late"))
+            await asyncio.gather(*waiters, late)
+        finally:
+            await client.aclose()
+
+        assert order == [0, 1, 2, 3, 4, "late"]
+        stats = pool.stats()
+        assert stats["waiting"] == 0
+        assert stats["acquired"] == 7
+        assert stats["waited"] == 6
+        assert pool.wait_times.count == 7
+        assert stats["wait_seconds"] > 0
+
+    @pytest.mark.asyncio
+    async def test_timeout_raises_and_leaves_the_queue(self, redis_url):
+        options = BlockingPoolOptions(max_connections=1, timeout=0.02)
+        client = blocking_client(redis_url, options)
+        pool = client.connection_pool
+        try:
+            held = await pool.get_connection()
+            with pytest.raises(MaxConnectionsError, match="no connection"):
+                await pool.get_connection()
+            assert pool.timeouts == 1
+            assert pool.waiting == 0
+            await pool.release(held)
+            assert await client.ping()
+        finally:
+            await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_passes_its_turn_on(self, redis_url):
+        client = blocking_client(redis_url, BlockingPoolOptions(max_connections=1))
+        pool = client.connection_pool
+        try:
+            held = await pool.get_connection()
+            cancelled = asyncio.ensure_future(pool.get_connection())
+            waiting = asyncio.ensure_future(pool.get_connection())
+            await asyncio.sleep(0)
+            await pool.release(held)
+            # The first waiter was handed the connection but gives up.
+            cancelled.cancel()
+            connection = await asyncio.wait_for(waiting, 1)
+            await pool.release(connection)
+        finally:
+            await client.aclose()
+
+        assert cancelled.cancelled()
+        assert pool.waiting == 0
+        assert pool.stats()["in_use"] == 0
+
+
+class TestSanicRedisBlockingPool:
+    def test_rejects_conflicting_options(self, app_name):
+        with pytest.raises(ValueError, match="cluster"):
+            SanicRedis(Sanic(app_name), cluster=True, blocking_pool=True)
+        with pytest.raises(ValueError, match="max_connections"):
+            SanicRedis(
+                Sanic(f"{app_name}_kwargs"),
+                from_url_kwargs={"max_connections": 5},
+                blocking_pool=True,
+            )
+
+    @pytest.mark.asyncio
+    @pytest.mark.integration
+    async def test_client_uses_the_blocking_pool(self, app_name, redis_url):
+        app = Sanic(app_name)
+        exporter = PrometheusExporter()
+        SanicRedis(
+            app,
+            redis_url=redis_url,
+            blocking_pool=BlockingPoolOptions(max_connections=3, timeout=1),
+            metrics=MetricsOptions(exporter=exporter),
+        )
+
+        await get_listener(app, "before_server_start")(app)
+        try:
+            client = app.ctx.redis
+            assert isinstance(client.connection_pool, FairBlockingPool)
+            assert client.connection_pool.max_connections == 3
+            await asyncio.gather(*(client.ping() for _ in range(10)))
+            rendered = exporter.render()
+        finally:
+            await get_listener(app, "after_server_stop")(app)
+
+        assert 'sanic_redis_pool_wait_seconds_count{ctx_name="redis"} 10' in rendered
+        assert (
+            'sanic_redis_pool_wait_seconds_bucket{ctx_name="redis",le="+Inf"} 10'
+            in (rendered)
+        )
@@ -0,0 +1,255 @@
+"""
+Tests for the circuit breaker.
+"""
+
+import asyncio
+
+import pytest
+from redis.exceptions import ConnectionError, ResponseError, TimeoutError
+from sanic import Sanic
+from sanic.response import text
+from sanic_testing.testing import SanicTestClient
+
+import sanic_redis.core as core
+from sanic_redis import (
+    BreakerOptions,
+    CircuitBreaker,
+    CircuitOpenError,
+    SanicRedis,
+    redis_deadline,
+)
+
+from .test_sanic_redis import FakeRedis
+
+
+class FakeCommandRedis(FakeRedis):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = []
+        self.error = None
+        self.delay = 0.0
+
+    async def execute_command(self, *args, **options):
+        self.calls.append(args)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return b"value"
+
+
+def breaker(client, **kwargs):
+    kwargs.setdefault("window_size", 4)
+    kwargs.setdefault("minimum_calls", 4)
+    kwargs.setdefault("open_duration", 0.02)
+    kwargs.setdefault("half_open_calls", 2)
+    circuit = CircuitBreaker(client, BreakerOptions(**kwargs))
+    circuit.install()
+    return circuit
+
+
+async def fail(client, times):
+    for _ in range(times):
+        with pytest.raises(ConnectionError):
+            await client.execute_command("GET", "k")
+
+
+class TestCircuitBreaker:
+    def test_options_are_validated(self):
+        with pytest.raises(ValueError, match="failure_rate"):
+            BreakerOptions(failure_rate=0)
+        with pytest.raises(ValueError, match="minimum_calls"):
+            BreakerOptions(window_size=5, minimum_calls=6)
+        with pytest.raises(ValueError, match="slow_call_duration"):
+            BreakerOptions(slow_call_duration=0)
+
+    @pytest.mark.asyncio
+    async def test_opens_on_failure_rate_and_fails_fast(self):
+        client = FakeCommandRedis()
+        circuit = breaker(client, fallbacks={"get": None})
+        client.error = ConnectionError("down")
+
+        await fail(client, 3)
+        assert circuit.state == "closed"
+        await fail(client, 1)
+        assert circuit.state == "open"
+
+        client.calls.clear()
+        assert await client.execute_command("GET", "k") is None
+        with pytest.raises(CircuitOpenError):
+            await client.execute_command("SET", "k", "v")
+        assert client.calls == []
+        assert circuit.stats()["rejected"] == 2
+
+    @pytest.mark.asyncio
+    async def test_redis_error_replies_are_not_failures(self):
+        client = FakeCommandRedis()
+        circuit = breaker(client)
+        client.error = ResponseError("WRONGTYPE")
+
+        for _ in range(4):
+            with pytest.raises(ResponseError):
+                await client.execute_command("GET", "k")
+
+        assert circuit.state == "closed"
+
+    @pytest.mark.asyncio
+    async def test_slow_calls_count_as_failures(self):
+        client = FakeCommandRedis()
+        circuit = breaker(client, slow_call_duration=0.001)
+        client.delay = 0.005
+
+        for _ in range(4):
+            await client.execute_command("BLPOP", "queue", 1)
+        assert circuit.state == "closed"
+        # Half of the window is now slow.
+        for _ in range(2):
+            assert await client.execute_command("GET", "k") == b"value"
+        assert circuit.state == "open"
+
+    @pytest.mark.asyncio
+    async def test_half_open_probes_close_the_circuit(self):
+        client = FakeCommandRedis()
+        circuit = breaker(client)
+        client.error = ConnectionError("down")
+        await fail(client, 4)
+        await asyncio.sleep(0.03)
+
+        client.error = None
+        assert await client.execute_command("GET", "k") == b"value"
+        assert circuit.state == "half_open"
+        assert await client.execute_command("GET", "k") == b"value"
+        assert circuit.state == "closed"
+
+    @pytest.mark.asyncio
+    async def test_failed_probe_reopens_the_circuit(self):
+        client = FakeCommandRedis()
+        circuit = breaker(client)
+        client.error = ConnectionError("down")
+        await fail(client, 4)
+        await asyncio.sleep(0.03)
+
+        await fail(client, 1)
+
+        assert circuit.state == "open"
+        with pytest.raises(CircuitOpenError):
+            await client.execute_command("GET", "k")
+
+    @pytest.mark.asyncio
+    async def test_half_open_limits_concurrent_probes(self):
+        client = FakeCommandRedis()
+        circuit = breaker(client)
+        client.error = ConnectionError("down")
+        await fail(client, 4)
+        await asyncio.sleep(0.03)
+        client.error = None
+        client.delay = 0.01
+
+        results = await asyncio.gather(
+            *(client.execute_command("GET", "k") for _ in range(3)),
+            return_exceptions=True,
+        )
+
+        assert results[:2] == [b"value", b"value"]
+        assert isinstance(results[2], CircuitOpenError)
+        assert circuit.state == "closed"
+
+    @pytest.mark.asyncio
+    async def test_deadline_bounds_commands(self):
+        client = FakeCommandRedis()
+        circuit = breaker(client)
+        client.delay = 0.05
+
+        with redis_deadline(0.01):
+            with pytest.raises(TimeoutError, match="deadline"):
+                await client.execute_command("GET", "k")
+        with redis_deadline(0):
+            with pytest.raises(TimeoutError, match="deadline"):
+                await client.execute_command("GET", "k")
+        with redis_deadline(None):
+            assert await client.execute_command("GET", "k") == b"value"
+
+        assert len(client.calls) == 2
+        assert circuit.stats()["failures"] == 1
+
+
+class TestSanicRedisBreaker:
+    @pytest.mark.asyncio
+    async def test_requests_get_a_deadline_from_response_timeout(
+        self, app_name, redis_url, monkeypatch
+    ):
+        monkeypatch.setattr(core, "from_url", lambda url, **kwargs: FakeCommandRedis())
+
+        app = Sanic(app_name)
+        app.config.RESPONSE_TIMEOUT = 0.01
+        SanicRedis(app, redis_url=redis_url, breaker=True)
+
+        @app.get("/")
+        async def handler(request):
+            request.app.ctx.redis.delay = 0.05
+            try:
+                await request.app.ctx.redis.execute_command("GET", "k")
+            except TimeoutError:
+                return text("timed out")
+            return text("ok")
+
+        _, response = await app.asgi_client.get("/")
+
+        assert response.text == "timed out"
+
+    def test_websockets_get_no_deadline(self, app_name, redis_url, monkeypatch):
+        monkeypatch.setattr(core, "from_url", lambda url, **kwargs: FakeCommandRedis())
+
+        app = Sanic(app_name)
+        app.config.RESPONSE_TIMEOUT = 0.01
+        SanicRedis(app, redis_url=redis_url, breaker=True)
+
+        @app.websocket("/ws")
+        async def feed(request, ws):
+            request.app.ctx.redis.delay = 0.05
+            value = await request.app.ctx.redis.execute_command("GET", "k")
+            await ws.send(value.decode())
+            await ws.recv()
+
+        async def client(ws):
+            await ws.recv()
+
+        _, response = SanicTestClient(app, port=None).websocket("/ws", mimic=client)
+
+        assert response.client_received == ["value"]
+
+    @pytest.mark.asyncio
+    async def test_routes_can_opt_out_of_the_deadline(
+        self, app_name, redis_url, monkeypatch
+    ):
+        monkeypatch.setattr(core, "from_url", lambda url, **kwargs: FakeCommandRedis())
+
+        app = Sanic(app_name)
+        app.config.RESPONSE_TIMEOUT = 0.01
+        SanicRedis(app, redis_url=redis_url, breaker=True)
+
+        @app.get("/export", ctx_redis_deadline=False)
+        async def export(request):
+            request.app.ctx.redis.delay = 0.05
+            await request.app.ctx.redis.execute_command("GET", "k")
+            return text("ok")
+
+        _, response = await app.asgi_client.get("/export")
+
+        assert response.text == "ok"
+
+    @pytest.mark.asyncio
+    async def test_breaker_is_exposed_on_app_ctx(
+        self, app_name, redis_url, monkeypatch
+    ):
+        monkeypatch.setattr(core, "from_url", lambda url, **kwargs: FakeCommandRedis())
+        app = Sanic(app_name)
+        SanicRedis(app, redis_url=redis_url, breaker=BreakerOptions(deadline=False))
+
+        @app.get("/")
+        async def handler(request):
+            return text(request.app.ctx.redis_breaker.state)
+
+        _, response = await app.asgi_client.get("/")
+
+        assert response.text == "closed"
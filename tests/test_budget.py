@@ -0,0 +1,127 @@
+"""
+Tests for connection budgets shared by Sanic workers.
+"""
+
+import multiprocessing
+
+import pytest
+from redis.asyncio import from_url
+from redis.exceptions import MaxConnectionsError
+from sanic import Sanic
+
+from sanic_redis import PoolBudget, PoolBudgetOptions, SanicRedis
+from sanic_redis.budget import budget_counters, share_budget
+
+from .test_sanic_redis import get_listener
+
+
+def counters(workers, connections=0):
+    return multiprocessing.Value("i", workers), multiprocessing.Value("i", connections)
+
+
+class TestPoolBudgetOptions:
+    def test_validates_arguments(self):
+        with pytest.raises(ValueError, match="max_connections"):
+            PoolBudgetOptions(max_connections=0)
+        with pytest.raises(ValueError, match="min_per_worker"):
+            PoolBudgetOptions(max_connections=10, min_per_worker=0)
+        with pytest.raises(ValueError, match="workers"):
+            PoolBudgetOptions(max_connections=10, workers=0)
+
+
+class TestPoolBudget:
+    def test_each_worker_gets_a_share(self):
+        client = from_url("redis://localhost:6379")
+        budget = PoolBudget(client, PoolBudgetOptions(max_connections=100), counters(8))
+
+        budget.install()
+
+        assert client.connection_pool.max_connections == 12
+        stats = budget.stats()
+        assert stats["server"] == "localhost:6379"
+        assert stats["workers"] == 8
+        assert stats["worker_max_connections"] == 12
+
+    def test_share_is_at_least_min_per_worker(self):
+        client = from_url("redis://localhost:6379")
+        options = PoolBudgetOptions(max_connections=10, min_per_worker=2)
+
+        budget = PoolBudget(client, options, counters(32))
+
+        assert budget.worker_max_connections == 2
+
+    def test_counters_come_from_the_main_process(self, app_name):
+        app = Sanic(app_name)
+        options = PoolBudgetOptions(max_connections=10)
+        app.state.workers = 4
+
+        local = budget_counters(app, "redis_pool_budget", options)
+        share_budget(app, "redis_pool_budget", options)
+        shared = budget_counters(app, "redis_pool_budget", options)
+
+        assert local[0].value == 1
+        assert shared[0].value == 4
+        assert budget_counters(app, "redis_pool_budget", options) is shared
+
+    @pytest.mark.asyncio
+    @pytest.mark.integration
+    async def test_connections_beyond_the_budget_are_refused(self, redis_url):
+        client = from_url(redis_url)
+        shared = counters(2, connections=3)
+        budget = PoolBudget(client, PoolBudgetOptions(max_connections=4), shared)
+        budget.install()
+        pool = client.connection_pool
+        try:
+            connection = await pool.get_connection()
+            with pytest.raises(MaxConnectionsError, match="budget"):
+                await pool.get_connection()
+            await pool.release(connection)
+            assert await client.ping()
+
+            assert budget.stats()["connections"] == 4
+            assert budget.stats()["worker_connections"] == 1
+            assert budget.rejected == 1
+            await budget.aclose()
+            assert shared[1].value == 3
+        finally:
+            await client.aclose()
+
+
+class TestSanicRedisPoolBudget:
+    def test_rejects_conflicting_options(self, app_name):
+        options = PoolBudgetOptions(max_connections=10)
+
+        with pytest.raises(ValueError, match="cluster"):
+            SanicRedis(Sanic(app_name), cluster=True, pool_budget=options)
+        with pytest.raises(ValueError, match="max_connections"):
+            SanicRedis(
+                Sanic(f"{app_name}_kwargs"),
+                from_url_kwargs={"max_connections": 5},
+                pool_budget=options,
+            )
+
+    @pytest.mark.asyncio
+    @pytest.mark.integration
+    async def test_budget_follows_the_app_lifecycle(self, app_name, redis_url):
+        app = Sanic(app_name)
+        app.state.workers = 4
+        SanicRedis(
+            app,
+            redis_url=redis_url,
+            ping_on_startup=True,
+            pool_budget=PoolBudgetOptions(max_connections=20),
+        )
+
+        await get_listener(app, "main_process_start")(app)
+        await get_listener(app, "before_server_start")(app)
+
+        budget = app.ctx.redis_pool_budget
+        assert isinstance(budget, PoolBudget)
+        assert app.ctx.redis.connection_pool.max_connections == 5
+        assert budget.stats()["connections"] == 1
+        assert app.shared_ctx.redis_pool_budget[1].value == 1
+
+        await get_listener(app, "after_server_stop")(app)
+
+        assert app.shared_ctx.redis_pool_budget[1].value == 0
+        assert not hasattr(app.ctx, "redis_pool_budget")
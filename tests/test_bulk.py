@@ -0,0 +1,165 @@
+"""
+Tests for pipelined bulk writes.
+"""
+
+import asyncio
+
+import pytest
+from redis.asyncio import from_url
+from redis.exceptions import ConnectionError, DataError
+
+from sanic_redis import (
+    BulkHSet,
+    BulkOptions,
+    BulkSet,
+    BulkXAdd,
+    BulkZAdd,
+    bulk_write,
+)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    def set(self, key, value, px=None):
+        if value is None:
+            raise DataError("invalid value")
+        self.commands.append(("SET", key, value, px))
+
+    def pexpire(self, key, ms):
+        self.commands.append(("PEXPIRE", key, ms))
+
+    async def execute(self, raise_on_error=True):
+        client = self.client
+        client.in_flight += 1
+        client.max_in_flight = max(client.max_in_flight, client.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if client.fail_batches:
+                client.fail_batches -= 1
+                raise ConnectionError("connection lost")
+            client.commands.extend(self.commands)
+            return [True] * len(self.commands)
+        finally:
+            client.in_flight -= 1
+
+
+class FakeBulkRedis:
+    def __init__(self):
+        self.commands = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail_batches = 0
+
+    def pipeline(self, transaction=True):
+        assert transaction is False
+        return FakePipeline(self)
+
+
+class TestBulkOptions:
+    def test_validates_arguments(self):
+        with pytest.raises(ValueError, match="batch_size"):
+            BulkOptions(batch_size=0)
+        with pytest.raises(ValueError, match="concurrency"):
+            BulkOptions(concurrency=0)
+
+
+class TestBulkWrite:
+    @pytest.mark.asyncio
+    async def test_batches_are_pipelined_with_bounded_concurrency(self):
+        client = FakeBulkRedis()
+        read = []
+
+        async def operations():
+            for index in range(100):
+                read.append((index, client.in_flight))
+                yield BulkSet(f"k{index}", index, ttl=1.5)
+
+        result = await bulk_write(
+            client, operations(), BulkOptions(batch_size=10, concurrency=3)
+        )
+
+        assert result.written == 100
+        assert result.batches == 10
+        assert result.failed == 0
+        assert client.max_in_flight == 3
+        # The source is not read further while every pipeline is busy.
+        assert max(in_flight for _index, in_flight in read) <= 3
+        assert client.commands[0] == ("SET", "k0", 0, 1500)
+
+    @pytest.mark.asyncio
+    async def test_errors_are_reported_per_batch(self):
+        client = FakeBulkRedis()
+        client.fail_batches = 1
+        operations = [BulkSet(f"k{index}", index) for index in range(6)]
+        operations[4] = BulkSet("bad", None)
+
+        result = await bulk_write(
+            client, operations, BulkOptions(batch_size=3, concurrency=1)
+        )
+
+        assert result.written == 2
+        assert [(error.batch, error.operation.key) for error in result.errors] == [
+            (0, "k0"),
+            (0, "k1"),
+            (0, "k2"),
+            (1, "bad"),
+        ]
+        assert isinstance(result.errors[0].error, ConnectionError)
+        assert isinstance(result.errors[3].error, DataError)
+
+    @pytest.mark.asyncio
+    async def test_producer_errors_cancel_the_pipelines(self):
+        client = FakeBulkRedis()
+
+        def operations():
+            yield from (BulkSet(f"k{index}", index) for index in range(4))
+            raise KeyError("source failed")
+
+        with pytest.raises(KeyError):
+            await bulk_write(client, operations(), BulkOptions(batch_size=2))
+
+        await asyncio.sleep(0.02)
+        assert client.commands == []
+
+    @pytest.mark.asyncio
+    @pytest.mark.integration
+    async def test_writes_every_operation_type(self, redis_url, redis_key):
+        client = from_url(redis_url)
+        text, hash_key = redis_key("text"), redis_key("hash")
+        zset, stream = redis_key("zset"), redis_key("stream")
+        try:
+            await client.set(redis_key("taken"), "v")
+            result = await bulk_write(
+                client,
+                [
+                    BulkSet(text, "v", ttl=100),
+                    BulkHSet(hash_key, {"a": 1, "b": 2}, ttl=100),
+                    BulkZAdd(zset, {"m": 1.5}),
+                    BulkXAdd(stream, {"f": "v"}, maxlen=10, ttl=100),
+                    BulkHSet(redis_key("taken"), {"a": 1}),
+                ],
+                BulkOptions(batch_size=2),
+            )
+            assert await client.get(text) == b"v"
+            assert await client.hgetall(hash_key) == {b"a": b"1", b"b": b"2"}
+            assert await client.zscore(zset, "m") == 1.5
+            assert await client.xlen(stream) == 1
+            ttls = [await client.ttl(key) for key in (text, hash_key, zset, stream)]
+        finally:
+            await client.aclose()
+
+        assert ttls == [100, 100, -1, 100]
+        assert result.written == 4
+        assert result.batches == 3
+        (error,) = result.errors
+        assert error.batch == 2
+        assert "WRONGTYPE" in str(error.error)
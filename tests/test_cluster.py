@@ -0,0 +1,105 @@
+"""
+Tests for Redis Cluster support.
+"""
+
+import pytest
+from redis.asyncio.cluster import RedisCluster
+from sanic import Sanic
+
+import sanic_redis.core as core
+from sanic_redis import SanicRedis
+from sanic_redis.cluster import hmget_many, mget
+
+from .test_sanic_redis import FakeRedis, get_listener
+
+
+class FakeSingleNode:
+    def __init__(self):
+        self.commands = []
+
+    async def mget(self, keys):
+        self.commands.append(("MGET", keys))
+        return [key.upper() for key in keys]
+
+    async def hmget(self, name, fields):
+        self.commands.append(("HMGET", name, fields))
+        return [f"{name}.{field}" for field in fields]
+
+
+class FakeClusterFactory:
+    def __init__(self):
+        self.calls = []
+        self.client = FakeRedis()
+
+    def from_url(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        return self.client
+
+
+@pytest.fixture
+def cluster_client():
+    return RedisCluster(host="localhost", port=7000)
+
+
+class TestClusterHelpers:
+    @pytest.mark.asyncio
+    async def test_mget_uses_slot_aware_reads_on_cluster(
+        self, cluster_client, monkeypatch
+    ):
+        calls = []
+
+        async def mget_nonatomic(keys):
+            calls.append(keys)
+            return [None for _key in keys]
+
+        monkeypatch.setattr(cluster_client, "mget_nonatomic", mget_nonatomic)
+
+        assert await mget(cluster_client, iter(["a", "b"])) == [None, None]
+        assert calls == [["a", "b"]]
+        assert await mget(cluster_client, []) == []
+
+    @pytest.mark.asyncio
+    async def test_mget_and_hmget_many_on_single_node(self):
+        client = FakeSingleNode()
+
+        assert await mget(client, ["a", "b"]) == ["A", "B"]  # type: ignore[arg-type]
+        assert await hmget_many(client, {"h": ["x", "y"]}) == {  # type: ignore[arg-type]
+            "h": ["h.x", "h.y"]
+        }
+        assert client.commands == [("MGET", ["a", "b"]), ("HMGET", "h", ["x", "y"])]
+
+
+class TestSanicRedisCluster:
+    @pytest.mark.asyncio
+    async def test_cluster_mode_uses_redis_cluster_lifecycle(
+        self, app_name, redis_url, monkeypatch
+    ):
+        factory = FakeClusterFactory()
+        monkeypatch.setattr(core, "RedisCluster", factory)
+
+        app = Sanic(app_name)
+        redis = SanicRedis(
+            cluster=True,
+            ping_on_startup=True,
+            from_url_kwargs={"decode_responses": True},
+        )
+        redis.init_app(app, redis_url=redis_url)
+
+        await get_listener(app, "before_server_start")(app)
+
+        assert factory.calls == [(redis_url, {"decode_responses": True})]
+        assert factory.client.pinged is True
+        assert app.ctx.redis is factory.client
+
+        await get_listener(app, "after_server_stop")(app)
+
+        assert factory.client.closed is True
+        assert not hasattr(app.ctx, "redis")
+
+    def test_cluster_mode_rejects_single_node_options(self, app_name):
+        app = Sanic(app_name)
+
+        with pytest.raises(ValueError, match="single_connection_client"):
+            SanicRedis(cluster=True, single_connection_client=True).init_app(app)
+        with pytest.raises(ValueError, match="near_cache"):
+            SanicRedis(cluster=True, near_cache=True).init_app(app)
@@ -0,0 +1,148 @@
+"""
+Tests for the slow command log and hot-key sketch.
+"""
+
+import asyncio
+
+import pytest
+from redis.exceptions import TimeoutError
+from sanic import Sanic
+from sanic.response import json
+
+import sanic_redis.core as core
+from sanic_redis import DiagnosticsOptions, RedisDiagnostics, SanicRedis
+from sanic_redis.diagnostics import SpaceSaving, command_keys, key_pattern
+
+from .test_sanic_redis import FakeRedis
+
+
+class FakeSlowRedis(FakeRedis):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.delays = {}
+        self.errors = {}
+
+    async def execute_command(self, *args, **options):
+        await asyncio.sleep(self.delays.get(args[0], 0))
+        if args[0] in self.errors:
+            raise self.errors[args[0]]
+        return [b"abc", b"de"] if args[0] == "LRANGE" else b"OK"
+
+
+def diagnosed(**options):
+    client = FakeSlowRedis()
+    diagnostics = RedisDiagnostics(
+        client,  # type: ignore[arg-type]
+        DiagnosticsOptions(**options),
+    )
+    diagnostics.install()
+    return client, diagnostics
+
+
+class TestDiagnosticsHelpers:
+    def test_options_validate_ranges(self):
+        with pytest.raises(ValueError, match="sample_rate"):
+            DiagnosticsOptions(sample_rate=2)
+        with pytest.raises(ValueError, match="slow_log_size"):
+            DiagnosticsOptions(slow_log_size=0)
+
+    def test_command_keys_and_patterns(self):
+        assert command_keys(("GET", "user:1")) == ["user:1"]
+        assert command_keys(("MGET", "a", "b")) == ["a", "b"]
+        assert command_keys(("MSET", "a", 1, "b", 2)) == ["a", "b"]
+        assert command_keys(("EVALSHA", "sha", 1, "k", "arg")) == ["k"]
+        assert command_keys(("PING",)) == []
+        assert command_keys(("PUBLISH", "channel", "message")) == []
+
+        assert key_pattern(b"user:42:posts") == "user:*:posts"
+        assert key_pattern("session:5f1c2e9a-aaaa-bbbb") == "session:*"
+
+    def test_space_saving_keeps_heavy_hitters(self):
+        sketch = SpaceSaving(2)
+        for key in ["hot", "hot", "hot", "a", "b", "hot", "c"]:
+            sketch.add(key)
+
+        top = sketch.top()
+        assert top[0] == ("hot", 4)
+        assert len(top) == 2
+
+
+class TestRedisDiagnostics:
+    @pytest.mark.asyncio
+    async def test_logs_slow_commands_in_a_ring_buffer(self):
+        client, diagnostics = diagnosed(
+            slow_threshold=0.01, slow_log_size=2, sample_rate=0
+        )
+        client.delays = {"LRANGE": 0.02, "HGET": 0.02}
+        client.errors = {"HGET": TimeoutError("timed out")}
+
+        await client.execute_command("GET", "fast:1")
+        await client.execute_command("LRANGE", "feed:7", 0, -1)
+        with pytest.raises(TimeoutError):
+            await client.execute_command("HGET", "user:9", "name")
+        await client.execute_command("LRANGE", "feed:8", 0, -1)
+
+        slow = diagnostics.slow_commands()
+        assert [entry.command for entry in slow] == ["LRANGE", "HGET"]
+        assert slow[0].key_pattern == "feed:*"
+        assert slow[0].reply_size == 5
+        assert slow[0].duration >= 0.01
+        assert slow[0].route is None
+        assert slow[1].reply_size == 0
+
+    @pytest.mark.asyncio
+    async def test_samples_hot_keys_and_scales_counts(self):
+        client, diagnostics = diagnosed(sample_rate=1.0, hot_keys=4)
+
+        for _ in range(3):
+            await client.execute_command("GET", "flags")
+        await client.execute_command("MGET", b"flags", "config")
+
+        assert diagnostics.hot_keys(1) == [("flags", 4)]
+        assert diagnostics.stats()["commands"] == 4
+
+        diagnostics.reset()
+        assert diagnostics.hot_keys() == []
+        assert diagnostics.slow_commands() == []
+
+
+class TestSanicRedisDiagnostics:
+    @pytest.mark.asyncio
+    async def test_admin_route_reports_slow_commands_with_routes(
+        self, app_name, redis_url, monkeypatch
+    ):
+        client = FakeSlowRedis()
+        client.delays = {"GET": 0.01}
+        monkeypatch.setattr(core, "from_url", lambda url, **kwargs: client)
+
+        app = Sanic(app_name)
+        SanicRedis(
+            app,
+            redis_url=redis_url,
+            diagnostics=DiagnosticsOptions(
+                slow_threshold=0.005, sample_rate=1.0, route="/_redis"
+            ),
+        )
+
+        @app.get("/users/<user_id>")
+        async def handler(request, user_id):
+            await request.app.ctx.redis.execute_command("GET", f"user:{user_id}")
+            return json(request.app.ctx.redis_diagnostics.stats())
+
+        _, response = await app.asgi_client.get("/users/12")
+
+        (entry,) = response.json["slow_commands"]
+        assert entry["command"] == "GET"
+        assert entry["key_pattern"] == "user:*"
+        assert entry["route"] == "/users/<user_id:str>"
+        assert response.json["hot_keys"] == [{"key": "user:12", "count": 1}]
+
+        _, admin = await app.asgi_client.get("/_redis")
+
+        assert admin.status_code == 200
+        assert set(admin.json) == {
+            "commands",
+            "slow_threshold",
+            "slow_commands",
+            "hot_keys",
+        }
@@ -0,0 +1,179 @@
+"""
+Tests for the batching loader.
+"""
+
+import asyncio
+
+import pytest
+from redis.exceptions import ConnectionError
+from sanic import Sanic
+from sanic.response import json
+
+import sanic_redis.core as core
+from sanic_redis import LoaderOptions, LoaderScope, RedisLoader, SanicRedis
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def hmget(self, name, fields):
+        self.calls.append((name, fields))
+
+    async def execute(self):
+        self.client.commands.append(("PIPELINE", self.calls))
+        return [
+            [self.client.hashes.get(name, {}).get(field) for field in fields]
+            for name, fields in self.calls
+        ]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.hashes = {}
+        self.commands = []
+        self.error = None
+        self.closed = False
+
+    async def mget(self, keys):
+        self.commands.append(("MGET", keys))
+        if self.error:
+            raise self.error
+        return [self.data.get(key) for key in keys]
+
+    async def hmget(self, name, fields):
+        self.commands.append(("HMGET", name, fields))
+        return [self.hashes.get(name, {}).get(field) for field in fields]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def aclose(self):
+        self.closed = True
+
+
+class TestRedisLoader:
+    @pytest.mark.asyncio
+    async def test_concurrent_loads_are_merged_and_deduplicated(self):
+        client = FakeRedis()
+        client.data = {"a": b"1", "b": b"2"}
+        loader = RedisLoader(client, LoaderOptions())
+
+        values = await asyncio.gather(
+            loader.load("a"), loader.load("b"), loader.load("a"), loader.load("c")
+        )
+
+        assert values == [b"1", b"2", b"1", None]
+        assert client.commands == [("MGET", ["a", "b", "c"])]
+
+    @pytest.mark.asyncio
+    async def test_max_batch_size_sends_early(self):
+        client = FakeRedis()
+        loader = RedisLoader(client, LoaderOptions(max_batch_size=2))
+
+        await loader.load_many(["a", "b", "c"])
+
+        assert client.commands == [("MGET", ["a", "b"]), ("MGET", ["c"])]
+
+    @pytest.mark.asyncio
+    async def test_hash_fields_are_merged_per_hash(self):
+        client = FakeRedis()
+        client.hashes = {"user:1": {"name": b"ann", "age": b"30"}}
+        loader = RedisLoader(client, LoaderOptions())
+
+        values = await asyncio.gather(
+            loader.load_field("user:1", "name"), loader.load_field("user:1", "age")
+        )
+        assert values == [b"ann", b"30"]
+        assert client.commands == [("HMGET", "user:1", ["name", "age"])]
+
+        client.commands.clear()
+        await asyncio.gather(
+            loader.load_field("user:1", "name"), loader.load_field("user:2", "name")
+        )
+        assert client.commands == [
+            ("PIPELINE", [("user:1", ["name"]), ("user:2", ["name"])])
+        ]
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_caller_in_the_batch(self):
+        client = FakeRedis()
+        client.error = ConnectionError("down")
+        loader = RedisLoader(client, LoaderOptions())
+
+        results = await asyncio.gather(
+            loader.load("a"), loader.load("b"), return_exceptions=True
+        )
+
+        assert all(isinstance(result, ConnectionError) for result in results)
+
+
+class TestLoaderScope:
+    @pytest.mark.asyncio
+    async def test_scope_memoizes_values(self):
+        client = FakeRedis()
+        client.data = {"a": b"1"}
+        scope = RedisLoader(client, LoaderOptions()).scope()
+
+        assert await scope.load("a") == b"1"
+        client.data["a"] = b"2"
+        assert await scope.load("a") == b"1"
+        assert len(client.commands) == 1
+
+        scope.clear("a")
+        assert await scope.load("a") == b"2"
+        scope.prime("a", b"3")
+        assert await scope.load("a") == b"3"
+
+    @pytest.mark.asyncio
+    async def test_scope_does_not_memoize_failures(self):
+        client = FakeRedis()
+        client.error = ConnectionError("down")
+        scope = RedisLoader(client, LoaderOptions()).scope()
+
+        with pytest.raises(ConnectionError):
+            await scope.load("a")
+
+        client.error = None
+        assert await scope.load("a") is None
+
+
+class TestSanicRedisLoader:
+    @pytest.mark.asyncio
+    async def test_each_request_gets_its_own_scope(
+        self, app_name, redis_url, monkeypatch
+    ):
+        fake = FakeRedis()
+        fake.data = {"a": b"1"}
+        monkeypatch.setattr(core, "from_url", lambda url, **kwargs: fake)
+
+        app = Sanic(app_name)
+        SanicRedis(app, redis_url=redis_url, loader=True)
+        scopes = []
+
+        @app.get("/")
+        async def handler(request):
+            scope = request.ctx.redis_loader
+            scopes.append(scope)
+            first, second = await asyncio.gather(scope.load("a"), scope.load("a"))
+            return json(
+                {
+                    "shared_loader": scope.loader is request.app.ctx.redis_loader,
+                    "values": [first.decode(), second.decode()],
+                }
+            )
+
+        _, response = await app.asgi_client.get("/")
+
+        assert response.json == {"shared_loader": True, "values": ["1", "1"]}
+        assert isinstance(scopes[0], LoaderScope)
+        assert fake.commands == [("MGET", ["a"])]
+        assert fake.closed is True
@@ -0,0 +1,310 @@
+"""
+Tests for distributed locks and single-flight calls.
+"""
+
+import asyncio
+import time
+
+import pytest
+from redis.asyncio import from_url
+from sanic import Sanic
+
+import sanic_redis.core as core
+import sanic_redis.locks as locks_module
+from sanic_redis import (
+    LockOptions,
+    LockTimeoutError,
+    RedisLock,
+    RedisLocks,
+    SanicRedis,
+)
+from sanic_redis.locks import ACQUIRE_SCRIPT, RELEASE_SCRIPT, RENEW_SCRIPT
+
+from .test_sanic_redis import FakeRedis, get_listener
+
+
+class FakeLockScript:
+    """Run the lock scripts against the client's in-memory keys."""
+
+    def __init__(self, client, source):
+        self.client = client
+        self.source = source
+
+    async def __call__(self, keys, args, client):
+        (key,) = keys
+        store = client.keys
+        now = time.monotonic()
+        if key in store and store[key][1] <= now:
+            del store[key]
+        client.calls.append((self.source, key))
+        await asyncio.sleep(0)
+        if self.source == ACQUIRE_SCRIPT:
+            token, lease_ms = args
+            if key in store:
+                return max(1, int((store[key][1] - now) * 1000))
+            store[key] = (token, now + lease_ms / 1000)
+            return 0
+        if key not in store or store[key][0] != args[0]:
+            return 0
+        if self.source == RENEW_SCRIPT:
+            store[key] = (args[0], now + args[1] / 1000)
+        else:
+            del store[key]
+        return 1
+
+
+class FakeLockRedis(FakeRedis):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.keys = {}
+        self.calls = []
+
+    def register_script(self, source):
+        return FakeLockScript(self, source)
+
+    def count(self, source):
+        return sum(called == source for called, _key in self.calls)
+
+
+def locks(client=None, **options):
+    return RedisLocks(client or FakeLockRedis(), LockOptions(**options))
+
+
+class TestLockOptions:
+    def test_validates_arguments(self):
+        with pytest.raises(ValueError, match="lease"):
+            LockOptions(lease=0)
+        with pytest.raises(ValueError, match="renew_interval"):
+            LockOptions(lease=1, renew_interval=1)
+        with pytest.raises(ValueError, match="timeout"):
+            LockOptions(timeout=-1)
+        with pytest.raises(ValueError, match="retry_interval"):
+            LockOptions(retry_interval=0)
+
+
+class TestRedisLocks:
+    @pytest.mark.asyncio
+    async def test_lock_is_taken_and_released_with_its_token(self):
+        client = FakeLockRedis()
+        manager = locks(client)
+
+        async with manager("job:42") as lock:
+            assert isinstance(lock, RedisLock)
+            assert lock.locked
+            assert client.keys["sanic-redis:lock:job:42"][0] == lock.token
+
+        assert not lock.locked
+        assert client.keys == {}
+        assert manager.stats()["acquired"] == 1
+
+    @pytest.mark.asyncio
+    async def test_local_contenders_wait_without_polling_redis(self):
+        client = FakeLockRedis()
+        manager = locks(client)
+        order = []
+
+        async def work(index):
+            async with manager("job"):
+                order.append(index)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(work(index) for index in range(20)))
+
+        assert order == list(range(20))
+        # Each coroutine took the lock once; none of them polled.
+        assert client.count(ACQUIRE_SCRIPT) == 20
+        assert manager.contended == 0
+        assert manager._gates == {}
+
+    @pytest.mark.asyncio
+    async def test_remote_holder_is_polled_by_one_coroutine(self):
+        client = FakeLockRedis()
+        client.keys["sanic-redis:lock:job"] = ("other", time.monotonic() + 0.1)
+        manager = locks(client, retry_interval=0.02)
+
+        async def work():
+            async with manager("job"):
+                pass
+
+        await asyncio.gather(*(work() for _ in range(10)))
+
+        polls = client.count(ACQUIRE_SCRIPT) - 10
+        assert 0 < polls <= 10
+        assert manager.contended == polls
+
+    @pytest.mark.asyncio
+    async def test_timeout_applies_to_local_and_remote_waits(self):
+        client = FakeLockRedis()
+        client.keys["sanic-redis:lock:job"] = ("other", time.monotonic() + 10)
+        manager = locks(client, retry_interval=0.01)
+
+        results = await asyncio.gather(
+            *(manager("job", timeout=0.05).acquire() for _ in range(3)),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(result, LockTimeoutError) for result in results)
+        assert manager._gates == {}
+        assert manager.stats()["waiting"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_passes_the_gate_on(self):
+        manager = locks()
+        holder = manager("job")
+        await holder.acquire()
+
+        cancelled = asyncio.ensure_future(manager("job").acquire())
+        waiting = manager("job")
+        acquired = asyncio.ensure_future(waiting.acquire())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await holder.release()
+        await acquired
+
+        assert waiting.locked
+        await waiting.release()
+        assert manager._gates == {}
+
+    @pytest.mark.asyncio
+    async def test_held_locks_are_renewed(self):
+        client = FakeLockRedis()
+        manager = locks(client, lease=0.06, renew_interval=0.02)
+
+        async with manager("job") as lock:
+            await asyncio.sleep(0.15)
+            assert "sanic-redis:lock:job" in client.keys
+            assert not lock.lost
+
+        assert client.count(RENEW_SCRIPT) >= 3
+
+    @pytest.mark.asyncio
+    async def test_release_stops_a_renewal_that_swallows_the_cancel(self, monkeypatch):
+        client = FakeLockRedis()
+        manager = locks(client, lease=0.06, renew_interval=0.02)
+        monkeypatch.setattr(locks_module, "RENEWAL_STOP_GRACE", 0.01)
+        renew = manager._renew_script
+        started = asyncio.Event()
+
+        async def stuck_renew(keys, args, client):
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                # Like asyncio.wait_for on Python 3.10 and 3.11 when the
+                # reply arrives together with the cancellation.
+                pass
+            return await renew(keys=keys, args=args, client=client)
+
+        manager._renew_script = stuck_renew
+        lock = manager("job")
+        await lock.acquire()
+        await started.wait()
+
+        await asyncio.wait_for(lock.release(), 1)
+        renewals = client.count(RENEW_SCRIPT)
+        await asyncio.sleep(0.05)
+
+        assert lock._renewal is None
+        assert client.count(RENEW_SCRIPT) == renewals
+        assert "sanic-redis:lock:job" not in client.keys
+
+    @pytest.mark.asyncio
+    async def test_expired_lease_marks_the_lock_lost(self):
+        client = FakeLockRedis()
+        manager = locks(client, lease=0.05, renew_interval=0.04)
+
+        async with manager("job") as lock:
+            client.keys.clear()
+            await asyncio.sleep(0.06)
+            assert lock.lost
+
+        assert manager.lost == 1
+        assert client.count(RELEASE_SCRIPT) == 1
+
+    @pytest.mark.asyncio
+    async def test_single_flight_shares_one_call_per_worker(self):
+        client = FakeLockRedis()
+        manager = locks(client)
+        calls = []
+
+        async def load(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return value * 2
+
+        results = await asyncio.gather(
+            *(manager.single_flight("load", load, 21) for _ in range(5))
+        )
+
+        assert results == [42] * 5
+        assert calls == [21]
+        assert client.count(ACQUIRE_SCRIPT) == 1
+        assert manager._flights == {}
+
+    @pytest.mark.asyncio
+    async def test_single_flight_errors_reach_every_caller(self):
+        manager = locks()
+
+        async def fail():
+            await asyncio.sleep(0)
+            raise KeyError("missing")
+
+        results = await asyncio.gather(
+            *(manager.single_flight("load", fail) for _ in range(3)),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(result, KeyError) for result in results)
+
+    @pytest.mark.asyncio
+    async def test_release_requires_a_held_lock(self):
+        lock = locks()("job")
+
+        with pytest.raises(RuntimeError, match="not held"):
+            await lock.release()
+
+    @pytest.mark.asyncio
+    @pytest.mark.integration
+    @pytest.mark.real_redis
+    async def test_scripts_exclude_other_clients(self, redis_url, redis_key):
+        first, second = from_url(redis_url), from_url(redis_url)
+        prefix = redis_key("lock") + ":"
+        options = LockOptions(lease=1, retry_interval=0.01, prefix=prefix)
+        first_locks = RedisLocks(first, options)
+        second_locks = RedisLocks(second, options)
+        try:
+            async with first_locks("job"):
+                with pytest.raises(LockTimeoutError):
+                    await second_locks("job", timeout=0.05).acquire()
+            async with second_locks("job", timeout=1):
+                assert await second.exists(prefix + "job") == 1
+        finally:
+            await first.aclose()
+            await second.aclose()
+
+
+class TestSanicRedisLocks:
+    @pytest.mark.asyncio
+    async def test_locks_follow_the_app_lifecycle(
+        self, app_name, redis_url, monkeypatch
+    ):
+        client = FakeLockRedis()
+        monkeypatch.setattr(core, "from_url", lambda url, **kwargs: client)
+
+        app = Sanic(app_name)
+        SanicRedis(app, redis_url=redis_url, locks=LockOptions(lease=5))
+
+        await get_listener(app, "before_server_start")(app)
+
+        manager = app.ctx.redis_locks
+        assert isinstance(manager, RedisLocks)
+        assert manager.options.lease == 5
+        lock = manager("job")
+        await lock.acquire()
+
+        await get_listener(app, "after_server_stop")(app)
+
+        assert lock._renewal is not None and lock._renewal.done()
+        assert not hasattr(app.ctx, "redis_locks")
+        with pytest.raises(RuntimeError, match="closed"):
+            await manager("other").acquire()
@@ -0,0 +1,169 @@
+"""
+Tests for client metrics.
+"""
+
+import asyncio
+
+import pytest
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.exceptions import ResponseError, TimeoutError
+from sanic import Sanic
+from sanic.response import text
+
+import sanic_redis.core as core
+from sanic_redis import MetricsOptions, PrometheusExporter, RedisMetrics, SanicRedis
+from sanic_redis.metrics import pool_stats
+
+from .test_sanic_redis import FakeRedis
+
+
+class FakePool:
+    def __init__(self):
+        self._in_use_connections = {object(), object()}
+        self._available_connections = [object()]
+
+
+class FakeMeteredRedis(FakeRedis):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.connection_pool = FakePool()
+        self.errors = {}
+        self.metrics = None
+        self.in_flight_seen = []
+
+    async def execute_command(self, *args, **options):
+        if self.metrics is not None:
+            self.in_flight_seen.append(self.metrics.in_flight)
+        await asyncio.sleep(0)
+        error = self.errors.get(args[0])
+        if error is not None:
+            raise error
+        return b"OK"
+
+
+def metered(exporter, ctx_name="redis"):
+    client = FakeMeteredRedis()
+    metrics = RedisMetrics(
+        client,  # type: ignore[arg-type]
+        ctx_name,
+        MetricsOptions(exporter=exporter),
+    )
+    client.metrics = metrics
+    metrics.install()
+    return client, metrics
+
+
+class TestPrometheusExporter:
+    def test_buckets_must_be_sorted(self):
+        with pytest.raises(ValueError, match="buckets"):
+            PrometheusExporter(buckets=(0.1, 0.01))
+
+    def test_histogram_buckets_are_cumulative(self):
+        exporter = PrometheusExporter(buckets=(0.01, 0.1))
+        exporter.observe_command("redis", "GET", 0.005, None)
+        exporter.observe_command("redis", "GET", 0.01, None)
+        exporter.observe_command("redis", "GET", 0.5, None)
+
+        output = exporter.render()
+
+        prefix = 'sanic_redis_command_duration_seconds_bucket{ctx_name="redis",'
+        assert f'{prefix}command="GET",le="0.01"}} 2' in output
+        assert f'{prefix}command="GET",le="0.1"}} 2' in output
+        assert f'{prefix}command="GET",le="+Inf"}} 3' in output
+        assert (
+            'sanic_redis_command_duration_seconds_count{ctx_name="redis",'
+            'command="GET"} 3' in output
+        )
+
+
+class TestRedisMetrics:
+    @pytest.mark.asyncio
+    async def test_records_latency_errors_timeouts_and_in_flight(self):
+        exporter = PrometheusExporter()
+        client, metrics = metered(exporter, ctx_name="cache")
+        client.errors = {
+            "HGET": ResponseError("WRONGTYPE"),
+            "BLPOP": TimeoutError("timed out"),
+        }
+
+        await asyncio.gather(
+            client.execute_command("GET", "a"), client.execute_command("GET", "b")
+        )
+        with pytest.raises(ResponseError):
+            await client.execute_command("HGET", "a", "b")
+        with pytest.raises(TimeoutError):
+            await client.execute_command("BLPOP", "a", 1)
+
+        output = exporter.render()
+        assert client.in_flight_seen[:2] == [1, 2]
+        assert metrics.in_flight == 0
+        assert (
+            'sanic_redis_command_duration_seconds_count{ctx_name="cache",'
+            'command="GET"} 2' in output
+        )
+        assert (
+            'sanic_redis_command_errors_total{ctx_name="cache",command="HGET",'
+            'error="ResponseError"} 1' in output
+        )
+        assert (
+            'sanic_redis_command_timeouts_total{ctx_name="cache",command="BLPOP"} 1'
+            in output
+        )
+        assert 'sanic_redis_commands_in_flight{ctx_name="cache"} 0' in output
+        assert (
+            'sanic_redis_pool_connections{ctx_name="cache",state="in_use"} 2' in output
+        )
+        assert 'sanic_redis_pool_connections{ctx_name="cache",state="idle"} 1' in output
+
+        await metrics.aclose()
+        assert "sanic_redis_commands_in_flight{" not in exporter.render()
+
+    @pytest.mark.asyncio
+    async def test_blocking_pool_reports_waiting_callers(self):
+        pool = BlockingConnectionPool(max_connections=1, timeout=1)
+        client = Redis(connection_pool=pool)
+        pool._in_use_connections.add(object())
+
+        async def wait_for_connection():
+            async with pool._condition:
+                await pool._condition.wait()
+
+        waiter = asyncio.ensure_future(wait_for_connection())
+        await asyncio.sleep(0)
+
+        assert pool_stats(client) == {"in_use": 1, "idle": 0, "waiting": 1}
+
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+
+class TestSanicRedisMetrics:
+    @pytest.mark.asyncio
+    async def test_metrics_route_exposes_client_metrics(
+        self, app_name, redis_url, monkeypatch
+    ):
+        monkeypatch.setattr(core, "from_url", lambda url, **kwargs: FakeMeteredRedis())
+        exporter = PrometheusExporter()
+
+        app = Sanic(app_name)
+        SanicRedis(
+            app,
+            redis_url=redis_url,
+            metrics=MetricsOptions(exporter=exporter, route="/metrics"),
+        )
+
+        @app.get("/")
+        async def handler(request):
+            await request.app.ctx.redis.execute_command("SET", "a", 1)
+            return text("ok")
+
+        await app.asgi_client.get("/")
+        _, response = await app.asgi_client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert (
+            'sanic_redis_command_duration_seconds_count{ctx_name="redis",'
+            'command="SET"} 1' in response.text
+        )
+        assert exporter.sources == []
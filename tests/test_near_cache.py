@@ -0,0 +1,343 @@
+"""
+Tests for the in-process near cache.
+"""
+
+import asyncio
+
+import pytest
+from redis.exceptions import ResponseError, TimeoutError
+from sanic import Sanic
+
+import sanic_redis.core as core
+from sanic_redis import NearCache, NearCacheOptions, SanicRedis
+
+from .test_sanic_redis import get_listener
+
+
+class FakeConnection:
+    instances = []
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.sent = []
+        self.messages = asyncio.Queue()
+        self.disconnected = False
+        FakeConnection.instances.append(self)
+
+    async def connect(self):
+        pass
+
+    async def send_command(self, *args):
+        self.sent.append(args)
+        if args[:2] == ("CLIENT", "ID"):
+            errors = self.kwargs.get("handshake_errors")
+            self.messages.put_nowait(errors.pop(0) if errors else 7)
+        elif args[:2] == ("CLIENT", "TRACKING"):
+            self.messages.put_nowait(self.kwargs.get("tracking_reply", b"OK"))
+        elif args[0] == "SUBSCRIBE":
+            self.messages.put_nowait([b"subscribe", args[1], 1])
+
+    async def read_response(self, disconnect_on_error=True):
+        try:
+            message = await self.messages.get()
+        except asyncio.CancelledError:
+            if not self.kwargs.get("lose_cancel"):
+                raise
+            # Like asyncio.wait_for on Python 3.10 and 3.11 when the reply
+            # arrives together with the cancellation.
+            return [b"subscribe", b"__redis__:invalidate", 1]
+        if isinstance(message, Exception):
+            raise message
+        return message
+
+    async def disconnect(self):
+        self.disconnected = True
+
+
+class FakePool:
+    connection_class = FakeConnection
+
+    def __init__(self, **connection_kwargs):
+        self.connection_kwargs = connection_kwargs
+
+
+class FakeRedis:
+    def __init__(self, **connection_kwargs):
+        self.data = {}
+        self.commands = []
+        self.closed = False
+        self.connection_pool = FakePool(**connection_kwargs)
+
+    async def execute_command(self, *args, **options):
+        self.commands.append(args)
+        name, *rest = args
+        if name == "GET":
+            return self.data.get(rest[0])
+        if name == "HGETALL":
+            return dict(self.data.get(rest[0], {}))
+        if name == "SET":
+            self.data[rest[0]] = rest[1]
+            return True
+        if name == "PING":
+            return True
+        raise ResponseError(name)
+
+    async def get(self, key):
+        return await self.execute_command("GET", key)
+
+    async def set(self, key, value):
+        return await self.execute_command("SET", key, value)
+
+    async def hgetall(self, key):
+        return await self.execute_command("HGETALL", key)
+
+    async def ping(self):
+        return await self.execute_command("PING")
+
+    async def aclose(self):
+        self.closed = True
+
+
+def ttl_only(**options):
+    return NearCacheOptions(tracking=False, **options)
+
+
+async def wait_for(predicate, interval=0.0):
+    for _ in range(100):
+        if predicate():
+            return
+        await asyncio.sleep(interval)
+    raise AssertionError("condition was not reached")
+
+
+class TestNearCache:
+    def test_options_validate_bounds(self):
+        with pytest.raises(ValueError, match="max_entries"):
+            NearCacheOptions(max_entries=0)
+        with pytest.raises(ValueError, match="max_memory"):
+            NearCacheOptions(max_memory=0)
+        with pytest.raises(ValueError, match="ttl"):
+            NearCacheOptions(ttl=0)
+
+    @pytest.mark.asyncio
+    async def test_repeated_reads_are_served_locally(self):
+        client = FakeRedis()
+        client.data["flag"] = b"on"
+        cache = NearCache(client, ttl_only())
+        cache.install()
+
+        assert await client.get("flag") == b"on"
+        assert await client.get("flag") == b"on"
+
+        assert client.commands == [("GET", "flag")]
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+        assert len(cache) == 1
+
+    @pytest.mark.asyncio
+    async def test_writes_through_the_client_invalidate_entries(self):
+        client = FakeRedis()
+        cache = NearCache(client, ttl_only())
+        cache.install()
+
+        assert await client.get("flag") is None
+        await client.set("flag", b"off")
+
+        assert await client.get("flag") == b"off"
+        assert cache.invalidations == 1
+
+    @pytest.mark.asyncio
+    async def test_entries_expire_after_ttl(self, monkeypatch):
+        now = [100.0]
+        monkeypatch.setattr("sanic_redis.near_cache.time.monotonic", lambda: now[0])
+        client = FakeRedis()
+        cache = NearCache(client, ttl_only(ttl=5))
+        cache.install()
+
+        await client.get("flag")
+        now[0] += 6
+        await client.get("flag")
+
+        assert client.commands == [("GET", "flag"), ("GET", "flag")]
+
+    @pytest.mark.asyncio
+    async def test_entry_and_memory_caps_evict_least_recently_used(self):
+        client = FakeRedis()
+        cache = NearCache(client, ttl_only(max_entries=2))
+        cache.install()
+
+        await client.get("a")
+        await client.get("b")
+        await client.get("a")
+        await client.get("c")
+
+        assert cache.evictions == 1
+        client.commands.clear()
+        await client.get("a")
+        await client.get("b")
+        assert client.commands == [("GET", "b")]
+
+        small = NearCache(FakeRedis(), ttl_only(max_memory=400))
+        small.install()
+        for key in "abcdef":
+            await small.client.get(key)
+        assert small.memory <= 400
+        assert small.evictions > 0
+
+    @pytest.mark.asyncio
+    async def test_call_options_are_part_of_the_entry(self):
+        client = FakeRedis()
+        client.data["flag"] = b"on"
+        cache = NearCache(client, ttl_only())
+        cache.install()
+
+        for cast in (int, float, int):
+            await client.execute_command(
+                "GET", "flag", keys=["flag"], score_cast_func=cast
+            )
+        await client.execute_command("GET", "flag", keys=["flag"])
+        await client.execute_command("GET", "flag", keys=["flag"], unhashable=[1])
+
+        assert len(client.commands) == 4
+        assert cache.stats()["hits"] == 1
+        assert len(cache) == 3
+
+    @pytest.mark.asyncio
+    async def test_mutable_replies_are_copied(self):
+        client = FakeRedis()
+        client.data["config"] = {b"a": b"1"}
+        NearCache(client, ttl_only()).install()
+
+        first = await client.hgetall("config")
+        first[b"b"] = b"2"
+
+        assert await client.hgetall("config") == {b"a": b"1"}
+
+    @pytest.mark.asyncio
+    async def test_prefixes_limit_cached_keys(self):
+        client = FakeRedis()
+        NearCache(client, ttl_only(prefixes=("flags:",))).install()
+
+        await client.get("flags:a")
+        await client.get("flags:a")
+        await client.get("other")
+        await client.get("other")
+
+        assert client.commands == [
+            ("GET", "flags:a"),
+            ("GET", "other"),
+            ("GET", "other"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_tracking_invalidation_messages_drop_entries(self):
+        FakeConnection.instances.clear()
+        client = FakeRedis(protocol=3)
+        cache = NearCache(client, NearCacheOptions(prefixes=("flags:",)))
+        cache.install()
+
+        await client.get("flags:a")
+        assert len(cache) == 0
+
+        cache.start()
+        await wait_for(lambda: cache.tracking)
+        connection = FakeConnection.instances[0]
+        assert connection.kwargs["protocol"] == 2
+        assert connection.sent[1] == (
+            "CLIENT",
+            "TRACKING",
+            "ON",
+            "REDIRECT",
+            7,
+            "BCAST",
+            "PREFIX",
+            "flags:",
+        )
+
+        await client.get("flags:a")
+        await client.get("flags:b")
+        assert len(cache) == 2
+
+        connection.messages.put_nowait(
+            [b"message", b"__redis__:invalidate", [b"flags:a"]]
+        )
+        await wait_for(lambda: len(cache) == 1)
+
+        connection.messages.put_nowait([b"message", b"__redis__:invalidate", None])
+        await wait_for(lambda: len(cache) == 0)
+
+        await cache.aclose()
+        assert connection.disconnected is True
+
+    @pytest.mark.asyncio
+    async def test_tracking_reconnects_after_a_handshake_timeout(self):
+        FakeConnection.instances.clear()
+        client = FakeRedis(handshake_errors=[TimeoutError("Timeout reading")])
+        cache = NearCache(client, NearCacheOptions())
+        cache.install()
+
+        cache.start()
+        await wait_for(lambda: cache.tracking, interval=0.01)
+
+        assert len(FakeConnection.instances) == 2
+        assert FakeConnection.instances[0].disconnected is True
+        assert cache._listener is not None and not cache._listener.done()
+        await cache.aclose()
+
+    @pytest.mark.asyncio
+    async def test_tracking_falls_back_to_ttl_only_mode(self):
+        FakeConnection.instances.clear()
+        client = FakeRedis(tracking_reply=ResponseError("unknown subcommand"))
+        cache = NearCache(client, NearCacheOptions())
+        cache.install()
+
+        cache.start()
+        await wait_for(lambda: cache._listener is not None and cache._listener.done())
+
+        assert cache.tracking is False
+        await client.get("flag")
+        await client.get("flag")
+        assert client.commands == [("GET", "flag")]
+        await cache.aclose()
+
+    @pytest.mark.asyncio
+    async def test_aclose_stops_a_listener_that_swallows_the_cancel(self):
+        FakeConnection.instances.clear()
+        client = FakeRedis(lose_cancel=True)
+        cache = NearCache(client, NearCacheOptions())
+        cache.install()
+        cache.start()
+        await wait_for(lambda: cache.tracking)
+
+        await asyncio.wait_for(cache.aclose(), 1)
+
+        assert len(FakeConnection.instances) == 1
+        assert FakeConnection.instances[0].disconnected is True
+        await client.get("flag")
+        assert len(cache) == 0
+
+
+class TestSanicRedisNearCache:
+    @pytest.mark.asyncio
+    async def test_startup_registers_near_cache_on_ctx(
+        self, app_name, redis_url, monkeypatch
+    ):
+        fake = FakeRedis()
+        monkeypatch.setattr(core, "from_url", lambda url, **kwargs: fake)
+
+        app = Sanic(app_name)
+        redis = SanicRedis(ctx_name="cache", near_cache=ttl_only())
+        redis.init_app(app, redis_url=redis_url)
+
+        await get_listener(app, "before_server_start")(app)
+
+        assert app.ctx.cache is fake
+        assert isinstance(app.ctx.cache_near_cache, NearCache)
+        await fake.get("flag")
+        await fake.get("flag")
+        assert app.ctx.cache_near_cache.hits == 1
+
+        await get_listener(app, "after_server_stop")(app)
+
+        assert fake.closed is True
+        assert not hasattr(app.ctx, "cache_near_cache")
@@ -0,0 +1,215 @@
+"""
+Tests for automatic command pipelining.
+"""
+
+import asyncio
+
+import pytest
+from redis.exceptions import ResponseError
+from sanic import Sanic
+
+import sanic_redis.core as core
+from sanic_redis import AutoPipeline, AutoPipelineOptions, SanicRedis
+
+from .test_sanic_redis import get_listener
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.stack = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.stack = []
+
+    def execute_command(self, *args, **options):
+        self.stack.append((args, options))
+        return self
+
+    async def execute(self, raise_on_error=True):
+        self.client.pipelines.append([args for args, _options in self.stack])
+        results = []
+        for args, _options in self.stack:
+            try:
+                results.append(self.client.run(*args))
+            except ResponseError as exc:
+                results.append(exc)
+        return results
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.commands = []
+        self.pipelines = []
+        self.closed = False
+
+    def run(self, *args):
+        name, *rest = args
+        if name == "SET":
+            self.data[rest[0]] = rest[1]
+            return True
+        if name == "GET":
+            return self.data.get(rest[0])
+        if name == "INCR":
+            self.data[rest[0]] = int(self.data.get(rest[0], 0)) + 1
+            return self.data[rest[0]]
+        if name == "PING":
+            return True
+        raise ResponseError(f"unknown command {name}")
+
+    async def execute_command(self, *args, **options):
+        self.commands.append(args)
+        return self.run(*args)
+
+    def pipeline(self, transaction=True):
+        assert transaction is False
+        return FakePipeline(self)
+
+    async def get(self, key):
+        return await self.execute_command("GET", key)
+
+    async def set(self, key, value):
+        return await self.execute_command("SET", key, value)
+
+    async def ping(self):
+        return await self.execute_command("PING")
+
+    async def aclose(self):
+        self.closed = True
+
+
+class TestAutoPipeline:
+    def test_options_validate_knobs(self):
+        with pytest.raises(ValueError, match="max_batch_size"):
+            AutoPipelineOptions(max_batch_size=0)
+        with pytest.raises(ValueError, match="flush_delay"):
+            AutoPipelineOptions(flush_delay=-1)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_commands_share_one_pipeline(self):
+        client = FakeRedis()
+        AutoPipeline(client, AutoPipelineOptions()).install()
+
+        results = await asyncio.gather(
+            client.set("a", "1"),
+            client.get("a"),
+            client.execute_command("INCR", "n"),
+            client.execute_command("INCR", "n"),
+        )
+
+        assert results == [True, "1", 1, 2]
+        assert client.pipelines == [
+            [("SET", "a", "1"), ("GET", "a"), ("INCR", "n"), ("INCR", "n")]
+        ]
+        assert client.commands == []
+
+    @pytest.mark.asyncio
+    async def test_single_command_skips_pipeline(self):
+        client = FakeRedis()
+        AutoPipeline(client, AutoPipelineOptions()).install()
+
+        assert await client.ping() is True
+        assert client.pipelines == []
+        assert client.commands == [("PING",)]
+
+    @pytest.mark.asyncio
+    async def test_max_batch_size_splits_batches(self):
+        client = FakeRedis()
+        pipeline = AutoPipeline(client, AutoPipelineOptions(max_batch_size=2))
+        pipeline.install()
+
+        await asyncio.gather(*(client.get(str(i)) for i in range(5)))
+
+        assert [len(batch) for batch in client.pipelines] == [2, 2]
+        assert client.commands == [("GET", "4")]
+        assert pipeline.batches == 2
+        assert pipeline.batched_commands == 4
+
+    @pytest.mark.asyncio
+    async def test_flush_delay_collects_commands_across_ticks(self):
+        client = FakeRedis()
+        AutoPipeline(client, AutoPipelineOptions(flush_delay=0.01)).install()
+
+        async def delayed_get():
+            await asyncio.sleep(0)
+            return await client.get("late")
+
+        await asyncio.gather(client.get("early"), delayed_get())
+
+        assert client.pipelines == [[("GET", "early"), ("GET", "late")]]
+
+    @pytest.mark.asyncio
+    async def test_command_errors_are_returned_to_their_caller(self):
+        client = FakeRedis()
+        AutoPipeline(client, AutoPipelineOptions()).install()
+
+        ok, failed = await asyncio.gather(
+            client.get("a"),
+            client.execute_command("BOGUS"),
+            return_exceptions=True,
+        )
+
+        assert ok is None
+        assert isinstance(failed, ResponseError)
+
+    @pytest.mark.asyncio
+    async def test_blocking_commands_bypass_the_queue(self):
+        client = FakeRedis()
+        AutoPipeline(client, AutoPipelineOptions()).install()
+
+        with pytest.raises(ResponseError):
+            await client.execute_command("BLPOP", "queue", 0)
+
+        assert client.commands == [("BLPOP", "queue", 0)]
+        assert client.pipelines == []
+
+
+class TestSanicRedisAutoPipeline:
+    def test_auto_pipeline_accepts_bool_or_options(self):
+        assert SanicRedis().auto_pipeline is None
+        assert SanicRedis(auto_pipeline=True).auto_pipeline == AutoPipelineOptions()
+
+        options = AutoPipelineOptions(max_batch_size=16, flush_delay=0.001)
+        assert SanicRedis(auto_pipeline=options).auto_pipeline is options
+
+        with pytest.raises(TypeError, match="auto_pipeline"):
+            SanicRedis(auto_pipeline={"max_batch_size": 16})  # type: ignore[arg-type]
+
+    @pytest.mark.asyncio
+    async def test_startup_installs_auto_pipeline_on_ctx_client(
+        self, app_name, redis_url, monkeypatch
+    ):
+        fake = FakeRedis()
+        monkeypatch.setattr(core, "from_url", lambda url, **kwargs: fake)
+
+        app = Sanic(app_name)
+        redis = SanicRedis(auto_pipeline=True)
+        redis.init_app(app, redis_url=redis_url)
+
+        await get_listener(app, "before_server_start")(app)
+
+        assert app.ctx.redis is fake
+        await asyncio.gather(fake.set("a", "1"), fake.get("a"))
+        assert fake.pipelines == [[("SET", "a", "1"), ("GET", "a")]]
+
+        await get_listener(app, "after_server_stop")(app)
+        assert fake.closed is True
+
+    @pytest.mark.asyncio
+    async def test_init_app_can_disable_instance_auto_pipeline(
+        self, app_name, redis_url, monkeypatch
+    ):
+        fake = FakeRedis()
+        monkeypatch.setattr(core, "from_url", lambda url, **kwargs: fake)
+
+        app = Sanic(app_name)
+        redis = SanicRedis(auto_pipeline=True)
+        redis.init_app(app, redis_url=redis_url, auto_pipeline=False)
+
+        await get_listener(app, "before_server_start")(app)
+
+        assert "execute_command" not in vars(fake)
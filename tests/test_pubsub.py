@@ -0,0 +1,259 @@
+"""
+Tests for the shared pub/sub hub.
+"""
+
+import asyncio
+
+import pytest
+from redis.asyncio import from_url
+from redis.exceptions import ConnectionError
+from sanic import Sanic
+
+import sanic_redis.core as core
+from sanic_redis import PubSubHub, PubSubOptions, SanicRedis
+
+from .test_sanic_redis import FakeRedis, get_listener
+
+
+class FakePubSub:
+    def __init__(self):
+        self.commands = []
+        self.messages = asyncio.Queue()
+        self.closed = False
+        self.errors = []
+
+    async def subscribe(self, *channels):
+        self.commands.append(("SUBSCRIBE", *channels))
+
+    async def psubscribe(self, *patterns):
+        self.commands.append(("PSUBSCRIBE", *patterns))
+
+    async def unsubscribe(self, *channels):
+        self.commands.append(("UNSUBSCRIBE", *channels))
+
+    async def punsubscribe(self, *patterns):
+        self.commands.append(("PUNSUBSCRIBE", *patterns))
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        if self.errors:
+            raise self.errors.pop(0)
+        return await self.messages.get()
+
+    def publish(self, channel, data, pattern=None):
+        self.messages.put_nowait(
+            {
+                "type": "message" if pattern is None else "pmessage",
+                "pattern": pattern,
+                "channel": channel,
+                "data": data,
+            }
+        )
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakePubSubRedis(FakeRedis):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.pubsubs = []
+
+    def pubsub(self):
+        pubsub = FakePubSub()
+        self.pubsubs.append(pubsub)
+        return pubsub
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestPubSubHub:
+    def test_options_are_validated(self):
+        with pytest.raises(ValueError, match="queue_size"):
+            PubSubOptions(queue_size=0)
+        with pytest.raises(ValueError, match="overflow"):
+            PubSubOptions(overflow="block")  # type: ignore[arg-type]
+
+    @pytest.mark.asyncio
+    async def test_subscriptions_share_one_connection_with_refcounts(self):
+        client = FakePubSubRedis()
+        hub = PubSubHub(client, PubSubOptions())  # type: ignore[arg-type]
+
+        first = await hub.subscribe("chat:1")
+        second = await hub.subscribe("chat:1", "chat:2")
+        await first.aclose()
+        await second.aclose()
+
+        (pubsub,) = client.pubsubs
+        assert pubsub.commands == [
+            ("SUBSCRIBE", b"chat:1"),
+            ("SUBSCRIBE", b"chat:2"),
+            ("UNSUBSCRIBE", b"chat:1", b"chat:2"),
+        ]
+        assert hub.stats()["channels"] == 0
+        await hub.aclose()
+
+    @pytest.mark.asyncio
+    async def test_messages_fan_out_to_matching_subscriptions(self):
+        client = FakePubSubRedis()
+        hub = PubSubHub(client, PubSubOptions())  # type: ignore[arg-type]
+        chat = await hub.subscribe("chat:1")
+        other = await hub.subscribe("chat:1")
+        pattern = await hub.psubscribe("chat:*")
+        pubsub = client.pubsubs[0]
+
+        pubsub.publish(b"chat:1", b"hello")
+        pubsub.publish(b"chat:9", b"ignored")
+        pubsub.publish(b"chat:9", b"matched", pattern=b"chat:*")
+        await settle()
+
+        assert (await chat.get()).data == b"hello"  # type: ignore[union-attr]
+        assert (await other.get()).data == b"hello"  # type: ignore[union-attr]
+        message = await pattern.get()
+        assert message is not None
+        assert (message.channel, message.data) == (b"chat:9", b"matched")
+        assert len(chat) == len(other) == len(pattern) == 0
+        assert hub.delivered == 3
+        await hub.aclose()
+
+    @pytest.mark.asyncio
+    async def test_slow_subscribers_drop_oldest_messages(self):
+        client = FakePubSubRedis()
+        hub = PubSubHub(client, PubSubOptions(queue_size=2))  # type: ignore[arg-type]
+        slow = await hub.subscribe("feed")
+        pubsub = client.pubsubs[0]
+
+        for data in (b"1", b"2", b"3"):
+            pubsub.publish(b"feed", data)
+        await settle()
+
+        messages = [await slow.get() for _ in range(2)]
+        assert [message.data for message in messages if message] == [b"2", b"3"]
+        assert slow.dropped == hub.dropped == 1
+        await hub.aclose()
+
+    @pytest.mark.asyncio
+    async def test_overflow_close_releases_slow_subscribers(self):
+        client = FakePubSubRedis()
+        hub = PubSubHub(
+            client,  # type: ignore[arg-type]
+            PubSubOptions(queue_size=1, overflow="close"),
+        )
+        slow = await hub.subscribe("feed")
+        pubsub = client.pubsubs[0]
+
+        pubsub.publish(b"feed", b"1")
+        pubsub.publish(b"feed", b"2")
+        await settle()
+
+        assert slow.closed is True
+        assert [message.data async for message in slow] == [b"1"]
+        assert pubsub.commands[-1] == ("UNSUBSCRIBE", b"feed")
+        await slow.aclose()
+        assert pubsub.commands.count(("UNSUBSCRIBE", b"feed")) == 1
+        await hub.aclose()
+
+    @pytest.mark.asyncio
+    async def test_listener_survives_connection_errors(self):
+        client = FakePubSubRedis()
+        hub = PubSubHub(client, PubSubOptions())  # type: ignore[arg-type]
+        client.pubsubs[0].errors.append(ConnectionError("lost"))
+        subscription = await hub.subscribe("chat")
+
+        client.pubsubs[0].publish(b"chat", b"after reconnect")
+
+        message = await asyncio.wait_for(subscription.get(), 1)
+        assert message is not None
+        assert message.data == b"after reconnect"
+        await hub.aclose()
+
+    @pytest.mark.asyncio
+    async def test_aclose_ends_subscriptions(self):
+        client = FakePubSubRedis()
+        hub = PubSubHub(client, PubSubOptions())  # type: ignore[arg-type]
+        subscription = await hub.subscribe("chat")
+        waiter = asyncio.ensure_future(subscription.get())
+        await settle()
+
+        await hub.aclose()
+
+        assert await waiter is None
+        assert client.pubsubs[0].closed is True
+        with pytest.raises(RuntimeError, match="closed"):
+            await hub.subscribe("chat")
+
+    @pytest.mark.asyncio
+    async def test_aclose_stops_a_read_that_swallows_the_cancel(self):
+        client = FakePubSubRedis()
+        hub = PubSubHub(client, PubSubOptions())  # type: ignore[arg-type]
+        await hub.subscribe("chat")
+        pubsub = client.pubsubs[0]
+        reads = []
+
+        async def get_message(ignore_subscribe_messages=False, timeout=0.0):
+            reads.append(True)
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                # Like asyncio.wait_for on Python 3.10 and 3.11 when the
+                # reply arrives together with the cancellation.
+                return None
+
+        pubsub.get_message = get_message
+        await settle()
+
+        await asyncio.wait_for(hub.aclose(), 1)
+
+        assert len(reads) == 1
+        assert pubsub.closed is True
+
+
+class TestSanicRedisPubSub:
+    @pytest.mark.asyncio
+    async def test_hub_follows_the_app_lifecycle(
+        self, app_name, redis_url, monkeypatch
+    ):
+        client = FakePubSubRedis()
+        monkeypatch.setattr(core, "from_url", lambda url, **kwargs: client)
+
+        app = Sanic(app_name)
+        SanicRedis(app, redis_url=redis_url, pubsub=PubSubOptions(queue_size=5))
+
+        await get_listener(app, "before_server_start")(app)
+
+        hub = app.ctx.redis_pubsub
+        assert isinstance(hub, PubSubHub)
+        assert hub.options.queue_size == 5
+
+        await get_listener(app, "after_server_stop")(app)
+
+        assert client.pubsubs[0].closed is True
+        assert not hasattr(app.ctx, "redis_pubsub")
+
+    def test_pubsub_is_rejected_in_cluster_mode(self, app_name):
+        with pytest.raises(ValueError, match="pubsub"):
+            SanicRedis(cluster=True, pubsub=True).init_app(Sanic(app_name))
+
+    @pytest.mark.asyncio
+    @pytest.mark.integration
+    async def test_messages_arrive_from_redis(self, redis_url, redis_key):
+        client = from_url(redis_url)
+        hub = PubSubHub(client, PubSubOptions())
+        channel = redis_key("pubsub")
+        try:
+            first = await hub.subscribe(channel)
+            second = await hub.psubscribe(f"{channel}*")
+            # SUBSCRIBE is only sent, not confirmed, before subscribe returns.
+            await asyncio.sleep(0.1)
+            await client.publish(channel, "hello")
+            messages = [await asyncio.wait_for(s.get(), 2) for s in (first, second)]
+        finally:
+            await hub.aclose()
+            await client.aclose()
+
+        assert [message.data for message in messages if message] == [
+            b"hello",
+            b"hello",
+        ]
@@ -0,0 +1,190 @@
+"""
+Tests for the rate limiter middleware.
+"""
+
+import asyncio
+
+import pytest
+from redis.asyncio import from_url
+from redis.exceptions import ConnectionError
+from sanic import Sanic
+from sanic.response import text
+
+import sanic_redis.core as core
+from sanic_redis import RateLimiter, SanicRedis
+
+from .test_sanic_redis import FakeRedis
+
+
+class FakeBudgetScript:
+    """Grant tokens from a budget that never refills."""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def __call__(self, keys, args, client):
+        (key,) = keys
+        limit, _period_ms, cost, partial = args
+        client.calls.append((key, cost, partial))
+        await asyncio.sleep(0)
+        if client.error:
+            raise client.error
+        tokens = client.budgets.setdefault(key, limit)
+        granted = cost if tokens >= cost else (tokens if partial == "1" else 0)
+        client.budgets[key] = tokens - granted
+        return [granted, tokens - granted, 0 if granted else 500]
+
+
+class FakeScriptRedis(FakeRedis):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.budgets = {}
+        self.calls = []
+        self.error = None
+
+    def register_script(self, source):
+        return FakeBudgetScript(self)
+
+
+class TestRateLimiter:
+    def test_validates_arguments(self):
+        with pytest.raises(ValueError, match="limit"):
+            RateLimiter(limit=0, period=1)
+        with pytest.raises(ValueError, match="algorithm"):
+            RateLimiter(limit=1, period=1, algorithm="leaky")  # type: ignore[arg-type]
+        with pytest.raises(ValueError, match="lease"):
+            RateLimiter(limit=5, period=1, lease=10)
+
+    @pytest.mark.asyncio
+    async def test_each_hit_is_one_script_call(self):
+        client = FakeScriptRedis()
+        limiter = RateLimiter(limit=2, period=60, prefix="rl:")
+
+        results = [await limiter.hit(client, "user:1") for _ in range(3)]
+
+        assert [result.allowed for result in results] == [True, True, False]
+        assert [result.remaining for result in results] == [1, 0, 0]
+        assert results[2].retry_after == 0.5
+        assert client.calls == [("rl:sliding_window:user:1", 1, "0")] * 3
+
+    @pytest.mark.asyncio
+    async def test_lease_mode_spends_reserved_tokens_locally(self):
+        client = FakeScriptRedis()
+        limiter = RateLimiter(limit=5, period=60, lease=2, prefix="rl:")
+
+        results = await asyncio.gather(*(limiter.hit(client, "hot") for _ in range(7)))
+
+        assert [result.allowed for result in results].count(True) == 5
+        # Three reservations of up to 2 tokens, then one rejected call.
+        assert client.calls == [
+            ("rl:sliding_window:hot", 2, "1"),
+            ("rl:sliding_window:hot", 2, "1"),
+            ("rl:sliding_window:hot", 2, "1"),
+            ("rl:sliding_window:hot", 2, "1"),
+        ]
+
+        # The rejection is remembered until its retry time.
+        assert (await limiter.hit(client, "hot")).allowed is False
+        assert len(client.calls) == 4
+
+    @pytest.mark.asyncio
+    async def test_leases_expire(self):
+        client = FakeScriptRedis()
+        limiter = RateLimiter(limit=10, period=60, lease=5, lease_ttl=0.01)
+
+        await limiter.hit(client, "k")
+        await asyncio.sleep(0.02)
+        await limiter.hit(client, "k")
+
+        assert len(client.calls) == 2
+        assert client.budgets == {"sanic-redis:ratelimit:sliding_window:k": 0}
+
+
+class TestRateLimiterMiddleware:
+    @pytest.mark.asyncio
+    async def test_middleware_rejects_with_429_and_headers(
+        self, app_name, redis_url, monkeypatch
+    ):
+        client = FakeScriptRedis()
+        monkeypatch.setattr(core, "from_url", lambda url, **kwargs: client)
+
+        app = Sanic(app_name)
+        SanicRedis(app, redis_url=redis_url)
+        RateLimiter(limit=1, period=60, key=lambda request: "global").install(app)
+
+        @app.get("/")
+        async def handler(request):
+            return text("ok")
+
+        _, allowed = await app.asgi_client.get("/")
+        _, limited = await app.asgi_client.get("/")
+
+        assert allowed.status_code == 200
+        assert allowed.headers["x-ratelimit-limit"] == "1"
+        assert allowed.headers["x-ratelimit-remaining"] == "0"
+        assert limited.status_code == 429
+        assert limited.headers["retry-after"] == "1"
+
+    @pytest.mark.asyncio
+    async def test_fails_open_when_redis_is_unreachable(
+        self, app_name, redis_url, monkeypatch
+    ):
+        client = FakeScriptRedis()
+        client.error = ConnectionError("down")
+        monkeypatch.setattr(core, "from_url", lambda url, **kwargs: client)
+
+        app = Sanic(app_name)
+        SanicRedis(app, redis_url=redis_url)
+        RateLimiter(limit=1, period=60).install(app)
+
+        @app.get("/")
+        async def handler(request):
+            return text("ok")
+
+        _, response = await app.asgi_client.get("/")
+
+        assert response.status_code == 200
+        assert "x-ratelimit-limit" not in response.headers
+
+
+class TestRateLimiterScripts:
+    @pytest.mark.asyncio
+    @pytest.mark.integration
+    @pytest.mark.real_redis
+    @pytest.mark.parametrize("algorithm", ["sliding_window", "token_bucket"])
+    async def test_scripts_enforce_the_limit(self, redis_url, redis_key, algorithm):
+        client = from_url(redis_url)
+        limiter = RateLimiter(
+            limit=3, period=1, algorithm=algorithm, prefix=redis_key("ratelimit")
+        )
+        try:
+            results = [await limiter.hit(client, "k") for _ in range(4)]
+            await client.delete(f"{limiter.prefix}k")
+        finally:
+            await client.aclose()
+
+        assert [result.allowed for result in results] == [True, True, True, False]
+        assert results[2].remaining == 0
+        assert 0 < results[3].retry_after <= 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.integration
+    @pytest.mark.real_redis
+    @pytest.mark.parametrize("algorithm", ["sliding_window", "token_bucket"])
+    async def test_scripts_grant_partial_leases(self, redis_url, redis_key, algorithm):
+        client = from_url(redis_url)
+        limiter = RateLimiter(
+            limit=5, period=10, algorithm=algorithm, prefix=redis_key("ratelimit")
+        )
+        try:
+            first = await limiter._call(client, "k", 4, True)
+            second = await limiter._call(client, "k", 4, True)
+            third = await limiter._call(client, "k", 4, True)
+            await client.delete(f"{limiter.prefix}k")
+        finally:
+            await client.aclose()
+
+        assert first[0] == 4
+        assert second[0] == 1
+        assert third[0] == 0
+        assert third[2] > 0
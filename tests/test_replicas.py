@@ -0,0 +1,235 @@
+"""
+Tests for read/write splitting across replicas.
+"""
+
+import asyncio
+
+import pytest
+from redis.exceptions import ConnectionError
+from sanic import Sanic
+from sanic.response import json
+
+import sanic_redis.core as core
+from sanic_redis import ReplicaOptions, ReplicaRouter, SanicRedis
+
+
+class FakeRedis:
+    def __init__(self, name, calls, error=None, delay=0):
+        self.name = name
+        self.calls = calls
+        self.error = error
+        self.delay = delay
+        self.closed = False
+
+    async def execute_command(self, *args, **options):
+        self.calls.append((self.name, args[0]))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.name
+
+    async def get(self, key):
+        return await self.execute_command("GET", key)
+
+    async def set(self, key, value):
+        return await self.execute_command("SET", key, value)
+
+    async def aclose(self):
+        self.closed = True
+
+
+def build_router(calls, **options):
+    primary = FakeRedis("primary", calls)
+    replicas = [FakeRedis("replica-1", calls), FakeRedis("replica-2", calls)]
+    router = ReplicaRouter(
+        primary,  # type: ignore[arg-type]
+        replicas,  # type: ignore[arg-type]
+        ReplicaOptions(urls=("redis://r1", "redis://r2"), **options),
+    )
+    router.install()
+    return primary, replicas, router
+
+
+class TestReplicaRouter:
+    def test_options_validate_urls_and_strategy(self):
+        with pytest.raises(ValueError, match="urls"):
+            ReplicaOptions(urls=())
+        with pytest.raises(ValueError, match="strategy"):
+            ReplicaOptions(urls=("redis://r1",), strategy="random")  # type: ignore[arg-type]
+
+    @pytest.mark.asyncio
+    async def test_reads_round_robin_and_writes_go_to_primary(self):
+        calls = []
+        primary, _replicas, router = build_router(calls)
+
+        assert await primary.get("a") == "replica-1"
+        assert await primary.get("a") == "replica-2"
+        assert await primary.set("a", 1) == "primary"
+        assert await primary.execute_command("PING") == "primary"
+
+        assert router.replica_reads == 2
+
+    @pytest.mark.asyncio
+    async def test_least_outstanding_avoids_busy_replicas(self):
+        calls = []
+        primary, replicas, _router = build_router(calls, strategy="least_outstanding")
+        replicas[0].delay = 0.05
+
+        slow = asyncio.ensure_future(primary.get("slow"))
+        await asyncio.sleep(0)
+        fast = await asyncio.gather(primary.get("a"), primary.get("b"))
+        await slow
+
+        assert fast == ["replica-2", "replica-2"]
+
+    @pytest.mark.asyncio
+    async def test_read_your_writes_pins_reads_after_a_write(self):
+        calls = []
+        primary, _replicas, router = build_router(calls)
+
+        async def request_with_ryw():
+            router.read_your_writes()
+            before = await primary.get("a")
+            await primary.set("a", 1)
+            after = await primary.get("a")
+            return before, after
+
+        async def request_without_ryw():
+            await primary.set("a", 1)
+            return await primary.get("a")
+
+        assert await asyncio.ensure_future(request_with_ryw()) == (
+            "replica-1",
+            "primary",
+        )
+        assert await asyncio.ensure_future(request_without_ryw()) == "replica-2"
+
+    @pytest.mark.asyncio
+    async def test_replica_connection_errors_fall_back_to_primary(self):
+        calls = []
+        primary, replicas, router = build_router(calls)
+        replicas[0].error = ConnectionError("replica down")
+
+        assert await primary.get("a") == "primary"
+        assert router.primary_reads == 1
+
+        _primary, strict_replicas, _router = build_router(
+            calls, fallback_to_primary=False
+        )
+        strict_replicas[0].error = ConnectionError("replica down")
+        with pytest.raises(ConnectionError):
+            await _primary.get("a")
+
+
+class TestSanicRedisReplicas:
+    @pytest.mark.asyncio
+    async def test_replica_urls_create_routed_clients(
+        self, app_name, redis_url, monkeypatch
+    ):
+        calls = []
+        clients = {}
+
+        def fake_from_url(url, **kwargs):
+            clients[url] = FakeRedis(url, calls)
+            return clients[url]
+
+        monkeypatch.setattr(core, "from_url", fake_from_url)
+
+        app = Sanic(app_name)
+        SanicRedis(
+            app,
+            redis_url=redis_url,
+            replicas=ReplicaOptions(urls=("redis://replica:6379/0",)),
+        )
+
+        @app.get("/")
+        async def handler(request):
+            client = request.app.ctx.redis
+            await client.set("a", 1)
+            return json(
+                {
+                    "read_from": await client.get("a"),
+                    "router": isinstance(request.app.ctx.redis_router, ReplicaRouter),
+                }
+            )
+
+        _, response = await app.asgi_client.get("/")
+
+        assert response.json == {"read_from": "redis://replica:6379/0", "router": True}
+        assert clients["redis://replica:6379/0"].closed is True
+        assert clients[redis_url].closed is True
+
+    @pytest.mark.asyncio
+    async def test_request_state_resets_on_keep_alive_connections(
+        self, app_name, redis_url, monkeypatch
+    ):
+        calls = []
+        monkeypatch.setattr(
+            core, "from_url", lambda url, **kwargs: FakeRedis(url, calls)
+        )
+
+        app = Sanic(app_name)
+        SanicRedis(
+            app,
+            redis_url=redis_url,
+            replicas=ReplicaOptions(
+                urls=("redis://replica:6379/0",), read_your_writes=True
+            ),
+        )
+
+        @app.post("/write")
+        async def write(request):
+            await request.app.ctx.redis.set("a", 1)
+            return json({"read_from": await request.app.ctx.redis.get("a")})
+
+        @app.get("/read")
+        async def read(request):
+            return json({"read_from": await request.app.ctx.redis.get("a")})
+
+        server = await app.create_server(
+            host="127.0.0.1", port=0, return_asyncio_server=True
+        )
+        assert server is not None and server.server is not None
+        await server.startup()
+        await server.before_start()
+        await server.after_start()
+        port = server.server.sockets[0].getsockname()[1]
+        try:
+            # HTTP/1 serves the requests of one connection in a single task.
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            bodies = []
+            for method, path in (("POST", "/write"), ("GET", "/read")):
+                writer.write(f"{method} {path} HTTP/1.1\r\nhost: test\r\n\r\n".encode())
+                await writer.drain()
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = next(
+                    int(line.split(b":")[1])
+                    for line in head.split(b"\r\n")
+                    if line.lower().startswith(b"content-length")
+                )
+                bodies.append(await reader.readexactly(length))
+            writer.close()
+            await writer.wait_closed()
+        finally:
+            await server.before_stop()
+            await server.close()
+            await server.wait_closed()
+            await server.after_stop()
+
+        assert bodies == [
+            b'{"read_from":"' + redis_url.encode() + b'"}',
+            b'{"read_from":"redis://replica:6379/0"}',
+        ]
+
+    def test_replicas_reject_cluster_mode_and_plugin_query_options(self, app_name):
+        with pytest.raises(ValueError, match="cluster or sentinel"):
+            SanicRedis(
+                cluster=True, replicas=ReplicaOptions(urls=("redis://r1",))
+            ).init_app(Sanic(app_name))
+        with pytest.raises(ValueError, match="single_connection_client"):
+            SanicRedis(
+                replicas=ReplicaOptions(
+                    urls=("redis://r1?single_connection_client=true",)
+                )
+            ).init_app(Sanic(f"{app_name}-query"))
@@ -0,0 +1,170 @@
+"""
+Tests for the response caching decorator.
+"""
+
+import asyncio
+
+import pytest
+from sanic import Sanic
+from sanic.response import json, text
+
+from sanic_redis import cache_response
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def exists(self, key):
+        return int(key in self.data)
+
+    async def eval(self, script, numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+
+def build_app(app_name, **options):
+    app = Sanic(app_name)
+    app.ctx.redis = FakeRedis()
+    calls = []
+
+    @app.route("/page", methods=["GET", "POST"])
+    @cache_response(**{"ttl": 60, **options})
+    async def page(request):
+        calls.append(request.method)
+        await asyncio.sleep(0.01)
+        return text(f"page {len(calls)}", headers={"X-Custom": "yes"})
+
+    @app.get("/missing")
+    @cache_response(ttl=60)
+    async def missing(request):
+        calls.append("missing")
+        return json({"error": "missing"}, status=404)
+
+    return app, calls
+
+
+class TestCacheResponse:
+    def test_rejects_invalid_ttls(self):
+        with pytest.raises(ValueError, match="ttl"):
+            cache_response(ttl=0)
+        with pytest.raises(ValueError, match="stale_ttl"):
+            cache_response(ttl=1, stale_ttl=-1)
+
+    @pytest.mark.asyncio
+    async def test_second_request_is_served_from_redis(self, app_name):
+        app, calls = build_app(app_name)
+
+        _, first = await app.asgi_client.get("/page")
+        _, second = await app.asgi_client.get("/page")
+
+        assert calls == ["GET"]
+        assert first.text == second.text == "page 1"
+        assert first.headers["x-cache"] == "MISS"
+        assert second.headers["x-cache"] == "HIT"
+        assert second.headers["x-custom"] == "yes"
+        assert second.headers["etag"] == first.headers["etag"]
+        assert second.headers["content-type"] == "text/plain; charset=utf-8"
+
+    @pytest.mark.asyncio
+    async def test_matching_etag_returns_not_modified(self, app_name):
+        app, _calls = build_app(app_name)
+
+        _, first = await app.asgi_client.get("/page")
+        _, second = await app.asgi_client.get(
+            "/page", headers={"If-None-Match": first.headers["etag"]}
+        )
+
+        assert second.status_code == 304
+        assert second.content == b""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_run_handler_once(self, app_name):
+        app, calls = build_app(app_name)
+
+        responses = await asyncio.gather(
+            *(app.asgi_client.get("/page") for _ in range(5))
+        )
+
+        assert calls == ["GET"]
+        assert {response.text for _request, response in responses} == {"page 1"}
+
+    @pytest.mark.asyncio
+    async def test_stale_entries_are_served_while_refreshing(
+        self, app_name, monkeypatch
+    ):
+        now = [1000.0]
+        monkeypatch.setattr("sanic_redis.response_cache.time.time", lambda: now[0])
+        app, calls = build_app(app_name, ttl=10, stale_ttl=30)
+
+        await app.asgi_client.get("/page")
+        now[0] += 15
+        _, stale = await app.asgi_client.get("/page")
+
+        assert stale.headers["x-cache"] == "STALE"
+        assert stale.text == "page 1"
+
+        lock_key = "sanic-redis:response:/page:lock"
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if len(calls) == 2 and lock_key not in app.ctx.redis.data:
+                break
+        _, fresh = await app.asgi_client.get("/page")
+
+        assert calls == ["GET", "GET"]
+        assert fresh.headers["x-cache"] == "HIT"
+        assert fresh.text == "page 2"
+
+    @pytest.mark.asyncio
+    async def test_unsafe_methods_and_error_statuses_are_not_cached(self, app_name):
+        app, calls = build_app(app_name)
+
+        await app.asgi_client.post("/page")
+        await app.asgi_client.post("/page")
+        _, first = await app.asgi_client.get("/missing")
+        _, second = await app.asgi_client.get("/missing")
+
+        assert calls == ["POST", "POST", "missing", "missing"]
+        assert first.status_code == second.status_code == 404
+        assert "x-cache" not in second.headers
+        assert app.ctx.redis.data == {}
+
+    @pytest.mark.asyncio
+    async def test_credentialed_requests_bypass_the_cache(self, app_name):
+        app, calls = build_app(app_name)
+
+        await app.asgi_client.get("/page", headers={"authorization": "Bearer a"})
+        _, response = await app.asgi_client.get("/page", headers={"cookie": "s=b"})
+
+        assert calls == ["GET", "GET"]
+        assert response.text == "page 2"
+        assert "x-cache" not in response.headers
+        assert app.ctx.redis.data == {}
+
+    @pytest.mark.asyncio
+    async def test_credentialed_requests_can_opt_in(self, app_name):
+        app, calls = build_app(
+            app_name,
+            cache_credentialed=True,
+            key=lambda request: request.headers["authorization"],
+        )
+
+        _, first = await app.asgi_client.get("/page", headers={"authorization": "a"})
+        _, second = await app.asgi_client.get("/page", headers={"authorization": "b"})
+        _, again = await app.asgi_client.get("/page", headers={"authorization": "a"})
+
+        assert calls == ["GET", "GET"]
+        assert again.text == first.text == "page 1"
+        assert second.text == "page 2"
+        assert again.headers["x-cache"] == "HIT"
@@ -71,6 +71,24 @@ class TestSanicRedisUnit:
         assert redis.auto_close_connection_pool is None
         assert redis.from_url_kwargs == {}
         assert redis.ping_on_startup is False
+        assert redis.auto_pipeline is None
+        assert redis.near_cache is None
+        assert redis.loader is None
+        assert redis.cluster is False
+        assert redis.sentinel is None
+        assert redis.replicas is None
+        assert redis.warmup is None
+        assert redis.metrics is None
+        assert redis.diagnostics is None
+        assert redis.serializer is None
+        assert redis.scripts is None
+        assert redis.pubsub is None
+        assert redis.breaker is None
+        assert redis.share_pool is False
+        assert redis.locks is None
+        assert redis.pool_budget is None
+        assert redis.blocking_pool is None
+        assert redis.consumers == []
         assert not hasattr(redis, "app")
         assert not hasattr(redis, "conn")
 
@@ -180,6 +198,25 @@ class TestSanicRedisUnit:
             "auto_close_connection_pool",
             "from_url_kwargs",
             "ping_on_startup",
+            "auto_pipeline",
+            "near_cache",
+            "loader",
+            "cluster",
+            "sentinel",
+            "replicas",
+            "warmup",
+            "metrics",
+            "diagnostics",
+            "serializer",
+            "scripts",
+            "pubsub",
+            "breaker",
+            "share_pool",
+            "locks",
+            "pool_budget",
+            "blocking_pool",
+            "consumers",
+            "consumer",
             "init_app",
         ):
             assert hasattr(redis, attr)
@@ -0,0 +1,216 @@
+"""
+Tests for keyspace scan iterators.
+"""
+
+import asyncio
+
+import pytest
+from redis.asyncio import from_url
+from redis.asyncio.cluster import RedisCluster
+from redis.exceptions import ResponseError
+
+from sanic_redis import (
+    ScanOptions,
+    hscan_batches,
+    inspect_keys,
+    scan_batches,
+    sscan_batches,
+    zscan_batches,
+)
+from sanic_redis.scan import _AdaptiveCount
+
+
+class FakeNode:
+    def __init__(self, name, pages):
+        self.name = name
+        self.pages = pages
+
+
+@pytest.fixture
+def cluster_client(monkeypatch):
+    client = RedisCluster(host="localhost", port=7000)
+    nodes = [
+        FakeNode("a:1", [["a1", "a2"], ["a3"]]),
+        FakeNode("b:1", [["b1"], [], ["b2"]]),
+    ]
+    client.counts = []
+
+    async def scan(cursor, match=None, count=None, _type=None, target_nodes=None):
+        client.counts.append((target_nodes.name, cursor, count))
+        await asyncio.sleep(0)
+        pages = target_nodes.pages
+        following = cursor + 1 if cursor + 1 < len(pages) else 0
+        if isinstance(pages[cursor], Exception):
+            raise pages[cursor]
+        return {target_nodes.name: following}, pages[cursor]
+
+    monkeypatch.setattr(client, "get_primaries", lambda: nodes)
+    monkeypatch.setattr(client, "scan", scan)
+    return client
+
+
+class TestScanOptions:
+    def test_validates_arguments(self):
+        with pytest.raises(ValueError, match="min_count"):
+            ScanOptions(min_count=0)
+        with pytest.raises(ValueError, match="count"):
+            ScanOptions(count=5, min_count=10)
+        with pytest.raises(ValueError, match="target_latency"):
+            ScanOptions(target_latency=0)
+        with pytest.raises(ValueError, match="queue_size"):
+            ScanOptions(queue_size=0)
+
+    def test_count_adapts_to_the_target_latency(self):
+        count = _AdaptiveCount(
+            ScanOptions(count=100, min_count=10, max_count=300, target_latency=0.01)
+        )
+
+        count.update(0.001)
+        assert count.value == 200
+        count.update(0.001)
+        assert count.value == 300
+        count.update(0.007)
+        assert count.value == 300
+        count.update(0.03)
+        assert count.value == 100
+        count.update(10)
+        assert count.value == 10
+
+
+class TestClusterScan:
+    @pytest.mark.asyncio
+    async def test_primaries_are_scanned_concurrently(self, cluster_client):
+        batches = [batch async for batch in scan_batches(cluster_client)]
+
+        assert sorted(key for batch in batches for key in batch) == [
+            "a1",
+            "a2",
+            "a3",
+            "b1",
+            "b2",
+        ]
+        assert [] not in batches
+        # Both nodes were asked before either finished.
+        assert {name for name, _cursor, _count in cluster_client.counts[:2]} == {
+            "a:1",
+            "b:1",
+        }
+
+    @pytest.mark.asyncio
+    async def test_node_errors_reach_the_consumer(self, cluster_client):
+        cluster_client.get_primaries()[1].pages = [["b1"], ResponseError("busy")]
+
+        with pytest.raises(ResponseError, match="busy"):
+            async for _batch in scan_batches(cluster_client):
+                pass
+
+    @pytest.mark.asyncio
+    async def test_closing_early_stops_the_node_scans(self, cluster_client):
+        for node in cluster_client.get_primaries():
+            node.pages = [[f"{node.name}:{i}"] for i in range(100)]
+        scan = scan_batches(cluster_client, options=ScanOptions(queue_size=1))
+
+        first = await scan.__anext__()
+        await scan.aclose()
+        calls = len(cluster_client.counts)
+        await asyncio.sleep(0.01)
+
+        assert len(first) == 1
+        assert len(cluster_client.counts) == calls < 10
+
+
+class TestScanIntegration:
+    @pytest.mark.asyncio
+    @pytest.mark.integration
+    async def test_scan_streams_matching_keys(self, redis_url, redis_key):
+        client = from_url(redis_url)
+        keys = [redis_key(f"k{i}") for i in range(50)]
+        prefix = keys[0].rsplit(":", 1)[0]
+        try:
+            await client.mset(dict.fromkeys(keys, 1))
+            await client.hset(redis_key("h"), "f", "v")
+            options = ScanOptions(count=10, min_count=10)
+            batches = [
+                batch
+                async for batch in scan_batches(
+                    client, match=f"{prefix}:k*", key_type="string", options=options
+                )
+            ]
+        finally:
+            await client.aclose()
+
+        assert len(batches) > 1
+        found = {key.decode() for batch in batches for key in batch}
+        assert found == set(keys)
+
+    @pytest.mark.asyncio
+    @pytest.mark.integration
+    async def test_collection_scans(self, redis_url, redis_key):
+        client = from_url(redis_url)
+        options = ScanOptions(count=10, min_count=10)
+        try:
+            await client.hset(redis_key("h"), mapping={f"f{i}": i for i in range(30)})
+            await client.sadd(redis_key("s"), *range(30))
+            await client.zadd(redis_key("z"), {f"m{i}": i for i in range(30)})
+            fields = [
+                pair
+                async for batch in hscan_batches(
+                    client, redis_key("h"), options=options
+                )
+                for pair in batch
+            ]
+            members = [
+                member
+                async for batch in sscan_batches(
+                    client, redis_key("s"), match="1*", options=options
+                )
+                for member in batch
+            ]
+            scored = [
+                pair
+                async for batch in zscan_batches(
+                    client, redis_key("z"), options=options
+                )
+                for pair in batch
+            ]
+        finally:
+            await client.aclose()
+
+        assert dict(fields) == {f"f{i}".encode(): str(i).encode() for i in range(30)}
+        assert sorted(members) == sorted(
+            str(i).encode() for i in range(30) if str(i)[0] == "1"
+        )
+        assert sorted(scored, key=lambda pair: pair[1])[:2] == [
+            (b"m0", 0.0),
+            (b"m1", 1.0),
+        ]
+        assert len(scored) == 30
+
+    @pytest.mark.asyncio
+    @pytest.mark.integration
+    async def test_inspect_keys_pipelines_follow_up_commands(
+        self, redis_url, redis_key
+    ):
+        client = from_url(redis_url)
+        text, hash_key = redis_key("text"), redis_key("hash")
+        prefix = text.rsplit(":", 1)[0]
+        try:
+            await client.set(text, "v", ex=100)
+            await client.hset(hash_key, "f", "v")
+            rows = [
+                row
+                async for batch in inspect_keys(
+                    client, scan_batches(client, match=f"{prefix}:*"), "TYPE", "TTL"
+                )
+                for row in batch
+            ]
+        finally:
+            await client.aclose()
+
+        assert sorted(rows) == sorted(
+            [(text.encode(), b"string", 100), (hash_key.encode(), b"hash", -1)]
+        )
+
+    def test_inspect_keys_needs_a_command(self):
+        with pytest.raises(ValueError, match="command"):
+            inspect_keys(None, scan_batches(None))  # type: ignore[arg-type]
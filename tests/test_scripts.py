@@ -0,0 +1,133 @@
+"""
+Tests for the Lua script registry.
+"""
+
+import hashlib
+
+import pytest
+from redis.asyncio import Redis
+from redis.exceptions import NoScriptError, ResponseError
+from sanic import Sanic
+
+import sanic_redis.core as core
+from sanic_redis import SanicRedis, ScriptRegistry
+
+from .test_sanic_redis import get_listener
+
+INCR_CAPPED = """
+local value = redis.call('INCR', KEYS[1])
+if value > tonumber(ARGV[1]) then
+    redis.call('SET', KEYS[1], ARGV[1])
+    return tonumber(ARGV[1])
+end
+return value
+"""
+
+
+def sha(source):
+    return hashlib.sha1(source.encode()).hexdigest()
+
+
+class ScriptServer:
+    """Record script commands sent through a redis.asyncio client."""
+
+    def __init__(self, client, cached=()):
+        self.cache = set(cached)
+        self.calls = []
+        client.script_load = self.script_load
+        client.evalsha = self.evalsha
+
+    async def script_load(self, source):
+        if "syntax error" in source:
+            raise ResponseError("Error compiling script")
+        self.calls.append(("SCRIPT LOAD", sha(source)))
+        self.cache.add(sha(source))
+        return sha(source)
+
+    async def evalsha(self, digest, numkeys, *args):
+        self.calls.append(("EVALSHA", digest, numkeys, *args))
+        if digest not in self.cache:
+            raise NoScriptError("NOSCRIPT No matching script.")
+        return 1
+
+
+class TestScriptRegistry:
+    def test_rejects_conflicting_sources_for_a_name(self):
+        registry = ScriptRegistry({"incr_capped": INCR_CAPPED})
+
+        assert registry.register("incr_capped", INCR_CAPPED) == "incr_capped"
+        with pytest.raises(ValueError, match="incr_capped"):
+            registry.register("incr_capped", "return 1")
+
+    @pytest.mark.asyncio
+    async def test_calls_use_evalsha_and_reload_on_noscript(self):
+        client = Redis()
+        server = ScriptServer(client)
+        scripts = ScriptRegistry({"incr_capped": INCR_CAPPED}).bind(client)
+
+        assert await scripts.call("incr_capped", keys=["hits"], args=[10]) == 1
+        assert server.calls == [
+            ("EVALSHA", sha(INCR_CAPPED), 1, "hits", 10),
+            ("SCRIPT LOAD", sha(INCR_CAPPED)),
+            ("EVALSHA", sha(INCR_CAPPED), 1, "hits", 10),
+        ]
+
+        server.calls.clear()
+        assert await scripts["incr_capped"](keys=["hits"], args=[10]) == 1
+        assert server.calls == [("EVALSHA", sha(INCR_CAPPED), 1, "hits", 10)]
+        assert "incr_capped" in scripts
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_load_sends_every_script(self):
+        client = Redis()
+        server = ScriptServer(client)
+        registry = ScriptRegistry({"a": "return 1", "b": "return 2"})
+
+        await registry.bind(client).load()
+
+        assert sorted(server.calls) == sorted(
+            [("SCRIPT LOAD", sha("return 1")), ("SCRIPT LOAD", sha("return 2"))]
+        )
+        await client.aclose()
+
+
+class TestSanicRedisScripts:
+    @pytest.mark.asyncio
+    async def test_startup_preloads_scripts(self, app_name, redis_url, monkeypatch):
+        client = Redis()
+        server = ScriptServer(client)
+        monkeypatch.setattr(core, "from_url", lambda url, **kwargs: client)
+        registry = ScriptRegistry()
+        registry.register("incr_capped", INCR_CAPPED)
+
+        app = Sanic(app_name)
+        SanicRedis(app, redis_url=redis_url, scripts=registry)
+
+        await get_listener(app, "before_server_start")(app)
+
+        assert server.calls == [("SCRIPT LOAD", sha(INCR_CAPPED))]
+        assert await app.ctx.redis_scripts.call("incr_capped", ["k"], [3]) == 1
+        assert server.calls[-1] == ("EVALSHA", sha(INCR_CAPPED), 1, "k", 3)
+
+        await get_listener(app, "after_server_stop")(app)
+
+        assert not hasattr(app.ctx, "redis_scripts")
+
+    @pytest.mark.asyncio
+    async def test_broken_script_fails_startup(self, app_name, redis_url, monkeypatch):
+        client = Redis()
+        ScriptServer(client)
+        monkeypatch.setattr(core, "from_url", lambda url, **kwargs: client)
+
+        app = Sanic(app_name)
+        SanicRedis(
+            app,
+            redis_url=redis_url,
+            scripts=ScriptRegistry({"broken": "syntax error"}),
+        )
+
+        with pytest.raises(ResponseError, match="compiling"):
+            await get_listener(app, "before_server_start")(app)
+
+        assert not hasattr(app.ctx, "redis")
@@ -0,0 +1,214 @@
+"""
+Tests for Sentinel support.
+"""
+
+import asyncio
+from urllib.parse import urlsplit
+
+import pytest
+from redis.asyncio.sentinel import Sentinel
+from redis.exceptions import ConnectionError
+from sanic import Sanic
+
+import sanic_redis.core as core
+from sanic_redis import SanicRedis, SentinelFailover, SentinelOptions
+
+from .test_sanic_redis import FakeRedis, get_listener
+
+
+def sentinel_options(**options):
+    return SentinelOptions(
+        service_name="mymaster",
+        sentinels=(("sentinel-1", 26379), ("sentinel-2", 26379)),
+        **options,
+    )
+
+
+class FakeFailover:
+    instances = []
+
+    def __init__(self, options, connection_kwargs, single_connection_client=False):
+        self.options = options
+        self.connection_kwargs = connection_kwargs
+        self.single_connection_client = single_connection_client
+        self.master = FakeRedis()
+        self.replica = FakeRedis() if options.replicas else None
+        self.started = False
+        self.closed = False
+        FakeFailover.instances.append(self)
+
+    def start(self):
+        self.started = True
+
+    async def aclose(self):
+        self.closed = True
+
+
+class LostCancelPubSub:
+    def __init__(self):
+        self.reads = 0
+        self.closed = False
+
+    async def subscribe(self, channel):
+        pass
+
+    async def get_message(self, timeout=0.0):
+        self.reads += 1
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            # Like asyncio.wait_for on Python 3.10 and 3.11 when the reply
+            # arrives together with the cancellation.
+            return None
+
+    async def aclose(self):
+        self.closed = True
+
+
+class TestSentinelFailover:
+    def test_options_require_sentinels(self):
+        with pytest.raises(ValueError, match="sentinels"):
+            SentinelOptions(service_name="mymaster", sentinels=())
+
+    def test_builds_master_and_replica_clients(self):
+        failover = SentinelFailover(
+            sentinel_options(replicas=True), {"decode_responses": True}
+        )
+
+        assert failover.master.connection_pool.service_name == "mymaster"
+        assert failover.replica is not None
+        assert failover.replica.connection_pool.is_master is False
+        assert len(failover.sentinel.sentinels) == 2
+
+    def test_parses_switch_master_messages_for_its_service(self):
+        failover = SentinelFailover(sentinel_options(), {})
+
+        assert failover._parse_switch(
+            {"type": "message", "data": b"mymaster 10.0.0.1 6379 10.0.0.2 6380"}
+        ) == ("10.0.0.2", 6380)
+        assert (
+            failover._parse_switch(
+                {"type": "message", "data": "other 10.0.0.1 6379 10.0.0.2 6380"}
+            )
+            is None
+        )
+        assert failover._parse_switch({"type": "subscribe", "data": 1}) is None
+
+    @pytest.mark.asyncio
+    async def test_switch_drops_connections_and_measures_recovery(self, monkeypatch):
+        failover = SentinelFailover(sentinel_options(recovery_interval=0.001), {})
+        disconnects = []
+        pings = []
+
+        async def disconnect(inuse_connections=True):
+            disconnects.append(inuse_connections)
+
+        async def ping():
+            pings.append(True)
+            if len(pings) < 3:
+                raise ConnectionError("master is moving")
+            return True
+
+        monkeypatch.setattr(failover.master.connection_pool, "disconnect", disconnect)
+        monkeypatch.setattr(failover.master, "ping", ping)
+
+        await failover.handle_switch(("10.0.0.2", 6380))
+
+        stats = failover.stats()
+        assert disconnects == [True]
+        assert len(pings) == 3
+        assert stats["failovers"] == 1
+        assert stats["master_address"] == ("10.0.0.2", 6380)
+        assert stats["last_recovery_time"] is not None
+        assert stats["last_recovery_time"] >= 0
+
+    @pytest.mark.asyncio
+    async def test_aclose_stops_a_watch_that_swallows_the_cancel(self):
+        failover = SentinelFailover(sentinel_options(), {})
+        pubsubs = []
+
+        def pubsub():
+            pubsubs.append(LostCancelPubSub())
+            return pubsubs[-1]
+
+        for sentinel in failover.sentinel.sentinels:
+            sentinel.pubsub = pubsub
+        failover.start()
+        await asyncio.sleep(0.01)
+
+        await asyncio.wait_for(failover.aclose(), 1)
+
+        assert len(pubsubs) == 1
+        assert pubsubs[0].reads == 1
+        assert pubsubs[0].closed is True
+
+
+class TestSanicRedisSentinel:
+    @pytest.mark.asyncio
+    async def test_sentinel_mode_registers_master_without_url(
+        self, app_name, monkeypatch
+    ):
+        FakeFailover.instances.clear()
+        monkeypatch.setattr(core, "SentinelFailover", FakeFailover)
+
+        app = Sanic(app_name)
+        redis = SanicRedis(
+            sentinel=sentinel_options(replicas=True),
+            from_url_kwargs={"decode_responses": True},
+            ping_on_startup=True,
+        )
+        redis.init_app(app)
+
+        await get_listener(app, "before_server_start")(app)
+
+        (failover,) = FakeFailover.instances
+        assert failover.connection_kwargs == {"decode_responses": True}
+        assert failover.single_connection_client is False
+        assert failover.started is True
+        assert failover.master.pinged is True
+        assert app.ctx.redis is failover.master
+        assert app.ctx.redis_replica is failover.replica
+        assert app.ctx.redis_sentinel is failover
+
+        await get_listener(app, "after_server_stop")(app)
+
+        assert failover.closed is True
+        assert failover.master.closed is True
+        assert failover.replica.closed is True
+        assert not hasattr(app.ctx, "redis_sentinel")
+        assert not hasattr(app.ctx, "redis_replica")
+
+    @pytest.mark.asyncio
+    @pytest.mark.integration
+    @pytest.mark.parametrize("single_connection_client", [False, True])
+    async def test_master_client_runs_commands(
+        self, app_name, redis_url, redis_key, monkeypatch, single_connection_client
+    ):
+        address = urlsplit(redis_url)
+
+        async def discover_master(sentinel, service_name):
+            return address.hostname, address.port
+
+        monkeypatch.setattr(Sentinel, "discover_master", discover_master)
+        app = Sanic(app_name)
+        SanicRedis(
+            app,
+            sentinel=sentinel_options(),
+            single_connection_client=single_connection_client,
+            ping_on_startup=True,
+        )
+
+        await get_listener(app, "before_server_start")(app)
+        try:
+            client = app.ctx.redis
+            assert client.single_connection_client is single_connection_client
+            await client.set(redis_key("sentinel"), "v")
+            assert await client.get(redis_key("sentinel")) == b"v"
+        finally:
+            await get_listener(app, "after_server_stop")(app)
+
+    def test_sentinel_and_cluster_are_exclusive(self, app_name):
+        with pytest.raises(ValueError, match="mutually exclusive"):
+            SanicRedis(cluster=True, sentinel=sentinel_options()).init_app(
+                Sanic(app_name)
+            )
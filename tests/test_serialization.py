@@ -0,0 +1,167 @@
+"""
+Tests for typed value serialization.
+"""
+
+import sys
+import zlib
+
+import pytest
+from sanic import Sanic
+
+import sanic_redis.core as core
+from sanic_redis import SanicRedis, Serializer, SerializerOptions
+
+from .test_sanic_redis import FakeRedis, get_listener
+
+
+class FakeStore(FakeRedis):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, **options):
+        self.data[key] = value
+        return True
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    async def mset(self, mapping):
+        self.data.update(mapping)
+        return True
+
+    async def hget(self, name, key):
+        return self.data.get(name, {}).get(key)
+
+    async def hset(self, name, mapping):
+        self.data.setdefault(name, {}).update(mapping)
+        return len(mapping)
+
+    async def hgetall(self, name):
+        return dict(self.data.get(name, {}))
+
+
+class ReverseCodec:
+    def encode(self, value):
+        return value.encode()[::-1]
+
+    def decode(self, data):
+        return data.tobytes()[::-1].decode()
+
+
+def serializer(**options):
+    return Serializer(FakeStore(), SerializerOptions(**options))
+
+
+class TestSerializer:
+    def test_options_validate_names(self):
+        with pytest.raises(ValueError, match="codec"):
+            SerializerOptions(codec="yaml")
+        with pytest.raises(ValueError, match="compression"):
+            SerializerOptions(compression="brotli")
+
+    def test_defaults_to_json(self):
+        values = serializer()
+
+        assert SerializerOptions().codec == "json"
+        assert values.encode({"a": [1]}) == b'\x00{"a":[1]}'
+
+    @pytest.mark.parametrize(
+        ("codec", "value"),
+        [
+            ("json", {"a": [1, 2.5, None], "b": "text"}),
+            ("pickle", {"a": [1, 2.5, None], "b": (1, 2)}),
+            ("orjson", {"a": [1, 2.5, None], "b": "text"}),
+            ("raw", b"\x00\x01bytes"),
+        ],
+    )
+    def test_codecs_round_trip(self, codec, value):
+        if codec == "orjson":
+            pytest.importorskip("orjson")
+        values = serializer(codec=codec)
+
+        encoded = values.encode(value)
+
+        assert encoded[0] == 0
+        assert values.decode(encoded) == value
+
+    def test_compresses_large_values_behind_a_header_byte(self):
+        values = serializer(codec="raw", compression="zlib", compress_threshold=64)
+
+        small = values.encode(b"x" * 10)
+        large = values.encode(b"x" * 1000)
+
+        assert small == b"\x00" + b"x" * 10
+        assert large[0] == 1
+        assert len(large) < 100
+        assert zlib.decompress(large[1:]) == b"x" * 1000
+        assert values.decode(large) == b"x" * 1000
+        assert values.decode(memoryview(bytearray(large))) == b"x" * 1000
+
+    def test_keeps_incompressible_values_uncompressed(self):
+        values = serializer(codec="raw", compression="zlib", compress_threshold=0)
+        noise = bytes(range(256))
+
+        assert values.encode(noise)[0] == 0
+
+    def test_reads_values_written_with_another_compression_setting(self):
+        writer = serializer(codec="raw", compression="zlib", compress_threshold=0)
+        reader = serializer(codec="raw")
+
+        assert reader.decode(writer.encode(b"y" * 500)) == b"y" * 500
+        with pytest.raises(ValueError, match="header byte 9"):
+            reader.decode(b"\x09data")
+
+    def test_custom_codec(self):
+        values = serializer(codec=ReverseCodec())
+
+        assert values.encode("abc") == b"\x00cba"
+        assert values.decode(b"\x00cba") == "abc"
+
+    def test_missing_optional_dependency_names_the_extra(self, monkeypatch):
+        monkeypatch.setitem(sys.modules, "msgpack", None)
+
+        with pytest.raises(ImportError, match=r"sanic-redis\[msgpack\]"):
+            serializer(codec="msgpack")
+
+    @pytest.mark.asyncio
+    async def test_client_helpers_encode_and_decode(self):
+        values = serializer(compression="zlib", compress_threshold=16)
+
+        await values.set("user:1", {"name": "a" * 100})
+        await values.mset({"a": 1, "b": [2]})
+        await values.hset("h", {"f": {"x": 1}})
+
+        assert await values.get("user:1") == {"name": "a" * 100}
+        assert await values.get("missing", default=0) == 0
+        assert await values.mget(["a", "b", "missing"]) == [1, [2], None]
+        assert await values.hget("h", "f") == {"x": 1}
+        assert await values.hgetall("h") == {"f": {"x": 1}}
+
+
+class TestSanicRedisSerializer:
+    @pytest.mark.asyncio
+    async def test_registers_serializer_on_ctx(self, app_name, redis_url, monkeypatch):
+        client = FakeStore()
+        monkeypatch.setattr(core, "from_url", lambda url, **kwargs: client)
+
+        app = Sanic(app_name)
+        SanicRedis(app, redis_url=redis_url, serializer=True)
+
+        await get_listener(app, "before_server_start")(app)
+
+        assert isinstance(app.ctx.redis_serializer, Serializer)
+        assert app.ctx.redis_serializer.client is client
+
+        await get_listener(app, "after_server_stop")(app)
+
+        assert not hasattr(app.ctx, "redis_serializer")
+
+    def test_rejects_decode_responses(self, app_name):
+        with pytest.raises(ValueError, match="decode_responses"):
+            SanicRedis(
+                serializer=True, from_url_kwargs={"decode_responses": True}
+            ).init_app(Sanic(app_name))
@@ -0,0 +1,376 @@
+"""
+Tests for the Redis session store.
+"""
+
+import json
+
+import pytest
+from redis.asyncio import from_url
+from sanic import Sanic
+from sanic.response import HTTPResponse, text
+
+import sanic_redis.core as core
+from sanic_redis import RedisSessions, SanicRedis, Session
+
+from .test_sanic_redis import FakeRedis
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.queued = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+    def set(self, key, value, px=None):
+        self.queued.append(("SET", key, value, px))
+
+    def hset(self, key, mapping):
+        self.queued.append(("HSET", key, mapping))
+
+    def hdel(self, key, *fields):
+        self.queued.append(("HDEL", key, *sorted(fields)))
+
+    def pexpire(self, key, ttl_ms):
+        self.queued.append(("PEXPIRE", key, ttl_ms))
+
+    async def execute(self):
+        self.client.calls.extend(self.queued)
+        for command, key, *args in self.queued:
+            if command == "SET":
+                self.client.strings[key] = args[0]
+            elif command == "HSET":
+                self.client.hashes.setdefault(key, {}).update(args[0])
+            elif command == "HDEL":
+                for field in args:
+                    self.client.hashes.get(key, {}).pop(field, None)
+        return [True] * len(self.queued)
+
+
+class FakeSessionRedis(FakeRedis):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.hashes = {}
+        self.strings = {}
+        self.calls = []
+
+    def pipeline(self, transaction=True):
+        assert transaction
+        return FakePipeline(self)
+
+    async def hgetall(self, key):
+        self.calls.append(("HGETALL", key))
+        return {
+            name.encode(): value.encode()
+            for name, value in self.hashes.get(key, {}).items()
+        }
+
+    async def get(self, key):
+        self.calls.append(("GET", key))
+        return self.strings.get(key)
+
+    async def pexpire(self, key, ttl_ms):
+        self.calls.append(("PEXPIRE", key, ttl_ms))
+        return key in self.hashes or key in self.strings
+
+    async def exists(self, key):
+        self.calls.append(("EXISTS", key))
+        return int(key in self.hashes or key in self.strings)
+
+    async def delete(self, key):
+        self.calls.append(("DEL", key))
+        self.hashes.pop(key, None)
+        self.strings.pop(key, None)
+
+
+class TestRedisSessions:
+    def test_validates_arguments(self):
+        with pytest.raises(ValueError, match="ttl"):
+            RedisSessions(ttl=0)
+        with pytest.raises(ValueError, match="refresh_interval"):
+            RedisSessions(refresh_interval=-1)
+        assert RedisSessions(ttl=60).refresh_interval == 30
+        with pytest.raises(ValueError, match="storage"):
+            RedisSessions(storage="json")  # type: ignore[arg-type]
+
+    @pytest.mark.asyncio
+    async def test_untouched_new_session_costs_nothing(self):
+        client = FakeSessionRedis()
+        store = RedisSessions()
+        response = HTTPResponse()
+
+        await store.save(Session(store, client, None), response)
+
+        assert client.calls == []
+        assert "set-cookie" not in response.headers
+
+    @pytest.mark.asyncio
+    async def test_reads_require_await_and_load_once(self):
+        client = FakeSessionRedis()
+        client.hashes["s:abc"] = {"user": json.dumps(7)}
+        session = Session(RedisSessions(prefix="s:"), client, "abc")
+
+        with pytest.raises(RuntimeError, match="await"):
+            session["user"]
+        assert (await session)["user"] == 7
+        await session
+
+        assert client.calls == [("HGETALL", "s:abc")]
+
+    @pytest.mark.asyncio
+    async def test_hash_storage_writes_only_changed_fields(self):
+        client = FakeSessionRedis()
+        client.hashes["s:abc"] = {"user": "7", "cart": "[]", "theme": '"dark"'}
+        store = RedisSessions(prefix="s:", ttl=60)
+        session = await Session(store, client, "abc")
+
+        session["cart"] = [1]
+        del session["theme"]
+        client.calls.clear()
+        await store.save(session, HTTPResponse())
+
+        assert client.calls == [
+            ("HDEL", "s:abc", "theme"),
+            ("HSET", "s:abc", {"cart": "[1]"}),
+            ("PEXPIRE", "s:abc", 60_000),
+        ]
+        assert client.hashes["s:abc"] == {"user": "7", "cart": "[1]"}
+        assert session.modified is False
+
+    @pytest.mark.asyncio
+    async def test_hash_storage_writes_without_loading(self):
+        client = FakeSessionRedis()
+        client.hashes["s:abc"] = {"user": "7"}
+        store = RedisSessions(prefix="s:")
+        session = Session(store, client, "abc")
+
+        session["seen"] = True
+        await store.save(session, HTTPResponse())
+
+        assert ("HGETALL", "s:abc") not in client.calls
+        assert client.hashes["s:abc"] == {"user": "7", "seen": "true"}
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("storage", ["hash", "string"])
+    async def test_unknown_sid_gets_a_fresh_id(self, storage):
+        client = FakeSessionRedis()
+        store = RedisSessions(prefix="s:", storage=storage)
+        session = await Session(store, client, "planted")
+        response = HTTPResponse()
+
+        assert session.is_new
+        session["user"] = 7
+        await store.save(session, response)
+
+        assert session.sid not in (None, "planted")
+        assert "s:planted" not in client.hashes
+        assert "s:planted" not in client.strings
+        cookie = response.cookies.get_cookie("session")
+        assert cookie is not None
+        assert cookie.value == session.sid
+
+    @pytest.mark.asyncio
+    async def test_unknown_sid_written_without_loading_gets_a_fresh_id(self):
+        client = FakeSessionRedis()
+        store = RedisSessions(prefix="s:")
+        session = Session(store, client, "planted")
+
+        session["user"] = 7
+        await store.save(session, HTTPResponse())
+
+        assert ("EXISTS", "s:planted") in client.calls
+        assert client.hashes == {f"s:{session.sid}": {"user": "7"}}
+        assert session.sid != "planted"
+
+    @pytest.mark.asyncio
+    async def test_pending_changes_apply_over_loaded_data(self):
+        client = FakeSessionRedis()
+        client.hashes["s:abc"] = {"user": "7", "cart": "[]"}
+        session = Session(RedisSessions(prefix="s:"), client, "abc")
+
+        session["user"] = 8
+        del session["cart"]
+
+        assert dict(await session) == {"user": 8}
+
+    @pytest.mark.asyncio
+    async def test_string_storage_writes_the_whole_session(self):
+        client = FakeSessionRedis()
+        client.strings["s:abc"] = json.dumps({"user": 7})
+        store = RedisSessions(prefix="s:", storage="string", ttl=60)
+        session = Session(store, client, "abc")
+
+        with pytest.raises(RuntimeError, match="await"):
+            session["user"] = 8
+        (await session)["user"] = 8
+        await store.save(session, HTTPResponse())
+
+        assert client.calls[-1] == ("SET", "s:abc", '{"user": 8}', 60_000)
+
+    @pytest.mark.asyncio
+    async def test_new_session_gets_a_cookie(self):
+        client = FakeSessionRedis()
+        store = RedisSessions(prefix="s:", ttl=60)
+        session = Session(store, client, None)
+        response = HTTPResponse()
+
+        session["user"] = 7
+        await store.save(session, response)
+
+        assert session.sid is not None
+        assert client.hashes == {f"s:{session.sid}": {"user": "7"}}
+        cookie = response.cookies.get_cookie("session")
+        assert cookie is not None
+        assert cookie.value == session.sid
+        assert cookie.max_age == 60
+        assert cookie.httponly and cookie.secure
+
+    @pytest.mark.asyncio
+    async def test_unchanged_sessions_refresh_ttl_once_per_interval(self):
+        client = FakeSessionRedis()
+        client.hashes["s:abc"] = {"user": "7"}
+        store = RedisSessions(prefix="s:", ttl=60, refresh_interval=30)
+
+        for _ in range(3):
+            await store.save(await Session(store, client, "abc"), HTTPResponse())
+
+        assert client.calls.count(("PEXPIRE", "s:abc", 60_000)) == 1
+
+        store._refreshed["abc"] -= 30
+        await store.save(Session(store, client, "abc"), HTTPResponse())
+
+        assert client.calls.count(("PEXPIRE", "s:abc", 60_000)) == 2
+
+    @pytest.mark.asyncio
+    async def test_expired_session_drops_its_cookie(self):
+        client = FakeSessionRedis()
+        store = RedisSessions(prefix="s:")
+        response = HTTPResponse()
+
+        await store.save(Session(store, client, "gone"), response)
+
+        cookie = response.cookies.get_cookie("session")
+        assert cookie is not None
+        assert cookie.max_age == 0
+        assert "gone" not in store._refreshed
+
+    @pytest.mark.asyncio
+    async def test_invalidate_deletes_the_session(self):
+        client = FakeSessionRedis()
+        client.hashes["s:abc"] = {"user": "7"}
+        store = RedisSessions(prefix="s:")
+        session = Session(store, client, "abc")
+        response = HTTPResponse()
+
+        session.invalidate()
+        await store.save(session, response)
+
+        assert client.calls == [("DEL", "s:abc")]
+        assert client.hashes == {}
+        cookie = response.cookies.get_cookie("session")
+        assert cookie is not None
+        assert cookie.max_age == 0
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("storage", ["hash", "string"])
+    async def test_regenerate_moves_the_data_to_a_new_id(self, storage):
+        client = FakeSessionRedis()
+        client.hashes["s:abc"] = {"cart": "[1]"}
+        client.strings["s:abc"] = json.dumps({"cart": [1]})
+        store = RedisSessions(prefix="s:", storage=storage)
+        session = Session(store, client, "abc")
+        response = HTTPResponse()
+
+        await session.regenerate()
+        session["user"] = 7
+        await store.save(session, response)
+
+        assert session.sid not in (None, "abc")
+        assert ("DEL", "s:abc") in client.calls
+        assert "s:abc" not in client.hashes and "s:abc" not in client.strings
+        assert dict(await Session(store, client, session.sid)) == {
+            "cart": [1],
+            "user": 7,
+        }
+        cookie = response.cookies.get_cookie("session")
+        assert cookie is not None
+        assert cookie.value == session.sid
+
+    @pytest.mark.asyncio
+    async def test_invalidate_after_regenerate_drops_the_old_session(self):
+        client = FakeSessionRedis()
+        client.hashes["s:abc"] = {"user": "7"}
+        store = RedisSessions(prefix="s:")
+        session = Session(store, client, "abc")
+        response = HTTPResponse()
+
+        await session.regenerate()
+        session.invalidate()
+        await store.save(session, response)
+
+        assert client.hashes == {}
+        cookie = response.cookies.get_cookie("session")
+        assert cookie is not None
+        assert cookie.max_age == 0
+
+
+class TestRedisSessionsMiddleware:
+    @pytest.mark.asyncio
+    async def test_middleware_round_trips_the_session(
+        self, app_name, redis_url, monkeypatch
+    ):
+        client = FakeSessionRedis()
+        monkeypatch.setattr(core, "from_url", lambda url, **kwargs: client)
+
+        app = Sanic(app_name)
+        SanicRedis(app, redis_url=redis_url)
+        RedisSessions(prefix="s:").install(app)
+
+        @app.post("/login")
+        async def login(request):
+            request.ctx.session["user"] = "ada"
+            return text("ok")
+
+        @app.get("/me")
+        async def me(request):
+            session = await request.ctx.session
+            return text(session.get("user", "anonymous"))
+
+        _, anonymous = await app.asgi_client.get("/me")
+        _, login_response = await app.asgi_client.post(
+            "/login", headers={"cookie": "session=planted"}
+        )
+        sid = login_response.cookies["session"]
+        _, me_response = await app.asgi_client.get(
+            "/me", headers={"cookie": f"session={sid}"}
+        )
+
+        assert anonymous.text == "anonymous"
+        assert sid != "planted"
+        assert client.hashes == {f"s:{sid}": {"user": '"ada"'}}
+        assert me_response.text == "ada"
+
+
+class TestRedisSessionsServer:
+    @pytest.mark.asyncio
+    @pytest.mark.integration
+    @pytest.mark.parametrize("storage", ["hash", "string"])
+    async def test_sessions_round_trip(self, redis_url, redis_key, storage):
+        client = from_url(redis_url)
+        store = RedisSessions(prefix=redis_key("session"), storage=storage, ttl=5)
+        try:
+            session = Session(store, client, None)
+            session["user"] = 7
+            await store.save(session, HTTPResponse())
+            loaded = await Session(store, client, session.sid)
+            ttl = await client.pttl(store.prefix + str(session.sid))
+            await client.delete(store.prefix + str(session.sid))
+        finally:
+            await client.aclose()
+
+        assert dict(loaded) == {"user": 7}
+        assert 0 < ttl <= 5000
@@ -0,0 +1,148 @@
+"""
+Tests for connection pools shared between databases.
+"""
+
+import pytest
+from redis.asyncio import Connection
+from redis.exceptions import ResponseError
+from sanic import Sanic
+
+from sanic_redis import DatabasePool, SanicRedis
+from sanic_redis.shared_pool import _shared_pools, shared_client
+
+from .test_sanic_redis import get_listeners
+
+
+class FakeConnection(Connection):
+    sent: list = []
+    select_reply = b"OK"
+
+    async def connect(self):
+        pass
+
+    async def can_read(self, timeout=0):
+        return False
+
+    async def disconnect(self, *args, **kwargs):
+        self.disconnected = True
+
+    async def send_command(self, *args, **kwargs):
+        self.sent.append((self.db, args))
+
+    async def read_response(self, *args, **kwargs):
+        if self.sent[-1][1][0] == "SELECT":
+            return self.select_reply
+        return b"value"
+
+
+@pytest.fixture(autouse=True)
+def fake_connections(monkeypatch):
+    monkeypatch.setattr(FakeConnection, "sent", [])
+    yield
+    _shared_pools.clear()
+
+
+def client(db):
+    return shared_client(
+        f"redis://localhost:6379/{db}", connection_class=FakeConnection
+    )
+
+
+class TestSharedPool:
+    @pytest.mark.asyncio
+    async def test_databases_of_one_server_share_a_pool(self):
+        first, second = client(1), client(2)
+        other = shared_client(
+            "redis://localhost:6380/1", connection_class=FakeConnection
+        )
+
+        assert isinstance(first.connection_pool, DatabasePool)
+        assert first.connection_pool.pool is second.connection_pool.pool
+        assert first.connection_pool.pool is not other.connection_pool.pool
+        assert second.connection_pool.connection_kwargs["db"] == 2
+        assert len(_shared_pools) == 2
+
+    @pytest.mark.asyncio
+    async def test_select_is_sent_only_when_switching_databases(self):
+        first, second = client(1), client(2)
+
+        assert await first.get("k") == b"value"
+        assert await second.get("k") == b"value"
+        assert await second.get("k") == b"value"
+        assert await first.get("k") == b"value"
+
+        assert FakeConnection.sent == [
+            (1, ("GET", "k")),
+            (1, ("SELECT", 2)),
+            (2, ("GET", "k")),
+            (2, ("GET", "k")),
+            (2, ("SELECT", 1)),
+            (1, ("GET", "k")),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_failed_select_does_not_reuse_the_connection(self, monkeypatch):
+        first, second = client(1), client(2)
+        await first.get("k")
+        monkeypatch.setattr(FakeConnection, "select_reply", b"ERR")
+
+        with pytest.raises(ResponseError, match="SELECT 2"):
+            await second.get("k")
+
+        pool = first.connection_pool.pool
+        assert len(pool._in_use_connections) == 0
+        assert [c.db for c in pool._available_connections] == [1]
+
+    @pytest.mark.asyncio
+    async def test_last_client_closes_the_shared_pool(self):
+        first, second = client(1), client(2)
+        await first.get("k")
+        pool = first.connection_pool.pool
+
+        await first.aclose()
+        await first.aclose()
+        (connection,) = pool._available_connections
+        assert len(_shared_pools) == 1
+        assert not hasattr(connection, "disconnected")
+
+        await second.aclose()
+        assert _shared_pools == {}
+        assert connection.disconnected is True
+
+
+class TestSanicRedisSharedPool:
+    @pytest.mark.asyncio
+    async def test_instances_share_a_pool_for_the_app_lifetime(self, app_name):
+        app = Sanic(app_name)
+        app.config.REDIS_CACHE = "redis://localhost:6379/1"
+        app.config.REDIS_QUEUE = "redis://localhost:6379/2"
+        for name in ("cache", "queue"):
+            SanicRedis(
+                app,
+                config_name=f"REDIS_{name.upper()}",
+                ctx_name=name,
+                share_pool=True,
+            )
+
+        for listener in get_listeners(app, "before_server_start"):
+            await listener(app)
+        cache, queue = app.ctx.cache, app.ctx.queue
+
+        assert cache.connection_pool.pool is queue.connection_pool.pool
+        assert (cache.connection_pool.db, queue.connection_pool.db) == (1, 2)
+
+        for listener in get_listeners(app, "after_server_stop"):
+            await listener(app)
+        assert _shared_pools == {}
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [{"cluster": True}, {"auto_close_connection_pool": False}],
+    )
+    def test_share_pool_rejects_unsupported_modes(self, app_name, kwargs):
+        app = Sanic(app_name)
+
+        with pytest.raises(ValueError, match="share_pool"):
+            SanicRedis(
+                app, redis_url="redis://localhost:6379/1", share_pool=True, **kwargs
+            )
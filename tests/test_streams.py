@@ -0,0 +1,346 @@
+"""
+Tests for stream consumer groups.
+"""
+
+import asyncio
+
+import pytest
+from redis.asyncio import from_url
+from redis.exceptions import ResponseError
+from sanic import Sanic
+
+import sanic_redis.core as core
+from sanic_redis import SanicRedis, StreamConsumer, StreamConsumerOptions
+
+from .test_sanic_redis import FakeRedis, get_listener
+
+
+class FakeStreamRedis(FakeRedis):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.entries = asyncio.Queue()
+        self.pending = []
+        self.groups = []
+        self.reads = []
+        self.acks = []
+        self.claims = []
+        self.ack_errors = []
+
+    def add(self, *entries):
+        for entry in entries:
+            self.entries.put_nowait(entry)
+
+    async def xgroup_create(self, name, groupname, id="$", mkstream=False):
+        if (name, groupname) in self.groups:
+            raise ResponseError("BUSYGROUP Consumer Group name already exists")
+        self.groups.append((name, groupname))
+
+    async def xreadgroup(self, groupname, consumername, streams, count, block):
+        self.reads.append(count)
+        (stream,) = streams
+        try:
+            first = await asyncio.wait_for(self.entries.get(), block / 1000)
+        except asyncio.TimeoutError:
+            return []
+        batch = [first]
+        while len(batch) < count and not self.entries.empty():
+            batch.append(self.entries.get_nowait())
+        return [[stream.encode(), batch]]
+
+    async def xautoclaim(
+        self, name, groupname, consumername, min_idle_time, start_id, count
+    ):
+        self.claims.append((start_id, count))
+        claimed, self.pending = self.pending[:count], self.pending[count:]
+        return [b"0-0" if not self.pending else b"1-0", claimed, []]
+
+    async def xack(self, name, groupname, *ids):
+        if self.ack_errors:
+            raise self.ack_errors.pop(0)
+        self.acks.append(ids)
+        return len(ids)
+
+
+class LostCancelStreamRedis(FakeStreamRedis):
+    async def xreadgroup(self, groupname, consumername, streams, count, block):
+        self.reads.append(count)
+        try:
+            await asyncio.sleep(block / 1000)
+        except asyncio.CancelledError:
+            # Like asyncio.wait_for on Python 3.10 and 3.11 when the reply
+            # arrives together with the cancellation.
+            return []
+        return []
+
+
+def options(**kwargs):
+    kwargs.setdefault("block", 0.01)
+    kwargs.setdefault("ack_interval", 0.01)
+    kwargs.setdefault("claim_idle", None)
+    return StreamConsumerOptions(**kwargs)
+
+
+async def wait_until(condition):
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.005)
+    raise AssertionError("condition was not met")
+
+
+class TestStreamConsumer:
+    def test_options_are_validated(self):
+        with pytest.raises(ValueError, match="batch_size"):
+            StreamConsumerOptions(batch_size=0)
+        with pytest.raises(ValueError, match="concurrency"):
+            StreamConsumerOptions(concurrency=0)
+        with pytest.raises(ValueError, match="claim_idle"):
+            StreamConsumerOptions(claim_idle=0)
+
+    @pytest.mark.asyncio
+    async def test_entries_are_handled_and_acked_in_batches(self):
+        client = FakeStreamRedis()
+        handled = []
+
+        async def handler(message):
+            handled.append((message.stream, message.id, message.fields))
+
+        consumer = StreamConsumer(
+            client,  # type: ignore[arg-type]
+            "jobs",
+            "workers",
+            handler,
+            options(consumer="c1", ack_batch_size=3),
+        )
+        client.add(*((f"{i}-0".encode(), {b"n": str(i).encode()}) for i in range(3)))
+        consumer.start()
+        await wait_until(lambda: consumer.acked == 3)
+        await consumer.aclose()
+
+        assert client.groups == [("jobs", "workers")]
+        assert handled[0] == ("jobs", b"0-0", {b"n": b"0"})
+        assert client.acks == [(b"0-0", b"1-0", b"2-0")]
+        assert consumer.stats()["processed"] == 3
+
+    @pytest.mark.asyncio
+    async def test_reads_never_exceed_free_handler_slots(self):
+        client = FakeStreamRedis()
+        release = asyncio.Event()
+        running = []
+
+        async def handler(message):
+            running.append(message.id)
+            await release.wait()
+
+        consumer = StreamConsumer(
+            client,  # type: ignore[arg-type]
+            "jobs",
+            "workers",
+            handler,
+            options(concurrency=2, batch_size=10),
+        )
+        client.add(*((f"{i}-0".encode(), {}) for i in range(3)))
+        consumer.start()
+        await wait_until(lambda: len(running) == 2)
+        await asyncio.sleep(0.03)
+
+        assert len(running) == 2
+        assert client.reads[0] == 2
+
+        release.set()
+        await wait_until(lambda: consumer.acked == 3)
+        await consumer.aclose()
+
+    @pytest.mark.asyncio
+    async def test_failed_entries_stay_pending(self):
+        client = FakeStreamRedis()
+
+        async def handler(message):
+            if message.id == b"1-0":
+                raise RuntimeError("boom")
+
+        consumer = StreamConsumer(
+            client,  # type: ignore[arg-type]
+            "jobs",
+            "workers",
+            handler,
+            options(),
+        )
+        client.add((b"0-0", {}), (b"1-0", {}))
+        consumer.start()
+        await wait_until(lambda: consumer.failed == 1 and consumer.acked == 1)
+        await consumer.aclose()
+
+        assert client.acks == [(b"0-0",)]
+
+    @pytest.mark.asyncio
+    async def test_stale_pending_entries_are_reclaimed(self):
+        client = FakeStreamRedis()
+        client.pending = [(b"5-0", {b"retry": b"1"}), (b"6-0", None)]
+        handled = []
+
+        async def handler(message):
+            handled.append(message.id)
+
+        consumer = StreamConsumer(
+            client,  # type: ignore[arg-type]
+            "jobs",
+            "workers",
+            handler,
+            options(claim_idle=30, batch_size=1),
+        )
+        consumer.start()
+        await wait_until(lambda: consumer.acked == 2)
+        await consumer.aclose()
+
+        assert handled == [b"5-0"]
+        assert client.claims == [("0-0", 1), (b"1-0", 1)]
+        assert consumer.claimed == 1
+
+    @pytest.mark.asyncio
+    async def test_aclose_drains_running_handlers(self):
+        client = FakeStreamRedis()
+        finished = []
+
+        async def handler(message):
+            await asyncio.sleep(0.02)
+            finished.append(message.id)
+
+        consumer = StreamConsumer(
+            client,  # type: ignore[arg-type]
+            "jobs",
+            "workers",
+            handler,
+            options(ack_interval=10),
+        )
+        client.add((b"0-0", {}))
+        consumer.start()
+        await wait_until(lambda: consumer.stats()["in_flight"] == 1)
+
+        await consumer.aclose()
+
+        assert finished == [b"0-0"]
+        assert client.acks == [(b"0-0",)]
+
+    @pytest.mark.asyncio
+    async def test_aclose_cancels_handlers_after_drain_timeout(self):
+        client = FakeStreamRedis()
+
+        async def handler(message):
+            await asyncio.sleep(10)
+
+        consumer = StreamConsumer(
+            client,  # type: ignore[arg-type]
+            "jobs",
+            "workers",
+            handler,
+            options(drain_timeout=0.01),
+        )
+        client.add((b"0-0", {}))
+        consumer.start()
+        await wait_until(lambda: consumer.stats()["in_flight"] == 1)
+
+        await consumer.aclose()
+
+        assert consumer.stats()["in_flight"] == 0
+        assert client.acks == []
+
+    @pytest.mark.asyncio
+    async def test_aclose_stops_a_read_that_swallows_the_cancel(self):
+        client = LostCancelStreamRedis()
+        consumer = StreamConsumer(
+            client,  # type: ignore[arg-type]
+            "jobs",
+            "workers",
+            handler=lambda message: asyncio.sleep(0),
+            options=options(block=10),
+        )
+        consumer.start()
+        await wait_until(lambda: client.reads)
+
+        await asyncio.wait_for(consumer.aclose(), 2)
+
+        assert client.reads == [16]
+
+    @pytest.mark.asyncio
+    async def test_acker_survives_xack_errors(self):
+        client = FakeStreamRedis()
+        client.ack_errors = [ResponseError("NOGROUP No such consumer group")]
+        handled = []
+
+        async def handler(message):
+            handled.append(message.id)
+
+        consumer = StreamConsumer(
+            client,  # type: ignore[arg-type]
+            "jobs",
+            "workers",
+            handler,
+            options(),
+        )
+        consumer.start()
+        client.add((b"0-0", {}))
+        await wait_until(lambda: not client.ack_errors)
+        client.add((b"1-0", {}))
+        await wait_until(lambda: client.acks)
+        await consumer.aclose()
+
+        assert handled == [b"0-0", b"1-0"]
+        assert client.acks == [(b"1-0",)]
+
+
+class TestSanicRedisConsumers:
+    @pytest.mark.asyncio
+    async def test_consumers_follow_the_app_lifecycle(
+        self, app_name, redis_url, monkeypatch
+    ):
+        client = FakeStreamRedis()
+        monkeypatch.setattr(core, "from_url", lambda url, **kwargs: client)
+        handled = []
+
+        app = Sanic(app_name)
+        redis = SanicRedis(app, redis_url=redis_url)
+
+        @redis.consumer("jobs", "workers", options(consumer="c1"))
+        async def handle_job(message):
+            handled.append(message.id)
+
+        await get_listener(app, "before_server_start")(app)
+        assert client.groups == []
+
+        client.add((b"0-0", {}))
+        await get_listener(app, "after_server_start")(app)
+        await wait_until(lambda: handled == [b"0-0"])
+        await get_listener(app, "after_server_stop")(app)
+
+        assert client.groups == [("jobs", "workers")]
+        assert client.acks == [(b"0-0",)]
+        assert client.closed is True
+
+    @pytest.mark.asyncio
+    @pytest.mark.integration
+    async def test_consumer_reads_and_acks_from_redis(self, redis_url, redis_key):
+        client = from_url(redis_url)
+        stream = redis_key("stream")
+        handled = []
+
+        async def handler(message):
+            handled.append(message.fields)
+
+        consumer = StreamConsumer(
+            client, stream, "workers", handler, options(consumer="c1")
+        )
+        try:
+            consumer.start()
+            await wait_until(lambda: consumer._acker is not None)
+            await asyncio.sleep(0.05)
+            await client.xadd(stream, {"n": "1"})
+            await wait_until(lambda: consumer.acked == 1)
+            await consumer.aclose()
+            pending = await client.xpending(stream, "workers")
+            await client.delete(stream)
+        finally:
+            await client.aclose()
+
+        assert handled == [{b"n": b"1"}]
+        assert pending["pending"] == 0
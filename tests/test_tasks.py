@@ -0,0 +1,42 @@
+"""
+Tests for background task helpers.
+"""
+
+import asyncio
+
+import pytest
+
+from sanic_redis.tasks import stop_task
+
+
+class TestStopTask:
+    @pytest.mark.asyncio
+    async def test_cancels_again_until_the_task_is_done(self):
+        cancels = []
+
+        async def stubborn():
+            while len(cancels) < 3:
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    cancels.append(True)
+
+        task = asyncio.ensure_future(stubborn())
+        await asyncio.sleep(0)
+
+        await stop_task(task, retry_interval=0.001)
+
+        assert task.done()
+        assert len(cancels) == 3
+
+    @pytest.mark.asyncio
+    async def test_raises_what_the_task_raised(self):
+        async def broken():
+            raise RuntimeError("boom")
+
+        task = asyncio.ensure_future(broken())
+        await asyncio.sleep(0)
+
+        with pytest.raises(RuntimeError, match="boom"):
+            await stop_task(task)
+        await stop_task(None)
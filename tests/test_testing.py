@@ -0,0 +1,189 @@
+"""
+Tests for the in-process fake Redis server.
+"""
+
+import asyncio
+
+import pytest
+from redis.asyncio import from_url
+from redis.exceptions import ResponseError, WatchError
+from sanic import Sanic
+from sanic.response import text
+
+from sanic_redis import SanicRedis
+from sanic_redis.testing import FakeRedisServer
+
+
+@pytest.fixture
+async def server():
+    async with FakeRedisServer() as server:
+        yield server
+
+
+@pytest.fixture(params=[2, 3], ids=["resp2", "resp3"])
+async def client(server, request):
+    client = from_url(server.url, protocol=request.param)
+    yield client
+    await client.aclose()
+
+
+class TestFakeRedisServer:
+    @pytest.mark.asyncio
+    async def test_strings_and_expiry(self, client):
+        assert await client.set("k", "v", ex=10) is True
+        assert await client.set("k", "w", nx=True) is None
+        assert await client.get("k") == b"v"
+        assert await client.ttl("k") == 10
+        assert await client.incrby("n", 5) == 5
+        assert await client.incrbyfloat("n", 0.5) == 5.5
+        assert await client.mget("k", "missing") == [b"v", None]
+
+        await client.pexpire("k", 1)
+        await asyncio.sleep(0.01)
+        assert await client.exists("k") == 0
+        assert await client.ttl("k") == -2
+
+    @pytest.mark.asyncio
+    async def test_hashes_lists_and_sets(self, client):
+        await client.hset("h", mapping={"a": 1, "b": 2})
+        await client.rpush("l", "a", "b", "c")
+        await client.sadd("s", "a", "b")
+
+        assert await client.hgetall("h") == {b"a": b"1", b"b": b"2"}
+        assert await client.hincrby("h", "a", 2) == 3
+        assert await client.lrange("l", 0, -1) == [b"a", b"b", b"c"]
+        assert await client.lmove("l", "l2", "LEFT", "RIGHT") == b"a"
+        assert await client.smembers("s") == {b"a", b"b"}
+        assert await client.sinter("s", "missing") == set()
+        assert await client.type("l2") == b"list"
+
+        with pytest.raises(ResponseError, match="WRONGTYPE"):
+            await client.get("h")
+
+    @pytest.mark.asyncio
+    async def test_sorted_sets(self, client):
+        await client.zadd("z", {"a": 1, "b": 2, "c": 3})
+
+        assert await client.zrange("z", 0, -1) == [b"a", b"b", b"c"]
+        assert [
+            tuple(pair) for pair in await client.zrange("z", 0, 0, withscores=True)
+        ] == [(b"a", 1.0)]
+        assert await client.zrangebyscore("z", "(1", "+inf") == [b"b", b"c"]
+        assert await client.zincrby("z", 5, "a") == 6.0
+        assert await client.zrevrank("z", "a") == 0
+        assert [tuple(pair) for pair in await client.zpopmin("z", 1)] == [(b"b", 2.0)]
+
+    @pytest.mark.asyncio
+    async def test_blocking_pop_waits_for_a_push(self, server, client):
+        other = from_url(server.url)
+        waiter = asyncio.ensure_future(client.blpop(["queue"], timeout=2))
+        await asyncio.sleep(0.05)
+        await other.rpush("queue", "job")
+        await other.aclose()
+
+        assert tuple(await waiter) == (b"queue", b"job")
+        assert await client.blpop(["queue"], timeout=0.05) is None
+
+    @pytest.mark.asyncio
+    async def test_pipelines_and_transactions(self, server, client):
+        async with client.pipeline() as pipe:
+            pipe.set("k", 1).incr("k").get("k")
+            assert await pipe.execute() == [True, 2, b"2"]
+
+        other = from_url(server.url)
+        async with client.pipeline() as pipe:
+            await pipe.watch("k")
+            await other.set("k", "changed")
+            pipe.multi()
+            pipe.set("k", "mine")
+            with pytest.raises(WatchError):
+                await pipe.execute()
+        await other.aclose()
+        assert await client.get("k") == b"changed"
+
+    @pytest.mark.asyncio
+    async def test_scan_visits_every_key_once(self, client):
+        await client.mset({f"key:{i}": i for i in range(25)})
+        await client.set("other", 1)
+
+        keys = [key async for key in client.scan_iter(match="key:*", count=7)]
+
+        assert sorted(keys) == sorted(f"key:{i}".encode() for i in range(25))
+
+    @pytest.mark.asyncio
+    async def test_pubsub_delivers_channel_and_pattern_messages(self, client):
+        pubsub = client.pubsub()
+        await pubsub.subscribe("news")
+        await pubsub.psubscribe("n*")
+        for _ in range(2):
+            await pubsub.get_message(timeout=1)
+
+        assert await client.publish("news", "hi") == 2
+        first = await pubsub.get_message(timeout=1)
+        second = await pubsub.get_message(timeout=1)
+        await pubsub.aclose()
+
+        assert (first["type"], first["data"]) == ("message", b"hi")
+        assert (second["type"], second["pattern"]) == ("pmessage", b"n*")
+
+    @pytest.mark.asyncio
+    async def test_stream_consumer_groups(self, client):
+        await client.xgroup_create("s", "g", id="0", mkstream=True)
+        entry = await client.xadd("s", {"f": "v"})
+
+        read = await client.xreadgroup("g", "c1", {"s": ">"}, count=10)
+        pending = await client.xpending("s", "g")
+        claimed = await client.xautoclaim("s", "g", "c2", min_idle_time=0)
+        acked = await client.xack("s", "g", entry)
+
+        entries = read[b"s"][0] if isinstance(read, dict) else read[0][1]
+        assert entries == [(entry, {b"f": b"v"})]
+        assert pending["pending"] == 1
+        assert claimed[1] == [(entry, {b"f": b"v"})]
+        assert acked == 1
+        with pytest.raises(ResponseError, match="BUSYGROUP"):
+            await client.xgroup_create("s", "g")
+
+    @pytest.mark.asyncio
+    async def test_databases_are_isolated(self, server):
+        first = from_url(f"{server.url}/1")
+        second = from_url(f"{server.url}/2")
+        await first.set("k", "one")
+
+        assert await second.get("k") is None
+        assert await first.dbsize() == 1
+        await first.aclose()
+        await second.aclose()
+
+    @pytest.mark.asyncio
+    async def test_unsupported_commands_reply_with_errors(self, client):
+        with pytest.raises(ResponseError, match="unknown command 'EVAL'"):
+            await client.eval("return 1", 0)
+        with pytest.raises(ResponseError, match="wrong number of arguments"):
+            await client.execute_command("GET")
+
+    def test_runs_on_a_background_thread(self):
+        async def roundtrip(url):
+            client = from_url(url)
+            await client.set("k", "v")
+            value = await client.get("k")
+            await client.aclose()
+            return value
+
+        with FakeRedisServer() as server:
+            assert asyncio.run(roundtrip(server.url)) == b"v"
+
+    @pytest.mark.asyncio
+    async def test_sanic_redis_can_point_at_the_server(self, server, app_name):
+        app = Sanic(app_name)
+        app.config.REDIS = server.url
+        SanicRedis(app)
+
+        @app.get("/")
+        async def handler(request):
+            await request.app.ctx.redis.set("visits", 1)
+            return text((await request.app.ctx.redis.get("visits")).decode())
+
+        _, response = await app.asgi_client.get("/")
+
+        assert response.text == "1"
@@ -0,0 +1,176 @@
+"""
+Tests for connection pool pre-warming.
+"""
+
+import asyncio
+
+import pytest
+from redis.exceptions import ConnectionError
+from sanic import Sanic
+
+import sanic_redis.core as core
+from sanic_redis import SanicRedis, WarmupOptions
+from sanic_redis.warmup import warm_pool
+
+from .test_sanic_redis import FakeRedis, get_listener
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+        self.disconnected = False
+
+    async def send_command(self, *args):
+        self.pool.commands.append(args)
+
+    async def read_response(self):
+        if self.pool.delay:
+            await asyncio.sleep(self.pool.delay)
+        self.pool.opening -= 1
+        if self.pool.error:
+            raise self.pool.error
+        return b"PONG"
+
+    async def disconnect(self):
+        self.disconnected = True
+
+
+class FakePool:
+    def __init__(self, max_connections=100, delay=0, error=None):
+        self.max_connections = max_connections
+        self.delay = delay
+        self.error = error
+        self.commands = []
+        self.in_use = 0
+        self.opening = 0
+        self.peak_opening = 0
+        self.created = []
+        self.released = []
+
+    async def get_connection(self):
+        self.in_use += 1
+        self.opening += 1
+        self.peak_opening = max(self.peak_opening, self.opening)
+        await asyncio.sleep(0)
+        connection = FakeConnection(self)
+        self.created.append(connection)
+        return connection
+
+    async def release(self, connection):
+        self.in_use -= 1
+        self.released.append(connection)
+
+
+class FakePooledRedis(FakeRedis):
+    def __init__(self, pool=None, **kwargs):
+        super().__init__(**kwargs)
+        self.connection_pool = pool or FakePool()
+        self.single_connection_client = False
+
+
+class TestWarmPool:
+    def test_options_validate_counts(self):
+        with pytest.raises(ValueError, match="connections"):
+            WarmupOptions(connections=0)
+        with pytest.raises(ValueError, match="concurrency"):
+            WarmupOptions(concurrency=0)
+
+    @pytest.mark.asyncio
+    async def test_opens_distinct_connections_with_bounded_concurrency(self):
+        pool = FakePool(delay=0.001)
+        client = FakePooledRedis(pool)
+
+        warmed = await warm_pool(
+            client,  # type: ignore[arg-type]
+            WarmupOptions(connections=6, concurrency=2),
+        )
+
+        assert warmed == 6
+        assert len(pool.created) == 6
+        assert pool.commands == [("PING",)] * 6
+        assert pool.peak_opening == 2
+        assert sorted(map(id, pool.released)) == sorted(map(id, pool.created))
+        assert pool.in_use == 0
+
+    @pytest.mark.asyncio
+    async def test_caps_connections_at_pool_size(self):
+        pool = FakePool(max_connections=3)
+
+        warmed = await warm_pool(
+            FakePooledRedis(pool),  # type: ignore[arg-type]
+            WarmupOptions(connections=10),
+        )
+
+        assert warmed == 3
+
+    @pytest.mark.asyncio
+    async def test_timeout_continues_without_pending_connections(self, caplog):
+        pool = FakePool(delay=1)
+
+        warmed = await warm_pool(
+            FakePooledRedis(pool),  # type: ignore[arg-type]
+            WarmupOptions(connections=2, timeout=0.01),
+        )
+
+        assert warmed == 0
+        assert pool.in_use == 0
+        assert all(connection.disconnected for connection in pool.created)
+        assert "pool warm-up timed out" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_connection_errors_propagate_after_release(self):
+        pool = FakePool(error=ConnectionError("refused"))
+
+        with pytest.raises(ConnectionError, match="refused"):
+            await warm_pool(
+                FakePooledRedis(pool),  # type: ignore[arg-type]
+                WarmupOptions(connections=2),
+            )
+
+        assert pool.in_use == 0
+
+    @pytest.mark.asyncio
+    async def test_single_connection_client_is_pinged(self):
+        client = FakePooledRedis()
+        client.single_connection_client = True
+
+        assert await warm_pool(client, WarmupOptions()) == 1  # type: ignore[arg-type]
+        assert client.pinged is True
+        assert client.connection_pool.created == []
+
+
+class TestSanicRedisWarmup:
+    @pytest.mark.asyncio
+    async def test_startup_warms_pool_before_registering_client(
+        self, app_name, redis_url, monkeypatch
+    ):
+        client = FakePooledRedis()
+        monkeypatch.setattr(core, "from_url", lambda url, **kwargs: client)
+
+        app = Sanic(app_name)
+        redis = SanicRedis(warmup=WarmupOptions(connections=4))
+        redis.init_app(app, redis_url=redis_url)
+
+        await get_listener(app, "before_server_start")(app)
+
+        assert len(client.connection_pool.created) == 4
+        assert client.pinged is False
+        assert app.ctx.redis is client
+
+    @pytest.mark.asyncio
+    async def test_failed_warmup_closes_client(self, app_name, redis_url, monkeypatch):
+        client = FakePooledRedis(FakePool(error=ConnectionError("refused")))
+        monkeypatch.setattr(core, "from_url", lambda url, **kwargs: client)
+
+        app = Sanic(app_name)
+        SanicRedis(app, redis_url=redis_url, warmup=True)
+
+        with pytest.raises(ConnectionError):
+            await get_listener(app, "before_server_start")(app)
+
+        assert client.closed is True
+        assert not hasattr(app.ctx, "redis")
+
+    def test_warmup_is_rejected_in_cluster_mode(self, app_name):
+        with pytest.raises(ValueError, match="warmup"):
+            SanicRedis(cluster=True, warmup=True).init_app(Sanic(app_name))